@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serviço de AVATARES da lista de contatos
+Fotos de perfil ficam em um LRU de pixmaps já recortados em círculo (memória)
+e em um cache em disco chaveado pelo hash da URL, com validade. Downloads
+passam por um pool pequeno compartilhado e pedidos iguais são agrupados
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from PyQt6.QtGui import QBrush, QImage, QPainter, QPixmap, QTransform
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".whatsapp_chat", "avatars")
+DISK_TTL = 7 * 24 * 3600  # Fotos em disco valem uma semana
+FAILURE_TTL = 10 * 60  # URLs que falharam não são tentadas de novo por 10 min
+MEMORY_ENTRIES = 300  # Pixmaps mantidos em memória (52x52 ≈ 11 KB cada)
+DOWNLOAD_WORKERS = 3  # Downloads simultâneos no máximo
+DOWNLOAD_TIMEOUT = 5
+
+AvatarKey = Tuple[str, int]
+
+
+def _circular_image(data: bytes, size: int) -> Optional[QImage]:
+    """
+    Decodifica, redimensiona e recorta em círculo.
+    Usa QImage (e não QPixmap) para poder rodar fora da thread da interface.
+    """
+    image = QImage()
+    if not image.loadFromData(data) or image.isNull():
+        return None
+
+    scaled = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
+                          Qt.TransformationMode.SmoothTransformation)
+
+    circular = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+    circular.fill(Qt.GlobalColor.transparent)
+
+    # Centraliza o recorte quando a foto não é quadrada
+    brush = QBrush(scaled)
+    brush.setTransform(QTransform.fromTranslate(-(scaled.width() - size) / 2,
+                                                -(scaled.height() - size) / 2))
+
+    painter = QPainter(circular)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setBrush(brush)
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.drawEllipse(0, 0, size, size)
+    painter.end()
+
+    return circular
+
+
+class AvatarService(QObject):
+    """
+    Serviço único de fotos de perfil da aplicação.
+    - cached_pixmap(): consulta só a memória (pintura instantânea)
+    - request_avatar(): memória → disco → rede, sem repetir downloads em andamento
+    - O callback recebe o QPixmap pronto (ou None em caso de falha) na thread da interface
+    """
+
+    _image_ready = pyqtSignal(object, object)  # (url, tamanho), QImage ou None
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: int = MEMORY_ENTRIES,
+                 disk_ttl: int = DISK_TTL, workers: int = DOWNLOAD_WORKERS):
+        super().__init__()
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.disk_ttl = disk_ttl
+
+        self._pixmaps: "OrderedDict[AvatarKey, QPixmap]" = OrderedDict()
+        self._pending: Dict[AvatarKey, List[Callable]] = {}
+        self._failures: Dict[str, float] = {}
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="avatars")
+        self._local = threading.local()
+        self._image_ready.connect(self._on_image_ready)
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "downloads": 0, "coalesced": 0, "failures": 0}
+
+        self._executor.submit(self._purge_expired)
+
+    # ---------- consulta ----------
+
+    def cached_pixmap(self, url: str, size: int = 52) -> Optional[QPixmap]:
+        """Pixmap já pronto em memória, ou None"""
+        key = (url, size)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def request_avatar(self, url: str, size: int = 52, callback: Callable = None) -> Optional[QPixmap]:
+        """
+        Retorna o pixmap imediatamente se estiver em memória. Caso contrário
+        agenda o carregamento e chama `callback(pixmap_ou_None)` quando terminar.
+        Vários pedidos da mesma URL enquanto o primeiro está em andamento
+        compartilham o mesmo download.
+        """
+        if not url or not url.startswith("http"):
+            return None
+
+        pixmap = self.cached_pixmap(url, size)
+        if pixmap is not None:
+            self.stats["memory_hits"] += 1
+            return pixmap
+
+        failed_at = self._failures.get(url)
+        if failed_at and time.time() - failed_at < FAILURE_TTL:
+            return None
+
+        key = (url, size)
+        waiting = self._pending.get(key)
+        if waiting is not None:
+            self.stats["coalesced"] += 1
+            if callback:
+                waiting.append(callback)
+            return None
+
+        self._pending[key] = [callback] if callback else []
+        self._executor.submit(self._load, key)
+        return None
+
+    def cancel(self, url: str, size: int = 52, callback: Callable = None):
+        """Remove um callback pendente (o download continua para os demais)"""
+        waiting = self._pending.get((url, size))
+        if waiting and callback in waiting:
+            waiting.remove(callback)
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def is_pending(self, url: str, size: int = 52) -> bool:
+        """True se há carregamento em andamento para a URL (o callback pedido será chamado)"""
+        return (url, size) in self._pending
+
+    def clear_memory(self):
+        self._pixmaps.clear()
+
+    # ---------- pool de trabalho (fora da interface) ----------
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests
+
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def _cache_path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".img")
+
+    def _read_disk(self, url: str) -> Optional[bytes]:
+        path = self._cache_path(url)
+        try:
+            if time.time() - os.path.getmtime(path) > self.disk_ttl:
+                return None
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, url: str, data: bytes):
+        path = self._cache_path(url)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar avatar em disco: {e}")
+
+    def _load(self, key: AvatarKey):
+        url, size = key
+        image = None
+        try:
+            data = self._read_disk(url)
+            if data is not None:
+                self.stats["disk_hits"] += 1
+            else:
+                response = self._session().get(url, timeout=DOWNLOAD_TIMEOUT)
+                if response.status_code == 200 and response.content:
+                    data = response.content
+                    self.stats["downloads"] += 1
+                    self._write_disk(url, data)
+
+            if data:
+                image = _circular_image(data, size)
+        except Exception as e:
+            print(f"Erro ao carregar imagem: {e}")
+
+        self._image_ready.emit(key, image)
+
+    def _purge_expired(self):
+        """Apaga do disco fotos vencidas (roda uma vez, no pool)"""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+
+        limit = time.time() - self.disk_ttl
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if os.path.getmtime(path) < limit:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    # ---------- entrega (thread da interface) ----------
+
+    def _on_image_ready(self, key: AvatarKey, image: Optional[QImage]):
+        callbacks = self._pending.pop(key, [])
+
+        pixmap = None
+        if image is not None and not image.isNull():
+            pixmap = QPixmap.fromImage(image)
+            self._pixmaps[key] = pixmap
+            self._pixmaps.move_to_end(key)
+            while len(self._pixmaps) > self.max_entries:
+                self._pixmaps.popitem(last=False)
+            self._failures.pop(key[0], None)
+        else:
+            self.stats["failures"] += 1
+            self._failures[key[0]] = time.time()
+
+        for callback in callbacks:
+            try:
+                callback(pixmap)
+            except RuntimeError:
+                # Widget destruído antes do download terminar (lista recarregada)
+                pass
+            except Exception as e:
+                print(f"Erro ao aplicar avatar: {e}")
+
+    def shutdown(self):
+        self._pending.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_service_instance: Optional[AvatarService] = None
+
+
+def get_avatar_service() -> AvatarService:
+    """Retorna a instância compartilhada (criada na primeira chamada, na thread da interface)"""
+    global _service_instance
+
+    if _service_instance is None:
+        _service_instance = AvatarService()
+
+    return _service_instance
@@ -11,11 +11,11 @@ from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional, Any
 from contextlib import contextmanager
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy import func, desc, and_, or_, text
+from sqlalchemy import func, desc, and_, or_, text, select
 
 # Importar modelos atualizados
 from backend.banco.models_updated import (
-    WebhookEvent, Chat, Sender, MessageContent, MessageStats, ContactStats, RealTimeStats,
+    WebhookEvent, Chat, Sender, MessageContent, MessageStats, ContactStats, RealTimeStats, ChatMessageIndex,
     init_database, create_database_engine, create_session_factory
 )
 
@@ -31,6 +31,7 @@ class WhatsAppDatabaseManager:
         """Inicializa o gerenciador do banco"""
         self.db_path = db_path
         self.engine, self.Session = init_database(db_path)
+        self._sync_chat_message_index()
         logger.info(f"✅ Banco de dados inicializado: {db_path}")
 
     @contextmanager
@@ -107,6 +108,11 @@ class WhatsAppDatabaseManager:
                     )
                     session.add(sender)
 
+                # Índice (conversa, momento) para a paginação do histórico
+                chat_key = self.chat_key_for_message(webhook_data)
+                if chat_key:
+                    session.add(ChatMessageIndex(event_id=event.id, chat_key=chat_key, moment=event.moment))
+
                 # Salvar conteúdo da mensagem
                 msg_content = webhook_data.get('msgContent', {})
                 if msg_content:
@@ -458,28 +464,168 @@ class WhatsAppDatabaseManager:
                 for event, sender, content in query:
                     # Buscar mídias associadas
                     medias = session.query(MessageMedia).filter_by(event_id=event.id).all()
-
-                    message_data = json.loads(event.raw_json)
-                    message_data['_db_info'] = {
-                        'id': event.id,
-                        'message_type': content.message_type if content else 'unknown',
-                        'sender_name': sender.push_name if sender else 'Unknown',
-                        'saved_at': event.created_at.isoformat(),
-                        'media_files': [{
-                            'path': media.media_path,
-                            'type': media.media_type,
-                            'mimetype': media.mimetype,
-                            'file_size': media.file_size,
-                            'download_status': media.download_status
-                        } for media in medias if media.media_path]  # Só incluir se tem path
-                    }
-                    results.append(message_data)
+                    results.append(self._event_to_message_dict(event, sender, content, medias))
 
                 return results
         except Exception as e:
             logger.error(f"❌ Erro ao buscar mensagens: {e}")
             return []
 
+    @staticmethod
+    def _event_to_message_dict(event, sender, content, medias) -> Dict:
+        """JSON original do webhook + _db_info (formato de get_recent_messages)"""
+        message_data = json.loads(event.raw_json)
+        message_data['_db_info'] = {
+            'id': event.id,
+            'message_type': content.message_type if content else 'unknown',
+            'sender_name': sender.push_name if sender else 'Unknown',
+            'saved_at': event.created_at.isoformat(),
+            'media_files': [{
+                'path': media.media_path,
+                'type': media.media_type,
+                'mimetype': media.mimetype,
+                'file_size': media.file_size,
+                'download_status': media.download_status
+            } for media in medias if media.media_path]  # Só incluir se tem path
+        }
+        return message_data
+
+    # ========== HISTÓRICO POR CONVERSA (PAGINAÇÃO KEYSET) ==========
+
+    @staticmethod
+    def chat_key_for_message(webhook_data: Dict) -> str:
+        """
+        Conversa a que a mensagem pertence (mesma regra da interface): grupos e
+        mensagens enviadas usam chat.id; recebidas em conversa individual, sender.id
+        """
+        if webhook_data.get('isGroup', False) or webhook_data.get('fromMe', False):
+            return (webhook_data.get('chat') or {}).get('id', '')
+        return (webhook_data.get('sender') or {}).get('id', '')
+
+    def _sync_chat_message_index(self) -> int:
+        """Indexa eventos gravados antes da tabela existir (só os posteriores ao último indexado)"""
+        try:
+            with self.get_session() as session:
+                result = session.execute(text("""
+                    INSERT OR IGNORE INTO chat_message_index (event_id, chat_key, moment)
+                    SELECT e.id,
+                           CASE WHEN e.is_group = 1 OR e.from_me = 1 THEN c.chat_id ELSE s.sender_id END,
+                           e.moment
+                    FROM webhook_events e
+                    LEFT JOIN chats c ON c.event_id = e.id
+                    LEFT JOIN senders s ON s.event_id = e.id
+                    WHERE e.id > (SELECT COALESCE(MAX(event_id), 0) FROM chat_message_index)
+                      AND (CASE WHEN e.is_group = 1 OR e.from_me = 1 THEN c.chat_id ELSE s.sender_id END) <> ''
+                """))
+                indexed = result.rowcount or 0
+                if indexed > 0:
+                    logger.info(f"📇 {indexed} mensagens adicionadas ao índice de conversas")
+                return indexed
+        except Exception as e:
+            logger.error(f"❌ Erro ao sincronizar índice de conversas: {e}")
+            return 0
+
+    def get_chat_messages_before(self, chat_key: str, before_moment: int, limit: int = 20,
+                                 before_message_id: str = None) -> List[Dict]:
+        """
+        Página de mensagens de uma conversa anteriores ao cursor, da mais nova
+        para a mais antiga. Keyset em (chat_key, moment, event_id): custo
+        proporcional ao tamanho da página, não ao histórico.
+
+        Args:
+            chat_key: ID do contato/grupo.
+            before_moment: Timestamp unix da mensagem mais antiga já exibida.
+            limit: Tamanho da página.
+            before_message_id: messageId dessa mensagem; desempata mensagens no mesmo segundo.
+        """
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import MessageMedia
+
+                cursor_filter = ChatMessageIndex.moment < before_moment
+                if before_message_id:
+                    cursor_event = session.query(WebhookEvent.id, WebhookEvent.moment) \
+                        .filter(WebhookEvent.message_id == before_message_id).first()
+                    if cursor_event:
+                        cursor_filter = or_(
+                            ChatMessageIndex.moment < cursor_event.moment,
+                            and_(ChatMessageIndex.moment == cursor_event.moment,
+                                 ChatMessageIndex.event_id < cursor_event.id)
+                        )
+
+                page = session.query(ChatMessageIndex.event_id) \
+                    .filter(ChatMessageIndex.chat_key == chat_key, cursor_filter) \
+                    .order_by(desc(ChatMessageIndex.moment), desc(ChatMessageIndex.event_id)) \
+                    .limit(limit) \
+                    .all()
+                event_ids = [row.event_id for row in page]
+                if not event_ids:
+                    return []
+
+                rows = session.query(WebhookEvent, Sender, MessageContent) \
+                    .outerjoin(Sender, WebhookEvent.id == Sender.event_id) \
+                    .outerjoin(MessageContent, WebhookEvent.id == MessageContent.event_id) \
+                    .filter(WebhookEvent.id.in_(event_ids)) \
+                    .all()
+
+                medias_by_event = {}
+                for media in session.query(MessageMedia).filter(MessageMedia.event_id.in_(event_ids)):
+                    medias_by_event.setdefault(media.event_id, []).append(media)
+
+                by_id = {
+                    event.id: self._event_to_message_dict(event, sender, content, medias_by_event.get(event.id, []))
+                    for event, sender, content in rows
+                }
+                return [by_id[event_id] for event_id in event_ids if event_id in by_id]
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao paginar mensagens de {chat_key}: {e}")
+            return []
+
+    def get_chat_directory(self) -> List[Dict]:
+        """
+        Todas as conversas do banco, da mais recente para a mais antiga, com o
+        total de mensagens e o JSON da última. Agrupa o índice de conversas
+        (sem varrer webhook_events) e decodifica só uma mensagem por conversa.
+        """
+        try:
+            with self.get_session() as session:
+                summary = session.query(
+                    ChatMessageIndex.chat_key,
+                    func.max(ChatMessageIndex.moment).label('last_moment'),
+                    func.count(ChatMessageIndex.event_id).label('total'),
+                    func.max(ChatMessageIndex.event_id).label('last_event_id')
+                ).group_by(ChatMessageIndex.chat_key) \
+                    .order_by(desc('last_moment')) \
+                    .all()
+
+                event_ids = [row.last_event_id for row in summary]
+                raw_by_event = {}
+                for start in range(0, len(event_ids), 500):
+                    chunk = event_ids[start:start + 500]
+                    for event_id, raw_json in session.query(WebhookEvent.id, WebhookEvent.raw_json) \
+                            .filter(WebhookEvent.id.in_(chunk)):
+                        raw_by_event[event_id] = raw_json
+
+                directory = []
+                for row in summary:
+                    try:
+                        last_message = json.loads(raw_by_event.get(row.last_event_id) or '{}')
+                    except ValueError:
+                        last_message = {}
+
+                    directory.append({
+                        'chat_key': row.chat_key,
+                        'last_moment': row.last_moment or 0,
+                        'total_messages': row.total,
+                        'last_message': last_message
+                    })
+                return directory
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao listar conversas: {e}")
+            return []
+
     def update_media_path(self, event_id: int, media_type: str, file_path: str) -> bool:
         """Atualiza o caminho da mídia após download bem-sucedido"""
         try:
@@ -502,6 +648,338 @@ class WhatsAppDatabaseManager:
             logger.error(f"❌ Erro ao atualizar caminho da mídia: {e}")
             return False
 
+    # ========== TRANSCRIÇÕES DE ÁUDIO ==========
+
+    def save_transcription(self, message_id: str, text: str, chat_id: str = None,
+                           confidence: float = None, engine: str = None, model_name: str = None,
+                           language: str = None, audio_seconds: int = None) -> bool:
+        """Salva (ou atualiza) a transcrição de um áudio, chaveada pelo messageId"""
+        if not message_id or not text:
+            return False
+
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import MessageTranscription
+
+                transcription = session.query(MessageTranscription).filter_by(message_id=message_id).first()
+                if not transcription:
+                    transcription = MessageTranscription(message_id=message_id)
+                    session.add(transcription)
+
+                transcription.text = text
+                transcription.chat_id = chat_id or transcription.chat_id
+                transcription.confidence = confidence
+                transcription.engine = engine
+                transcription.model_name = model_name
+                transcription.language = language
+                transcription.audio_seconds = audio_seconds
+                transcription.created_at = datetime.utcnow()
+                return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar transcrição: {e}")
+            return False
+
+    def get_transcription(self, message_id: str) -> Optional[Dict]:
+        """Retorna a transcrição salva de uma mensagem (ou None)"""
+        return self.get_transcriptions([message_id]).get(message_id)
+
+    def get_transcriptions(self, message_ids: List[str]) -> Dict[str, Dict]:
+        """Retorna transcrições de várias mensagens em uma única consulta"""
+        message_ids = [mid for mid in message_ids if mid]
+        if not message_ids:
+            return {}
+
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import MessageTranscription
+
+                results = {}
+                # SQLite limita o número de parâmetros por consulta
+                for start in range(0, len(message_ids), 500):
+                    chunk = message_ids[start:start + 500]
+                    rows = session.query(MessageTranscription) \
+                        .filter(MessageTranscription.message_id.in_(chunk)) \
+                        .all()
+
+                    for row in rows:
+                        results[row.message_id] = {
+                            'message_id': row.message_id,
+                            'chat_id': row.chat_id,
+                            'text': row.text,
+                            'confidence': row.confidence,
+                            'engine': row.engine,
+                            'model_name': row.model_name,
+                            'language': row.language,
+                            'audio_seconds': row.audio_seconds,
+                            'created_at': row.created_at.isoformat() if row.created_at else None
+                        }
+
+                return results
+        except Exception as e:
+            logger.error(f"❌ Erro ao buscar transcrições: {e}")
+            return {}
+
+    # ========== FORMAS DE ONDA DE ÁUDIO ==========
+
+    def save_waveform(self, message_id: str, levels: bytes, source: str = 'audio') -> bool:
+        """Salva (ou atualiza) os níveis da forma de onda de uma mensagem"""
+        if not message_id or not levels:
+            return False
+
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import MessageWaveform
+
+                waveform = session.query(MessageWaveform).filter_by(message_id=message_id).first()
+                if not waveform:
+                    waveform = MessageWaveform(message_id=message_id)
+                    session.add(waveform)
+
+                waveform.levels = bytes(levels)
+                waveform.bar_count = len(levels)
+                waveform.source = source
+                waveform.created_at = datetime.utcnow()
+                return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao salvar forma de onda: {e}")
+            return False
+
+    def get_waveforms(self, message_ids: List[str]) -> Dict[str, Dict]:
+        """Retorna formas de onda de várias mensagens em uma única consulta"""
+        message_ids = [mid for mid in message_ids if mid]
+        if not message_ids:
+            return {}
+
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import MessageWaveform
+
+                results = {}
+                for start in range(0, len(message_ids), 500):
+                    chunk = message_ids[start:start + 500]
+                    rows = session.query(MessageWaveform) \
+                        .filter(MessageWaveform.message_id.in_(chunk)) \
+                        .all()
+
+                    for row in rows:
+                        results[row.message_id] = {
+                            'levels': bytes(row.levels),
+                            'source': row.source
+                        }
+
+                return results
+        except Exception as e:
+            logger.error(f"❌ Erro ao buscar formas de onda: {e}")
+            return {}
+
+    # ========== FILA DE ENVIO (OUTBOX) ==========
+
+    def enqueue_outbox_message(self, message_data: Dict) -> Optional[int]:
+        """Grava uma mensagem na fila de envio e retorna o ID da fila"""
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import OutboxMessage
+
+                item = OutboxMessage(
+                    temp_id=message_data['temp_id'],
+                    chat_id=message_data['contact_id'],
+                    message_type=message_data['type'],
+                    file_type=message_data.get('file_type'),
+                    content=message_data.get('content'),
+                    file_path=message_data.get('file_path'),
+                    caption=message_data.get('caption'),
+                    status='queued'
+                )
+                session.add(item)
+                session.flush()
+                return item.id
+        except Exception as e:
+            logger.error(f"❌ Erro ao enfileirar mensagem: {e}")
+            return None
+
+    def claim_outbox_messages(self, limit: int) -> List[Dict]:
+        """
+        Reserva (status 'sending') até `limit` mensagens prontas para envio.
+
+        Só a mensagem mais antiga pendente de cada chat pode ser reservada, então
+        chats diferentes são enviados em paralelo sem inverter a ordem dentro do chat.
+        """
+        if limit <= 0:
+            return []
+
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import OutboxMessage
+
+                now = datetime.utcnow()
+                heads = select(func.min(OutboxMessage.id)) \
+                    .where(OutboxMessage.status.in_(['queued', 'sending'])) \
+                    .group_by(OutboxMessage.chat_id)
+
+                rows = session.query(OutboxMessage) \
+                    .filter(OutboxMessage.id.in_(heads)) \
+                    .filter(OutboxMessage.status == 'queued') \
+                    .filter(or_(OutboxMessage.next_attempt_at.is_(None), OutboxMessage.next_attempt_at <= now)) \
+                    .order_by(OutboxMessage.id) \
+                    .limit(limit) \
+                    .all()
+
+                claimed = []
+                for row in rows:
+                    row.status = 'sending'
+                    row.updated_at = now
+                    claimed.append({
+                        'outbox_id': row.id,
+                        'temp_id': row.temp_id,
+                        'contact_id': row.chat_id,
+                        'type': row.message_type,
+                        'file_type': row.file_type,
+                        'content': row.content,
+                        'file_path': row.file_path,
+                        'caption': row.caption or '',
+                        'attempts': row.attempts or 0,
+                        'timestamp': row.created_at.isoformat() if row.created_at else None
+                    })
+
+                return claimed
+        except Exception as e:
+            logger.error(f"❌ Erro ao reservar mensagens da fila: {e}")
+            return []
+
+    def mark_outbox_sent(self, outbox_id: int, api_message_id: str = None) -> bool:
+        """Marca uma mensagem da fila como enviada"""
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import OutboxMessage
+
+                item = session.get(OutboxMessage, outbox_id)
+                if not item:
+                    return False
+
+                item.status = 'sent'
+                item.api_message_id = api_message_id
+                item.attempts = (item.attempts or 0) + 1
+                item.last_error = None
+                item.updated_at = datetime.utcnow()
+                return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao marcar mensagem como enviada: {e}")
+            return False
+
+    def mark_outbox_failed(self, outbox_id: int, error: str, retry_at: datetime = None) -> bool:
+        """
+        Registra uma falha de envio. Com `retry_at` a mensagem volta para a fila
+        (status 'queued'); sem ele a falha é definitiva (status 'failed').
+        """
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import OutboxMessage
+
+                item = session.get(OutboxMessage, outbox_id)
+                if not item:
+                    return False
+
+                item.status = 'queued' if retry_at else 'failed'
+                item.next_attempt_at = retry_at
+                item.attempts = (item.attempts or 0) + 1
+                item.last_error = error
+                item.updated_at = datetime.utcnow()
+                return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao registrar falha de envio: {e}")
+            return False
+
+    def mark_outbox_uncertain(self, outbox_id: int, error: str) -> bool:
+        """
+        Registra um envio sem confirmação (timeout de leitura, 5xx): a W-API pode
+        ter entregue a mensagem, então ela não volta para a fila (status 'uncertain').
+        """
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import OutboxMessage
+
+                item = session.get(OutboxMessage, outbox_id)
+                if not item:
+                    return False
+
+                item.status = 'uncertain'
+                item.next_attempt_at = None
+                item.attempts = (item.attempts or 0) + 1
+                item.last_error = error
+                item.updated_at = datetime.utcnow()
+                return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao registrar envio incerto: {e}")
+            return False
+
+    def release_outbox_message(self, outbox_id: int) -> bool:
+        """Devolve para a fila uma mensagem reservada que não chegou a ser enviada (não conta tentativa)"""
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import OutboxMessage
+
+                item = session.get(OutboxMessage, outbox_id)
+                if not item or item.status != 'sending':
+                    return False
+
+                item.status = 'queued'
+                item.updated_at = datetime.utcnow()
+                return True
+        except Exception as e:
+            logger.error(f"❌ Erro ao devolver mensagem para a fila: {e}")
+            return False
+
+    def recover_outbox(self, keep_sent_days: int = 7) -> int:
+        """
+        Prepara a fila na inicialização: mensagens que ficaram em 'sending'
+        (app fechado no meio do envio) voltam para 'queued' e enviadas antigas são removidas.
+        Retorna quantas mensagens pendentes existem.
+        """
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import OutboxMessage
+
+                session.query(OutboxMessage) \
+                    .filter(OutboxMessage.status == 'sending') \
+                    .update({'status': 'queued', 'updated_at': datetime.utcnow()}, synchronize_session=False)
+
+                cutoff = datetime.utcnow() - timedelta(days=keep_sent_days)
+                session.query(OutboxMessage) \
+                    .filter(OutboxMessage.status == 'sent', OutboxMessage.updated_at < cutoff) \
+                    .delete(synchronize_session=False)
+
+                return session.query(OutboxMessage).filter(OutboxMessage.status == 'queued').count()
+        except Exception as e:
+            logger.error(f"❌ Erro ao recuperar fila de envio: {e}")
+            return 0
+
+    def get_outbox_summary(self) -> Dict:
+        """Contagem por status e horário da próxima nova tentativa"""
+        try:
+            with self.get_session() as session:
+                from backend.banco.models_updated import OutboxMessage
+
+                counts = dict(
+                    session.query(OutboxMessage.status, func.count(OutboxMessage.id))
+                    .group_by(OutboxMessage.status)
+                    .all()
+                )
+                next_attempt = session.query(func.min(OutboxMessage.next_attempt_at)) \
+                    .filter(OutboxMessage.status == 'queued') \
+                    .scalar()
+
+                return {
+                    'queued': counts.get('queued', 0),
+                    'sending': counts.get('sending', 0),
+                    'sent': counts.get('sent', 0),
+                    'failed': counts.get('failed', 0),
+                    'uncertain': counts.get('uncertain', 0),
+                    'next_attempt_at': next_attempt
+                }
+        except Exception as e:
+            logger.error(f"❌ Erro ao resumir fila de envio: {e}")
+            return {'queued': 0, 'sending': 0, 'sent': 0, 'failed': 0, 'uncertain': 0, 'next_attempt_at': None}
+
     def get_daily_stats(self, days: int = 7) -> List[Dict]:
         """Retorna estatísticas dos últimos N dias"""
         try:
@@ -571,6 +1049,40 @@ class WhatsAppDatabaseManager:
             logger.error(f"❌ Erro ao obter dashboard: {e}")
             return {}
 
+    def get_campaign_recipients(self, min_messages: int = 1, active_since_days: int = None,
+                                only_business: bool = None, limit: int = None) -> List[Dict]:
+        """Contatos (não grupos) para campanhas, com nome disponível como variável do modelo"""
+        try:
+            with self.get_session() as session:
+                query = session.query(ContactStats) \
+                    .filter(ContactStats.contact_id.isnot(None)) \
+                    .filter(~ContactStats.contact_id.like('%-%')) \
+                    .filter(ContactStats.total_messages >= min_messages)
+
+                if active_since_days is not None:
+                    since = datetime.utcnow() - timedelta(days=active_since_days)
+                    query = query.filter(ContactStats.last_message_date >= since)
+
+                if only_business is not None:
+                    query = query.filter(ContactStats.is_business == only_business)
+
+                query = query.order_by(desc(ContactStats.last_message_date))
+                if limit:
+                    query = query.limit(limit)
+
+                return [
+                    {
+                        'phone': contact.contact_id,
+                        'nome': contact.contact_name or '',
+                        'empresa': contact.business_name or '',
+                        'total_mensagens': contact.total_messages
+                    }
+                    for contact in query.all()
+                ]
+        except Exception as e:
+            logger.error(f"❌ Erro ao buscar destinatários de campanha: {e}")
+            return []
+
     def get_contact_stats(self, limit: int = 20) -> List[Dict]:
         """Retorna estatísticas dos contatos mais ativos"""
         try:
@@ -4,7 +4,8 @@ Modelos atualizados do banco de dados para WhatsApp webhooks
 SQLite com SQLAlchemy otimizado para os novos tipos de mensagem
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float
+from sqlalchemy import create_engine, Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Float, LargeBinary, \
+    Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
@@ -216,6 +217,72 @@ class MessageMedia(Base):
     event = relationship("WebhookEvent", back_populates="message_medias")
 
 
+class MessageTranscription(Base):
+    """Tabela para transcrições de áudio (cache por mensagem)"""
+    __tablename__ = 'message_transcriptions'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    message_id = Column(String(100), unique=True, nullable=False, index=True)  # messageId do webhook
+    chat_id = Column(String(50), index=True)
+    text = Column(Text, nullable=False)
+    confidence = Column(Float)
+    engine = Column(String(20))  # whisper, google
+    model_name = Column(String(20))  # tiny, base, small...
+    language = Column(String(10))
+    audio_seconds = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+
+class MessageWaveform(Base):
+    """Tabela para formas de onda de áudio (níveis uint8 por mensagem)"""
+    __tablename__ = 'message_waveforms'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    message_id = Column(String(100), unique=True, nullable=False, index=True)  # messageId do webhook
+    levels = Column(LargeBinary, nullable=False)  # 1 byte (0-255) por barra
+    bar_count = Column(Integer, nullable=False)
+    source = Column(String(20), default='audio')  # audio (calculada), whatsapp (campo do webhook)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class OutboxMessage(Base):
+    """Fila persistente de mensagens a enviar (sobrevive a reinícios do app)"""
+    __tablename__ = 'outbox_messages'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    temp_id = Column(String(50), unique=True, nullable=False)  # ID temporário usado pela UI
+    chat_id = Column(String(50), nullable=False, index=True)  # Destinatário (ordem garantida por chat)
+    message_type = Column(String(20), nullable=False)  # text, file
+    file_type = Column(String(20))  # image, video, audio, document
+    content = Column(Text)
+    file_path = Column(Text)
+    caption = Column(Text)
+    status = Column(String(20), default='queued', index=True)  # queued, sending, sent, failed, uncertain
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime)
+    last_error = Column(Text)
+    api_message_id = Column(String(100))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ChatMessageIndex(Base):
+    """
+    Índice (conversa, momento) de cada mensagem, para paginar o histórico com
+    keyset sem varrer nem decodificar o JSON de todos os eventos
+    """
+    __tablename__ = 'chat_message_index'
+
+    event_id = Column(Integer, ForeignKey('webhook_events.id', ondelete='CASCADE'), primary_key=True)
+    chat_key = Column(String(50), nullable=False)  # contato ou grupo dono da conversa
+    moment = Column(Integer, nullable=False)  # timestamp unix (cópia de webhook_events.moment)
+
+    __table_args__ = (
+        Index('ix_chat_message_index_chat_moment', 'chat_key', 'moment', 'event_id'),
+    )
+
+
 # Configuração do banco
 def create_database_engine(db_path="whatsapp_webhook_realtime.db"):
     """Cria e configura o engine do banco de dados"""
@@ -270,4 +337,4 @@ def init_database(db_path="whatsapp_webhook_realtime.db"):
 
 def get_database_schema_version():
     """Retorna versão do schema do banco"""
-    return "2.0.0"
+    return "2.3.0"
@@ -7,14 +7,20 @@ from backend.wapi.mensagem.enviosMensagensDocs.enviarDocumento import EnviaDocum
 from backend.wapi.mensagem.enviosMensagensDocs.enviarImagem import EnviaImagem
 from backend.wapi.mensagem.enviosMensagensDocs.enviarGif import EnviaGif
 from backend.wapi.mensagem.enviosMensagensDocs.enviarAudio import EnviaAudio
+from backend.wapi.mensagem.enviosMensagensDocs.otimizadorMidia import OtimizadorMidia
+from backend.wapi.mensagem.enviosMensagensDocs.cacheMidia import CacheMidia
 from backend.wapi.mensagem.deletar.deletarMensagens import DeletaMensagem
 from backend.wapi.mensagem.editar.editarMensagens import EditarMensagem
 from backend.wapi.mensagem.reacao.enviarReacao import EnviarReacao
 from backend.wapi.mensagem.reacao.removerreacao import RemoverReacao
+from backend.wapi.mensagem.ler.lerMensagens import LerMensagem
+from backend.wapi.transporte import TransporteWAPI
 
 
 class WhatsAppAPI:
-    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/"):
+    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/", timeouts=None,
+                 tentativas=3, pool_size=10, otimizar_midia=True,
+                 cache_midia=True):
         """
         Inicializa a classe WhatsAppAPI para interagir com a API W-API do WhatsApp.
 
@@ -22,11 +28,52 @@ class WhatsAppAPI:
             instance_id (str): ID da instância do WhatsApp.
             api_token (str): Token de autenticação da API.
             base_url (str): URL base da API.
+            timeouts (dict, optional): Timeouts (conexão, leitura) por endpoint, ex: {"send-text": (5, 20)}.
+            tentativas (int, optional): Novas tentativas para chamadas idempotentes. Default: 3.
+            pool_size (int, optional): Conexões keep-alive mantidas no pool. Default: 10.
+            otimizar_midia (bool, optional): Reduz imagens, áudios e GIFs locais antes do upload. Default: True.
+            cache_midia (bool, optional): Reaproveita mídias locais já enviadas. Default: True.
         """
         self.instance_id = instance_id
         self.api_token = api_token
         self.base_url = base_url
 
+        # Um único pool de conexões compartilhado por todos os endpoints
+        self.transporte = TransporteWAPI(api_token, timeouts=timeouts, tentativas=tentativas,
+                                         pool_size=pool_size)
+
+        # Sem Pillow/ffmpeg o otimizador simplesmente devolve o arquivo original
+        self.otimizador = OtimizadorMidia() if otimizar_midia else None
+        self.cache_midia = CacheMidia() if cache_midia else None
+        midia = {"transporte": self.transporte, "otimizador": self.otimizador, "cache": self.cache_midia}
+
+        self._texto = EnviaTexto(instance_id, api_token, base_url, transporte=self.transporte)
+        self._documento = EnviaDocumento(base_url, instance_id, api_token, transporte=self.transporte,
+                                         cache=self.cache_midia)
+        self._imagem = EnviaImagem(instance_id, api_token, **midia)
+        self._gif = EnviaGif(instance_id, api_token, **midia)
+        self._audio = EnviaAudio(instance_id, api_token, **midia)
+        self._deletar = DeletaMensagem(instance_id, api_token, transporte=self.transporte)
+        self._editar = EditarMensagem(instance_id, api_token, transporte=self.transporte)
+        self._reacao = EnviarReacao(instance_id, api_token, transporte=self.transporte)
+        self._remover_reacao = RemoverReacao(instance_id, api_token, transporte=self.transporte)
+        self._leitura = LerMensagem(instance_id, api_token, transporte=self.transporte)
+
+    def fechar(self):
+        """Encerra as conexões mantidas pelo pool e apaga o cache de mídia em disco"""
+        self.transporte.fechar()
+        if self.cache_midia:
+            self.cache_midia.limpar()
+
+    def estatisticas_midia(self):
+        """Bytes economizados pela otimização e uso do cache de mídia desde o início"""
+        estatisticas = {}
+        if self.otimizador:
+            estatisticas.update(self.otimizador.estatisticas())
+        if self.cache_midia:
+            estatisticas["cache"] = self.cache_midia.estatisticas()
+        return estatisticas
+
     def checa_status_conexao(self, api_token, id_instance):
         """
         Verifica o status de conexão com a API.
@@ -44,7 +91,10 @@ class WhatsAppAPI:
             "Content-Type": "application/json"
         }
 
-        response = requests.get(url, headers=headers)
+        try:
+            response = self.transporte.get(url, headers=headers)
+        except requests.exceptions.RequestException:
+            return "disconnected"
 
         if response.status_code == 200:
             return "connected"
@@ -63,8 +113,7 @@ class WhatsAppAPI:
         Returns:
             dict: Resposta da API.
         """
-        whatsapp_sender = EnviaTexto(self.instance_id, self.api_token, self.base_url)
-        return whatsapp_sender.envia_mensagem_texto(phone_number, message, delay_message)
+        return self._texto.envia_mensagem_texto(phone_number, message, delay_message)
 
     def envia_documento(self, phone_number, file_path, caption="", delay=2):
         """
@@ -79,8 +128,7 @@ class WhatsAppAPI:
         Returns:
             dict: Resultado do envio.
         """
-        whatsapp_docs = EnviaDocumento(self.base_url, self.instance_id, self.api_token)
-        return whatsapp_docs.enviar_arquivo_local(phone_number, file_path, caption, delay)
+        return self._documento.enviar_arquivo_local(phone_number, file_path, caption, delay)
 
     def enviar_imagem(self, phone_number, image_path, caption="", delay_message=1):
         """
@@ -95,8 +143,7 @@ class WhatsAppAPI:
         Returns:
             dict: Resultado do envio.
         """
-        whatsapp_image = EnviaImagem(self.instance_id, self.api_token)
-        return whatsapp_image.enviar(phone_number, image_path, caption, delay_message)
+        return self._imagem.enviar(phone_number, image_path, caption, delay_message)
 
     def enviarGif(self, phone_number, gif_source, caption="", delay_message=1):
         """
@@ -111,8 +158,7 @@ class WhatsAppAPI:
         Returns:
             dict: Resultado do envio.
         """
-        whatsapp_gif = EnviaGif(self.instance_id, self.api_token)
-        return whatsapp_gif.enviar(phone_number, gif_source, caption, delay_message)
+        return self._gif.enviar(phone_number, gif_source, caption, delay_message)
 
     def enviar_audio(self, phone_number, audio_source, delay_message=1):
         """
@@ -126,8 +172,7 @@ class WhatsAppAPI:
         Returns:
             dict: Resultado do envio.
         """
-        whatsapp_audio = EnviaAudio(self.instance_id, self.api_token)
-        return whatsapp_audio.enviar(phone_number, audio_source)
+        return self._audio.enviar(phone_number, audio_source)
 
     def deleta_mensagem(self, phone_number, message_ids):
         """
@@ -142,8 +187,7 @@ class WhatsAppAPI:
         Returns:
             dict: Resultado da operação.
         """
-        deleter = DeletaMensagem(self.instance_id, self.api_token)
-        return deleter.deletar(phone_number, message_ids)
+        return self._deletar.deletar(phone_number, message_ids)
 
     def editar_mensagem(self, phone, message_id, new_text):
         """
@@ -157,13 +201,11 @@ class WhatsAppAPI:
         Returns:
             dict: Resposta da API.
         """
-        editor = EditarMensagem(self.instance_id, self.api_token)
-        return editor.editar_mensagem(phone, message_id, new_text)
+        return self._editar.editar_mensagem(phone, message_id, new_text)
 
     def enviar_reacao(self, phone, message_id, reaction="👍", delay=2):
 
-        reacao = EnviarReacao(self.instance_id, self.api_token)
-        return reacao.enviar_reacao(
+        return self._reacao.enviar_reacao(
             phone=phone,
             message_id=message_id,
             reaction=reaction,
@@ -172,13 +214,25 @@ class WhatsAppAPI:
 
     def removerReacao(self, phone, menssagem_id, dalay):
 
-        removeRecao = RemoverReacao(self.instance_id, self.api_token)
-        return removeRecao.remover_reacao(
+        return self._remover_reacao.remover_reacao(
             phone=phone,
             message_id=menssagem_id,
             delay_message=dalay
         )
 
+    def marcar_conversa_como_lida(self, phone, message_ids):
+        """
+        Envia confirmações de leitura de uma conversa.
+
+        Args:
+            phone (str): Número do telefone ou ID do grupo.
+            message_ids (list): IDs das mensagens em ordem cronológica.
+
+        Returns:
+            list: Resultados das confirmações enviadas (vazia se todas já tinham sido confirmadas).
+        """
+        return self._leitura.marcar_conversa_como_lida(phone, message_ids)
+
 
 if __name__ == "__main__":
     # Configurações da API - substitua pelos seus dados reais
@@ -0,0 +1,402 @@
+import base64
+import csv
+import json
+import mimetypes
+import os
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urlparse
+
+import requests
+
+from backend.wapi.limitador import LimitadorEnvio
+
+# Endpoint e campo do payload por tipo de mídia
+TIPOS_MIDIA = {
+    "image": ("send-image", "image"),
+    "video": ("send-gif", "gif"),
+    "audio": ("send-audio", "audio"),
+    "document": ("send-document", "document"),
+}
+
+MAX_TENTATIVAS = 3
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+
+class _VariaveisModelo(dict):
+    """Variáveis ausentes no destinatário ficam vazias em vez de quebrar o modelo"""
+
+    def __missing__(self, chave):
+        return ""
+
+
+def formatar_modelo(modelo, variaveis):
+    """Aplica as variáveis do destinatário ao modelo (ex: "Olá {nome}!")"""
+    return modelo.format_map(_VariaveisModelo(variaveis))
+
+
+def validar_modelo(modelo):
+    """Confere a sintaxe do modelo antes da campanha; levanta ValueError com o motivo"""
+    try:
+        campos = [campo for _, campo, _, _ in string.Formatter().parse(modelo) if campo is not None]
+    except ValueError as e:
+        raise ValueError(f"Modelo de mensagem inválido: {e}")
+
+    for campo in campos:
+        if not campo or campo[0].isdigit():
+            raise ValueError(f"Modelo de mensagem inválido: use variáveis com nome, como {{nome}} "
+                             f"(encontrado {{{campo}}}); para uma chave literal use {{{{ }}}}")
+
+
+def normalizar_telefone(telefone):
+    """Mantém só dígitos e adiciona o DDI 55 em números brasileiros sem ele"""
+    numero = ''.join(filter(str.isdigit, str(telefone or '')))
+    if len(numero) in (10, 11) and not numero.startswith('55'):
+        numero = '55' + numero
+    return numero
+
+
+def carregar_destinatarios_csv(caminho_csv, coluna_telefone="phone"):
+    """
+    Lê destinatários de um CSV. A coluna de telefone é obrigatória; as demais
+    colunas viram variáveis do modelo. Números repetidos são ignorados.
+    """
+    destinatarios = []
+    vistos = set()
+
+    with open(caminho_csv, newline='', encoding='utf-8-sig') as arquivo:
+        amostra = arquivo.read(4096)
+        arquivo.seek(0)
+        try:
+            dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+        except csv.Error:
+            dialeto = csv.excel
+
+        for linha in csv.DictReader(arquivo, dialect=dialeto):
+            telefone = normalizar_telefone(linha.get(coluna_telefone))
+            if len(telefone) < 10 or telefone in vistos:
+                continue
+            vistos.add(telefone)
+            destinatarios.append(dict(linha, phone=telefone))
+
+    return destinatarios
+
+
+def destinatarios_do_banco(db_manager, **filtros):
+    """Destinatários a partir dos contatos do banco (ver get_campaign_recipients)"""
+    return db_manager.get_campaign_recipients(**filtros)
+
+
+class CampanhaEnvio:
+    """
+    Envio em massa de uma mesma mensagem (texto e/ou mídia) para muitos destinatários.
+
+    - A mídia local é codificada em base64 UMA vez; o corpo JSON de cada envio é
+      montado por concatenação de bytes, sem recodificar o arquivo.
+    - Os envios rodam em paralelo sob o LimitadorEnvio (taxa adaptativa a 429/5xx).
+    - O progresso é gravado em disco (append em resultados.jsonl) a cada envio;
+      executar() de novo retoma de onde parou, pulando quem já recebeu.
+    - Um POST só é repetido quando a W-API certamente não o aceitou (falha de
+      conexão, 429/5xx). Timeout de leitura fica como "uncertain" e não é
+      reenviado, para não duplicar a mensagem no destinatário.
+
+    Uso:
+        api = WhatsAppAPI(INSTANCE_ID, API_TOKEN)
+        campanha = CampanhaEnvio(api, "promo_julho", carregar_destinatarios_csv("clientes.csv"),
+                                 "Olá {nome}, confira a promoção!", midia="banner.jpg")
+        resumo = campanha.executar()
+        campanha.exportar_relatorio("relatorio_promo_julho.csv")
+    """
+
+    def __init__(self, api, campanha_id, destinatarios, modelo="", midia=None, tipo_midia="image",
+                 pasta="campanhas", limitador=None, max_workers=8):
+        """
+        Args:
+            api (WhatsAppAPI): Cliente configurado (o pool de conexões dele é reutilizado).
+            campanha_id (str): Identificador; define a pasta de progresso.
+            destinatarios (list): Dicionários com 'phone' e variáveis do modelo.
+            modelo (str): Texto (ou legenda da mídia) com variáveis, ex: "Olá {nome}".
+            midia (str, optional): URL ou caminho local da mídia.
+            tipo_midia (str): image, video, audio ou document.
+            pasta (str): Pasta base dos arquivos de progresso.
+            limitador (LimitadorEnvio, optional): Compartilhe o do app para respeitar o mesmo limite.
+            max_workers (int): Envios simultâneos.
+        """
+        if tipo_midia not in TIPOS_MIDIA:
+            raise ValueError(f"Tipo de mídia não suportado: {tipo_midia}")
+        if not modelo and not midia:
+            raise ValueError("Informe um modelo de mensagem e/ou uma mídia")
+        if modelo:
+            validar_modelo(modelo)
+
+        self.api = api
+        self.transporte = api.transporte
+        self.campanha_id = campanha_id
+        self.destinatarios = destinatarios
+        self.modelo = modelo
+        self.midia = midia
+        self.tipo_midia = tipo_midia
+        self.max_workers = max_workers
+
+        self.limitador = limitador or LimitadorEnvio()
+
+        self.pasta = os.path.join(pasta, campanha_id)
+        self.arquivo_resultados = os.path.join(self.pasta, "resultados.jsonl")
+        os.makedirs(self.pasta, exist_ok=True)
+
+        self._resultados = self._carregar_resultados()
+        self._lock_arquivo = threading.Lock()
+        self._midia_codificada = None
+        self._salvar_estado()
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+
+    def _salvar_estado(self):
+        estado = {
+            "campanha_id": self.campanha_id,
+            "modelo": self.modelo,
+            "midia": self.midia,
+            "tipo_midia": self.tipo_midia,
+            "total_destinatarios": len(self.destinatarios),
+            "atualizado_em": datetime.now().isoformat()
+        }
+        with open(os.path.join(self.pasta, "campanha.json"), "w", encoding="utf-8") as arquivo:
+            json.dump(estado, arquivo, ensure_ascii=False, indent=2)
+
+    def _carregar_resultados(self):
+        """Último resultado de cada telefone (linhas corrompidas por queda são ignoradas)"""
+        resultados = {}
+        if not os.path.exists(self.arquivo_resultados):
+            return resultados
+
+        with open(self.arquivo_resultados, encoding="utf-8") as arquivo:
+            for linha in arquivo:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                resultados[registro["phone"]] = registro
+
+        return resultados
+
+    def _registrar(self, registro):
+        with self._lock_arquivo:
+            self._resultados[registro["phone"]] = registro
+            with open(self.arquivo_resultados, "a", encoding="utf-8") as arquivo:
+                arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    # ------------------------------------------------------------------
+    # Montagem do corpo
+    # ------------------------------------------------------------------
+
+    def _preparar_midia(self):
+        """Codifica a mídia local uma única vez (data URI já escapado para JSON)"""
+        if not self.midia or self._midia_codificada is not None:
+            return
+
+        parsed = urlparse(self.midia)
+        if parsed.scheme in ("http", "https") and parsed.netloc:
+            self._midia_codificada = json.dumps(self.midia).encode("utf-8")
+            return
+
+        mime_type = mimetypes.guess_type(self.midia)[0] or "application/octet-stream"
+        with open(self.midia, "rb") as arquivo:
+            conteudo = base64.b64encode(arquivo.read())
+
+        self._midia_codificada = b'"data:' + mime_type.encode("ascii") + b';base64,' + conteudo + b'"'
+        print(f"📦 Mídia da campanha codificada uma vez ({len(self._midia_codificada) / (1024 * 1024):.1f} MB)")
+
+    def _montar_requisicao(self, destinatario):
+        """Retorna (endpoint, corpo em bytes) para um destinatário"""
+        texto = formatar_modelo(self.modelo, destinatario) if self.modelo else ""
+
+        if not self.midia:
+            payload = {"phone": destinatario["phone"], "message": texto, "delayMessage": 1}
+            return "send-text", json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+        endpoint, campo = TIPOS_MIDIA[self.tipo_midia]
+        payload = {"phone": destinatario["phone"], "delayMessage": 1}
+        if texto and self.tipo_midia != "audio":
+            payload["caption"] = texto
+        if self.tipo_midia == "document":
+            payload["fileName"] = os.path.basename(urlparse(self.midia).path)
+            payload["extension"] = os.path.splitext(payload["fileName"])[1].lstrip(".").lower()
+
+        # O campo da mídia entra por último, como bytes prontos: nenhum json.dumps do base64
+        corpo = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        return endpoint, corpo[:-1] + b', "' + campo.encode("ascii") + b'": ' + self._midia_codificada + b'}'
+
+    # ------------------------------------------------------------------
+    # Envio
+    # ------------------------------------------------------------------
+
+    def pendentes(self):
+        """Destinatários que ainda não receberam (inclui falhas; os "uncertain" não são reenviados)"""
+        return [d for d in self.destinatarios
+                if self._resultados.get(d["phone"], {}).get("status") not in ("sent", "uncertain")]
+
+    def _enviar_um(self, destinatario, cancelar):
+        try:
+            endpoint, corpo = self._montar_requisicao(destinatario)
+        except (KeyError, IndexError, ValueError, AttributeError) as e:
+            # Ex: {valor:.2f} com um valor que não é número; o destinatário fica como falha no relatório
+            return {
+                "phone": destinatario["phone"],
+                "status": "failed",
+                "message_id": None,
+                "tentativas": 0,
+                "erro": f"Erro no modelo da mensagem: {e!r}",
+                "enviado_em": datetime.now().isoformat()
+            }
+
+        url = f"{self.api.base_url.rstrip('/')}/message/{endpoint}"
+        params = {"instanceId": self.api.instance_id}
+        erro = None
+
+        for tentativa in range(1, MAX_TENTATIVAS + 1):
+            if not self.limitador.aguardar(destinatario["phone"], cancelar=cancelar):
+                return None  # Cancelado: continua pendente para a próxima execução
+
+            try:
+                response = self.transporte.post(url, params=params, data=corpo)
+            except requests.exceptions.ConnectionError as e:
+                # Inclui ConnectTimeout: a mensagem não chegou à W-API, pode repetir
+                erro = f"Erro de conexão: {e}"
+                time.sleep(min(2 ** tentativa, 30))
+                continue
+            except requests.exceptions.Timeout as e:
+                # Timeout de leitura: a W-API pode já ter aceitado o envio; repetir duplicaria
+                return {
+                    "phone": destinatario["phone"],
+                    "status": "uncertain",
+                    "message_id": None,
+                    "tentativas": tentativa,
+                    "erro": f"Sem resposta da W-API (pode ter sido enviada): {e}",
+                    "enviado_em": datetime.now().isoformat()
+                }
+            except requests.exceptions.RequestException as e:
+                erro = f"Erro de requisição: {e}"
+                break
+
+            if response.status_code == 200:
+                try:
+                    dados = response.json()
+                except ValueError:
+                    dados = {}
+                return {
+                    "phone": destinatario["phone"],
+                    "status": "sent",
+                    "message_id": dados.get("messageId") if isinstance(dados, dict) else None,
+                    "tentativas": tentativa,
+                    "erro": None,
+                    "enviado_em": datetime.now().isoformat()
+                }
+
+            erro = f"Erro HTTP {response.status_code}: {response.text[:200]}"
+            if response.status_code not in STATUS_REPETIVEIS:
+                break
+            # 429/5xx: o limitador já aplicou pausa/redução; a próxima volta espera por ele
+
+        return {
+            "phone": destinatario["phone"],
+            "status": "failed",
+            "message_id": None,
+            "tentativas": tentativa,
+            "erro": erro,
+            "enviado_em": datetime.now().isoformat()
+        }
+
+    def executar(self, callback_progresso=None, cancelar=None):
+        """
+        Envia para todos os pendentes e devolve o resumo.
+
+        Args:
+            callback_progresso (callable, optional): Chamado com (concluídos, total, resultado).
+            cancelar (threading.Event, optional): Interrompe a campanha (retomável depois).
+        """
+        pendentes = self.pendentes()
+        total = len(pendentes)
+        if not total:
+            print(f"✅ Campanha {self.campanha_id}: nada pendente")
+            return self.resumo()
+
+        self._preparar_midia()
+        cancelar = cancelar or threading.Event()
+        concluidos = 0
+        inicio = time.monotonic()
+
+        print(f"🚀 Campanha {self.campanha_id}: {total} destinatário(s) pendente(s)")
+
+        # O limitador só observa o transporte compartilhado enquanto a campanha roda;
+        # um limitador do app que já observava continua registrado no final
+        observador = self.limitador.registrar_resposta
+        registrou = observador not in self.transporte.observadores
+        if registrou:
+            self.transporte.adicionar_observador(observador)
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="campanha") as executor:
+                futuros = [executor.submit(self._enviar_um, d, cancelar) for d in pendentes]
+
+                # Cada resultado é gravado assim que chega, para não reenviar após uma queda
+                for futuro in as_completed(futuros):
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        print(f"❌ Erro inesperado na campanha: {e}")
+                        continue
+
+                    if resultado is None:
+                        continue
+
+                    self._registrar(resultado)
+                    concluidos += 1
+                    if callback_progresso:
+                        callback_progresso(concluidos, total, resultado)
+        finally:
+            if registrou:
+                self.transporte.remover_observador(observador)
+
+        duracao = time.monotonic() - inicio
+        resumo = self.resumo()
+        print(f"📊 Campanha {self.campanha_id}: {resumo['enviados']} enviados, {resumo['falhas']} falhas, "
+              f"{resumo['incertos']} incertos, {resumo['pendentes']} pendentes em {duracao:.0f}s")
+        return resumo
+
+    # ------------------------------------------------------------------
+    # Relatórios
+    # ------------------------------------------------------------------
+
+    def resumo(self):
+        status = [self._resultados.get(d["phone"], {}).get("status") for d in self.destinatarios]
+        enviados = status.count("sent")
+        falhas = status.count("failed")
+        incertos = status.count("uncertain")
+        return {
+            "campanha_id": self.campanha_id,
+            "total": len(self.destinatarios),
+            "enviados": enviados,
+            "falhas": falhas,
+            "incertos": incertos,
+            "pendentes": len(self.destinatarios) - enviados - falhas - incertos,
+            "limitador": self.limitador.metricas()
+        }
+
+    def exportar_relatorio(self, caminho_csv):
+        """Gera CSV com o resultado de cada destinatário"""
+        campos = ["phone", "status", "message_id", "tentativas", "erro", "enviado_em"]
+
+        with open(caminho_csv, "w", newline="", encoding="utf-8") as arquivo:
+            writer = csv.DictWriter(arquivo, fieldnames=campos)
+            writer.writeheader()
+            for destinatario in self.destinatarios:
+                resultado = self._resultados.get(destinatario["phone"]) or {
+                    "phone": destinatario["phone"], "status": "pending"
+                }
+                writer.writerow({campo: resultado.get(campo) for campo in campos})
+
+        return caminho_csv
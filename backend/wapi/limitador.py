@@ -0,0 +1,215 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """Balde de fichas: permite rajadas de até `capacidade` e média de `taxa` por segundo"""
+
+    def __init__(self, taxa, capacidade):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self.fichas = capacidade
+        self._ultimo = time.monotonic()
+
+    def _reabastecer(self, agora):
+        self.fichas = min(self.capacidade, self.fichas + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def espera_necessaria(self, agora):
+        """Segundos até haver uma ficha disponível (0 se já houver)"""
+        self._reabastecer(agora)
+        if self.fichas >= 1:
+            return 0.0
+        return (1 - self.fichas) / self.taxa
+
+    def consumir(self):
+        self.fichas -= 1
+
+
+def interpretar_retry_after(valor):
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos"""
+    if not valor:
+        return None
+
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+
+    try:
+        quando = parsedate_to_datetime(valor)
+        return max(0.0, (quando - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class LimitadorEnvio:
+    """
+    Agendador de envios com baldes de fichas por instância e por destinatário.
+
+    A taxa da instância se adapta às respostas da W-API (aumento aditivo,
+    redução multiplicativa): cada envio bem-sucedido sobe a taxa um pouco até
+    `taxa_maxima`; um 429 corta a taxa pela metade e pausa todos os envios pelo
+    tempo do Retry-After; erros 5xx reduzem a taxa com menos força.
+
+    Uso:
+        limitador = LimitadorEnvio()
+        transporte.adicionar_observador(limitador.registrar_resposta)
+        if limitador.aguardar(telefone):
+            ...envia...
+    """
+
+    def __init__(self, taxa_inicial=2.0, taxa_maxima=5.0, taxa_minima=0.2, rajada=5,
+                 taxa_destinatario=1.0, rajada_destinatario=3, pausa_padrao_429=5.0):
+        """
+        Args:
+            taxa_inicial (float): Envios por segundo na instância ao iniciar.
+            taxa_maxima (float): Teto da taxa adaptativa.
+            taxa_minima (float): Piso da taxa após reduções.
+            rajada (int): Envios seguidos permitidos na instância.
+            taxa_destinatario (float): Envios por segundo para um mesmo número.
+            rajada_destinatario (int): Envios seguidos permitidos para um mesmo número.
+            pausa_padrao_429 (float): Pausa quando um 429 chega sem Retry-After.
+        """
+        self.taxa_maxima = taxa_maxima
+        self.taxa_minima = taxa_minima
+        self.taxa_destinatario = taxa_destinatario
+        self.rajada_destinatario = rajada_destinatario
+        self.pausa_padrao_429 = pausa_padrao_429
+
+        self._instancia = TokenBucket(taxa_inicial, rajada)
+        self._destinatarios = {}
+        self._pausado_ate = 0.0
+        self._lock = threading.Lock()
+
+        # Métricas
+        self._envios = deque()  # instantes (monotonic) dos envios liberados no último minuto
+        self.total_liberados = 0
+        self.total_429 = 0
+        self.total_5xx = 0
+        self.aguardando = 0
+
+    @property
+    def taxa_atual(self):
+        return self._instancia.taxa
+
+    def _bucket_destinatario(self, destinatario):
+        bucket = self._destinatarios.get(destinatario)
+        if bucket is None:
+            # Limpa baldes cheios (destinatários ociosos) para não crescer sem limite
+            if len(self._destinatarios) > 1000:
+                agora = time.monotonic()
+                for b in self._destinatarios.values():
+                    b.espera_necessaria(agora)
+                self._destinatarios = {
+                    chave: b for chave, b in self._destinatarios.items() if b.fichas < b.capacidade
+                }
+            bucket = TokenBucket(self.taxa_destinatario, self.rajada_destinatario)
+            self._destinatarios[destinatario] = bucket
+        return bucket
+
+    def aguardar(self, destinatario=None, cancelar=None, timeout=None):
+        """
+        Bloqueia até o envio ser permitido e consome as fichas.
+
+        Args:
+            destinatario (str, optional): Número/chat de destino.
+            cancelar (threading.Event, optional): Interrompe a espera quando sinalizado.
+            timeout (float, optional): Tempo máximo de espera em segundos.
+
+        Returns:
+            bool: True se o envio foi liberado, False se cancelado ou expirado.
+        """
+        limite = time.monotonic() + timeout if timeout is not None else None
+
+        with self._lock:
+            self.aguardando += 1
+
+        try:
+            while True:
+                with self._lock:
+                    agora = time.monotonic()
+                    espera = max(
+                        self._pausado_ate - agora,
+                        self._instancia.espera_necessaria(agora),
+                        self._bucket_destinatario(destinatario).espera_necessaria(agora) if destinatario else 0.0
+                    )
+
+                    if espera <= 0:
+                        self._instancia.consumir()
+                        if destinatario:
+                            self._destinatarios[destinatario].consumir()
+                        self._registrar_liberacao(agora)
+                        return True
+
+                if limite is not None:
+                    if agora >= limite:
+                        return False
+                    espera = min(espera, limite - agora)
+
+                if cancelar is not None:
+                    if cancelar.wait(espera):
+                        return False
+                else:
+                    time.sleep(espera)
+        finally:
+            with self._lock:
+                self.aguardando -= 1
+
+    def _registrar_liberacao(self, agora):
+        self.total_liberados += 1
+        self._envios.append(agora)
+        while self._envios and agora - self._envios[0] > 60:
+            self._envios.popleft()
+
+    def registrar_resposta(self, metodo, url, response):
+        """Ajusta a taxa conforme a resposta da W-API (observador do TransporteWAPI)"""
+        status = response.status_code
+
+        with self._lock:
+            bucket = self._instancia
+
+            if status == 429:
+                self.total_429 += 1
+                pausa = interpretar_retry_after(response.headers.get('Retry-After'))
+                if pausa is None:
+                    pausa = self.pausa_padrao_429
+                self._pausado_ate = max(self._pausado_ate, time.monotonic() + pausa)
+                bucket.taxa = max(self.taxa_minima, bucket.taxa * 0.5)
+                bucket.fichas = min(bucket.fichas, 0)
+                print(f"🚦 W-API limitou envios (429): pausa de {pausa:.1f}s, taxa {bucket.taxa:.2f}/s")
+
+            elif status >= 500:
+                self.total_5xx += 1
+                bucket.taxa = max(self.taxa_minima, bucket.taxa * 0.75)
+
+            elif status < 400 and metodo.upper() == 'POST':
+                # Aumento aditivo: ~+1 envio/s a cada 10 sucessos
+                bucket.taxa = min(self.taxa_maxima, bucket.taxa + 0.1)
+
+    def metricas(self):
+        """Taxa configurada, taxa efetiva (último minuto) e contadores"""
+        with self._lock:
+            agora = time.monotonic()
+            while self._envios and agora - self._envios[0] > 60:
+                self._envios.popleft()
+
+            if len(self._envios) > 1:
+                janela = max(agora - self._envios[0], 1.0)
+                taxa_efetiva = len(self._envios) / janela
+            else:
+                taxa_efetiva = float(len(self._envios))
+
+            return {
+                'taxa_atual': round(self._instancia.taxa, 2),
+                'taxa_efetiva': round(taxa_efetiva, 2),
+                'envios_ultimo_minuto': len(self._envios),
+                'aguardando': self.aguardando,
+                'pausado_por': round(max(0.0, self._pausado_ate - agora), 1),
+                'total_liberados': self.total_liberados,
+                'total_429': self.total_429,
+                'total_5xx': self.total_5xx
+            }
@@ -1,11 +1,15 @@
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from backend.wapi.transporte import obter_transporte
 
 
 class DeletaMensagem:
     """Classe ultra simplificada para deletar mensagens no WhatsApp."""
 
-    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/message"):
+    MAX_CONCORRENTES = 8
+
+    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/message", transporte=None):
         self.instance_id = instance_id
         self.api_token = api_token
         self.base_url = base_url
@@ -13,6 +17,7 @@ class DeletaMensagem:
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {api_token}'
         }
+        self.transporte = transporte or obter_transporte(api_token)
 
     def deletar(self, phone_number, message_ids):
         """
@@ -63,11 +68,10 @@ class DeletaMensagem:
                 'instanceId': self.instance_id
             }
 
-            response = requests.delete(
+            response = self.transporte.delete(
                 url,
                 headers=self.headers,
-                params=params,
-                timeout=30
+                params=params
             )
 
             if response.status_code == 200:
@@ -97,7 +101,7 @@ class DeletaMensagem:
             return {"success": False, "error": str(e)}
 
     def _deletar_varias(self, phone, message_ids_list):
-        """Deleta várias mensagens."""
+        """Deleta várias mensagens (em paralelo, pelo pool de conexões)."""
         if not message_ids_list:
             return {"success": False, "error": "Lista vazia"}
 
@@ -105,15 +109,16 @@ class DeletaMensagem:
         erros = 0
         detalhes = []
 
-        for msg_id in message_ids_list:
-            try:
-                if not msg_id or not str(msg_id).strip():
-                    erros += 1
-                    detalhes.append("❌ ID vazio")
-                    continue
+        ids_validos = [str(msg_id).strip() for msg_id in message_ids_list if msg_id and str(msg_id).strip()]
+        for _ in range(len(message_ids_list) - len(ids_validos)):
+            erros += 1
+            detalhes.append("❌ ID vazio")
 
-                resultado = self._deletar_uma(phone, str(msg_id).strip())
+        if ids_validos:
+            with ThreadPoolExecutor(max_workers=min(self.MAX_CONCORRENTES, len(ids_validos))) as executor:
+                resultados = list(executor.map(lambda msg_id: self._deletar_uma(phone, msg_id), ids_validos))
 
+            for msg_id, resultado in zip(ids_validos, resultados):
                 if resultado["success"]:
                     sucessos += 1
                     detalhes.append(f"✅ {msg_id}")
@@ -121,10 +126,6 @@ class DeletaMensagem:
                     erros += 1
                     detalhes.append(f"❌ {msg_id}: {resultado['error']}")
 
-            except Exception as e:
-                erros += 1
-                detalhes.append(f"❌ {msg_id}: erro")
-
         return {
             "success": sucessos > 0,
             "deletadas": sucessos,
@@ -1,15 +1,17 @@
 import requests
 import json
+from backend.wapi.transporte import obter_transporte
 
 
 class EditarMensagem:
-    def __init__(self, instance_id, token):
+    def __init__(self, instance_id, token, transporte=None):
         """
         Inicializa o editor de mensagens
 
         Args:
             instance_id (str): ID da instância do WhatsApp
             token (str): Token de autorização da API
+            transporte (TransporteWAPI, optional): Pool HTTP compartilhado
         """
         self.instance_id = instance_id
         self.token = token
@@ -18,6 +20,7 @@ class EditarMensagem:
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {self.token}'
         }
+        self.transporte = transporte or obter_transporte(token)
 
     def editar_mensagem(self, phone, message_id, new_text):
         """
@@ -40,7 +43,7 @@ class EditarMensagem:
         }
 
         try:
-            response = requests.post(url, json=data, headers=self.headers)
+            response = self.transporte.post(url, json=data, headers=self.headers)
             response.raise_for_status()  # Levanta exceção para códigos de erro HTTP
             return response.json()
 
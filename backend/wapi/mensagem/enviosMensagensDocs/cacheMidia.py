@@ -0,0 +1,464 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from backend.wapi.mensagem.enviosMensagensDocs.corpoStreaming import ArquivoBase64, CorpoJsonStreaming
+from backend.wapi.transporte import FALHA_INCERTA, FALHA_REPETIR, classificar_falha
+
+# Campos em que a W-API pode devolver a mídia hospedada do lado dela
+CAMPOS_REFERENCIA = ("mediaUrl", "fileUrl", "media_url", "file_url", "url")
+
+
+class ArquivoCodificado(ArquivoBase64):
+    """ArquivoBase64 cujo conteúdo já está codificado (na memória ou num arquivo em disco)"""
+
+    def __init__(self, mime_type, tamanho, dados=None, caminho_disco=None):
+        self.caminho_arquivo = caminho_disco
+        self.mime_type = mime_type
+        self.tamanho = tamanho
+        self.dados = dados
+
+    def blocos_base64(self, tamanho_bloco):
+        tamanho_codificado = 4 * tamanho_bloco // 3
+
+        if self.dados is not None:
+            for inicio in range(0, len(self.dados), tamanho_codificado):
+                yield self.dados[inicio:inicio + tamanho_codificado]
+            return
+
+        with open(self.caminho_arquivo, 'rb') as handle:
+            while True:
+                bloco = handle.read(tamanho_codificado)
+                if not bloco:
+                    return
+                yield bloco
+
+
+class _Entrada:
+    __slots__ = ("mime_type", "tamanho", "dados", "caminho_disco", "referencia", "bytes_economizados",
+                 "rebaixando")
+
+    def __init__(self, mime_type, tamanho, bytes_economizados=0):
+        self.mime_type = mime_type
+        self.tamanho = tamanho
+        self.dados = None
+        self.caminho_disco = None
+        self.referencia = None
+        self.bytes_economizados = bytes_economizados
+        self.rebaixando = False  # Sendo gravada em disco fora do lock; os dados seguem válidos até lá
+
+    @property
+    def tamanho_base64(self):
+        return 4 * ((self.tamanho + 2) // 3)
+
+    def arquivo(self):
+        if self.dados is None and self.caminho_disco is None:
+            return None
+        return ArquivoCodificado(self.mime_type, self.tamanho, self.dados, self.caminho_disco)
+
+
+def extrair_referencia(dados):
+    """Procura na resposta da W-API uma URL reutilizável da mídia enviada"""
+    if not isinstance(dados, dict):
+        return None
+
+    for campo in CAMPOS_REFERENCIA:
+        valor = dados.get(campo)
+        if isinstance(valor, str):
+            parsed = urlparse(valor)
+            # URLs .enc do CDN do WhatsApp são criptografadas e não servem como fonte
+            if parsed.scheme in ("http", "https") and parsed.netloc and not parsed.path.endswith(".enc"):
+                return valor
+
+    for aninhado in ("data", "message", "media"):
+        referencia = extrair_referencia(dados.get(aninhado))
+        if referencia:
+            return referencia
+
+    return None
+
+
+class CacheMidia:
+    """
+    Cache das mídias locais já preparadas para envio.
+
+    Mandar o mesmo arquivo (tabela de preços, banner de promoção) para vários
+    chats deixava de reler, otimizar e codificar o arquivo a cada envio. Cada
+    entrada guarda o base64 pronto (na memória até `limite_memoria`, depois em
+    disco até `limite_disco`) e, se a W-API devolver a URL da mídia hospedada,
+    essa referência: os próximos envios mandam só a URL, sem upload.
+
+    A chave é o SHA-256 do conteúdo mais o tipo de envio; o hash fica memorizado
+    por caminho + mtime + tamanho, então arquivo alterado gera nova entrada.
+
+    Um arquivo em disco entregue a um envio fica preso até o envio terminar: se
+    a entrada sair do cache nesse meio tempo, ele só é apagado na liberação.
+    Gravações e remoções em disco acontecem fora do lock.
+
+    Uso:
+        cache = CacheMidia()
+        resultado = cache.enviar(caminho, "image",
+                                 enviar_arquivo=lambda arquivo: ...,
+                                 enviar_referencia=lambda url: ...)
+    """
+
+    MAX_ENTRADAS = 1000
+
+    def __init__(self, limite_memoria=64 * 1024 * 1024, limite_disco=512 * 1024 * 1024, pasta_disco=None):
+        """
+        Args:
+            limite_memoria (int): Bytes de base64 mantidos na memória.
+            limite_disco (int): Bytes de base64 mantidos em disco (0 desativa o disco).
+            pasta_disco (str, optional): Pasta dos arquivos em disco (padrão: pasta temporária própria).
+        """
+        self.limite_memoria = limite_memoria
+        self.limite_disco = limite_disco
+        self._pasta_disco = pasta_disco
+        self._pasta_criada = False
+
+        self._entradas = OrderedDict()  # chave -> _Entrada, da menos para a mais recente
+        self._hashes = {}  # (caminho, mtime_ns, tamanho) -> sha256
+        self._bytes_memoria = 0
+        self._bytes_disco = 0
+        self._em_uso = {}  # caminho em disco -> envios que ainda o leem
+        self._apagar_depois = set()  # saíram do cache enquanto em uso
+        self._pasta_apagar_depois = None  # limpar() com arquivos em uso: a pasta sai com o último
+        self._lock = threading.Lock()
+
+        self.acertos = 0
+        self.falhas = 0
+        self.uploads_evitados = 0
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def chave(self, caminho, tipo):
+        """Chave da entrada: tipo de envio + SHA-256 do conteúdo"""
+        caminho = os.path.abspath(caminho)
+        info = os.stat(caminho)
+        identificacao = (caminho, info.st_mtime_ns, info.st_size)
+
+        with self._lock:
+            sha = self._hashes.get(identificacao)
+
+        if sha is None:
+            sha = self._sha256(caminho)
+            with self._lock:
+                if len(self._hashes) >= self.MAX_ENTRADAS:
+                    self._hashes.clear()
+                self._hashes[identificacao] = sha
+
+        return f"{tipo}:{sha}"
+
+    def enviar(self, caminho, tipo, enviar_arquivo, enviar_referencia=None, otimizar=None, mime_type=None):
+        """
+        Envia um arquivo local aproveitando o cache.
+
+        Args:
+            caminho (str): Arquivo local.
+            tipo (str): Tipo de envio (image, gif, audio, document): separa as entradas.
+            enviar_arquivo (callable): Recebe um ArquivoBase64 e devolve o dict de resultado.
+            enviar_referencia (callable, optional): Recebe a URL hospedada e devolve o dict de resultado.
+            otimizar (callable, optional): Ex: OtimizadorMidia.otimizar_imagem; usado só na primeira vez.
+            mime_type (str, optional): Tipo MIME do arquivo (detectado pela extensão se omitido).
+
+        Returns:
+            dict: Resultado do envio, com "cache" ("referencia", "acerto" ou "falha").
+        """
+        chave = self.chave(caminho, tipo)
+
+        if enviar_referencia:
+            with self._lock:
+                entrada = self._entradas.get(chave)
+                referencia = entrada.referencia if entrada else None
+
+            if referencia:
+                resultado = enviar_referencia(referencia)
+                if resultado.get("success"):
+                    with self._lock:
+                        self.uploads_evitados += 1
+                    resultado["cache"] = "referencia"
+                    return resultado
+
+                # Sem recusa clara da W-API (timeout, 5xx, conexão) o envio pode ter
+                # acontecido ou deve ser repetido inteiro: subir o arquivo agora duplicaria
+                falha = classificar_falha(resultado.get("status_code"), resultado.get("exception"))
+                if falha in (FALHA_INCERTA, FALHA_REPETIR):
+                    resultado["cache"] = "referencia"
+                    return resultado
+
+                # A URL pode ter expirado: volta ao upload normal
+                print(f"⚠️ Referência em cache recusada, reenviando arquivo: {os.path.basename(caminho)}")
+                with self._lock:
+                    if entrada:
+                        entrada.referencia = None
+
+        arquivo, economia, situacao, descartar = self._obter_arquivo(chave, caminho, otimizar, mime_type)
+        try:
+            resultado = enviar_arquivo(arquivo)
+        finally:
+            if descartar:
+                descartar()
+
+        if resultado.get("success"):
+            referencia = extrair_referencia(resultado.get("data"))
+            if referencia:
+                with self._lock:
+                    entrada = self._entradas.get(chave)
+                    if entrada:
+                        entrada.referencia = referencia
+
+        resultado["cache"] = situacao
+        if economia:
+            resultado["bytes_economizados"] = economia
+        return resultado
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "bytes_memoria": self._bytes_memoria,
+                "bytes_disco": self._bytes_disco,
+                "referencias": sum(1 for entrada in self._entradas.values() if entrada.referencia),
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "uploads_evitados": self.uploads_evitados
+            }
+
+    def limpar(self):
+        """Esvazia o cache e apaga os arquivos em disco (os que estão em uso saem ao fim do envio)"""
+        apagar = []
+        with self._lock:
+            for entrada in self._entradas.values():
+                self._liberar(entrada, apagar)
+            self._entradas.clear()
+            self._hashes.clear()
+            self._bytes_memoria = 0
+            self._bytes_disco = 0
+            pasta, criada = self._pasta_disco, self._pasta_criada
+            if criada:
+                self._pasta_disco, self._pasta_criada = None, False
+                if self._em_uso:
+                    self._pasta_apagar_depois, pasta = pasta, None
+
+        if criada and pasta:
+            shutil.rmtree(pasta, ignore_errors=True)
+        else:
+            self._apagar_arquivos(apagar)
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _sha256(caminho):
+        sha = hashlib.sha256()
+        with open(caminho, 'rb') as handle:
+            for bloco in iter(lambda: handle.read(1024 * 1024), b''):
+                sha.update(bloco)
+        return sha.hexdigest()
+
+    def _obter_arquivo(self, chave, caminho, otimizar, mime_type=None):
+        """Retorna (arquivo, bytes_economizados, situação, descartar)"""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            arquivo = entrada.arquivo() if entrada else None
+            if arquivo:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return arquivo, entrada.bytes_economizados, "acerto", self._prender(arquivo)
+            self.falhas += 1
+
+        otimizacao = otimizar(caminho) if otimizar else None
+        origem = otimizacao["caminho"] if otimizacao else caminho
+        mime_type = ((otimizacao or {}).get("mime_type") or mime_type or mimetypes.guess_type(origem)[0]
+                     or 'application/octet-stream')
+        economia = otimizacao["bytes_economizados"] if otimizacao else 0
+
+        def descartar():
+            if otimizacao and otimizacao.get("temporario"):
+                try:
+                    os.remove(otimizacao["caminho"])
+                except OSError:
+                    pass
+
+        entrada = _Entrada(mime_type, os.path.getsize(origem), economia)
+
+        if entrada.tamanho_base64 <= self.limite_memoria // 4:
+            with open(origem, 'rb') as handle:
+                entrada.dados = base64.b64encode(handle.read())
+        elif entrada.tamanho_base64 <= self.limite_disco // 4:
+            entrada.caminho_disco = self._codificar_em_disco(origem)
+
+        arquivo = entrada.arquivo()
+        if arquivo is None:
+            # Grande demais para o cache: streaming direto do arquivo, como antes
+            return ArquivoBase64(origem, mime_type), economia, "falha", descartar
+
+        descartar()
+        with self._lock:
+            soltar = self._prender(arquivo)
+            rebaixar, apagar = self._inserir(chave, entrada)
+        self._rebaixar(rebaixar)
+        self._apagar_arquivos(apagar)
+        return arquivo, economia, "falha", soltar
+
+    def _novo_arquivo_disco(self):
+        """Cria um arquivo vazio na pasta do cache (chamar com o lock)"""
+        if self._pasta_disco is None:
+            self._pasta_disco = tempfile.mkdtemp(prefix="wapi_cache_midia_")
+            self._pasta_criada = True
+        os.makedirs(self._pasta_disco, exist_ok=True)
+
+        descritor, caminho = tempfile.mkstemp(suffix=".b64", dir=self._pasta_disco)
+        os.close(descritor)
+        return caminho
+
+    def _codificar_em_disco(self, origem):
+        with self._lock:
+            destino = self._novo_arquivo_disco()
+
+        with open(destino, 'wb') as saida:
+            for bloco in ArquivoBase64(origem).blocos_base64(CorpoJsonStreaming.BLOCO):
+                saida.write(bloco)
+        return destino
+
+    def _prender(self, arquivo):
+        """Marca o arquivo em disco como em uso (chamar com o lock); retorna a função que o solta"""
+        caminho = arquivo.caminho_arquivo
+        if arquivo.dados is not None or not caminho:
+            return None
+        self._em_uso[caminho] = self._em_uso.get(caminho, 0) + 1
+        return lambda: self._soltar(caminho)
+
+    def _soltar(self, caminho):
+        apagar = []
+        pasta = None
+        with self._lock:
+            restantes = self._em_uso.get(caminho, 0) - 1
+            if restantes > 0:
+                self._em_uso[caminho] = restantes
+                return
+            self._em_uso.pop(caminho, None)
+            if caminho in self._apagar_depois:
+                self._apagar_depois.discard(caminho)
+                apagar.append(caminho)
+            if not self._em_uso and self._pasta_apagar_depois:
+                pasta, self._pasta_apagar_depois = self._pasta_apagar_depois, None
+
+        self._apagar_arquivos(apagar)
+        if pasta:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    def _inserir(self, chave, entrada):
+        """
+        Insere a entrada e aplica os limites (chamar com o lock).
+        Retorna (entradas a gravar em disco, arquivos a apagar): esse trabalho é
+        feito depois, fora do lock, por _rebaixar e _apagar_arquivos.
+        """
+        rebaixar, apagar = [], []
+
+        anterior = self._entradas.pop(chave, None)
+        if anterior:
+            entrada.referencia = entrada.referencia or anterior.referencia
+            self._liberar(anterior, apagar)
+
+        self._entradas[chave] = entrada
+        if entrada.dados is not None:
+            self._bytes_memoria += len(entrada.dados)
+        if entrada.caminho_disco:
+            self._bytes_disco += entrada.tamanho_base64
+
+        # Memória cheia: as entradas mais antigas descem para o disco
+        for outra in list(self._entradas.values()):
+            if self._bytes_memoria <= self.limite_memoria:
+                break
+            if outra.dados is not None and not outra.rebaixando and outra is not entrada:
+                self._bytes_memoria -= len(outra.dados)
+                if self.limite_disco > 0 and len(outra.dados) <= self.limite_disco // 4:
+                    outra.rebaixando = True
+                    rebaixar.append(outra)
+                else:
+                    outra.dados = None
+
+        self._aplicar_limite_disco(entrada, apagar)
+
+        while len(self._entradas) > self.MAX_ENTRADAS:
+            _, antiga = self._entradas.popitem(last=False)
+            self._liberar(antiga, apagar)
+
+        return rebaixar, apagar
+
+    def _aplicar_limite_disco(self, manter, apagar):
+        """Disco cheio: as mais antigas perdem o conteúdo (a referência continua valendo)"""
+        for outra in list(self._entradas.values()):
+            if self._bytes_disco <= self.limite_disco:
+                break
+            if outra.caminho_disco and outra is not manter:
+                self._remover_disco(outra, apagar)
+
+    def _rebaixar(self, entradas):
+        """Grava em disco (fora do lock) o base64 das entradas que saíram da memória"""
+        for entrada in entradas:
+            dados = entrada.dados
+            if dados is None or not entrada.rebaixando:
+                continue  # Liberada enquanto esperava
+
+            try:
+                with self._lock:
+                    destino = self._novo_arquivo_disco()
+                with open(destino, 'wb') as saida:
+                    saida.write(dados)
+            except OSError as e:
+                print(f"⚠️ Não foi possível gravar o cache de mídia em disco: {e}")
+                with self._lock:
+                    if entrada.rebaixando:
+                        entrada.rebaixando = False
+                        entrada.dados = None
+                continue
+
+            apagar = []
+            with self._lock:
+                if entrada.rebaixando:
+                    entrada.rebaixando = False
+                    entrada.dados = None
+                    entrada.caminho_disco = destino
+                    self._bytes_disco += len(dados)
+                    self._aplicar_limite_disco(entrada, apagar)
+                else:
+                    apagar.append(destino)  # A entrada saiu do cache durante a gravação
+            self._apagar_arquivos(apagar)
+
+    def _remover_disco(self, entrada, apagar):
+        """Desliga o arquivo da entrada (chamar com o lock); em uso, ele é apagado na liberação"""
+        caminho = entrada.caminho_disco
+        entrada.caminho_disco = None
+        self._bytes_disco -= entrada.tamanho_base64
+        if self._em_uso.get(caminho):
+            self._apagar_depois.add(caminho)
+        else:
+            apagar.append(caminho)
+
+    def _liberar(self, entrada, apagar):
+        if entrada.dados is not None:
+            if not entrada.rebaixando:
+                self._bytes_memoria -= len(entrada.dados)
+            entrada.dados = None
+        entrada.rebaixando = False
+        if entrada.caminho_disco:
+            self._remover_disco(entrada, apagar)
+
+    @staticmethod
+    def _apagar_arquivos(caminhos):
+        for caminho in caminhos:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
@@ -0,0 +1,145 @@
+import base64
+import json
+import mimetypes
+import os
+
+
+class ArquivoBase64:
+    """
+    Marca um campo do payload cujo valor é um arquivo local.
+
+    Em vez de ler o arquivo inteiro e montar a string base64 na memória,
+    o conteúdo é codificado em blocos no momento do envio (ver CorpoJsonStreaming).
+    """
+
+    def __init__(self, caminho_arquivo, mime_type=None):
+        """
+        Args:
+            caminho_arquivo (str): Caminho do arquivo local.
+            mime_type (str, optional): Tipo MIME do data URI. Detectado pela extensão se omitido.
+        """
+        self.caminho_arquivo = caminho_arquivo
+        self.mime_type = mime_type or mimetypes.guess_type(caminho_arquivo)[0] or 'application/octet-stream'
+        self.tamanho = os.path.getsize(caminho_arquivo)
+
+    @property
+    def prefixo(self):
+        """Cabeçalho do data URI (ex: data:image/jpeg;base64,)"""
+        return f"data:{self.mime_type};base64,".encode('ascii')
+
+    @property
+    def tamanho_base64(self):
+        """Tamanho exato do conteúdo codificado, sem precisar codificar"""
+        return 4 * ((self.tamanho + 2) // 3)
+
+    def blocos_base64(self, tamanho_bloco):
+        """Gera o conteúdo em base64 em blocos (tamanho_bloco deve ser múltiplo de 3)"""
+        with open(self.caminho_arquivo, 'rb') as handle:
+            while True:
+                bloco = handle.read(tamanho_bloco)
+                if not bloco:
+                    return
+                yield base64.b64encode(bloco)
+
+
+class CorpoJsonStreaming:
+    """
+    Corpo JSON file-like que gera o base64 do arquivo sob demanda.
+
+    O payload é serializado uma vez com um marcador no lugar do arquivo; no envio,
+    o prefixo do JSON, o data URI e o sufixo são entregues em blocos. Assim o pico
+    de memória fica em torno de BLOCO bytes, independente do tamanho do arquivo,
+    e o Content-Length é conhecido de antemão (sem transfer-encoding chunked).
+
+    Uso:
+        payload = {"phone": "...", "document": ArquivoBase64(caminho)}
+        requests.post(url, data=CorpoJsonStreaming(payload), headers=...)
+    """
+
+    BLOCO = 3 * 64 * 1024  # Múltiplo de 3: blocos base64 sem padding intermediário
+    _MARCADOR = "__arquivo_base64_streaming__"
+
+    def __init__(self, payload):
+        campos = [chave for chave, valor in payload.items() if isinstance(valor, ArquivoBase64)]
+        if len(campos) != 1:
+            raise ValueError("O payload deve conter exatamente um ArquivoBase64")
+
+        self.campo = campos[0]
+        self.arquivo = payload[self.campo]
+
+        serializado = json.dumps(dict(payload, **{self.campo: self._MARCADOR}), ensure_ascii=False)
+        prefixo, sufixo = serializado.split(json.dumps(self._MARCADOR), 1)
+
+        self._inicio = prefixo.encode('utf-8') + b'"' + self.arquivo.prefixo
+        self._fim = b'"' + sufixo.encode('utf-8')
+        self._tamanho_total = len(self._inicio) + self.arquivo.tamanho_base64 + len(self._fim)
+
+        self._blocos = None
+        self.seek(0)
+
+    def __len__(self):
+        return self._tamanho_total
+
+    def tell(self):
+        return self._posicao
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        """Só permite voltar ao início (necessário para reenvios/redirecionamentos)"""
+        if offset != 0 or whence != os.SEEK_SET:
+            raise OSError("CorpoJsonStreaming só suporta seek(0)")
+
+        self.close()
+        self._etapa = 0  # 0 = início do JSON, 1 = arquivo em base64, 2 = fim do JSON
+        self._buffer = self._inicio
+        self._offset = 0
+        self._posicao = 0
+        return 0
+
+    def read(self, size=-1):
+        """Lê até `size` bytes do corpo (ou tudo se size < 0)"""
+        if size is None or size < 0:
+            partes = []
+            while True:
+                parte = self.read(self.BLOCO)
+                if not parte:
+                    return b''.join(partes)
+                partes.append(parte)
+
+        # Recarrega o buffer só quando o restante não atende ao pedido
+        while len(self._buffer) - self._offset < size and self._etapa < 3:
+            self._buffer = self._buffer[self._offset:] + self._proximo_bloco()
+            self._offset = 0
+
+        dados = self._buffer[self._offset:self._offset + size]
+        self._offset += len(dados)
+        self._posicao += len(dados)
+        return dados
+
+    def _proximo_bloco(self):
+        """Avança a máquina de estados e devolve o próximo trecho do corpo"""
+        if self._etapa == 0:
+            self._blocos = self.arquivo.blocos_base64(self.BLOCO)
+            self._etapa = 1
+
+        if self._etapa == 1:
+            bloco = next(self._blocos, b'')
+            if bloco:
+                return bloco
+            self.close()
+            self._etapa = 2
+
+        if self._etapa == 2:
+            self._etapa = 3
+            return self._fim
+
+        return b''
+
+    def close(self):
+        if self._blocos:
+            self._blocos.close()
+            self._blocos = None
+
+
+def payload_possui_arquivo(payload):
+    """Indica se o payload precisa ser enviado com CorpoJsonStreaming"""
+    return any(isinstance(valor, ArquivoBase64) for valor in payload.values())
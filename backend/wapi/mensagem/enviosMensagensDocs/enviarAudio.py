@@ -1,10 +1,12 @@
 import requests
 import json
-import base64
 import os
 import mimetypes
 import tempfile
 
+from backend.wapi.mensagem.enviosMensagensDocs.corpoStreaming import ArquivoBase64, CorpoJsonStreaming, payload_possui_arquivo
+from backend.wapi.transporte import obter_transporte
+
 # Para gravação de áudio (instale com: pip install pyaudio)
 try:
     import pyaudio
@@ -19,7 +21,8 @@ except ImportError:
 class EnviaAudio:
     """Classe para enviar áudios via WhatsApp - arquivos, URLs ou gravação do microfone."""
 
-    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/message"):
+    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/message", transporte=None,
+                 otimizador=None, cache=None):
         self.instance_id = instance_id
         self.api_token = api_token
         self.base_url = base_url
@@ -27,6 +30,9 @@ class EnviaAudio:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_token}"
         }
+        self.transporte = transporte or obter_transporte(api_token)
+        self.otimizador = otimizador  # OtimizadorMidia: converte para Opus antes do upload
+        self.cache = cache  # CacheMidia: reaproveita áudios já enviados
 
     def enviar(self, phone_number, fonte_audio, **kwargs):
         """
@@ -199,18 +205,37 @@ class EnviaAudio:
             if not self._audio_valido(caminho_audio):
                 return {"success": False, "error": "Formato não suportado. Use: mp3, wav, ogg, m4a"}
 
-            # Converte para base64
-            audio_base64 = self._audio_to_base64(caminho_audio)
-            if not audio_base64:
-                return {"success": False, "error": "Erro na conversão para base64"}
+            def enviar_arquivo(audio_base64):
+                payload = {
+                    "phone": phone_number,
+                    "audio": audio_base64,
+                    "delayMessage": delay_message
+                }
+                return self._fazer_requisicao(payload)
 
-            payload = {
-                "phone": phone_number,
-                "audio": audio_base64,
-                "delayMessage": delay_message
-            }
+            otimizar = self.otimizador.otimizar_audio if self.otimizador else None
 
-            return self._fazer_requisicao(payload)
+            if self.cache:
+                return self.cache.enviar(
+                    caminho_audio, "audio", enviar_arquivo,
+                    enviar_referencia=lambda url: self._enviar_url_audio(phone_number, url, delay_message),
+                    otimizar=otimizar
+                )
+
+            otimizacao = otimizar(caminho_audio) if otimizar else None
+            try:
+                # Base64 gerado sob demanda durante a requisição
+                audio_base64 = self._audio_to_base64(otimizacao["caminho"] if otimizacao else caminho_audio)
+                if not audio_base64:
+                    return {"success": False, "error": "Erro na conversão para base64"}
+
+                resultado = enviar_arquivo(audio_base64)
+                if otimizacao:
+                    resultado["bytes_economizados"] = otimizacao["bytes_economizados"]
+                return resultado
+            finally:
+                if otimizacao:
+                    self.otimizador.descartar(otimizacao)
 
         except Exception as e:
             return {"success": False, "error": f"Erro ao processar arquivo: {str(e)}"}
@@ -222,7 +247,7 @@ class EnviaAudio:
         return ext in extensoes
 
     def _audio_to_base64(self, arquivo):
-        """Converte arquivo de áudio para base64."""
+        """Prepara arquivo de áudio para envio (base64 gerado em blocos)."""
         try:
             # Detecta MIME type
             mime_type, _ = mimetypes.guess_type(arquivo)
@@ -238,11 +263,7 @@ class EnviaAudio:
                 }
                 mime_type = mime_types.get(ext, 'audio/mpeg')
 
-            # Lê e converte
-            with open(arquivo, "rb") as f:
-                encoded = base64.b64encode(f.read()).decode('utf-8')
-
-            return f"data:{mime_type};base64,{encoded}"
+            return ArquivoBase64(arquivo, mime_type)
 
         except Exception as e:
             print(f"Erro na conversão: {e}")
@@ -254,31 +275,46 @@ class EnviaAudio:
             url = f"{self.base_url}/send-audio"
             params = {"instanceId": self.instance_id}
 
-            response = requests.post(
+            if payload_possui_arquivo(payload):
+                corpo = CorpoJsonStreaming(payload)
+            else:
+                corpo = json.dumps(payload)
+
+            response = self.transporte.post(
                 url,
                 headers=self.headers,
                 params=params,
-                data=json.dumps(payload),
-                timeout=60  # Timeout maior para áudios
+                data=corpo
             )
 
             if response.status_code == 200:
+                try:
+                    dados = response.json()
+                except ValueError:
+                    return {
+                        "success": False,
+                        "error": "HTTP 200 - Resposta inválida",
+                        "details": response.text[:200],
+                        "status_code": response.status_code
+                    }
                 return {
                     "success": True,
-                    "data": response.json(),
+                    "data": dados,
+                    "status_code": response.status_code,
                     "message": "Áudio enviado com sucesso!"
                 }
             else:
                 return {
                     "success": False,
                     "error": f"HTTP {response.status_code}",
-                    "details": response.text[:200]
+                    "details": response.text[:200],
+                    "status_code": response.status_code
                 }
 
-        except requests.exceptions.Timeout:
-            return {"success": False, "error": "Timeout - áudio muito grande?"}
-        except requests.exceptions.ConnectionError:
-            return {"success": False, "error": "Sem conexão"}
+        except requests.exceptions.Timeout as e:
+            return {"success": False, "error": "Timeout - áudio muito grande?", "exception": type(e).__name__}
+        except requests.exceptions.ConnectionError as e:
+            return {"success": False, "error": "Sem conexão", "exception": type(e).__name__}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
@@ -1,12 +1,14 @@
 import requests
 import json
 import os
-import base64
 from pathlib import Path
 
+from backend.wapi.mensagem.enviosMensagensDocs.corpoStreaming import ArquivoBase64, CorpoJsonStreaming, payload_possui_arquivo
+from backend.wapi.transporte import obter_transporte
+
 
 class EnviaDocumento:
-    def __init__(self, base_url, instance_name, api_key):
+    def __init__(self, base_url, instance_name, api_key, transporte=None, cache=None):
         """
         Inicializa a classe para envio de documentos
 
@@ -14,6 +16,8 @@ class EnviaDocumento:
             base_url (str): URL base da API
             instance_name (str): Nome da instância do WhatsApp
             api_key (str): Chave da API para autenticação
+            transporte (TransporteWAPI, optional): Pool HTTP compartilhado
+            cache (CacheMidia, optional): Reaproveita documentos já enviados
         """
         self.base_url = base_url.rstrip('/')
         self.instance_name = instance_name
@@ -22,10 +26,13 @@ class EnviaDocumento:
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {api_key}'
         }
+        self.transporte = transporte or obter_transporte(api_key)
+        self.cache = cache
 
     def enviar_arquivo_local(self, telefone, caminho_arquivo, legenda="", delay=2):
         """
-        Envia um arquivo local convertendo para Base64
+        Envia um arquivo local convertendo para Base64 em streaming
+        (o arquivo é codificado em blocos durante o envio, sem carregar tudo na memória)
 
         Args:
             telefone (str): Número do destinatário (ex: "5569993291093")
@@ -49,11 +56,6 @@ class EnviaDocumento:
             nome_arquivo = arquivo_path.name
             extensao = arquivo_path.suffix.lower().replace('.', '')  # Remove o ponto
 
-            # Ler arquivo e converter para base64
-            with open(caminho_arquivo, 'rb') as arquivo:
-                conteudo_arquivo = arquivo.read()
-                conteudo_base64 = base64.b64encode(conteudo_arquivo).decode('utf-8')
-
             # Determinar tipo MIME
             mime_types = {
                 'pdf': 'application/pdf',
@@ -78,36 +80,67 @@ class EnviaDocumento:
             # Preparar URL da API (URL correta conforme documentação)
             url = f"{self.base_url}/message/send-document?instanceId={self.instance_name}"
 
-            # Preparar payload conforme a documentação da API
-            payload = {
-                "phone": telefone,
-                "document": f"data:{mime_type};base64,{conteudo_base64}",
-                "extension": extensao,
-                "fileName": nome_arquivo,
-                "caption": legenda,
-                "delayMessage": delay
+            def enviar_arquivo(documento):
+                # Preparar payload conforme a documentação da API
+                # (documento local é lido e codificado em blocos durante o envio)
+                payload = {
+                    "phone": telefone,
+                    "document": documento,
+                    "extension": extensao,
+                    "fileName": nome_arquivo,
+                    "caption": legenda,
+                    "delayMessage": delay
+                }
+                return self._postar(url, payload, nome_arquivo, extensao)
+
+            # Mesmo documento para vários chats: base64 pronto ou só a URL hospedada
+            if self.cache:
+                return self.cache.enviar(caminho_arquivo, "document", enviar_arquivo,
+                                         enviar_referencia=enviar_arquivo, mime_type=mime_type)
+
+            return enviar_arquivo(ArquivoBase64(caminho_arquivo, mime_type))
+
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Erro geral: {str(e)}'
             }
 
-            # Log para debug
-            print(f"🔍 DEBUG INFO:")
-            print(f"URL: {url}")
-            print(f"Headers: {self.headers}")
-            print(f"Payload (sem base64): {dict(payload, document='[BASE64_DATA]')}")
-            print(f"Tamanho do Base64: {len(conteudo_base64)} caracteres")
-            print("-" * 50)
+    def _postar(self, url, payload, nome_arquivo, extensao):
+        """Envia o payload (arquivo em streaming ou URL) e monta o resultado"""
+        try:
+            documento = payload["document"]
+            if payload_possui_arquivo(payload):
+                tamanho_mb = round(documento.tamanho / (1024 * 1024), 2)
+                print(f"📤 Enviando documento: {nome_arquivo} ({tamanho_mb} MB)")
+                corpo = {"data": CorpoJsonStreaming(payload)}
+            else:
+                tamanho_mb = None
+                print(f"📤 Enviando documento já hospedado: {nome_arquivo}")
+                corpo = {"json": payload}
 
             # Fazer requisição
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = self.transporte.post(url, headers=self.headers, **corpo)
             response.raise_for_status()
 
+            try:
+                dados = response.json()
+            except ValueError:
+                return {
+                    'success': False,
+                    'error': 'Resposta não é um JSON válido',
+                    'status_code': response.status_code,
+                    'response_text': response.text[:200]
+                }
+
             return {
                 'success': True,
-                'data': response.json(),
+                'data': dados,
                 'status_code': response.status_code,
                 'arquivo_info': {
                     'nome': nome_arquivo,
                     'extensao': extensao,
-                    'tamanho_mb': round(len(conteudo_arquivo) / (1024 * 1024), 2)
+                    'tamanho_mb': tamanho_mb
                 }
             }
 
@@ -123,12 +156,8 @@ class EnviaDocumento:
                 'success': False,
                 'error': f'Erro na requisição: {str(e)}',
                 'status_code': getattr(e.response, 'status_code', None),
-                'response_text': getattr(e.response, 'text', None) if hasattr(e, 'response') else None
-            }
-        except Exception as e:
-            return {
-                'success': False,
-                'error': f'Erro geral: {str(e)}'
+                'response_text': getattr(e.response, 'text', None) if hasattr(e, 'response') else None,
+                'exception': type(e).__name__
             }
 
     def obter_info_arquivo(self, caminho_arquivo):
@@ -1,15 +1,18 @@
 import requests
 import json
-import base64
 import os
 import mimetypes
 from urllib.parse import urlparse
 
+from backend.wapi.mensagem.enviosMensagensDocs.corpoStreaming import ArquivoBase64, CorpoJsonStreaming, payload_possui_arquivo
+from backend.wapi.transporte import obter_transporte
+
 
 class EnviaGif:
     """Classe para enviar GIFs via WhatsApp usando a API W-API."""
 
-    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/message"):
+    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/message", transporte=None,
+                 otimizador=None, cache=None):
         """
         Inicializa a classe EnviaGif.
 
@@ -17,6 +20,9 @@ class EnviaGif:
             instance_id (str): ID da instância do WhatsApp.
             api_token (str): Token de autenticação da API.
             base_url (str): URL base da API.
+            transporte (TransporteWAPI, optional): Pool HTTP compartilhado.
+            otimizador (OtimizadorMidia, optional): Reduz o arquivo local antes do upload.
+            cache (CacheMidia, optional): Reaproveita a mídia já preparada/enviada antes.
         """
         self.instance_id = instance_id
         self.api_token = api_token
@@ -25,6 +31,9 @@ class EnviaGif:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_token}"
         }
+        self.transporte = transporte or obter_transporte(api_token)
+        self.otimizador = otimizador
+        self.cache = cache
 
     def enviar(self, phone_number, gif_source, caption="", delay_message=1):
         """
@@ -131,25 +140,48 @@ class EnviaGif:
                     "details": "Formatos suportados: .gif, .mp4, .mov, .avi"
                 }
 
-            # Converte para base64
-            gif_base64 = self._converter_para_base64(caminho_gif)
-            if not gif_base64:
-                return {
-                    "success": False,
-                    "error": "Erro ao converter arquivo para base64"
+            def enviar_arquivo(gif_base64):
+                payload = {
+                    "phone": phone_number,
+                    "gif": gif_base64,
+                    "delayMessage": delay_message
                 }
 
-            # Prepara payload
-            payload = {
-                "phone": phone_number,
-                "gif": gif_base64,
-                "delayMessage": delay_message
-            }
+                if caption:
+                    payload["caption"] = caption
 
-            if caption:
-                payload["caption"] = caption
+                return self._fazer_requisicao(payload)
 
-            return self._fazer_requisicao(payload)
+            # GIF de verdade não tem som: vira MP4 mudo e leve; vídeo comum mantém o áudio
+            otimizar = None
+            if self.otimizador:
+                manter_audio = not self._is_gif_animado(caminho_gif)
+                otimizar = lambda caminho: self.otimizador.otimizar_video(caminho, manter_audio=manter_audio)
+
+            if self.cache:
+                return self.cache.enviar(
+                    caminho_gif, "gif", enviar_arquivo,
+                    enviar_referencia=lambda url: self._enviar_url(phone_number, url, caption, delay_message),
+                    otimizar=otimizar
+                )
+
+            otimizacao = otimizar(caminho_gif) if otimizar else None
+            try:
+                # GIF/MP4 é lido e codificado em blocos no momento do envio
+                gif_base64 = self._converter_para_base64(otimizacao["caminho"] if otimizacao else caminho_gif)
+                if not gif_base64:
+                    return {
+                        "success": False,
+                        "error": "Erro ao preparar arquivo para base64"
+                    }
+
+                resultado = enviar_arquivo(gif_base64)
+                if otimizacao:
+                    resultado["bytes_economizados"] = otimizacao["bytes_economizados"]
+                return resultado
+            finally:
+                if otimizacao:
+                    self.otimizador.descartar(otimizacao)
 
         except Exception as e:
             return {
@@ -163,8 +195,15 @@ class EnviaGif:
         extensao = os.path.splitext(caminho_arquivo.lower())[1]
         return extensao in extensoes_validas
 
+    def _is_gif_animado(self, caminho_arquivo):
+        """Verifica se a fonte é um GIF (pela extensão ou pelo tipo MIME), e não um vídeo."""
+        if os.path.splitext(caminho_arquivo.lower())[1] == '.gif':
+            return True
+        mime_type, _ = mimetypes.guess_type(caminho_arquivo)
+        return mime_type == 'image/gif'
+
     def _converter_para_base64(self, caminho_arquivo):
-        """Converte um arquivo local para base64."""
+        """Referência do arquivo local para o corpo JSON em streaming."""
         try:
             mime_type, _ = mimetypes.guess_type(caminho_arquivo)
 
@@ -182,10 +221,7 @@ class EnviaGif:
                 else:
                     mime_type = 'video/mp4'  # Default
 
-            with open(caminho_arquivo, "rb") as arquivo:
-                encoded_string = base64.b64encode(arquivo.read()).decode('utf-8')
-
-            return f"data:{mime_type};base64,{encoded_string}"
+            return ArquivoBase64(caminho_arquivo, mime_type)
 
         except Exception as e:
             print(f"Erro ao converter arquivo para base64: {e}")
@@ -197,12 +233,16 @@ class EnviaGif:
             url = f"{self.base_url}/send-gif"
             params = {"instanceId": self.instance_id}
 
-            response = requests.post(
+            if payload_possui_arquivo(payload):
+                corpo = CorpoJsonStreaming(payload)
+            else:
+                corpo = json.dumps(payload)  # Usando data em vez de json como no exemplo
+
+            response = self.transporte.post(
                 url,
                 headers=self.headers,
                 params=params,
-                data=json.dumps(payload),  # Usando data em vez de json como no exemplo
-                timeout=30
+                data=corpo
             )
 
             print(f"Status Code: {response.status_code}")
@@ -234,20 +274,23 @@ class EnviaGif:
                     "status_code": response.status_code
                 }
 
-        except requests.exceptions.Timeout:
+        except requests.exceptions.Timeout as e:
             return {
                 "success": False,
-                "error": "Timeout - Requisição demorou muito"
+                "error": "Timeout - Requisição demorou muito",
+                "exception": type(e).__name__
             }
-        except requests.exceptions.ConnectionError:
+        except requests.exceptions.ConnectionError as e:
             return {
                 "success": False,
-                "error": "Erro de conexão - Verifique a internet"
+                "error": "Erro de conexão - Verifique a internet",
+                "exception": type(e).__name__
             }
         except requests.exceptions.RequestException as e:
             return {
                 "success": False,
-                "error": f"Erro na requisição: {str(e)}"
+                "error": f"Erro na requisição: {str(e)}",
+                "exception": type(e).__name__
             }
 
 
@@ -1,15 +1,18 @@
 import requests
 import json
-import base64
 import os
 import mimetypes
 from urllib.parse import urlparse
 
+from backend.wapi.mensagem.enviosMensagensDocs.corpoStreaming import ArquivoBase64, CorpoJsonStreaming, payload_possui_arquivo
+from backend.wapi.transporte import obter_transporte
+
 
 class EnviaImagem:
     """Classe para enviar imagens locais via WhatsApp usando a API W-API."""
 
-    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/message"):
+    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/message", transporte=None,
+                 otimizador=None, cache=None):
         """
         Inicializa a classe EnviaImagem.
 
@@ -17,6 +20,9 @@ class EnviaImagem:
             instance_id (str): ID da instância do WhatsApp.
             api_token (str): Token de autenticação da API.
             base_url (str): URL base da API.
+            transporte (TransporteWAPI, optional): Pool HTTP compartilhado.
+            otimizador (OtimizadorMidia, optional): Reduz o arquivo local antes do upload.
+            cache (CacheMidia, optional): Reaproveita a mídia já preparada/enviada antes.
         """
         self.instance_id = instance_id
         self.api_token = api_token
@@ -25,6 +31,9 @@ class EnviaImagem:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_token}"
         }
+        self.transporte = transporte or obter_transporte(api_token)
+        self.otimizador = otimizador
+        self.cache = cache
 
     def enviar(self, phone_number, caminho_imagem, caption="", delay_message=1):
         """
@@ -95,25 +104,46 @@ class EnviaImagem:
                     "details": "Formatos suportados: jpg, jpeg, png, gif, webp"
                 }
 
-            # Converte para base64
-            image_base64 = self._converter_para_base64(caminho_imagem)
-            if not image_base64:
-                return {
-                    "success": False,
-                    "error": "Erro ao converter imagem para base64"
+            def enviar_arquivo(image_base64):
+                payload = {
+                    "phone": phone_number,
+                    "image": image_base64,
+                    "delayMessage": delay_message
                 }
 
-            # Prepara payload
-            payload = {
-                "phone": phone_number,
-                "image": image_base64,
-                "delayMessage": delay_message
-            }
+                if caption:
+                    payload["caption"] = caption
 
-            if caption:
-                payload["caption"] = caption
+                return self._fazer_requisicao(payload)
 
-            return self._fazer_requisicao(payload)
+            otimizar = self.otimizador.otimizar_imagem if self.otimizador else None
+
+            # Imagem já enviada antes: base64 pronto ou só a URL hospedada pela W-API
+            if self.cache:
+                return self.cache.enviar(
+                    caminho_imagem, "image", enviar_arquivo,
+                    enviar_referencia=lambda url: self._enviar_url(phone_number, url, caption, delay_message),
+                    otimizar=otimizar
+                )
+
+            # Reduz a imagem antes do upload (cópia temporária; o original não muda)
+            otimizacao = otimizar(caminho_imagem) if otimizar else None
+            try:
+                # Prepara a imagem para base64 (codificada só no envio)
+                image_base64 = self._converter_para_base64(otimizacao["caminho"] if otimizacao else caminho_imagem)
+                if not image_base64:
+                    return {
+                        "success": False,
+                        "error": "Erro ao preparar imagem para base64"
+                    }
+
+                resultado = enviar_arquivo(image_base64)
+                if otimizacao:
+                    resultado["bytes_economizados"] = otimizacao["bytes_economizados"]
+                return resultado
+            finally:
+                if otimizacao:
+                    self.otimizador.descartar(otimizacao)
 
         except Exception as e:
             return {
@@ -148,17 +178,14 @@ class EnviaImagem:
         return extensao in extensoes_validas
 
     def _converter_para_base64(self, caminho_imagem):
-        """Converte uma imagem local para base64."""
+        """Prepara a imagem local para envio em base64 via streaming."""
         try:
             mime_type, _ = mimetypes.guess_type(caminho_imagem)
             if not mime_type or not mime_type.startswith('image/'):
                 # Default para JPEG se não conseguir detectar
                 mime_type = 'image/jpeg'
 
-            with open(caminho_imagem, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-
-            return f"data:{mime_type};base64,{encoded_string}"
+            return ArquivoBase64(caminho_imagem, mime_type)
 
         except Exception as e:
             print(f"Erro ao converter imagem para base64: {e}")
@@ -170,12 +197,16 @@ class EnviaImagem:
             url = f"{self.base_url}/send-image"
             params = {"instanceId": self.instance_id}
 
-            response = requests.post(
+            if payload_possui_arquivo(payload):
+                corpo = {"data": CorpoJsonStreaming(payload)}
+            else:
+                corpo = {"json": payload}
+
+            response = self.transporte.post(
                 url,
                 headers=self.headers,
-                json=payload,
                 params=params,
-                timeout=30
+                **corpo
             )
 
             try:
@@ -204,19 +235,22 @@ class EnviaImagem:
                     "status_code": response.status_code
                 }
 
-        except requests.exceptions.Timeout:
+        except requests.exceptions.Timeout as e:
             return {
                 "success": False,
-                "error": "Timeout - Requisição demorou muito"
+                "error": "Timeout - Requisição demorou muito",
+                "exception": type(e).__name__
             }
-        except requests.exceptions.ConnectionError:
+        except requests.exceptions.ConnectionError as e:
             return {
                 "success": False,
-                "error": "Erro de conexão - Verifique a internet"
+                "error": "Erro de conexão - Verifique a internet",
+                "exception": type(e).__name__
             }
         except requests.exceptions.RequestException as e:
             return {
                 "success": False,
-                "error": f"Erro na requisição: {str(e)}"
+                "error": f"Erro na requisição: {str(e)}",
+                "exception": type(e).__name__
             }
 
@@ -1,6 +1,7 @@
 import requests
 import json
 import logging
+from backend.wapi.transporte import obter_transporte
 
 # Configuração de logging para melhor depuração
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -8,7 +9,7 @@ logger = logging.getLogger(__name__)
 
 
 class EnviaTexto:
-    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/"):
+    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/", transporte=None):
         """
         Inicializa a classe WhatsAppAPI para interagir com a API W-API do WhatsApp
 
@@ -16,6 +17,7 @@ class EnviaTexto:
             instance_id (str): ID da instância do WhatsApp
             api_token (str): Token de autenticação da API
             base_url (str): URL base da API
+            transporte (TransporteWAPI, optional): Pool HTTP compartilhado
         """
         self.instance_id = instance_id
         self.api_token = api_token
@@ -24,6 +26,7 @@ class EnviaTexto:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_token}"
         }
+        self.transporte = transporte or obter_transporte(api_token)
 
     def envia_mensagem_texto(self, phone_number, message, delay_message=1):
         """
@@ -47,7 +50,7 @@ class EnviaTexto:
 
         try:
             logger.info(f"Enviando mensagem para {phone_number}")
-            response = requests.post(url, headers=self.headers, json=payload)
+            response = self.transporte.post(url, headers=self.headers, json=payload)
             response.raise_for_status()
 
             try:
@@ -60,7 +63,8 @@ class EnviaTexto:
                 return {
                     "success": False,
                     "error": "Resposta não é um JSON válido",
-                    "response_text": response.text
+                    "response_text": response.text,
+                    "status_code": response.status_code
                 }
 
         except requests.exceptions.HTTPError as e:
@@ -68,7 +72,7 @@ class EnviaTexto:
             return {"success": False, "error": f"Erro HTTP: {e}", "status_code": e.response.status_code}
         except requests.exceptions.RequestException as e:
             logger.error(f"Erro de requisição: {e}")
-            return {"success": False, "error": f"Erro de requisição: {e}"}
+            return {"success": False, "error": f"Erro de requisição: {e}", "exception": type(e).__name__}
 
     def check_connection_status(self, api_token=None, id_instance=None):
         """Verifica status da conexão W-API"""
@@ -85,7 +89,7 @@ class EnviaTexto:
                 'instanceId': id_instance
             }
 
-            response = requests.get(
+            response = self.transporte.get(
                 f"{self.base_url}/v1/instance/status-instance",
                 headers=headers,
                 params=params,
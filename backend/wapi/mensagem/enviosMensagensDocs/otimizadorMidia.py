@@ -0,0 +1,244 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+# Para redimensionar/recomprimir imagens (instale com: pip install pillow)
+try:
+    from PIL import Image, ImageOps
+
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    print("⚠️  Pillow não encontrado. Imagens serão enviadas sem otimização: pip install pillow")
+
+FFMPEG_PATH = shutil.which("ffmpeg")
+FFMPEG_AVAILABLE = FFMPEG_PATH is not None
+
+
+class OtimizadorMidia:
+    """
+    Reduz mídias locais antes do upload para a W-API.
+
+    O WhatsApp recomprime tudo que recebe (imagens ficam com ~1600px no maior
+    lado, áudios de voz viram Opus), então enviar o arquivo original só gasta
+    banda de subida. Este estágio gera uma cópia temporária já no formato que o
+    WhatsApp vai entregar:
+
+        - Imagens: redimensiona para `max_dimensao` e recodifica em JPEG/WebP (Pillow)
+        - Áudio: converte para Opus em contêiner OGG (ffmpeg)
+        - GIF/vídeo: converte para MP4 H.264 com altura e bitrate limitados (ffmpeg)
+
+    Sem Pillow/ffmpeg, ou se a versão otimizada não ficar menor, o arquivo
+    original é usado. Nunca altera o arquivo do usuário.
+
+    Uso:
+        otimizador = OtimizadorMidia()
+        resultado = otimizador.otimizar_imagem("/fotos/IMG_0001.jpg")
+        try:
+            ...envia resultado["caminho"] com resultado["mime_type"]...
+        finally:
+            otimizador.descartar(resultado)
+    """
+
+    # Arquivos menores que isso já estão bons o bastante; recodificar só perderia qualidade
+    TAMANHO_MINIMO = 150 * 1024
+    TIMEOUT_FFMPEG = 300
+
+    def __init__(self, max_dimensao=1600, qualidade=80, formato_imagem="JPEG", bitrate_audio="32k",
+                 altura_max_video=720, bitrate_video="1M", pasta_temp=None):
+        """
+        Args:
+            max_dimensao (int): Maior lado permitido para imagens, em pixels.
+            qualidade (int): Qualidade JPEG/WebP (1-100).
+            formato_imagem (str): "JPEG" ou "WEBP".
+            bitrate_audio (str): Bitrate do Opus (ex: "32k" para voz).
+            altura_max_video (int): Altura máxima de GIFs/vídeos.
+            bitrate_video (str): Bitrate máximo de vídeo (ex: "1M").
+            pasta_temp (str, optional): Onde gravar as cópias otimizadas.
+        """
+        self.max_dimensao = max_dimensao
+        self.qualidade = qualidade
+        self.formato_imagem = formato_imagem.upper()
+        self.bitrate_audio = bitrate_audio
+        self.altura_max_video = altura_max_video
+        self.bitrate_video = bitrate_video
+        self.pasta_temp = pasta_temp
+
+        self._lock = threading.Lock()
+        self.total_arquivos = 0
+        self.total_otimizados = 0
+        self.bytes_originais = 0
+        self.bytes_enviados = 0
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def otimizar_imagem(self, caminho, mime_type=None):
+        """Retorna o resultado da otimização de uma imagem (ver _resultado)"""
+        if not PIL_AVAILABLE or os.path.getsize(caminho) < self.TAMANHO_MINIMO:
+            return self._registrar(caminho, mime_type)
+
+        extensao = ".webp" if self.formato_imagem == "WEBP" else ".jpg"
+        destino = self._arquivo_temporario(extensao)
+
+        try:
+            with Image.open(caminho) as imagem:
+                # GIF/WebP animados perderiam a animação
+                if getattr(imagem, "is_animated", False):
+                    os.remove(destino)
+                    return self._registrar(caminho, mime_type)
+
+                imagem = ImageOps.exif_transpose(imagem)
+                imagem.thumbnail((self.max_dimensao, self.max_dimensao), Image.LANCZOS)
+
+                if imagem.mode in ("RGBA", "LA", "P"):
+                    imagem = imagem.convert("RGBA")
+                    if self.formato_imagem == "JPEG":
+                        # JPEG não tem transparência: aplica sobre fundo branco
+                        fundo = Image.new("RGB", imagem.size, (255, 255, 255))
+                        fundo.paste(imagem, mask=imagem.getchannel("A"))
+                        imagem = fundo
+                elif imagem.mode != "RGB":
+                    imagem = imagem.convert("RGB")
+
+                opcoes = {"quality": self.qualidade, "optimize": True}
+                if self.formato_imagem == "JPEG":
+                    opcoes["progressive"] = True
+                imagem.save(destino, self.formato_imagem, **opcoes)
+
+        except Exception as e:
+            print(f"⚠️ Não foi possível otimizar a imagem {os.path.basename(caminho)}: {e}")
+            self._remover(destino)
+            return self._registrar(caminho, mime_type)
+
+        novo_mime = "image/webp" if self.formato_imagem == "WEBP" else "image/jpeg"
+        return self._registrar(caminho, mime_type, destino, novo_mime)
+
+    def otimizar_audio(self, caminho, mime_type=None):
+        """Converte o áudio para Opus (o formato das mensagens de voz do WhatsApp)"""
+        if caminho.lower().endswith((".ogg", ".opus")):
+            return self._registrar(caminho, mime_type)
+
+        destino = self._arquivo_temporario(".ogg")
+        argumentos = ["-vn", "-ac", "1", "-c:a", "libopus", "-b:a", self.bitrate_audio,
+                      "-application", "voip"]
+        if not self._ffmpeg(caminho, destino, argumentos):
+            return self._registrar(caminho, mime_type)
+
+        return self._registrar(caminho, mime_type, destino, "audio/ogg")
+
+    def otimizar_video(self, caminho, mime_type=None, manter_audio=True):
+        """
+        Converte GIF/vídeo para MP4 H.264 com altura e bitrate limitados.
+
+        Args:
+            manter_audio (bool): False para GIFs (o WhatsApp os reproduz sem som).
+        """
+        destino = self._arquivo_temporario(".mp4")
+        argumentos = [
+            "-vf", f"scale=-2:'min({self.altura_max_video},ih)':flags=lanczos,format=yuv420p",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",
+            "-maxrate", self.bitrate_video, "-bufsize", "2M",
+            "-movflags", "+faststart"
+        ]
+        argumentos += ["-c:a", "aac", "-b:a", "96k"] if manter_audio else ["-an"]
+
+        if not self._ffmpeg(caminho, destino, argumentos):
+            return self._registrar(caminho, mime_type)
+
+        return self._registrar(caminho, mime_type, destino, "video/mp4")
+
+    def descartar(self, resultado):
+        """Remove a cópia temporária gerada (se houver)"""
+        if resultado and resultado.get("temporario"):
+            self._remover(resultado["caminho"])
+
+    def estatisticas(self):
+        """Totais acumulados desde a criação do otimizador"""
+        with self._lock:
+            return {
+                "arquivos": self.total_arquivos,
+                "otimizados": self.total_otimizados,
+                "bytes_originais": self.bytes_originais,
+                "bytes_enviados": self.bytes_enviados,
+                "bytes_economizados": self.bytes_originais - self.bytes_enviados
+            }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _arquivo_temporario(self, extensao):
+        descritor, caminho = tempfile.mkstemp(prefix="wapi_", suffix=extensao, dir=self.pasta_temp)
+        os.close(descritor)
+        return caminho
+
+    @staticmethod
+    def _remover(caminho):
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+    def _ffmpeg(self, origem, destino, argumentos):
+        """Executa o ffmpeg; retorna False (e apaga o destino) se não estiver disponível ou falhar"""
+        if not FFMPEG_AVAILABLE or os.path.getsize(origem) < self.TAMANHO_MINIMO:
+            self._remover(destino)
+            return False
+
+        comando = [FFMPEG_PATH, "-y", "-hide_banner", "-loglevel", "error", "-i", origem] + argumentos + [destino]
+        try:
+            processo = subprocess.run(comando, capture_output=True, timeout=self.TIMEOUT_FFMPEG)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"⚠️ ffmpeg falhou para {os.path.basename(origem)}: {e}")
+            self._remover(destino)
+            return False
+
+        if processo.returncode != 0:
+            erro = processo.stderr.decode("utf-8", "replace").strip()[-200:]
+            print(f"⚠️ ffmpeg falhou para {os.path.basename(origem)}: {erro}")
+            self._remover(destino)
+            return False
+
+        return True
+
+    def _registrar(self, original, mime_original, otimizado=None, mime_otimizado=None):
+        """
+        Monta o resultado e acumula as estatísticas. A cópia otimizada só é
+        usada se for menor que o original; caso contrário é descartada.
+
+        Returns:
+            dict: caminho, mime_type, temporario, bytes_originais, bytes_enviados, bytes_economizados
+        """
+        tamanho_original = os.path.getsize(original)
+        caminho, mime_type, temporario = original, mime_original, False
+
+        if otimizado:
+            if os.path.getsize(otimizado) < tamanho_original:
+                caminho, mime_type, temporario = otimizado, mime_otimizado, True
+            else:
+                self._remover(otimizado)
+
+        tamanho_enviado = os.path.getsize(caminho)
+
+        with self._lock:
+            self.total_arquivos += 1
+            self.total_otimizados += int(temporario)
+            self.bytes_originais += tamanho_original
+            self.bytes_enviados += tamanho_enviado
+
+        if temporario:
+            print(f"🗜️ {os.path.basename(original)}: {tamanho_original / 1024:.0f} KB → "
+                  f"{tamanho_enviado / 1024:.0f} KB")
+
+        return {
+            "caminho": caminho,
+            "mime_type": mime_type,
+            "temporario": temporario,
+            "bytes_originais": tamanho_original,
+            "bytes_enviados": tamanho_enviado,
+            "bytes_economizados": tamanho_original - tamanho_enviado
+        }
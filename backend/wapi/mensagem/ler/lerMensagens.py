@@ -1,5 +1,8 @@
 import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
+from backend.wapi.transporte import obter_transporte
 
 
 class LerMensagem:
@@ -7,13 +10,19 @@ class LerMensagem:
     Classe para marcar mensagens como lidas usando a API W-API.
     """
 
-    def __init__(self, instance_id: str, token: str):
+    MARCAR_SOMENTE_MAIS_RECENTE = True  # Ler a mais nova marca as anteriores do chat
+    MAX_CONCORRENTES = 8
+    ATRASO_LOTE = 1.0  # segundos acumulando confirmações em agendar_leitura()
+    MAX_CONFIRMADAS_POR_CHAT = 5000
+
+    def __init__(self, instance_id: str, token: str, transporte=None):
         """
         Inicializa a classe com as credenciais da API.
 
         Args:
             instance_id (str): ID da instância do WhatsApp
             token (str): Token de autorização da API
+            transporte (TransporteWAPI, optional): Pool HTTP compartilhado
         """
         self.instance_id = instance_id
         self.token = token
@@ -22,6 +31,13 @@ class LerMensagem:
             'Content-Type': 'application/json',
             'Authorization': f'Bearer {token}'
         }
+        self.transporte = transporte or obter_transporte(token)
+
+        # IDs já confirmados por chat (evita reenviar ao reabrir a conversa)
+        self._confirmadas: Dict[str, set] = {}
+        self._lote: Dict[str, List[str]] = {}
+        self._timer_lote = None
+        self._lock = threading.Lock()
 
     def marcar_como_lida(self, phone: str, message_id: str) -> Dict[str, Any]:
         """
@@ -43,7 +59,7 @@ class LerMensagem:
         }
 
         try:
-            response = requests.post(url, json=data, headers=self.headers)
+            response = self.transporte.post(url, json=data, headers=self.headers)
 
             if response.status_code == 200:
                 return {
@@ -78,13 +94,17 @@ class LerMensagem:
         """
         Marca múltiplas mensagens como lidas de uma vez.
 
+        As mensagens são agrupadas por chat (na ordem recebida, a última de cada
+        chat é a mais recente) e os chats são processados em paralelo.
+
         Args:
             mensagens (list): Lista de dicionários com 'phone' e 'message_id'
 
         Returns:
-            list: Lista com os resultados de cada marcação
+            list: Lista com os resultados de cada marcação enviada
         """
         resultados = []
+        por_chat: Dict[str, List[str]] = {}
 
         for mensagem in mensagens:
             phone = mensagem.get('phone')
@@ -98,30 +118,119 @@ class LerMensagem:
                 })
                 continue
 
-            resultado = self.marcar_como_lida(phone, message_id)
-            resultado["dados_entrada"] = mensagem
+            por_chat.setdefault(phone, []).append(message_id)
+
+        pedidos = []
+        for phone, message_ids in por_chat.items():
+            pedidos.extend(self._pedidos_da_conversa(phone, message_ids))
+
+        for resultado in self._enviar_em_paralelo(pedidos):
+            resultado["dados_entrada"] = {"phone": resultado["phone"], "message_id": resultado["message_id"]}
             resultados.append(resultado)
 
         return resultados
 
-    def marcar_conversa_como_lida(self, phone: str, message_ids: List[str]) -> List[Dict[str, Any]]:
+    def marcar_conversa_como_lida(self, phone: str, message_ids: List[str],
+                                  somente_mais_recente: Optional[bool] = None) -> List[Dict[str, Any]]:
         """
         Marca todas as mensagens de uma conversa como lidas.
 
+        Com `somente_mais_recente` (padrão da classe), só a última mensagem é
+        confirmada: no WhatsApp, ler a mensagem mais nova marca as anteriores do
+        chat como lidas. Mensagens já confirmadas antes não são reenviadas, então
+        reabrir o chat não gera requisições.
+
         Args:
             phone (str): Número do telefone
-            message_ids (list): Lista de IDs das mensagens
+            message_ids (list): IDs das mensagens em ordem cronológica
+            somente_mais_recente (bool, optional): Confirma só a última mensagem
 
         Returns:
-            list: Lista com os resultados de cada marcação
+            list: Lista com os resultados de cada marcação enviada
         """
-        resultados = []
-
+        pedidos = self._pedidos_da_conversa(phone, message_ids, somente_mais_recente)
+        return self._enviar_em_paralelo(pedidos)
+
+    def ja_confirmada(self, phone: str, message_id: str) -> bool:
+        """Indica se a confirmação de leitura desta mensagem já foi enviada"""
+        with self._lock:
+            return message_id in self._confirmadas.get(phone, ())
+
+    def _registrar_confirmadas(self, phone: str, message_ids: List[str]):
+        with self._lock:
+            confirmadas = self._confirmadas.setdefault(phone, set())
+            confirmadas.update(message_ids)
+            if len(confirmadas) > self.MAX_CONFIRMADAS_POR_CHAT:
+                # Conjunto só serve para deduplicar; recomeça em vez de crescer sem limite
+                confirmadas.clear()
+                confirmadas.update(message_ids)
+
+    def _pedidos_da_conversa(self, phone: str, message_ids: List[str],
+                             somente_mais_recente: Optional[bool] = None) -> List[Dict[str, Any]]:
+        """Reduz os IDs de um chat às confirmações que ainda precisam ser enviadas"""
+        if somente_mais_recente is None:
+            somente_mais_recente = self.MARCAR_SOMENTE_MAIS_RECENTE
+
+        vistos = set()
+        pendentes = []
         for message_id in message_ids:
-            resultado = self.marcar_como_lida(phone, message_id)
-            resultados.append(resultado)
+            if message_id and message_id not in vistos and not self.ja_confirmada(phone, message_id):
+                vistos.add(message_id)
+                pendentes.append(message_id)
 
-        return resultados
+        if not pendentes:
+            return []
+
+        if somente_mais_recente:
+            # A mais recente cobre todas as anteriores do mesmo chat
+            return [{"phone": phone, "message_id": pendentes[-1], "cobre": pendentes}]
+
+        return [{"phone": phone, "message_id": message_id, "cobre": [message_id]} for message_id in pendentes]
+
+    def _enviar_em_paralelo(self, pedidos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Envia as confirmações concorrentemente pelo pool de conexões"""
+        if not pedidos:
+            return []
+
+        def enviar(pedido):
+            resultado = self.marcar_como_lida(pedido["phone"], pedido["message_id"])
+            resultado["mensagens_cobertas"] = len(pedido["cobre"])
+            if resultado.get("sucesso"):
+                self._registrar_confirmadas(pedido["phone"], pedido["cobre"])
+            return resultado
+
+        if len(pedidos) == 1:
+            return [enviar(pedidos[0])]
+
+        with ThreadPoolExecutor(max_workers=min(self.MAX_CONCORRENTES, len(pedidos))) as executor:
+            return list(executor.map(enviar, pedidos))
+
+    def agendar_leitura(self, phone: str, message_ids: List[str]):
+        """
+        Acumula confirmações de leitura e envia todas juntas após `ATRASO_LOTE`
+        segundos. Chamadas seguidas para o mesmo chat (ex: mensagens chegando uma
+        a uma com o chat aberto) viram uma única requisição.
+        """
+        with self._lock:
+            self._lote.setdefault(phone, []).extend(message_ids)
+            if self._timer_lote is None:
+                self._timer_lote = threading.Timer(self.ATRASO_LOTE, self.enviar_lote)
+                self._timer_lote.daemon = True
+                self._timer_lote.start()
+
+    def enviar_lote(self) -> List[Dict[str, Any]]:
+        """Envia imediatamente as confirmações acumuladas por agendar_leitura()"""
+        with self._lock:
+            lote, self._lote = self._lote, {}
+            if self._timer_lote is not None:
+                self._timer_lote.cancel()
+                self._timer_lote = None
+
+        pedidos = []
+        for phone, message_ids in lote.items():
+            pedidos.extend(self._pedidos_da_conversa(phone, message_ids))
+
+        return self._enviar_em_paralelo(pedidos)
 
     def obter_estatisticas(self, resultados: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -1,15 +1,17 @@
 import requests
 import json
+from backend.wapi.transporte import obter_transporte
 
 
 class EnviarReacao:
-    def __init__(self, instance_id, token):
+    def __init__(self, instance_id, token, transporte=None):
         """
         Inicializa o enviador de reações
 
         Args:
             instance_id (str): ID da instância do WhatsApp
             token (str): Token de autorização da API
+            transporte (TransporteWAPI, optional): Pool HTTP compartilhado
         """
         self.instance_id = instance_id
         self.token = token
@@ -18,6 +20,7 @@ class EnviarReacao:
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
+        self.transporte = transporte or obter_transporte(token)
 
     def enviar_reacao(self, phone, message_id, reaction, delay=0):
         """
@@ -47,7 +50,7 @@ class EnviarReacao:
             payload["delayMessage"] = delay
 
         try:
-            response = requests.post(
+            response = self.transporte.post(
                 self.base_url,
                 headers=self.headers,
                 params=params,
@@ -1,6 +1,7 @@
 import requests
 import json
 from typing import Optional, Dict, Any
+from backend.wapi.transporte import obter_transporte
 
 
 class RemoverReacao:
@@ -8,13 +9,14 @@ class RemoverReacao:
     Classe para remover reações de mensagens usando a API W-API.
     """
 
-    def __init__(self, instance_id: str, token: str):
+    def __init__(self, instance_id: str, token: str, transporte=None):
         """
         Inicializa a classe com as credenciais da API.
 
         Args:
             instance_id (str): ID da instância do WhatsApp
             token (str): Token de autorização da API
+            transporte (TransporteWAPI, optional): Pool HTTP compartilhado
         """
         self.instance_id = instance_id
         self.token = token
@@ -23,6 +25,7 @@ class RemoverReacao:
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json"
         }
+        self.transporte = transporte or obter_transporte(token)
 
     def remover_reacao(self, phone: str, message_id: str, delay_message: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -53,7 +56,7 @@ class RemoverReacao:
 
         try:
             # Fazer a requisição
-            response = requests.post(
+            response = self.transporte.post(
                 url,
                 headers=self.headers,
                 params=params,
@@ -0,0 +1,170 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+OPERACOES_SUPORTADAS = ("delete", "edit", "react", "unreact")
+STATUS_TRANSITORIOS = {429, 500, 502, 503, 504}
+ERROS_TRANSITORIOS = ("timeout", "conexão", "conexao", "sem conexão", "erro na requisição", "erro de requisição")
+# Operações feitas com método idempotente (DELETE): o Retry do TransporteWAPI já as repete
+# em 429/5xx/timeout; repetir aqui também multiplicaria as chamadas contra o limite da W-API
+OPERACOES_REPETIDAS_PELO_TRANSPORTE = ("delete",)
+
+
+def _normalizar_resultado(resultado):
+    """
+    Os endpoints devolvem formatos diferentes ("success"/"error", "sucesso"/"erro"
+    ou o JSON cru da API). Retorna (sucesso, erro, status_code).
+    """
+    if not isinstance(resultado, dict):
+        return bool(resultado), None if resultado else "Resposta vazia da API", None
+
+    status_code = resultado.get("status_code")
+
+    if "success" in resultado:
+        sucesso = bool(resultado["success"])
+    elif "sucesso" in resultado:
+        sucesso = bool(resultado["sucesso"])
+    else:
+        # JSON cru da API: só há erro se a chave "erro" estiver presente
+        sucesso = "erro" not in resultado
+
+    erro = None
+    if not sucesso:
+        erro = str(resultado.get("error") or resultado.get("erro") or resultado.get("mensagem") or "Falha na operação")
+        if status_code is None and erro.startswith("HTTP "):
+            try:
+                status_code = int(erro.split()[1])
+            except (IndexError, ValueError):
+                pass
+
+    return sucesso, erro, status_code
+
+
+def _falha_transitoria(erro, status_code):
+    if status_code in STATUS_TRANSITORIOS:
+        return True
+    return bool(erro) and any(trecho in erro.lower() for trecho in ERROS_TRANSITORIOS)
+
+
+class ExecutorOperacoesLote:
+    """
+    Executa em paralelo operações sobre mensagens já enviadas (apagar, editar,
+    reagir, remover reação), com limite de concorrência e novas tentativas
+    para falhas transitórias (timeout, conexão, 429, 5xx). Apagar usa DELETE,
+    que o transporte já repete: para ela há uma única camada de tentativas.
+
+    Todas as operações são idempotentes do ponto de vista do WhatsApp (apagar,
+    editar para o mesmo texto ou reagir com o mesmo emoji duas vezes dá o mesmo
+    resultado), então repetir é seguro mesmo para os POSTs.
+
+    Uso:
+        executor = ExecutorOperacoesLote(whatsapp_api)
+        resultados = executor.executar([
+            ("delete", "5569...", "ID1", {}),
+            ("edit", "5569...", "ID2", {"text": "novo texto"}),
+            ("react", "5569...", "ID3", {"reaction": "👍"}),
+        ])
+    """
+
+    def __init__(self, api, max_concorrentes=8, tentativas=3, backoff=0.5):
+        """
+        Args:
+            api (WhatsAppAPI): Cliente configurado (pool de conexões compartilhado).
+            max_concorrentes (int): Operações simultâneas.
+            tentativas (int): Tentativas por operação em falhas transitórias (exceto as repetidas pelo transporte).
+            backoff (float): Espera base entre tentativas (dobra a cada nova tentativa).
+        """
+        self.api = api
+        self.max_concorrentes = max_concorrentes
+        self.tentativas = tentativas
+        self.backoff = backoff
+
+    def _chamar(self, operacao, chat_id, message_id, args):
+        if operacao == "delete":
+            return self.api.deleta_mensagem(chat_id, message_id)
+        if operacao == "edit":
+            return self.api.editar_mensagem(chat_id, message_id, args["text"])
+        if operacao == "react":
+            return self.api.enviar_reacao(chat_id, message_id, reaction=args["reaction"], delay=args.get("delay", 0))
+        if operacao == "unreact":
+            return self.api.removerReacao(chat_id, message_id, args.get("delay"))
+        raise ValueError(f"Operação não suportada: {operacao}")
+
+    def _executar_uma(self, item):
+        operacao, chat_id, message_id, args = item
+        args = args or {}
+        resultado = {
+            "operation": operacao,
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "args": args,
+            "success": False,
+            "error": None,
+            "status_code": None,
+            "attempts": 0,
+            "data": None
+        }
+
+        if operacao not in OPERACOES_SUPORTADAS:
+            resultado["error"] = f"Operação não suportada: {operacao}"
+            return resultado
+        if not chat_id or not message_id:
+            resultado["error"] = "chat_id e message_id são obrigatórios"
+            return resultado
+
+        tentativas = 1 if operacao in OPERACOES_REPETIDAS_PELO_TRANSPORTE else self.tentativas
+
+        for tentativa in range(1, tentativas + 1):
+            resultado["attempts"] = tentativa
+            try:
+                resposta = self._chamar(operacao, chat_id, message_id, args)
+                sucesso, erro, status_code = _normalizar_resultado(resposta)
+            except KeyError as e:
+                resultado["error"] = f"Argumento obrigatório ausente: {e}"
+                return resultado
+            except Exception as e:
+                resposta, sucesso, erro, status_code = None, False, f"Erro de requisição: {e}", None
+
+            resultado.update(success=sucesso, error=erro, status_code=status_code, data=resposta)
+
+            if sucesso or not _falha_transitoria(erro, status_code) or tentativa == tentativas:
+                break
+
+            time.sleep(self.backoff * 2 ** (tentativa - 1))
+
+        return resultado
+
+    def executar(self, operacoes, callback=None):
+        """
+        Executa as operações e devolve os resultados na mesma ordem da entrada.
+        Bloqueante: chame de uma thread de trabalho, nunca da thread da UI.
+
+        Args:
+            operacoes (list): Tuplas (operação, chat_id, message_id, args).
+            callback (callable, optional): Chamado com cada resultado assim que fica pronto.
+        """
+        operacoes = list(operacoes)
+        if not operacoes:
+            return []
+
+        def executar_e_avisar(item):
+            resultado = self._executar_uma(item)
+            if callback:
+                callback(resultado)
+            return resultado
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concorrentes, len(operacoes)),
+                                thread_name_prefix="operacoes") as executor:
+            return list(executor.map(executar_e_avisar, operacoes))
+
+    @staticmethod
+    def resumo(resultados):
+        sucessos = sum(1 for r in resultados if r["success"])
+        return {
+            "total": len(resultados),
+            "sucessos": sucessos,
+            "falhas": len(resultados) - sucessos,
+            "erros": [
+                {"operation": r["operation"], "message_id": r["message_id"], "error": r["error"]}
+                for r in resultados if not r["success"]
+            ]
+        }
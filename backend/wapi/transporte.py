@@ -0,0 +1,175 @@
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# (timeout de conexão, timeout de leitura) em segundos, pelo último trecho da URL
+TIMEOUTS_PADRAO = {
+    "status": (3.05, 5),
+    "status-instance": (3.05, 5),
+    "send-text": (5, 15),
+    "read-message": (5, 10),
+    "send-reaction": (5, 15),
+    "remove-reaction": (5, 15),
+    "edit-message": (5, 15),
+    "delete-message": (5, 15),
+    "send-image": (5, 60),
+    "send-audio": (5, 90),
+    "send-gif": (5, 120),
+    "send-document": (5, 120),
+}
+TIMEOUT_PADRAO = (5, 30)
+
+# Só métodos idempotentes são repetidos após resposta de erro ou falha de leitura.
+# Um POST repetido poderia duplicar a mensagem no WhatsApp do destinatário.
+METODOS_IDEMPOTENTES = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+STATUS_REPETIVEIS = (429, 500, 502, 503, 504)
+
+# Desfecho de um POST que falhou (ver classificar_falha)
+FALHA_REPETIR = "repetir"  # Não chegou à W-API ou foi recusado por limite: pode reenviar
+FALHA_INCERTA = "incerta"  # A W-API pode ter aceitado: reenviar duplicaria a mensagem
+FALHA_DEFINITIVA = "definitiva"  # Recusado pela W-API (4xx) ou requisição inválida
+
+
+class TransporteWAPI:
+    """
+    Camada HTTP compartilhada pelas classes de endpoint da W-API.
+
+    Mantém uma requests.Session com pool de conexões keep-alive (sem novo
+    handshake TLS a cada chamada), aplica timeout por endpoint e repete
+    automaticamente chamadas idempotentes que falharem por erro transitório.
+    Falhas de conexão (antes do envio do corpo) são repetidas para qualquer método.
+    """
+
+    def __init__(self, api_token, timeouts=None, tentativas=3, backoff=0.5, pool_size=10):
+        """
+        Args:
+            api_token (str): Token de autenticação da API.
+            timeouts (dict, optional): Sobrescreve timeouts por endpoint (ex: {"send-text": (5, 20)}).
+            tentativas (int): Número máximo de novas tentativas.
+            backoff (float): Fator de espera exponencial entre tentativas.
+            pool_size (int): Conexões mantidas abertas no pool.
+        """
+        self.api_token = api_token
+        self.timeouts = dict(TIMEOUTS_PADRAO, **(timeouts or {}))
+
+        retry = Retry(
+            total=tentativas,
+            connect=tentativas,
+            read=tentativas,
+            status=tentativas,
+            backoff_factor=backoff,
+            status_forcelist=STATUS_REPETIVEIS,
+            allowed_methods=METODOS_IDEMPOTENTES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.observadores = []
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_token}"
+        })
+
+    def timeout_para(self, url):
+        """Retorna o timeout configurado para o endpoint da URL"""
+        endpoint = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+        return self.timeouts.get(endpoint, TIMEOUT_PADRAO)
+
+    def request(self, method, url, **kwargs):
+        """Executa a requisição pelo pool; o timeout do endpoint é usado se não for informado"""
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout_para(url)
+        response = self.session.request(method, url, **kwargs)
+
+        for observador in self.observadores:
+            try:
+                observador(method, url, response)
+            except Exception as e:
+                print(f"⚠️ Erro em observador do transporte: {e}")
+
+        return response
+
+    def adicionar_observador(self, callback):
+        """Registra callback(metodo, url, response) chamado após cada resposta (ex: limitador de envios)"""
+        if callback not in self.observadores:
+            # Lista nova em vez de append: quem está iterando em outra thread não é afetado
+            self.observadores = self.observadores + [callback]
+
+    def remover_observador(self, callback):
+        """Remove um callback registrado por adicionar_observador (ignora se não estiver registrado)"""
+        self.observadores = [observador for observador in self.observadores if observador != callback]
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def fechar(self):
+        """Fecha as conexões abertas do pool"""
+        self.session.close()
+
+
+_transportes = {}
+_transportes_lock = threading.Lock()
+
+
+def obter_transporte(api_token):
+    """
+    Retorna o transporte compartilhado do token informado.
+    Usado quando uma classe de endpoint é criada fora do WhatsAppAPI.
+    """
+    with _transportes_lock:
+        transporte = _transportes.get(api_token)
+        if transporte is None:
+            transporte = TransporteWAPI(api_token)
+            _transportes[api_token] = transporte
+        return transporte
+
+
+def classificar_falha(status_code=None, excecao=None):
+    """
+    Classifica um POST que falhou pelo status HTTP e/ou pela exceção do requests
+    (classe ou nome da classe, como os envios devolvem em "exception").
+
+    - FALHA_REPETIR: falha de conexão (inclui ConnectTimeout) ou 429
+    - FALHA_INCERTA: timeout de leitura, resposta interrompida, 5xx ou 2xx ilegível
+    - FALHA_DEFINITIVA: demais 4xx e requisições inválidas
+
+    Retorna None quando não há status nem exceção (falha local, antes do envio).
+    """
+    if isinstance(excecao, str):
+        excecao = getattr(requests.exceptions, excecao, None)
+
+    if isinstance(excecao, type) and issubclass(excecao, requests.exceptions.RequestException):
+        if issubclass(excecao, requests.exceptions.ConnectionError):
+            return FALHA_REPETIR
+        if issubclass(excecao, (requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError,
+                                requests.exceptions.ContentDecodingError)):
+            return FALHA_INCERTA
+        if not status_code:
+            return FALHA_DEFINITIVA
+
+    if status_code:
+        if status_code == 429:
+            return FALHA_REPETIR
+        if status_code >= 500 or 200 <= status_code < 300:
+            return FALHA_INCERTA
+        return FALHA_DEFINITIVA
+
+    return None
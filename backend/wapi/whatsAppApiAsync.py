@@ -0,0 +1,287 @@
+import asyncio
+import importlib.util
+import mimetypes
+import os
+from urllib.parse import urlparse
+
+from backend.wapi.mensagem.enviosMensagensDocs.corpoStreaming import ArquivoBase64, CorpoJsonStreaming
+from backend.wapi.transporte import TIMEOUTS_PADRAO, TIMEOUT_PADRAO
+
+try:
+    import httpx
+
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# HTTP/2 só é habilitado se o pacote h2 estiver instalado (pip install httpx[http2])
+HTTP2_AVAILABLE = HTTPX_AVAILABLE and importlib.util.find_spec("h2") is not None
+
+
+class WhatsAppAPIAsync:
+    """
+    Versão assíncrona do WhatsAppAPI, para uso dentro de um event loop (FastAPI)
+    ou a partir de uma thread com asyncio.run().
+
+    Todas as chamadas passam por um único httpx.AsyncClient (pool keep-alive,
+    HTTP/2 quando disponível) e por um semáforo que limita quantas requisições
+    ficam em andamento ao mesmo tempo. Os métodos *_em_lote disparam várias
+    chamadas concorrentes respeitando esse limite.
+
+    Uso:
+        async with WhatsAppAPIAsync(instance_id, token) as api:
+            await api.envia_mensagem_texto("5569...", "Olá")
+            await api.enviar_textos_em_lote([("5569...", "Oi"), ("5511...", "Oi")])
+    """
+
+    def __init__(self, instance_id, api_token, base_url="https://api.w-api.app/v1/", limite_concorrencia=10,
+                 timeouts=None, tentativas=3):
+        """
+        Args:
+            instance_id (str): ID da instância do WhatsApp.
+            api_token (str): Token de autenticação da API.
+            base_url (str): URL base da API (ex: servidor mock local nos testes).
+            limite_concorrencia (int): Máximo de requisições simultâneas. Default: 10.
+            timeouts (dict, optional): Timeouts (conexão, leitura) por endpoint.
+            tentativas (int): Novas tentativas em falhas de conexão. Default: 3.
+        """
+        if not HTTPX_AVAILABLE:
+            raise ImportError("httpx não encontrado. Instale com: pip install httpx")
+
+        self.instance_id = instance_id
+        self.api_token = api_token
+        self.base_url = base_url.rstrip('/') + '/'
+        self.limite_concorrencia = limite_concorrencia
+        self.timeouts = dict(TIMEOUTS_PADRAO, **(timeouts or {}))
+        self.tentativas = tentativas
+
+        self._cliente = None
+        self._semaforo = None
+
+    async def __aenter__(self):
+        self._obter_cliente()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.fechar()
+
+    def _obter_cliente(self):
+        """Cria o cliente e o semáforo no event loop em uso"""
+        if self._cliente is None:
+            # Com transport= explícito o httpx ignora limits/http2 do cliente: vão no transporte.
+            # O transporte só repete falhas de conexão: nenhum POST é enviado duas vezes
+            transporte = httpx.AsyncHTTPTransport(
+                http2=HTTP2_AVAILABLE,
+                retries=self.tentativas,
+                limits=httpx.Limits(max_connections=self.limite_concorrencia,
+                                    max_keepalive_connections=self.limite_concorrencia)
+            )
+            self._cliente = httpx.AsyncClient(
+                transport=transporte,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.api_token}"
+                }
+            )
+            self._semaforo = asyncio.Semaphore(self.limite_concorrencia)
+        return self._cliente
+
+    async def fechar(self):
+        """Fecha o pool de conexões"""
+        if self._cliente is not None:
+            await self._cliente.aclose()
+            self._cliente = None
+            self._semaforo = None
+
+    # ------------------------------------------------------------------
+    # Núcleo
+    # ------------------------------------------------------------------
+
+    def _timeout(self, endpoint):
+        conexao, leitura = self.timeouts.get(endpoint, TIMEOUT_PADRAO)
+        return httpx.Timeout(leitura, connect=conexao)
+
+    async def _requisicao(self, metodo, caminho, params=None, payload=None):
+        """
+        Executa uma chamada à W-API e devolve o dicionário padrão de resultado.
+        Payloads com ArquivoBase64 são enviados em streaming, como na versão síncrona.
+        """
+        cliente = self._obter_cliente()
+        endpoint = caminho.rsplit('/', 1)[-1]
+        params = dict(params or {}, instanceId=self.instance_id)
+
+        kwargs = {"params": params, "timeout": self._timeout(endpoint)}
+        corpo = None
+        if payload is not None:
+            if any(isinstance(valor, ArquivoBase64) for valor in payload.values()):
+                corpo = CorpoJsonStreaming(payload)
+                kwargs["content"] = self._ler_em_blocos(corpo)
+                kwargs["headers"] = {"Content-Length": str(len(corpo))}
+            else:
+                kwargs["json"] = payload
+
+        try:
+            async with self._semaforo:
+                response = await cliente.request(metodo, self.base_url + caminho, **kwargs)
+        except httpx.TimeoutException:
+            return {"success": False, "error": "Timeout - Requisição demorou muito"}
+        except httpx.ConnectError:
+            return {"success": False, "error": "Erro de conexão - Verifique a internet"}
+        except httpx.HTTPError as e:
+            return {"success": False, "error": f"Erro na requisição: {str(e)}"}
+        finally:
+            if corpo is not None:
+                corpo.close()
+
+        try:
+            dados = response.json()
+        except ValueError:
+            dados = None
+
+        if response.status_code == 200:
+            return {"success": True, "data": dados, "status_code": response.status_code}
+
+        return {
+            "success": False,
+            "error": f"Erro HTTP {response.status_code}",
+            "details": dados if dados is not None else response.text[:200],
+            "status_code": response.status_code
+        }
+
+    @staticmethod
+    async def _ler_em_blocos(corpo):
+        """Entrega o corpo em blocos, lendo o arquivo fora do event loop"""
+        while True:
+            bloco = await asyncio.to_thread(corpo.read, CorpoJsonStreaming.BLOCO)
+            if not bloco:
+                break
+            yield bloco
+
+    @staticmethod
+    def _fonte_midia(fonte, mime_padrao):
+        """URLs seguem como estão; arquivos locais viram ArquivoBase64"""
+        parsed = urlparse(fonte)
+        if parsed.scheme in ("http", "https") and parsed.netloc:
+            return fonte
+        if not os.path.exists(fonte):
+            raise FileNotFoundError(f"Arquivo não encontrado: {fonte}")
+        mime_type = mimetypes.guess_type(fonte)[0] or mime_padrao
+        return ArquivoBase64(fonte, mime_type)
+
+    async def _enviar_midia(self, endpoint, campo, phone_number, fonte, mime_padrao, extras):
+        try:
+            midia = self._fonte_midia(fonte, mime_padrao)
+        except (FileNotFoundError, OSError) as e:
+            return {"success": False, "error": str(e)}
+
+        payload = {"phone": phone_number, campo: midia}
+        payload.update({chave: valor for chave, valor in extras.items() if valor not in (None, "")})
+        return await self._requisicao("POST", f"message/{endpoint}", payload=payload)
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+
+    async def checa_status_conexao(self):
+        """Retorna "connected" ou "disconnected" """
+        resultado = await self._requisicao("GET", "instance/status-instance")
+        return "connected" if resultado["success"] else "disconnected"
+
+    async def envia_mensagem_texto(self, phone_number, message, delay_message=1):
+        payload = {"phone": phone_number, "message": message, "delayMessage": delay_message}
+        return await self._requisicao("POST", "message/send-text", payload=payload)
+
+    async def enviar_imagem(self, phone_number, image_source, caption="", delay_message=1):
+        return await self._enviar_midia("send-image", "image", phone_number, image_source, "image/jpeg",
+                                        {"caption": caption, "delayMessage": delay_message})
+
+    async def enviar_gif(self, phone_number, gif_source, caption="", delay_message=1):
+        return await self._enviar_midia("send-gif", "gif", phone_number, gif_source, "video/mp4",
+                                        {"caption": caption, "delayMessage": delay_message})
+
+    async def enviar_audio(self, phone_number, audio_source, delay_message=1):
+        return await self._enviar_midia("send-audio", "audio", phone_number, audio_source, "audio/mpeg",
+                                        {"delayMessage": delay_message})
+
+    async def envia_documento(self, phone_number, file_path, caption="", delay=2):
+        extensao = os.path.splitext(file_path)[1].lstrip('.').lower()
+        return await self._enviar_midia("send-document", "document", phone_number, file_path,
+                                        "application/octet-stream",
+                                        {"extension": extensao, "fileName": os.path.basename(file_path),
+                                         "caption": caption, "delayMessage": delay})
+
+    async def deleta_mensagem(self, phone_number, message_ids):
+        """Deleta uma mensagem (str) ou várias (list), estas em paralelo"""
+        if isinstance(message_ids, str):
+            return await self._requisicao("DELETE", "message/delete-message",
+                                          params={"phone": phone_number, "messageId": message_ids})
+
+        resultados = await self.executar_em_lote(
+            self.deleta_mensagem(phone_number, message_id) for message_id in message_ids
+        )
+        deletadas = sum(1 for resultado in resultados if resultado.get("success"))
+        return {
+            "success": deletadas == len(resultados),
+            "deletadas": deletadas,
+            "total": len(resultados),
+            "resultados": resultados
+        }
+
+    async def editar_mensagem(self, phone, message_id, new_text):
+        payload = {"phone": phone, "text": new_text, "messageId": message_id}
+        return await self._requisicao("POST", "message/edit-message", payload=payload)
+
+    async def enviar_reacao(self, phone, message_id, reaction="👍", delay=0):
+        payload = {"phone": phone, "reaction": reaction, "messageId": message_id}
+        if delay > 0:
+            payload["delayMessage"] = delay
+        return await self._requisicao("POST", "message/send-reaction", payload=payload)
+
+    async def remover_reacao(self, phone, message_id, delay=None):
+        payload = {"phone": phone, "messageId": message_id}
+        if delay is not None:
+            payload["delayMessage"] = delay
+        return await self._requisicao("POST", "message/remove-reaction", payload=payload)
+
+    async def marcar_como_lida(self, phone, message_id):
+        payload = {"phone": phone, "messageId": message_id}
+        return await self._requisicao("POST", "message/read-message", payload=payload)
+
+    async def enviar_presenca(self, phone, presence="composing", delay=15):
+        """presence: "composing" (digitando) ou "recording" (gravando)"""
+        payload = {"phone": phone, "presence": presence, "delay": delay}
+        return await self._requisicao("POST", "chats/send-presence", payload=payload)
+
+    # ------------------------------------------------------------------
+    # Lotes
+    # ------------------------------------------------------------------
+
+    async def executar_em_lote(self, chamadas):
+        """
+        Executa várias corrotinas concorrentemente (limitadas pelo semáforo)
+        e devolve os resultados na mesma ordem. Exceções viram resultados de erro.
+        """
+        self._obter_cliente()
+        resultados = await asyncio.gather(*chamadas, return_exceptions=True)
+        return [
+            {"success": False, "error": f"Erro: {str(resultado)}"} if isinstance(resultado, Exception) else resultado
+            for resultado in resultados
+        ]
+
+    async def enviar_textos_em_lote(self, mensagens, delay_message=1):
+        """mensagens: lista de (phone, texto)"""
+        return await self.executar_em_lote(
+            self.envia_mensagem_texto(phone, texto, delay_message) for phone, texto in mensagens
+        )
+
+    async def marcar_lidas_em_lote(self, mensagens):
+        """mensagens: lista de (phone, message_id)"""
+        return await self.executar_em_lote(
+            self.marcar_como_lida(phone, message_id) for phone, message_id in mensagens
+        )
+
+    async def enviar_reacoes_em_lote(self, reacoes):
+        """reacoes: lista de (phone, message_id, emoji)"""
+        return await self.executar_em_lote(
+            self.enviar_reacao(phone, message_id, emoji) for phone, message_id, emoji in reacoes
+        )
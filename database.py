@@ -11,6 +11,8 @@ from typing import List, Dict, Optional, Set
 from datetime import datetime, date
 from collections import defaultdict
 
+from message_record import ChatMessage
+
 # Adicionar caminho do backend
 backend_path = os.path.join(os.path.dirname(__file__), 'backend', 'banco')
 sys.path.insert(0, backend_path)
@@ -67,6 +69,7 @@ class ChatDatabaseInterface:
         self.db_path = db_path
         self.db_manager = None
         self._contacts_cache = {}  # Cache de nomes dos contatos
+        self._contacts_cache_built = False  # Montado no primeiro uso (thread do worker, não na abertura)
         self._loaded_messages_cache = {}  # Cache de mensagens já carregadas por chat
         self._last_message_timestamps = {}  # Último timestamp por chat
         self._last_message_count = 0
@@ -75,18 +78,24 @@ class ChatDatabaseInterface:
             try:
                 self.db_manager = WhatsAppDatabaseManager(db_path)
                 print(f"✅ Conectado ao banco otimizado: {db_path}")
-                self._build_contacts_cache()
             except Exception as e:
                 print(f"❌ Erro ao conectar ao banco: {e}")
                 self.db_manager = None
         else:
             print("❌ Database manager não disponível")
 
+    def _ensure_contacts_cache(self):
+        """Constrói o cache de nomes na primeira consulta que precisa dele"""
+        if not self._contacts_cache_built:
+            self._build_contacts_cache()
+
     def _build_contacts_cache(self):
         """Constrói cache de nomes dos contatos"""
         if not self.is_connected():
             return
 
+        self._contacts_cache_built = True
+
         try:
             print("🔍 Construindo cache de nomes...")
 
@@ -114,6 +123,7 @@ class ChatDatabaseInterface:
         if not contact_id:
             return "Desconhecido"
 
+        self._ensure_contacts_cache()
         if contact_id in self._contacts_cache:
             return self._contacts_cache[contact_id]
 
@@ -241,7 +251,7 @@ class ChatDatabaseInterface:
             print(f"❌ Erro ao buscar chats: {e}")
             return []
 
-    def get_chat_messages_initial(self, chat_id: str, limit: int = 30) -> List[Dict]:
+    def get_chat_messages_initial(self, chat_id: str, limit: int = 30) -> List[ChatMessage]:
         """
         CORRIGIDO: Carrega mensagens APENAS do contato específico
         """
@@ -261,21 +271,21 @@ class ChatDatabaseInterface:
                 # Verificar se a mensagem pertence EXATAMENTE a este chat
                 if _message_belongs_to_chat_strict(msg, chat_id):
                     processed_msg = self._process_message_for_chat(msg)
-                    if processed_msg and processed_msg['timestamp'] > 0:
+                    if processed_msg and processed_msg.timestamp > 0:
                         chat_messages.append(processed_msg)
 
             # Ordenar e remover duplicatas
-            chat_messages.sort(key=lambda x: (x['timestamp'], x.get('message_id', '')))
+            chat_messages.sort(key=lambda x: (x.timestamp, x.message_id))
             unique_messages = self._remove_duplicates(chat_messages)
 
             # Cache isolado por chat
             self._loaded_messages_cache[chat_id] = {
-                msg.get('message_id', f"temp_{msg['timestamp']}"): msg
+                msg.message_id or f"temp_{msg.timestamp}": msg
                 for msg in unique_messages
             }
 
             if unique_messages:
-                self._last_message_timestamps[chat_id] = max(msg['timestamp'] for msg in unique_messages)
+                self._last_message_timestamps[chat_id] = max(msg.timestamp for msg in unique_messages)
 
             result = unique_messages[-limit:] if len(unique_messages) > limit else unique_messages
             print(f"✅ Isolamento OK: {len(result)} mensagens do contato {chat_id[:15]}")
@@ -285,7 +295,7 @@ class ChatDatabaseInterface:
             print(f"❌ Erro no carregamento isolado: {e}")
             return []
 
-    def get_new_messages_incremental(self, chat_id: str) -> List[Dict]:
+    def get_new_messages_incremental(self, chat_id: str) -> List[ChatMessage]:
         """SIMPLIFICADO: Buscar todas as mensagens novas sem filtros complexos"""
         if not self.is_connected():
             return []
@@ -309,10 +319,10 @@ class ChatDatabaseInterface:
                     continue
 
                 processed_msg = self._process_message_for_chat(msg)
-                if not processed_msg or processed_msg['timestamp'] <= last_timestamp:
+                if not processed_msg or processed_msg.timestamp <= last_timestamp:
                     continue
 
-                msg_id = processed_msg.get('message_id', f"temp_{processed_msg['timestamp']}")
+                msg_id = processed_msg.message_id or f"temp_{processed_msg.timestamp}"
                 if msg_id not in known_message_ids:
                     new_messages.append(processed_msg)
 
@@ -320,14 +330,14 @@ class ChatDatabaseInterface:
                 return []
 
             # Ordenar e atualizar cache
-            new_messages.sort(key=lambda x: (x['timestamp'], x.get('message_id', '')))
+            new_messages.sort(key=lambda x: (x.timestamp, x.message_id))
 
             for msg in new_messages:
-                msg_id = msg.get('message_id', f"temp_{msg['timestamp']}")
+                msg_id = msg.message_id or f"temp_{msg.timestamp}"
                 self._loaded_messages_cache[chat_id][msg_id] = msg
 
             if new_messages:
-                self._last_message_timestamps[chat_id] = max(msg['timestamp'] for msg in new_messages)
+                self._last_message_timestamps[chat_id] = max(msg.timestamp for msg in new_messages)
 
             print(f"✅ {len(new_messages)} NOVAS mensagens encontradas")
             return new_messages
@@ -338,45 +348,71 @@ class ChatDatabaseInterface:
 
 
 
-    def get_messages_before_pagination(self, chat_id: str, before_timestamp: float, limit: int = 20) -> List[Dict]:
+    def get_messages_before_pagination(self, chat_id: str, before_timestamp: float, limit: int = 20,
+                                       before_message_id: str = None) -> List[ChatMessage]:
+        """
+        Carrega mensagens antigas para paginação (scroll para cima).
+
+        Usa o índice (conversa, momento) do banco: cada página custa o tamanho
+        da página, qualquer que seja a profundidade do histórico.
+
+        Args:
+            chat_id: Contato/grupo
+            before_timestamp: Timestamp da mensagem mais antiga já exibida
+            limit: Tamanho da página
+            before_message_id: ID dessa mensagem (desempate no mesmo segundo)
         """
-        NOVO: Carrega mensagens antigas para paginação (scroll para cima)
+        return self.get_history_page(chat_id, before_timestamp, limit, before_message_id)['messages']
+
+    def get_history_page(self, chat_id: str, before_timestamp: float, limit: int = 20,
+                         before_message_id: str = None) -> Dict:
         """
+        Página de histórico com os dados da consulta bruta, antes do filtro:
+        {'messages': [...], 'raw_count': linhas lidas do banco,
+         'cursor': (timestamp, message_id) da linha mais antiga lida ou None}.
+
+        O fim do histórico é raw_count < limit (o filtro pode descartar linhas de
+        uma página cheia), e a próxima página parte do cursor, mesmo que todas as
+        linhas desta tenham sido descartadas.
+        """
+        page = {'messages': [], 'raw_count': 0, 'cursor': None}
         if not self.is_connected():
-            return []
+            return page
 
         try:
             print(f"📜 Paginação: {limit} mensagens antes de {before_timestamp}")
 
-            # Usar cache se disponível, senão buscar do banco
-            if chat_id in self._loaded_messages_cache:
-                all_chat_messages = list(self._loaded_messages_cache[chat_id].values())
-            else:
-                # Buscar do banco se cache não disponível
-                all_messages = self.db_manager.get_recent_messages(5000)
-                is_group = self._detect_if_group(chat_id, all_messages)
-                all_chat_messages = self._filter_and_process_messages(chat_id, all_messages, is_group)
-
-            # Filtrar mensagens antes do timestamp
-            older_messages = [
-                msg for msg in all_chat_messages
-                if msg['timestamp'] < before_timestamp
-            ]
-
-            # Ordenar e pegar as mais recentes das antigas
-            older_messages.sort(key=lambda x: (x['timestamp'], x.get('message_id', '')))
-
-            if len(older_messages) <= limit:
-                result = older_messages
-            else:
-                result = older_messages[-limit:]
+            raw_messages = self.db_manager.get_chat_messages_before(
+                chat_id, int(before_timestamp), limit=limit, before_message_id=before_message_id
+            )
+            page['raw_count'] = len(raw_messages)
+            if raw_messages:
+                # A consulta vem da mais nova para a mais antiga
+                oldest_raw = raw_messages[-1]
+                page['cursor'] = (oldest_raw.get('moment', 0), oldest_raw.get('messageId'))
+
+            older_messages = []
+            for msg in raw_messages:
+                processed_msg = self._process_message_for_chat(msg)
+                if processed_msg and processed_msg.timestamp > 0:
+                    older_messages.append(processed_msg)
 
-            print(f"✅ Paginação: {len(result)} mensagens antigas")
-            return result
+            # Ordem cronológica (a consulta vem da mais nova para a mais antiga)
+            older_messages.sort(key=lambda x: (x.timestamp, x.message_id))
+            result = self._remove_duplicates(older_messages)
+
+            # Mensagens antigas também entram no cache do chat (exclusão/edição locais)
+            chat_cache = self._loaded_messages_cache.setdefault(chat_id, {})
+            for msg in result:
+                chat_cache.setdefault(msg.message_id or f"temp_{msg.timestamp}", msg)
+
+            print(f"✅ Paginação: {len(result)} mensagens antigas ({len(raw_messages)} lidas)")
+            page['messages'] = result
+            return page
 
         except Exception as e:
             print(f"❌ Erro na paginação: {e}")
-            return []
+            return page
 
     def _detect_if_group(self, chat_id: str, messages: List[Dict]) -> bool:
         """Detecta se o chat é um grupo"""
@@ -385,25 +421,25 @@ class ChatDatabaseInterface:
                 return True
         return False
 
-    def _filter_and_process_messages(self, chat_id: str, all_messages: List[Dict], is_group: bool) -> List[Dict]:
+    def _filter_and_process_messages(self, chat_id: str, all_messages: List[Dict], is_group: bool) -> List[ChatMessage]:
         """Filtra e processa mensagens de um chat específico"""
         chat_messages = []
 
         for msg in all_messages:
             if self._message_belongs_to_chat(msg, chat_id, is_group):
                 processed_msg = self._process_message_for_chat(msg)
-                if processed_msg and processed_msg['timestamp'] > 0:
+                if processed_msg and processed_msg.timestamp > 0:
                     chat_messages.append(processed_msg)
 
         return chat_messages
 
-    def _remove_duplicates(self, messages: List[Dict]) -> List[Dict]:
+    def _remove_duplicates(self, messages: List[ChatMessage]) -> List[ChatMessage]:
         """Remove mensagens duplicadas baseado no message_id"""
         seen_ids = set()
         unique_messages = []
 
         for msg in messages:
-            msg_id = msg.get('message_id', '')
+            msg_id = msg.message_id
             if msg_id and msg_id not in seen_ids:
                 seen_ids.add(msg_id)
                 unique_messages.append(msg)
@@ -413,7 +449,7 @@ class ChatDatabaseInterface:
 
         return unique_messages
 
-    def process_single_new_message(self, message_data: Dict) -> Optional[Dict]:
+    def process_single_new_message(self, message_data: Dict) -> Optional[ChatMessage]:
         """CORRIGIDO: Processa mensagem única evitando duplicatas de enviadas"""
         try:
             print(f"📨 Processando mensagem única: {message_data.get('messageId', 'N/A')}")
@@ -434,7 +470,7 @@ class ChatDatabaseInterface:
 
             # Se temos cache para este chat, adicionar mensagem
             if chat_id in self._loaded_messages_cache:
-                msg_id = processed_msg.get('message_id', f"temp_{processed_msg['timestamp']}")
+                msg_id = processed_msg.message_id or f"temp_{processed_msg.timestamp}"
 
                 # Verificar se não é duplicata
                 if msg_id not in self._loaded_messages_cache[chat_id]:
@@ -443,8 +479,8 @@ class ChatDatabaseInterface:
 
                     # Atualizar timestamp
                     current_max = self._last_message_timestamps.get(chat_id, 0)
-                    if processed_msg['timestamp'] > current_max:
-                        self._last_message_timestamps[chat_id] = processed_msg['timestamp']
+                    if processed_msg.timestamp > current_max:
+                        self._last_message_timestamps[chat_id] = processed_msg.timestamp
 
             print(f"✅ Mensagem única processada: {processed_msg.get('content', '')[:50]}")
             return processed_msg
@@ -465,6 +501,13 @@ class ChatDatabaseInterface:
             self._last_message_timestamps.clear()
             print("🗑️ Cache de mensagens totalmente limpo")
 
+    def get_chat_audio_messages(self, chat_id: str) -> List[ChatMessage]:
+        """Retorna as mensagens de áudio já carregadas de um chat (para transcrição em lote)"""
+        chat_cache = self._loaded_messages_cache.get(chat_id, {})
+        audio_messages = [msg for msg in chat_cache.values() if msg.message_type == 'audio']
+        audio_messages.sort(key=lambda msg: msg.timestamp)
+        return audio_messages
+
     def get_cache_stats(self) -> Dict:
         """Retorna estatísticas do cache"""
         return {
@@ -523,7 +566,7 @@ class ChatDatabaseInterface:
         except Exception:
             return False
 
-    def _process_message_for_chat(self, msg: Dict) -> Optional[Dict]:
+    def _process_message_for_chat(self, msg: Dict) -> Optional[ChatMessage]:
         """Processa mensagem com IDs corretos vinculados - VERSÃO MELHORADA"""
         try:
             # ID ORIGINAL do webhook (o que realmente importa)
@@ -564,15 +607,6 @@ class ChatDatabaseInterface:
                 if not sender_name:
                     sender_name = self.get_contact_name(sender_id)
 
-            # Converter timestamp para strings
-            try:
-                dt = datetime.fromtimestamp(timestamp)
-                timestamp_str = dt.strftime('%H:%M')
-                date_str = dt.strftime('%d/%m/%Y')
-            except Exception:
-                timestamp_str = 'N/A'
-                date_str = 'N/A'
-
             # Extrair conteúdo e tipo
             content = self._extract_message_content(msg)
             message_type = self._detect_message_type(msg)
@@ -589,25 +623,21 @@ class ChatDatabaseInterface:
             if not chat_id and from_me:
                 chat_id = msg.get('contact_id', '')
 
-            # IMPORTANTE: Incluir tanto o ID do webhook quanto criar um ID local único
-            return {
-                'message_id': webhook_message_id,  # ID REAL do webhook
-                'local_message_id': f"local_{timestamp}_{hash(content[:20]) % 10000}",  # ID local para interface
-                'webhook_message_id': webhook_message_id,  # Backup do ID original
-                'sender_name': sender_name,
-                'content': content,
-                'timestamp': timestamp,
-                'timestamp_str': timestamp_str,
-                'date_str': date_str,
-                'from_me': from_me,
-                'is_group': is_group,
-                'message_type': message_type,
-                'media_data': media_data,
-                'sender_id': sender_id,
-                'chat_id': chat_id,  # ID correto do chat
-                'contact_id': chat_id,  # Compatibilidade
-                'raw_webhook_data': msg  # Dados originais para debug
-            }
+            # ID do webhook e chat_id corretos; horário formatado e ID local são calculados sob demanda.
+            # Do webhook só o msgContent é mantido (o resto do dicionário pode ser liberado)
+            return ChatMessage(
+                message_id=webhook_message_id,
+                chat_id=chat_id,
+                content=content,
+                timestamp=timestamp,
+                from_me=from_me,
+                is_group=is_group,
+                message_type=message_type,
+                media_data=media_data,
+                sender_id=sender_id,
+                sender_name=sender_name,
+                msg_content=msg.get('msgContent') or None
+            )
 
         except Exception as e:
             print(f"⚠️ Erro ao processar mensagem: {e}")
@@ -832,6 +862,46 @@ class ChatDatabaseInterface:
 
         return contacts
 
+    def get_chat_directory(self) -> List[Dict]:
+        """
+        Todas as conversas do banco no formato de get_contacts_list, para a busca
+        ir além das conversas carregadas na lista. Nomes vêm do cache de contatos
+        (sem uma consulta por conversa)
+        """
+        if not self.is_connected():
+            return []
+
+        self._ensure_contacts_cache()
+        directory = []
+        for entry in self.db_manager.get_chat_directory():
+            chat_id = entry['chat_key']
+            msg = entry['last_message']
+            is_group = msg.get('isGroup', False)
+            from_me = msg.get('fromMe', False)
+            sender = msg.get('sender', {}) if not (is_group or from_me) else {}
+
+            if is_group:
+                chat_name = self._extract_group_name(msg)
+            else:
+                chat_name = sender.get('pushName', '') or self._contacts_cache.get(chat_id, '')
+
+            source = sender if sender else msg.get('chat', {})
+            directory.append({
+                'contact_id': chat_id,
+                'contact_name': chat_name or self._format_phone(chat_id),
+                'last_message': self._extract_message_content(msg) if msg else '',
+                'last_message_time': entry['last_moment'],
+                'last_message_from_me': from_me,
+                'total_messages': entry['total_messages'],
+                'is_group': is_group,
+                'profile_picture': source.get('profilePicture', ''),
+                'is_business': bool(sender.get('verifiedBizName', '')),
+                'business_name': sender.get('verifiedBizName', '')
+            })
+
+        print(f"📇 Diretório de conversas: {len(directory)} chats")
+        return directory
+
     # NOVOS MÉTODOS PARA COMPATIBILIDADE
     def get_chat_messages(self, chat_id: str, limit: int = 50) -> List[Dict]:
         """
@@ -8,17 +8,34 @@ Versão completa sem dependências circulares
 import sys
 import os
 import json
-from datetime import datetime
-from typing import Dict, List, Optional, Set
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QMessageBox,
                              QFileDialog, QProgressBar, QLabel, QInputDialog)
 from PyQt6.QtCore import QThread, pyqtSignal, QTimer, QPropertyAnimation, QEasingCurve
 from PyQt6.QtGui import QIcon
 
+from startup_profiler import get_startup_profiler
+from ui_profiler import ProfilerOverlay, get_ui_profiler, profiled
+
 # Importar nossos módulos principais
-from ui.main_window_ui import MainWindowUI, ContactItemWidget
+from ui.main_window_ui import MainWindowUI
+from ui.contact_search import ContactSearchIndex
 from ui.chat_widget import MessageRenderer, MessageBubble
 from database import ChatDatabaseInterface
+from message_record import ChatMessage
+from message_view_model import PreparedMessages, prepare_messages
+from transcription_service import get_transcription_service
+from waveform_service import get_waveform_service
+from avatar_service import get_avatar_service
+from media_task_service import get_media_task_service
+from backend.wapi.limitador import LimitadorEnvio
+from backend.wapi.operacoesLote import ExecutorOperacoesLote
+from backend.wapi.transporte import FALHA_DEFINITIVA, FALHA_INCERTA, classificar_falha
 
 # Tentar importar WhatsApp API
 try:
@@ -43,6 +60,8 @@ except ImportError:
         def envia_mensagem_texto(self, phone, message, delay=1):
             return {"status": "mock", "message": "API não disponível"}
 
+get_startup_profiler().mark("imports")
+
 def validate_message_ids(message_data: Dict) -> Dict:
     """Valida e corrige IDs de mensagem se necessário"""
     webhook_id = message_data.get('webhook_message_id') or message_data.get('message_id')
@@ -137,59 +156,186 @@ class WhatsAppConfig:
             print(f"⚠️ Erro ao salvar configurações: {e}")
 
 
+class MemoryOutbox:
+    """Fila de envio em memória (usada só quando o banco não está disponível)"""
+
+    def __init__(self):
+        self._items: List[Dict] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def enqueue_outbox_message(self, message_data: Dict) -> Optional[int]:
+        with self._lock:
+            item = dict(message_data, outbox_id=self._next_id, status='queued', attempts=0, next_attempt_at=None)
+            self._items.append(item)
+            self._next_id += 1
+            return item['outbox_id']
+
+    def claim_outbox_messages(self, limit: int) -> List[Dict]:
+        with self._lock:
+            now = datetime.utcnow()
+            seen_chats = set()
+            claimed = []
+            for item in self._items:
+                if item['status'] not in ('queued', 'sending') or item['contact_id'] in seen_chats:
+                    continue
+                seen_chats.add(item['contact_id'])
+                ready = item['next_attempt_at'] is None or item['next_attempt_at'] <= now
+                if item['status'] == 'queued' and ready and len(claimed) < limit:
+                    item['status'] = 'sending'
+                    claimed.append(dict(item))
+            return claimed
+
+    def mark_outbox_sent(self, outbox_id: int, api_message_id: str = None) -> bool:
+        with self._lock:
+            self._items = [item for item in self._items if item['outbox_id'] != outbox_id]
+            return True
+
+    def mark_outbox_failed(self, outbox_id: int, error: str, retry_at: datetime = None) -> bool:
+        with self._lock:
+            for item in self._items:
+                if item['outbox_id'] == outbox_id:
+                    item['status'] = 'queued' if retry_at else 'failed'
+                    item['next_attempt_at'] = retry_at
+                    item['attempts'] += 1
+                    return True
+            return False
+
+    def mark_outbox_uncertain(self, outbox_id: int, error: str) -> bool:
+        with self._lock:
+            for item in self._items:
+                if item['outbox_id'] == outbox_id:
+                    item['status'] = 'uncertain'
+                    item['next_attempt_at'] = None
+                    item['attempts'] += 1
+                    return True
+            return False
+
+    def release_outbox_message(self, outbox_id: int) -> bool:
+        with self._lock:
+            for item in self._items:
+                if item['outbox_id'] == outbox_id and item['status'] == 'sending':
+                    item['status'] = 'queued'
+                    return True
+            return False
+
+    def recover_outbox(self, keep_sent_days: int = 7) -> int:
+        return 0
+
+    def get_outbox_summary(self) -> Dict:
+        with self._lock:
+            queued = [item for item in self._items if item['status'] == 'queued']
+            retries = [item['next_attempt_at'] for item in queued if item['next_attempt_at']]
+            return {
+                'queued': len(queued),
+                'sending': sum(1 for item in self._items if item['status'] == 'sending'),
+                'sent': 0,
+                'failed': sum(1 for item in self._items if item['status'] == 'failed'),
+                'uncertain': sum(1 for item in self._items if item['status'] == 'uncertain'),
+                'next_attempt_at': min(retries) if retries else None
+            }
+
+
 class WhatsAppMessageSender(QThread):
-    """Thread para envio de mensagens via WhatsApp API"""
+    """
+    Thread para envio de mensagens via WhatsApp API
+
+    As mensagens passam por uma fila persistente (tabela outbox_messages):
+    nada se perde se o app fechar, falhas são repetidas com backoff e chats
+    diferentes são enviados em paralelo mantendo a ordem dentro de cada chat.
+    Só falhas que certamente não chegaram à W-API (conexão, 429) são repetidas;
+    timeout de leitura e 5xx ficam como 'uncertain', para não duplicar a mensagem.
+    O ritmo é definido pelo LimitadorEnvio (baldes de fichas por instância e
+    por destinatário, adaptados às respostas 429/5xx da W-API).
+    """
+
+    MAX_PARALLEL_CHATS = 8
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_SECONDS = 2
+    RETRY_MAX_SECONDS = 120
+    IDLE_WAIT_SECONDS = 30
+    STOP_GRACE_SECONDS = 2  # Espera pelos envios em andamento ao parar (o closeEvent espera 3 s)
 
     # Sinais
-    message_sent = pyqtSignal(dict)
+    message_sent = pyqtSignal(object)  # ChatMessage
     message_failed = pyqtSignal(str, str)
+    message_retry_scheduled = pyqtSignal(str, int)  # contact_id, segundos até a nova tentativa
+    send_stats_updated = pyqtSignal(dict)  # profundidade da fila e taxa de envio
     progress_update = pyqtSignal(int)
     connection_status = pyqtSignal(bool)
 
-    def __init__(self):
+    def __init__(self, db_manager=None):
         super().__init__()
 
         self.config = WhatsAppConfig()
         self.whatsapp_api = None
-        self.message_queue = []
         self.is_sending = False
         self.stop_requested = False
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._status_check_running = threading.Event()
+        self.limitador = LimitadorEnvio()
+
+        if db_manager is not None:
+            self.outbox = db_manager
+        else:
+            print("⚠️ Banco indisponível - fila de envio apenas em memória")
+            self.outbox = MemoryOutbox()
+
+        pending = self.outbox.recover_outbox()
+        if pending:
+            print(f"📬 {pending} mensagem(ns) pendente(s) na fila de envio serão retomadas")
 
         self.init_api()
 
     def init_api(self):
-        """Inicializa a API do WhatsApp"""
+        """
+        Inicializa a API do WhatsApp
+
+        Só monta o cliente: o status da conexão é verificado em segundo plano
+        (request_connection_check) e chega pelo sinal connection_status, para
+        a janela não esperar pela rede ao abrir ou ao salvar a configuração.
+        """
         if not WHATSAPP_API_AVAILABLE:
             print("❌ WhatsAppAPI não disponível")
             return False
 
         try:
+            previous_api = self.whatsapp_api
             self.whatsapp_api = WhatsAppAPI(
                 instance_id=self.config.INSTANCE_ID,
                 api_token=self.config.API_TOKEN,
                 base_url=self.config.BASE_URL
             )
 
-            status = self.whatsapp_api.checa_status_conexao(
-                self.config.API_TOKEN,
-                self.config.INSTANCE_ID
-            )
+            # O limitador acompanha todas as respostas (429, Retry-After, 5xx)
+            if hasattr(self.whatsapp_api, 'transporte'):
+                self.whatsapp_api.transporte.adicionar_observador(self.limitador.registrar_resposta)
 
-            connected = status == "connected"
-            self.connection_status.emit(connected)
-
-            if connected:
-                print("✅ WhatsApp API conectada")
-            else:
-                print("⚠️ WhatsApp API não conectada")
-
-            return connected
+            # Reconfiguração: libera o pool, o cache de mídia e o observador da instância anterior
+            if previous_api:
+                self.close_api(previous_api)
+            return True
 
         except Exception as e:
             print(f"❌ Erro ao inicializar WhatsApp API: {e}")
             self.connection_status.emit(False)
             return False
 
+    def close_api(self, whatsapp_api=None):
+        """Encerra a instância da API (a atual, se nenhuma for informada) e solta o limitador dela"""
+        whatsapp_api = whatsapp_api or self.whatsapp_api
+        if not whatsapp_api:
+            return
+
+        try:
+            if hasattr(whatsapp_api, 'transporte'):
+                whatsapp_api.transporte.remover_observador(self.limitador.registrar_resposta)
+            if hasattr(whatsapp_api, 'fechar'):
+                whatsapp_api.fechar()
+        except Exception as e:
+            print(f"⚠️ Erro ao encerrar WhatsApp API: {e}")
+
     def send_text_message_to_contact(self, contact_id: str, message: str):
         """Envia mensagem de texto"""
         if not message.strip():
@@ -200,15 +346,12 @@ class WhatsAppMessageSender(QThread):
             'contact_id': self._format_phone_number(contact_id),
             'content': message.strip(),
             'timestamp': datetime.now().isoformat(),
-            'temp_id': f"temp_{int(datetime.now().timestamp() * 1000)}"
+            'temp_id': self._new_temp_id()
         }
 
-        self.message_queue.append(message_data)
+        self._enqueue(message_data)
         print(f"📝 Mensagem adicionada à fila: {contact_id}")
 
-        if not self.is_sending:
-            self.start()
-
     def send_file_to_contact(self, contact_id: str, file_path: str, file_type: str, caption: str = ""):
         """Envia arquivo"""
         if not os.path.exists(file_path):
@@ -222,50 +365,148 @@ class WhatsAppMessageSender(QThread):
             'file_path': file_path,
             'caption': caption,
             'timestamp': datetime.now().isoformat(),
-            'temp_id': f"temp_{int(datetime.now().timestamp() * 1000)}"
+            'temp_id': self._new_temp_id()
         }
 
-        self.message_queue.append(message_data)
+        self._enqueue(message_data)
         print(f"📎 Arquivo adicionado à fila: {file_type}")
 
-        if not self.is_sending:
+    @staticmethod
+    def _new_temp_id() -> str:
+        """ID provisório único (OutboxMessage.temp_id é unique; dois envios no mesmo ms não colidem)"""
+        return f"temp_{uuid.uuid4().hex}"
+
+    def _enqueue(self, message_data: Dict):
+        """Grava na fila persistente e acorda a thread de envio"""
+        if self.outbox.enqueue_outbox_message(message_data) is None:
+            self.message_failed.emit(message_data['contact_id'], "Não foi possível gravar a mensagem na fila")
+            return
+
+        self._wake.set()
+        if not self.isRunning():
             self.start()
 
     def run(self):
-        """Processa fila de mensagens"""
-        self.is_sending = True
+        """Despacha a fila: um envio por chat por vez, vários chats em paralelo"""
+        self.stop_requested = False
+        self._stop_event.clear()
+        in_flight = {}
+        executor = ThreadPoolExecutor(max_workers=self.MAX_PARALLEL_CHATS, thread_name_prefix="outbox")
 
-        while self.message_queue and not self.stop_requested:
-            message_data = self.message_queue.pop(0)
+        while not self.stop_requested:
+            self._wake.clear()
 
-            try:
-                self.progress_update.emit(0)
-                success = self._send_single_message(message_data)
+            free_slots = self.MAX_PARALLEL_CHATS - len(in_flight)
+            for message_data in self.outbox.claim_outbox_messages(free_slots):
+                future = executor.submit(self._send_single_message, message_data)
+                in_flight[future] = message_data
 
-                if success:
-                    sent_message = self._create_sent_message_data(message_data)
-                    self.message_sent.emit(sent_message)
-                    self.progress_update.emit(100)
-                else:
-                    self.message_failed.emit(
-                        message_data['contact_id'],
-                        "Falha no envio"
-                    )
+            self.is_sending = bool(in_flight)
 
-            except Exception as e:
-                error_msg = f"Erro no envio: {str(e)}"
-                self.message_failed.emit(message_data['contact_id'], error_msg)
+            if in_flight:
+                done, _ = wait(list(in_flight), timeout=0.5, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish_message(in_flight.pop(future), future)
+                continue
 
-            if self.message_queue:
-                self.msleep(500)
+            self.progress_update.emit(0)
+            self._wake.wait(self._seconds_until_next_retry())
+
+        # Reservas que nem começaram voltam para a fila; os envios em andamento têm um
+        # prazo curto para terminar e, sem resposta, ficam como incertos (podem ter sido entregues)
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future in [f for f in in_flight if f.cancelled()]:
+            self.outbox.release_outbox_message(in_flight.pop(future)['outbox_id'])
+
+        if in_flight:
+            wait(list(in_flight), timeout=self.STOP_GRACE_SECONDS)
+        for future, message_data in list(in_flight.items()):
+            if future.done():
+                self._finish_message(message_data, future)
+            else:
+                self.outbox.mark_outbox_uncertain(message_data['outbox_id'], "App fechado durante o envio")
+        in_flight.clear()
 
         self.is_sending = False
-        self.progress_update.emit(0)
 
-    def _send_single_message(self, message_data: Dict) -> bool:
-        """Envia uma única mensagem e captura o ID real da resposta"""
+    def _seconds_until_next_retry(self) -> float:
+        """Tempo de espera ocioso até a próxima tentativa agendada"""
+        next_attempt = self.outbox.get_outbox_summary().get('next_attempt_at')
+        if not next_attempt:
+            return self.IDLE_WAIT_SECONDS
+
+        remaining = (next_attempt - datetime.utcnow()).total_seconds()
+        return min(max(remaining, 0.1), self.IDLE_WAIT_SECONDS)
+
+    def _finish_message(self, message_data: Dict, future):
+        """Registra o resultado de um envio na fila e avisa a UI"""
+        contact_id = message_data['contact_id']
+
+        try:
+            success, result = future.result()
+            error_msg = "Falha no envio" if not success else ""
+        except Exception as e:
+            success, result = False, {}
+            error_msg = f"Erro no envio: {str(e)}"
+
+        if success:
+            sent_message = self._create_sent_message_data(message_data, result)
+            self.outbox.mark_outbox_sent(message_data['outbox_id'], sent_message['webhook_message_id'])
+            self.message_sent.emit(sent_message)
+            self.progress_update.emit(100)
+            self.send_stats_updated.emit(self.get_send_stats())
+            return
+
+        result = result if isinstance(result, dict) else {}
+        if result.get('error'):
+            error_msg = str(result['error'])
+
+        # Parado antes de chegar à W-API: volta para a fila sem contar tentativa
+        if result.get('interrupted'):
+            self.outbox.release_outbox_message(message_data['outbox_id'])
+            return
+
+        failure = classificar_falha(result.get('status_code'), result.get('exception'))
+        if failure == FALHA_INCERTA:
+            self.outbox.mark_outbox_uncertain(message_data['outbox_id'], error_msg)
+            self.message_failed.emit(contact_id, f"Envio não confirmado (a mensagem pode ter sido entregue): {error_msg}")
+            self.send_stats_updated.emit(self.get_send_stats())
+            return
+
+        attempts = message_data.get('attempts', 0) + 1
+        missing_file = message_data['type'] == 'file' and not os.path.exists(message_data.get('file_path') or '')
+
+        # Sem status nem exceção a falha foi local (antes do envio) e pode ser repetida
+        if failure == FALHA_DEFINITIVA or attempts >= self.MAX_ATTEMPTS or missing_file:
+            self.outbox.mark_outbox_failed(message_data['outbox_id'], error_msg)
+            self.message_failed.emit(contact_id, error_msg)
+            return
+
+        delay = min(self.RETRY_BASE_SECONDS * 2 ** (attempts - 1), self.RETRY_MAX_SECONDS)
+        self.outbox.mark_outbox_failed(
+            message_data['outbox_id'], error_msg, retry_at=datetime.utcnow() + timedelta(seconds=delay)
+        )
+        print(f"🔁 Nova tentativa para {contact_id} em {delay}s ({attempts}/{self.MAX_ATTEMPTS}): {error_msg}")
+        self.message_retry_scheduled.emit(contact_id, delay)
+        self.send_stats_updated.emit(self.get_send_stats())
+
+    def get_send_stats(self) -> Dict:
+        """Profundidade da fila de envio e taxas do limitador"""
+        summary = self.outbox.get_outbox_summary()
+        stats = {key: value for key, value in summary.items() if key != 'next_attempt_at'}
+        stats.update(self.limitador.metricas())
+        if self.whatsapp_api and hasattr(self.whatsapp_api, 'estatisticas_midia'):
+            stats['midia'] = self.whatsapp_api.estatisticas_midia()
+        return stats
+
+    def _send_single_message(self, message_data: Dict) -> Tuple[bool, Dict]:
+        """Envia uma única mensagem e devolve (sucesso, resposta da API)"""
         if not self.whatsapp_api:
-            return False
+            return False, {'error': 'WhatsApp API não inicializada'}
+
+        # Espera a vez no limitador (instância + destinatário)
+        if not self.limitador.aguardar(message_data['contact_id'], cancelar=self._stop_event):
+            return False, {'error': 'Envio interrompido', 'interrupted': True}
 
         try:
             result = None
@@ -317,33 +558,30 @@ class WhatsAppMessageSender(QThread):
 
                 self.progress_update.emit(75)
 
-            # ARMAZENAR a resposta da API para usar no _create_sent_message_data
-            self._last_api_response = result if result else {}
-
-            # Verificar resultado
-            if result and isinstance(result, dict):
+            # Verificar resultado (os wrappers de mídia devolvem success=False em erro)
+            if result and isinstance(result, dict) and result.get('success', True):
                 print(f"✅ Mensagem enviada: {result}")
 
                 # Log do messageId para debug
                 if 'messageId' in result:
                     print(f"📋 ID real da mensagem: {result['messageId']}")
 
-                return True
+                return True, result
             else:
                 print(f"❌ Falha no envio: {result}")
-                return False
+                return False, result if isinstance(result, dict) else {}
 
         except Exception as e:
             print(f"❌ Erro no envio: {e}")
-            return False
+            return False, {'error': f"Erro no envio: {str(e)}"}
 
-    def _create_sent_message_data(self, message_data: Dict) -> Dict:
+    def _create_sent_message_data(self, message_data: Dict, api_response: Dict) -> ChatMessage:
         """Cria dados da mensagem enviada com IDs corretos"""
         timestamp = int(datetime.now().timestamp())
 
         # OBTER O ID REAL DA RESPOSTA DA API se disponível
-        api_response = getattr(self, '_last_api_response', {})
-        real_message_id = api_response.get('messageId', message_data['temp_id'])
+        api_data = api_response.get('data') if isinstance(api_response.get('data'), dict) else {}
+        real_message_id = api_response.get('messageId') or api_data.get('messageId') or message_data['temp_id']
 
         if message_data['type'] == 'text':
             content = message_data['content']
@@ -366,25 +604,18 @@ class WhatsAppMessageSender(QThread):
                 'caption': caption
             }
 
-        # CORRIGIR: Incluir todos os IDs necessários
-        return {
-            'message_id': real_message_id,  # ID real da API ou temp_id se não disponível
-            'webhook_message_id': real_message_id,  # ID para operações da API
-            'local_message_id': message_data['temp_id'],  # ID temporário local
-            'sender_name': 'Você',
-            'content': content,
-            'timestamp': timestamp,
-            'timestamp_str': datetime.fromtimestamp(timestamp).strftime('%H:%M'),
-            'date_str': datetime.fromtimestamp(timestamp).strftime('%d/%m/%Y'),
-            'from_me': True,
-            'is_group': False,
-            'message_type': message_type,
-            'media_data': media_data,
-            'sender_id': '',
-            'contact_id': message_data['contact_id'],
-            'chat_id': message_data['contact_id'],  # CORRIGIR: usar contact_id como chat_id
-            'raw_webhook_data': {}  # Dados originais para debug
-        }
+        # ID real da API (ou temp_id se não disponível); o temp_id fica como ID local
+        return ChatMessage(
+            message_id=real_message_id,
+            chat_id=message_data['contact_id'],
+            content=content,
+            timestamp=timestamp,
+            from_me=True,
+            message_type=message_type,
+            media_data=media_data,
+            sender_name='Você',
+            local_message_id=message_data['temp_id']
+        )
 
     def _format_phone_number(self, phone: str) -> str:
         """Formata número de telefone"""
@@ -397,8 +628,26 @@ class WhatsAppMessageSender(QThread):
 
         return phone_clean
 
+    def request_connection_check(self):
+        """Verifica a conexão fora da thread da UI (ignorado se já houver uma verificação em andamento)"""
+        if not self.whatsapp_api or self._status_check_running.is_set():
+            return
+
+        self._status_check_running.set()
+
+        def check():
+            try:
+                if self.check_connection():
+                    print("✅ WhatsApp API conectada")
+                else:
+                    print("⚠️ WhatsApp API não conectada")
+            finally:
+                self._status_check_running.clear()
+
+        threading.Thread(target=check, name="whatsapp-status", daemon=True).start()
+
     def check_connection(self) -> bool:
-        """Verifica conexão"""
+        """Verifica conexão (bloqueante: na UI, prefira request_connection_check)"""
         if not self.whatsapp_api:
             return False
 
@@ -418,16 +667,32 @@ class WhatsAppMessageSender(QThread):
             return False
 
     def stop_sending(self):
-        """Para envio"""
+        """Para o envio; mensagens pendentes continuam na fila para o próximo início"""
         self.stop_requested = True
-        self.message_queue.clear()
-        self.is_sending = False
+        self._stop_event.set()
+        self._wake.set()
+
+
+class BulkMessageOperationWorker(QThread):
+    """Executa apagar/editar/reagir em lote fora da thread da UI"""
+
+    item_finished = pyqtSignal(dict)
+    batch_finished = pyqtSignal(list)
+
+    def __init__(self, whatsapp_api, operations: List[Tuple]):
+        super().__init__()
+        self.executor = ExecutorOperacoesLote(whatsapp_api)
+        self.operations = list(operations)
+
+    def run(self):
+        results = self.executor.executar(self.operations, callback=self.item_finished.emit)
+        self.batch_finished.emit(results)
 
 
 class IncrementalUpdater(QThread):
     """Thread para atualizações incrementais"""
 
-    new_messages_found = pyqtSignal(list)
+    new_messages_found = pyqtSignal(object)  # PreparedMessages
 
     def __init__(self, db_interface: ChatDatabaseInterface):
         super().__init__()
@@ -465,7 +730,7 @@ class IncrementalUpdater(QThread):
 
             if new_messages:
                 print(f"📬 {len(new_messages)} novas mensagens")
-                self.new_messages_found.emit(new_messages)
+                self.new_messages_found.emit(prepare_messages(new_messages))
             else:
                 if self.check_count % 10 == 0:
                     print(f"🔍 Verificação #{self.check_count}: sem novas mensagens")
@@ -484,7 +749,10 @@ class OptimizedDatabaseWorker(QThread):
     """Worker para operações do banco"""
 
     contacts_loaded = pyqtSignal(list)
-    messages_loaded_initial = pyqtSignal(list)
+    chat_directory_loaded = pyqtSignal(list, object)  # Todas as conversas do banco + índice de busca
+    # Mensagens já preparadas para a lista (PreparedMessages): separadores, horários e reações resolvidos aqui
+    messages_loaded_initial = pyqtSignal(object)
+    messages_loaded_before = pyqtSignal(str, object, bool, object)  # contact_id, mensagens, fim, cursor
     error_occurred = pyqtSignal(str)
     connection_status_changed = pyqtSignal(bool)
 
@@ -514,6 +782,14 @@ class OptimizedDatabaseWorker(QThread):
                 contacts = self.db_interface.get_contacts_list(50)
                 self.contacts_loaded.emit(contacts)
 
+            elif self.current_task == "load_chat_directory":
+                # O índice de milhares de conversas é montado aqui, fora da interface
+                # (worker próprio: não atrasa a troca de conversa)
+                directory = self.db_interface.get_chat_directory()
+                directory_index = ContactSearchIndex()
+                directory_index.rebuild(directory)
+                self.chat_directory_loaded.emit(directory, directory_index)
+
             elif self.current_task == "load_messages_initial":
                 contact_id = self.task_params.get('contact_id')
                 limit = self.task_params.get('limit', 30)
@@ -521,10 +797,24 @@ class OptimizedDatabaseWorker(QThread):
                 if contact_id:
                     print(f"⚡ Carregando mensagens para {contact_id[:15]}")
                     messages = self.db_interface.get_chat_messages_initial(contact_id, limit)
-                    self.messages_loaded_initial.emit(messages)
+                    self.messages_loaded_initial.emit(prepare_messages(messages))
                 else:
                     self.error_occurred.emit("ID do contato não fornecido")
 
+            elif self.current_task == "load_messages_before":
+                contact_id = self.task_params.get('contact_id')
+                limit = self.task_params.get('limit', 30)
+                page = self.db_interface.get_history_page(
+                    contact_id,
+                    self.task_params.get('before_timestamp', 0),
+                    limit=limit,
+                    before_message_id=self.task_params.get('before_message_id')
+                )
+                # Fim do histórico pela página bruta: o filtro pode descartar linhas de uma página cheia
+                exhausted = page['raw_count'] < limit
+                self.messages_loaded_before.emit(
+                    contact_id, prepare_messages(page['messages']), exhausted, page['cursor'])
+
         except Exception as e:
             self.error_occurred.emit(f"Erro na operação: {str(e)}")
 
@@ -538,19 +828,34 @@ class OptimizedDatabaseWorker(QThread):
 class WhatsAppChatMainWindow(QMainWindow):
     """Janela principal INDEPENDENTE com WhatsApp"""
 
+    # Mensagens por página ao rolar para cima no histórico
+    HISTORY_PAGE_SIZE = 30
+
+    # Busca no diretório de conversas do banco (além das carregadas na lista)
+    DIRECTORY_MAX_AGE = 10 * 60  # Recarrega o diretório junto com a lista a cada 10 min
+    DIRECTORY_RESULTS = 50  # Conversas do banco exibidas por busca
+
     def __init__(self):
         super().__init__()
+        profiler = get_startup_profiler()
 
         # Inicializar banco
         self.db_interface = ChatDatabaseInterface()
+        self.transcription_service = get_transcription_service(self.db_interface.db_manager)
+        self.waveform_service = get_waveform_service(self.db_interface.db_manager)
+        profiler.mark("banco e serviços")
 
         # Configurar UI
         self.ui = MainWindowUI(self)
+        profiler.mark("interface")
 
         # Criar workers
-        self.message_sender = WhatsAppMessageSender()
+        self.message_sender = WhatsAppMessageSender(self.db_interface.db_manager)
         self.db_worker = OptimizedDatabaseWorker(self.db_interface)
+        self.directory_worker = OptimizedDatabaseWorker(self.db_interface)
+        self._pending_db_task = None  # (tarefa, parâmetros) à espera do db_worker
         self.incremental_updater = IncrementalUpdater(self.db_interface)
+        profiler.mark("workers")
 
         # Conectar sinais
         self.setup_database_connections()
@@ -561,9 +866,16 @@ class WhatsAppChatMainWindow(QMainWindow):
         # Estado
         self.current_contact = None
         self.current_contact_data = None
+        self._history_cursor = None  # (timestamp, message_id) da linha mais antiga já lida do banco
         self.loaded_contacts = {}
+        self.chat_directory = {}  # contact_id → contato, todas as conversas do banco
+        self.chat_directory_index = ContactSearchIndex()
+        self.chat_directory_loaded_at = 0
+        self.directory_matches = []  # Conversas do banco exibidas pela busca atual
+        self.profiler_overlay = None  # Criado na primeira vez que o profiler é ligado
         self.is_loading_messages = False
         self.messages_loaded_count = 0
+        self._operation_workers = []
 
         # Timers
         self.refresh_timer = QTimer()
@@ -571,17 +883,34 @@ class WhatsAppChatMainWindow(QMainWindow):
         self.refresh_timer.start(60000)
 
         self.whatsapp_status_timer = QTimer()
-        self.whatsapp_status_timer.timeout.connect(self.message_sender.check_connection)
+        self.whatsapp_status_timer.timeout.connect(self.message_sender.request_connection_check)
         self.whatsapp_status_timer.start(30000)
 
-        # Carregar dados
-        self.load_initial_data()
-        self.incremental_updater.start()
         self.cleanup_timer = QTimer()
         self.cleanup_timer.timeout.connect(self._cleanup_pending_messages)
         self.cleanup_timer.start(1000)  # Limpar a cada 10 segundos
-        # Verificação inicial WhatsApp
-        QTimer.singleShot(2000, self.message_sender.check_connection)
+
+        # Carga inicial, monitoramento e envio só depois que a janela aparece
+        self._background_started = False
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self._background_started:
+            self._background_started = True
+            QTimer.singleShot(0, self._start_background_work)
+
+    def _start_background_work(self):
+        """Trabalho que não precisa estar pronto para a janela abrir"""
+        # Carregar dados
+        self.load_initial_data()
+        self.incremental_updater.start()
+
+        # Verificação inicial WhatsApp (em segundo plano)
+        self.message_sender.request_connection_check()
+
+        # Retomar mensagens que ficaram na fila de envio
+        self.message_sender.start()
+        get_startup_profiler().mark("tarefas em segundo plano")
 
     def _cleanup_pending_messages(self):
         """NOVO: Remove mensagens temporárias antigas (mais de 30 segundos)"""
@@ -604,13 +933,19 @@ class WhatsAppChatMainWindow(QMainWindow):
         """Conecta sinais do banco"""
         self.db_worker.contacts_loaded.connect(self.on_contacts_loaded)
         self.db_worker.messages_loaded_initial.connect(self.on_messages_loaded_initial)
+        self.db_worker.messages_loaded_before.connect(self.on_messages_loaded_before)
         self.db_worker.error_occurred.connect(self.on_database_error)
         self.db_worker.connection_status_changed.connect(self.on_db_connection_status_changed)
+        self.db_worker.finished.connect(self._start_pending_db_task)
+
+        self.directory_worker.chat_directory_loaded.connect(self.on_chat_directory_loaded)
+        self.directory_worker.error_occurred.connect(self.on_database_error)
 
     def setup_whatsapp_connections(self):
         """Conecta sinais do WhatsApp"""
         self.message_sender.message_sent.connect(self.on_whatsapp_message_sent)
         self.message_sender.message_failed.connect(self.on_whatsapp_message_failed)
+        self.message_sender.message_retry_scheduled.connect(self.on_whatsapp_message_retry)
         self.message_sender.progress_update.connect(self.on_whatsapp_progress)
         self.message_sender.connection_status.connect(self.on_whatsapp_connection_status)
 
@@ -622,10 +957,17 @@ class WhatsAppChatMainWindow(QMainWindow):
         """Conecta sinais da UI - VERSÃO ATUALIZADA"""
         self.ui.refresh_btn.clicked.connect(self.refresh_current_chat)
         self.ui.search_input.textChanged.connect(self.filter_contacts)
+        self.ui.contacts_list.contact_clicked.connect(self.on_contact_selected)
         self.ui.send_btn.clicked.connect(self.send_whatsapp_text_message)
         self.ui.attach_btn.clicked.connect(self.send_whatsapp_file)
         self.ui.message_input.returnPressed.connect(self.send_whatsapp_text_message)
 
+        # Balões reais só existem quando o usuário interage com uma linha da lista
+        self.ui.messages_view.bubble_factory = lambda record: MessageRenderer.create_message_widget(
+            record, whatsapp_api=self.message_sender.whatsapp_api)
+        self.ui.messages_view.bubble_created.connect(self._connect_message_bubble)
+        self.ui.messages_view.history_requested.connect(self.load_older_messages)
+
         # Atalhos
         from PyQt6.QtGui import QShortcut, QKeySequence
 
@@ -635,6 +977,15 @@ class WhatsAppChatMainWindow(QMainWindow):
         whatsapp_shortcut = QShortcut(QKeySequence("Ctrl+W"), self)
         whatsapp_shortcut.activated.connect(self.show_whatsapp_config)
 
+        transcribe_shortcut = QShortcut(QKeySequence("Ctrl+T"), self)
+        transcribe_shortcut.activated.connect(self.transcribe_all_voice_notes)
+
+        profiler_shortcut = QShortcut(QKeySequence("Ctrl+Shift+P"), self)
+        profiler_shortcut.activated.connect(self.toggle_profiler)
+
+        trace_shortcut = QShortcut(QKeySequence("Ctrl+Shift+S"), self)
+        trace_shortcut.activated.connect(lambda: get_ui_profiler().dump_trace())
+
     def send_whatsapp_text_message(self):
         """Envia mensagem via WhatsApp - CORRIGIDO"""
         if not self.current_contact:
@@ -727,6 +1078,7 @@ class WhatsAppChatMainWindow(QMainWindow):
             self.ui.attach_btn.setEnabled(True)
             self.ui.attach_btn.setText("📎")
 
+    @profiled()
     def on_whatsapp_message_sent(self, message_data: Dict):
         """CORRIGIDO: Mensagem WhatsApp enviada - NÃO criar temporária"""
         print(f"✅ Mensagem WhatsApp enviada: {message_data.get('content', '')[:50]}")
@@ -765,6 +1117,16 @@ class WhatsAppChatMainWindow(QMainWindow):
         # Mostrar erro
         QMessageBox.critical(self, "Erro WhatsApp", f"Falha no envio:\n{error_message}")
 
+    def on_whatsapp_message_retry(self, contact_id: str, delay_seconds: int):
+        """Falha temporária: a mensagem continua na fila e será reenviada"""
+        print(f"🔁 Reenvio para {contact_id} em {delay_seconds}s")
+
+        # Liberar os botões: a fila cuida do reenvio
+        self.ui.send_btn.setEnabled(True)
+        self.ui.send_btn.setText("➤")
+        self.ui.attach_btn.setEnabled(True)
+        self.ui.attach_btn.setText("📎")
+
     def on_whatsapp_progress(self, progress: int):
         """Progresso do envio - CORRIGIDO"""
         if progress < 100 and progress > 0:
@@ -933,6 +1295,7 @@ class WhatsAppChatMainWindow(QMainWindow):
 
             # Reinicializar API
             self.message_sender.init_api()
+            self.message_sender.request_connection_check()
 
             QMessageBox.information(dialog, "Sucesso", "Configurações salvas!")
             dialog.accept()
@@ -948,8 +1311,8 @@ class WhatsAppChatMainWindow(QMainWindow):
         self.ui.show_welcome_screen()
 
         if self.db_interface.is_connected():
-            self.db_worker.set_task("load_contacts")
-            self.db_worker.start()
+            self._run_db_task("load_contacts")
+            self._load_chat_directory_if_stale()
         else:
             QMessageBox.warning(self, "Erro", "Não foi possível conectar ao banco")
 
@@ -957,30 +1320,30 @@ class WhatsAppChatMainWindow(QMainWindow):
         """Status do banco"""
         self.ui.update_connection_status(connected)
 
+    @profiled()
     def on_contacts_loaded(self, contacts: List[Dict]):
         """Contatos carregados com conexão de seleção"""
         print(f"📋 {len(contacts)} contatos carregados")
 
-        self.ui.clear_contacts_list()
-        self.loaded_contacts.clear()
-
-        for contact_data in contacts:
-            contact_widget = self.ui.add_contact_to_list(contact_data)
+        self.loaded_contacts = {contact['contact_id']: contact for contact in contacts}
 
-            # CORREÇÃO: Conectar sinal para seleção de contato
-            contact_widget.clicked.connect(self.on_contact_selected)
+        # Conversas do banco achadas pela busca continuam no fim da lista
+        self.directory_matches = [contact for contact in self.directory_matches
+                                  if contact['contact_id'] not in self.loaded_contacts]
 
-            contact_id = contact_data['contact_id']
-            self.loaded_contacts[contact_id] = contact_data
+        # Diferença contra o retrato anterior: só as linhas alteradas mudam,
+        # seleção e rolagem ficam onde estavam (o índice de busca filtra as novas)
+        stats = self.ui.update_contacts_list(contacts + self.directory_matches)
 
-        print("✅ Lista atualizada com elevação de seleção")
+        print(f"✅ Lista atualizada: {stats['inserted']} novos, {stats['removed']} removidos, "
+              f"{stats['moved']} movidos, {stats['updated']} alterados")
 
+    @profiled()
     def on_contact_selected(self, contact_id: str):
         """CORRIGIDO: Seleção com isolamento total"""
-        if contact_id not in self.loaded_contacts:
+        contact_data = self.loaded_contacts.get(contact_id) or self.chat_directory.get(contact_id)
+        if contact_data is None:
             return
-
-        contact_data = self.loaded_contacts[contact_id]
         print(f"👤 ISOLAMENTO: Selecionado {contact_data['contact_name']} (ID: {contact_id[:15]})")
 
         # CORREÇÃO: Limpar cache de outros contatos para evitar interferência
@@ -993,6 +1356,7 @@ class WhatsAppChatMainWindow(QMainWindow):
 
         self.current_contact = contact_id
         self.current_contact_data = contact_data
+        self._history_cursor = None
 
         # Configurar updater APENAS para este contato
         self.incremental_updater.set_current_contact(contact_id)
@@ -1008,20 +1372,46 @@ class WhatsAppChatMainWindow(QMainWindow):
         self.is_loading_messages = True
         self.messages_loaded_count = 0
 
-        self.db_worker.set_task("load_messages_initial", contact_id=contact_id, limit=30)
+        # Worker ocupado: a carga entra quando ele terminar (sem travar a interface esperando)
+        self._run_db_task("load_messages_initial", contact_id=contact_id, limit=30)
 
+    def _run_db_task(self, task_name: str, **params):
+        """Inicia a tarefa no db_worker; se ele estiver ocupado, guarda a mais recente para depois"""
         if self.db_worker.isRunning():
-            self.db_worker.wait()
+            # Nunca chamar set_task com o worker rodando: ele leria os parâmetros trocados
+            self._pending_db_task = (task_name, params)
+            return
 
+        self.db_worker.set_task(task_name, **params)
         self.db_worker.start()
 
-    def on_messages_loaded_initial(self, messages: List[Dict]):
+    def _start_pending_db_task(self):
+        if self._pending_db_task is not None:
+            task_name, params = self._pending_db_task
+            self._pending_db_task = None
+            # finished é emitido pouco antes de a thread terminar: espera esse instante final
+            self.db_worker.wait()
+            self._run_db_task(task_name, **params)
+
+    def _load_chat_directory_if_stale(self):
+        """Recarrega o diretório de conversas (busca) no worker próprio, se estiver velho"""
+        if self._chat_directory_stale() and not self.directory_worker.isRunning():
+            self.directory_worker.set_task("load_chat_directory")
+            self.directory_worker.start()
+
+    @profiled()
+    def on_messages_loaded_initial(self, messages: PreparedMessages):
         """Mensagens iniciais carregadas"""
         if not self.current_contact:
             return
 
+        # Resultado de uma conversa anterior: a carga da conversa atual ainda está na fila
+        if self._pending_db_task and self._pending_db_task[0] == "load_messages_initial":
+            return
+
         print(f"💬 {len(messages)} mensagens carregadas")
         self.is_loading_messages = False
+        self._history_cursor = None
 
         self.clear_messages_display()
 
@@ -1029,73 +1419,77 @@ class WhatsAppChatMainWindow(QMainWindow):
             self.add_system_message("Nenhuma mensagem encontrada")
             return
 
-        # Renderizar mensagens
-        previous_message = None
-        self.messages_loaded_count = 0
+        # Transcrições e formas de onda salvas do chat (uma consulta cada, exibição imediata)
+        audio_message_ids = list(messages.audio_message_ids)
+        self.transcription_service.preload(audio_message_ids)
+        self.waveform_service.preload(audio_message_ids)
 
-        for i, message_data in enumerate(messages):
-            # Separador de data
-            if MessageRenderer.should_show_date_separator(message_data, previous_message):
-                date_str = message_data.get('date_str', '')
-                if date_str:
-                    formatted_date = MessageRenderer.format_date_separator(date_str)
-                    date_separator = MessageRenderer.create_date_separator(formatted_date)
-                    date_separator = MessageRenderer.create_date_separator(formatted_date)
-                    self.add_widget_to_chat_initial(date_separator)
-
-            # Criar mensagem
-            try:
-                message_widget = MessageRenderer.create_message_widget(
-                    message_data,
-                    whatsapp_api=self.message_sender.whatsapp_api
-                )
-                if message_widget:
-                    if isinstance(message_widget, MessageBubble):
-                        message_widget.message_date = message_data.get('date_str', '')
+        # Renderizar mensagens em lote: um reset do modelo, um layout, uma rolagem
+        render_start = time.perf_counter()
+        self.messages_loaded_count = self.ui.messages_view.set_messages(messages)
+        render_ms = (time.perf_counter() - render_start) * 1000
 
-                    self.add_widget_to_chat_initial(message_widget)
-                    self.messages_loaded_count += 1
+        print(f"✅ {self.messages_loaded_count} mensagens renderizadas em {render_ms:.1f} ms")
 
-                    # Animar
-                    if isinstance(message_widget, MessageBubble):
-                        QTimer.singleShot(20 * i, message_widget.animate_in)
+    def load_older_messages(self):
+        """Busca a página anterior do histórico (disparado ao rolar até o topo)"""
+        view = self.ui.messages_view
+        oldest = view.message_model.oldest_message()
 
-            except Exception as e:
-                print(f"Erro ao criar mensagem: {e}")
-                continue
+        if not self.current_contact or oldest is None:
+            view.finish_history_load([], exhausted=True)
+            return
+
+        if self.db_worker.isRunning() and self._pending_db_task is not None:
+            # Já há uma carga na fila: libera o pedido, a próxima rolagem tenta de novo
+            view.finish_history_load([])
+            return
 
-            previous_message = message_data
+        # Parte da última linha lida do banco, mesmo que o filtro a tenha descartado
+        before_timestamp, before_message_id = self._history_cursor or (oldest.timestamp, oldest.message_id)
 
-        # Stretch final
-        self.ui.messages_layout.addStretch()
+        print(f"📜 Carregando mensagens anteriores a {oldest.timestamp_str} {oldest.date_str}")
+        self._run_db_task(
+            "load_messages_before",
+            contact_id=self.current_contact,
+            before_timestamp=before_timestamp,
+            before_message_id=before_message_id,
+            limit=self.HISTORY_PAGE_SIZE
+        )
+
+    @profiled()
+    def on_messages_loaded_before(self, contact_id: str, messages: PreparedMessages,
+                                  exhausted: bool, cursor):
+        """Página de histórico carregada: insere no topo mantendo a posição da rolagem"""
+        if contact_id != self.current_contact:
+            return
 
-        # Atualizar geometria
-        self.ui.messages_widget.updateGeometry()
-        self.ui.messages_scroll.updateGeometry()
+        if cursor is not None:
+            self._history_cursor = cursor
 
-        QTimer.singleShot(200, self.ui.scroll_to_bottom)
+        audio_message_ids = list(messages.audio_message_ids)
+        self.transcription_service.preload(audio_message_ids)
+        self.waveform_service.preload(audio_message_ids)
 
-        print(f"✅ {self.messages_loaded_count} mensagens renderizadas")
+        added = self.ui.messages_view.finish_history_load(
+            messages, exhausted=exhausted)
+        self.messages_loaded_count += added
 
-    def on_new_messages_received_incremental(self, new_messages: List[Dict]):
+        if not added and not exhausted:
+            # O filtro descartou a página inteira: a rolagem não muda, então segue sozinho
+            self.ui.messages_view.continue_history_load()
+
+        print(f"📜 {added} mensagens antigas exibidas. Total: {self.messages_loaded_count}")
+
+    @profiled()
+    def on_new_messages_received_incremental(self, new_messages: PreparedMessages):
         """SIMPLIFICADO: Processar apenas novas mensagens normais"""
         if not new_messages:
             return
 
         print(f"📨 {len(new_messages)} novas mensagens")
 
-        for message_data in new_messages:
-            try:
-                # SIMPLES: Criar widget para todas as mensagens novas
-                message_widget = MessageRenderer.create_message_widget(
-                    message_data,
-                    whatsapp_api=self.message_sender.whatsapp_api
-                )
-                if message_widget:
-                    self.add_single_message_to_chat(message_widget, message_data, is_new=True)
-
-            except Exception as e:
-                print(f"Erro ao processar mensagem: {e}")
+        self.add_messages_to_chat(new_messages, is_new=True)
 
     def _is_reaction_update(self, message_data: Dict) -> bool:
         """Verifica se a mensagem é uma atualização de reação"""
@@ -1106,19 +1500,11 @@ class WhatsAppChatMainWindow(QMainWindow):
          )
 
     def _find_temporary_message_widget(self, temp_id: str) -> Optional['MessageBubble']:
-        """NOVO: Encontra widget de mensagem temporária pelo temp_id"""
+        """NOVO: Encontra o balão materializado de uma mensagem temporária pelo temp_id"""
         try:
-            for i in range(self.ui.messages_layout.count()):
-                item = self.ui.messages_layout.itemAt(i)
-                if item and item.widget():
-                    widget = item.widget()
-                    if isinstance(widget, MessageBubble):
-                        # Verificar se é o widget temporário
-                        if (hasattr(widget, 'is_temporary_sent') and
-                                widget.is_temporary_sent and
-                                hasattr(widget, 'temp_id') and
-                                widget.temp_id == temp_id):
-                            return widget
+            widget = self.ui.messages_view.bubble_for_message_id(temp_id)
+            if widget and getattr(widget, 'is_temporary_sent', False) and getattr(widget, 'temp_id', None) == temp_id:
+                return widget
             return None
         except Exception as e:
             print(f"Erro ao buscar widget temporário: {e}")
@@ -1153,10 +1539,11 @@ class WhatsAppChatMainWindow(QMainWindow):
                 print(f"⚠️ Mensagem temporária não encontrada para: {real_id}")
                 return
 
-            # Encontrar widget temporário na interface
-            temp_widget = self._find_temporary_message_widget(temp_id_to_replace)
-            if not temp_widget:
-                print(f"⚠️ Widget temporário não encontrado: {temp_id_to_replace}")
+            # Encontrar a linha temporária na lista
+            model = self.ui.messages_view.message_model
+            row = model.row_for_message_id(temp_id_to_replace)
+            if row < 0:
+                print(f"⚠️ Mensagem temporária não encontrada na lista: {temp_id_to_replace}")
                 return
 
             # Processar dados da mensagem definitiva
@@ -1165,19 +1552,22 @@ class WhatsAppChatMainWindow(QMainWindow):
                 print(f"⚠️ Erro ao processar mensagem definitiva: {real_id}")
                 return
 
-            # CRÍTICO: Atualizar widget temporário com dados definitivos
-            temp_widget.message_data.update(processed_msg)
-            temp_widget.webhook_message_id = real_id
-            temp_widget.message_data['webhook_message_id'] = real_id
-            temp_widget.message_data['message_id'] = real_id
+            # CRÍTICO: Atualizar o registro da linha com dados definitivos
+            record = model.message_at(row)
+            record.update(processed_msg)
+            record['message_id'] = real_id
+            model.refresh_row(row)
 
-            # Remover flags temporárias
-            temp_widget.is_temporary_sent = False
-            if hasattr(temp_widget, 'temp_id'):
-                delattr(temp_widget, 'temp_id')
+            # Balão materializado (se houver): remover flags temporárias
+            temp_widget = self.ui.messages_view.bubble_for_row(row)
+            if temp_widget:
+                temp_widget.webhook_message_id = real_id
+                temp_widget.is_temporary_sent = False
+                if hasattr(temp_widget, 'temp_id'):
+                    delattr(temp_widget, 'temp_id')
 
-            # Adicionar indicador visual de "enviado"
-            temp_widget._mark_as_delivered()
+                # Adicionar indicador visual de "enviado"
+                temp_widget._mark_as_delivered()
 
             # Limpar da lista de pendentes
             del self._pending_sent_messages[temp_id_to_replace]
@@ -1244,13 +1634,11 @@ class WhatsAppChatMainWindow(QMainWindow):
 
         print(f"😀 Processando reação: {reaction} para mensagem {target_message_id}")
 
-        # Encontrar widget da mensagem na interface
-        message_widget = self._find_message_widget_by_id(target_message_id)
+        # Atualizar registro da lista (e o balão, se estiver materializado)
+        message_widget = self.ui.messages_view.update_message(target_message_id, {'reaction': reaction})
         if message_widget and isinstance(message_widget, MessageBubble):
-            # Atualizar reação no widget
-            message_widget.message_data['reaction'] = reaction
             message_widget._update_reaction_display(reaction)
-            print(f"✅ Reação atualizada na interface")
+        print(f"✅ Reação atualizada na interface")
 
     def _is_message_edit(self, message_data: Dict) -> bool:
         """Verifica se é uma edição de mensagem"""
@@ -1266,14 +1654,12 @@ class WhatsAppChatMainWindow(QMainWindow):
 
         print(f"✏️ Processando edição de mensagem {webhook_message_id}")
 
-        # Encontrar widget da mensagem
-        message_widget = self._find_message_widget_by_id(webhook_message_id)
+        # Atualizar registro da lista (e o balão, se estiver materializado)
+        message_widget = self.ui.messages_view.update_message(
+            webhook_message_id, {'content': new_content, 'edited': True})
         if message_widget and isinstance(message_widget, MessageBubble):
-            # Atualizar conteúdo no widget
-            message_widget.message_data['content'] = new_content
-            message_widget.message_data['edited'] = True
             message_widget._show_as_edited(new_content)
-            print(f"✅ Edição atualizada na interface")
+        print(f"✅ Edição atualizada na interface")
 
     def _is_message_deletion(self, message_data: Dict) -> bool:
         """Verifica se é uma exclusão de mensagem"""
@@ -1288,28 +1674,16 @@ class WhatsAppChatMainWindow(QMainWindow):
 
         print(f"🗑️ Processando exclusão de mensagem {webhook_message_id}")
 
-        # Encontrar widget da mensagem
-        message_widget = self._find_message_widget_by_id(webhook_message_id)
+        # Atualizar registro da lista (e o balão, se estiver materializado)
+        message_widget = self.ui.messages_view.update_message(webhook_message_id, {'deleted': True})
         if message_widget and isinstance(message_widget, MessageBubble):
-            # Marcar como deletada no widget
-            message_widget.message_data['deleted'] = True
             message_widget._show_as_deleted()
-            print(f"✅ Exclusão atualizada na interface")
+        print(f"✅ Exclusão atualizada na interface")
 
     def _find_message_widget_by_id(self, webhook_message_id: str) -> Optional[MessageBubble]:
-        """Encontra widget de mensagem pelo ID do webhook"""
+        """Encontra o balão materializado da mensagem pelo ID do webhook (None se só estiver desenhada)"""
         try:
-            # Percorrer widgets no layout de mensagens
-            for i in range(self.ui.messages_layout.count()):
-                item = self.ui.messages_layout.itemAt(i)
-                if item and item.widget():
-                    widget = item.widget()
-                    if isinstance(widget, MessageBubble):
-                        widget_id = widget.message_data.get('webhook_message_id') or widget.message_data.get(
-                            'message_id')
-                        if widget_id == webhook_message_id:
-                            return widget
-            return None
+            return self.ui.messages_view.bubble_for_message_id(webhook_message_id)
         except Exception as e:
             print(f"Erro ao buscar widget: {e}")
             return None
@@ -1318,99 +1692,120 @@ class WhatsAppChatMainWindow(QMainWindow):
 
 
 
-    def add_single_message_to_chat(self, widget, message_data: Dict, is_sent: bool = False, is_new: bool = False):
-        """Adiciona uma mensagem e conecta sinais corretamente"""
-        try:
-            # Conectar sinais da mensagem se for MessageBubble
-            if isinstance(widget, MessageBubble):
-                # Conectar sinais com IDs corretos
-                widget.message_deleted.connect(self.on_message_deleted_from_ui)
-                widget.message_edited.connect(self.on_message_edited_from_ui)
-                widget.message_reaction.connect(self.on_message_reaction_from_ui)
-
-            # Verificar separador de data (código existente...)
-            need_date_separator = False
-            last_widget_date = None
-
-            if self.ui.messages_layout.count() > 1:
-                for i in range(self.ui.messages_layout.count() - 1, -1, -1):
-                    item = self.ui.messages_layout.itemAt(i)
-                    if item and item.widget():
-                        last_widget = item.widget()
-                        if isinstance(last_widget, MessageBubble):
-                            last_widget_date = getattr(last_widget, 'message_date', None)
-                            break
-
-            current_date = message_data.get('date_str', '')
-            if current_date and last_widget_date and current_date != last_widget_date:
-                need_date_separator = True
-            elif current_date and not last_widget_date:
-                need_date_separator = True
-
-            # Remover stretch (código existente...)
-            stretch_item = None
-            if self.ui.messages_layout.count() > 0:
-                last_item = self.ui.messages_layout.itemAt(self.ui.messages_layout.count() - 1)
-                if last_item and last_item.spacerItem():
-                    stretch_item = self.ui.messages_layout.takeAt(self.ui.messages_layout.count() - 1)
-
-            # Adicionar separador se necessário (código existente...)
-            if need_date_separator:
-                formatted_date = MessageRenderer.format_date_separator(current_date)
-                date_separator = MessageRenderer.create_date_separator(formatted_date)
-                if date_separator:
-                    date_separator.setVisible(True)
-                    date_separator.show()
-                    self.ui.messages_layout.addWidget(date_separator)
-
-            # Adicionar mensagem
-            widget.setVisible(True)
-            widget.show()
-
-            if isinstance(widget, MessageBubble):
-                widget.message_date = current_date
-
-            self.ui.messages_layout.addWidget(widget)
-
-            # Readicionar stretch (código existente...)
-            if stretch_item:
-                self.ui.messages_layout.addItem(stretch_item)
-            else:
-                self.ui.messages_layout.addStretch()
+    def run_message_operations(self, operations: List[Tuple]):
+        """
+        Executa operações (operação, chat_id, message_id, args) sobre mensagens
+        em segundo plano; cada bolha é atualizada assim que sua operação termina.
+        """
+        if not operations:
+            return
+        if not WHATSAPP_API_AVAILABLE or not self.message_sender.whatsapp_api:
+            QMessageBox.warning(self, "Erro", "WhatsApp API não disponível.")
+            return
+
+        worker = BulkMessageOperationWorker(self.message_sender.whatsapp_api, operations)
+        worker.item_finished.connect(self.on_message_operation_finished)
+        worker.batch_finished.connect(lambda results, w=worker: self.on_message_operations_finished(w, results))
+        self._operation_workers.append(worker)
+        worker.start()
+
+    def delete_messages_bulk(self, chat_id: str, message_ids: List[str]):
+        """Apaga várias mensagens de uma conversa com chamadas concorrentes"""
+        self.run_message_operations([('delete', chat_id, message_id, {}) for message_id in message_ids])
+
+    def on_message_operation_finished(self, result: Dict):
+        """Aplica o resultado de uma operação na bolha correspondente"""
+        widget = self._find_message_widget_by_id(result.get('message_id'))
+        if widget:
+            widget.apply_operation_result(result)
+            return
 
-            self.messages_loaded_count += 1
-            self.ui.messages_widget.updateGeometry()
+        # Linha só desenhada (balão nunca criado ou já descartado): atualizar o registro
+        if not result.get('success'):
+            print(f"❌ Falha em '{result.get('operation')}' ({result.get('message_id')}): {result.get('error')}")
+            return
 
-            # Animar (código existente...)
-            if isinstance(widget, MessageBubble):
-                if is_new or is_sent:
-                    QTimer.singleShot(50, widget.animate_in)
+        operation = result.get('operation')
+        args = result.get('args') or {}
+        message_id = result.get('message_id')
+        chat_id = result.get('chat_id')
+
+        if operation == 'delete':
+            self.ui.messages_view.update_message(message_id, {'deleted': True})
+            self.on_message_deleted_from_ui(message_id, chat_id)
+        elif operation == 'edit':
+            new_text = args.get('text', '')
+            self.ui.messages_view.update_message(message_id, {'content': new_text, 'edited': True})
+            self.on_message_edited_from_ui(message_id, new_text, chat_id)
+        elif operation in ('react', 'unreact'):
+            reaction = args.get('reaction') if operation == 'react' else None
+            self.ui.messages_view.update_message(message_id, {'reaction': reaction})
+            self.on_message_reaction_from_ui(message_id, reaction or '', chat_id)
+
+    def on_message_operations_finished(self, worker: BulkMessageOperationWorker, results: List[Dict]):
+        """Resumo do lote: um único aviso para todas as falhas"""
+        if worker in self._operation_workers:
+            self._operation_workers.remove(worker)
+        worker.deleteLater()
+
+        summary = ExecutorOperacoesLote.resumo(results)
+        print(f"📦 Operações em lote: {summary['sucessos']}/{summary['total']} concluídas")
+
+        if summary['falhas']:
+            details = "\n".join(f"• {e['operation']} {str(e['message_id'])[:15]}: {e['error']}"
+                                for e in summary['erros'][:5])
+            QMessageBox.warning(self, "Erro",
+                                f"{summary['falhas']} de {summary['total']} operação(ões) falharam:\n{details}")
+
+    def _connect_message_bubble(self, widget):
+        """Conecta os sinais de um balão materializado pela lista"""
+        if isinstance(widget, MessageBubble):
+            widget.message_deleted.connect(self.on_message_deleted_from_ui)
+            widget.message_edited.connect(self.on_message_edited_from_ui)
+            widget.message_reaction.connect(self.on_message_reaction_from_ui)
+            widget.operation_requested.connect(self.run_message_operations)
+            widget.async_operations = True
+
+    def add_messages_to_chat(self, messages: List[Dict], is_sent: bool = False, is_new: bool = False):
+        """
+        Adiciona mensagens ao final da lista em lote (separadores de data
+        inclusos pelo modelo): uma inserção, uma rolagem, animação só nas últimas.
+        """
+        try:
+            added = self.ui.messages_view.add_messages(messages, scroll=is_new or is_sent,
+                                                       animate=is_new or is_sent)
+            self.messages_loaded_count += added
 
-            # Scroll (código existente...)
-            if is_new or is_sent:
-                QTimer.singleShot(100, self.ui.scroll_to_bottom)
+            if added and (is_new or is_sent) and self.current_contact:
+                self._touch_contact(self.current_contact, messages[-1])
 
-            print(f"✅ Mensagem adicionada com sinais conectados. Total: {self.messages_loaded_count}")
+            print(f"✅ {added} mensagem(ns) adicionada(s). Total: {self.messages_loaded_count}")
 
         except Exception as e:
-            print(f"❌ Erro ao adicionar mensagem: {e}")
+            print(f"❌ Erro ao adicionar mensagens: {e}")
+
+    def _touch_contact(self, contact_id: str, message: Dict):
+        """Leva o chat ao topo da lista com a última mensagem, sem recarregar a lista"""
+        changes = {
+            'last_message': message.get('content', ''),
+            'last_message_time': message.get('timestamp') or int(time.time()),
+            'last_message_from_me': bool(message.get('from_me', False))
+        }
+
+        contact = self.ui.contacts_list.contact_model.update_contact(contact_id, changes, move_to_top=True)
+        if contact is not None:
+            self.loaded_contacts[contact_id] = contact
+            if self.current_contact == contact_id:
+                self.current_contact_data = contact
 
-    def add_widget_to_chat_initial(self, widget):
-        """Adiciona widget inicial"""
-        widget.setVisible(True)
-        widget.show()
-        self.ui.messages_layout.addWidget(widget)
-        self.ui.messages_widget.updateGeometry()
+    def add_single_message_to_chat(self, message_data: Dict, is_sent: bool = False, is_new: bool = False):
+        """Adiciona uma mensagem ao final da lista"""
+        self.add_messages_to_chat([message_data], is_sent=is_sent, is_new=is_new)
 
     def clear_messages_display(self):
         """Limpa mensagens"""
-        while self.ui.messages_layout.count() > 0:
-            child = self.ui.messages_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-
+        self.ui.clear_messages()
         self.messages_loaded_count = 0
-        QApplication.processEvents()
 
     def on_database_error(self, error_message: str):
         """Erro no banco"""
@@ -1418,53 +1813,49 @@ class WhatsAppChatMainWindow(QMainWindow):
 
     def add_system_message(self, message: str):
         """Adiciona mensagem do sistema"""
-        from PyQt6.QtWidgets import QLabel
-        from PyQt6.QtCore import Qt
-        from PyQt6.QtGui import QFont
-
-        system_label = QLabel(message)
-        system_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        system_label.setFont(QFont('Segoe UI', 10))
-        system_label.setMinimumHeight(40)
-        system_label.setStyleSheet("""
-            QLabel {
-                color: #95a5a6;
-                background-color: #f8f9fa;
-                padding: 10px 20px;
-                border-radius: 15px;
-                margin: 10px 50px;
-                font-style: italic;
-            }
-        """)
-
-        system_label.setVisible(True)
-        system_label.show()
-        self.add_widget_to_chat_initial(system_label)
+        self.ui.messages_view.message_model.add_system_message(message)
 
+    @profiled()
     def filter_contacts(self, search_text: str):
-        """Filtra contatos"""
-        search_text = search_text.lower().strip()
-
-        if not search_text:
-            for i in range(self.ui.contacts_list.count()):
-                item = self.ui.contacts_list.item(i)
-                item.setHidden(False)
+        """Filtra contatos pelo índice de busca (lista carregada + diretório do banco)"""
+        visible = self.ui.contacts_list.set_search_text(search_text)
+        self._update_directory_matches(search_text)
+
+        if search_text.strip():
+            print(f"🔎 Busca '{search_text.strip()}': {visible} carregadas, "
+                  f"{len(self.directory_matches)} do histórico")
+
+    def _update_directory_matches(self, search_text: str):
+        """Acrescenta ao fim da lista as conversas do banco que batem com a busca e não estão carregadas"""
+        matches = []
+        ids = self.chat_directory_index.search(search_text) if self.chat_directory else None
+        if ids:
+            ids -= self.loaded_contacts.keys()
+            found = sorted((self.chat_directory[contact_id] for contact_id in ids),
+                           key=lambda contact: contact['last_message_time'], reverse=True)
+            matches = found[:self.DIRECTORY_RESULTS]
+
+        if not matches and not self.directory_matches:
             return
 
-        for i in range(self.ui.contacts_list.count()):
-            item = self.ui.contacts_list.item(i)
-            widget = self.ui.contacts_list.itemWidget(item)
+        self.directory_matches = matches
+        model = self.ui.contacts_list.contact_model
+        loaded = [contact for contact in model.contacts() if contact['contact_id'] in self.loaded_contacts]
+        self.ui.update_contacts_list(loaded + matches)
 
-            if isinstance(widget, ContactItemWidget):
-                contact_data = widget.contact_data
-                name = contact_data.get('contact_name', '').lower()
-                contact_id = contact_data.get('contact_id', '').lower()
+    def _chat_directory_stale(self) -> bool:
+        return time.time() - self.chat_directory_loaded_at > self.DIRECTORY_MAX_AGE
 
-                should_show = (search_text in name or
-                               search_text in contact_id or
-                               search_text in contact_data.get('last_message', '').lower())
+    @profiled()
+    def on_chat_directory_loaded(self, directory: List[Dict], directory_index: ContactSearchIndex):
+        """Diretório de conversas do banco carregado (usado só pela busca)"""
+        self.chat_directory = {contact['contact_id']: contact for contact in directory}
+        self.chat_directory_index = directory_index
+        self.chat_directory_loaded_at = time.time()
 
-                item.setHidden(not should_show)
+        search_text = self.ui.search_input.text()
+        if search_text.strip():
+            self._update_directory_matches(search_text)
 
     def refresh_current_chat(self):
         """Refresh do chat"""
@@ -1487,21 +1878,68 @@ class WhatsAppChatMainWindow(QMainWindow):
         """Auto refresh contatos"""
         if not self.db_worker.isRunning() and not self.is_loading_messages:
             print("🔄 Auto-refresh contatos")
-            self.db_worker.set_task("load_contacts")
-            self.db_worker.start()
+            self._run_db_task("load_contacts")
+        self._load_chat_directory_if_stale()
 
     def show_debug_info(self):
         """Debug info"""
         if self.current_contact:
-            layout_count = self.ui.messages_layout.count()
+            rows_count = self.ui.messages_view.message_model.rowCount()
+            live_bubbles = self.ui.messages_view.live_bubble_count()
             cache_stats = self.db_interface.get_cache_stats()
 
             print(f"🔍 DEBUG:")
             print(f"   Contato: {self.current_contact}")
-            print(f"   Widgets: {layout_count}")
+            print(f"   Linhas: {rows_count} (balões materializados: {live_bubbles})")
             print(f"   Mensagens: {self.messages_loaded_count}")
             print(f"   Cache: {cache_stats}")
             print(f"   WhatsApp API: {'Disponível' if self.message_sender.whatsapp_api else 'Indisponível'}")
+            print(f"   Fila de envio: {self.message_sender.get_send_stats()}")
+
+    def toggle_profiler(self):
+        """Liga/desliga o profiler da interface e o overlay com as medidas (Ctrl+Shift+P)"""
+        profiler = get_ui_profiler()
+        if profiler.enabled:
+            profiler.stop()
+            if self.profiler_overlay:
+                self.profiler_overlay.hide()
+            return
+
+        profiler.start()
+        if self.profiler_overlay is None:
+            self.profiler_overlay = ProfilerOverlay(self, extra_stats=self._profiler_stats)
+        self.profiler_overlay.show()
+
+    def _profiler_stats(self) -> Dict:
+        """Números do chat aberto exibidos no overlay do profiler"""
+        return {
+            'Linhas': self.ui.messages_view.message_model.rowCount(),
+            'Balões vivos': self.ui.messages_view.live_bubble_count(),
+            'Conversas': self.ui.contacts_list.contact_model.rowCount()
+        }
+
+    def transcribe_all_voice_notes(self):
+        """Transcreve todas as mensagens de voz do chat atual (Ctrl+T)"""
+        if not self.current_contact:
+            return
+
+        if not self.transcription_service.is_available():
+            QMessageBox.warning(self, "Transcrição",
+                                "Nenhum engine de transcrição disponível.\n"
+                                "Instale openai-whisper ou SpeechRecognition.")
+            return
+
+        audio_messages = self.db_interface.get_chat_audio_messages(self.current_contact)
+        if not audio_messages:
+            self.add_system_message("Nenhuma mensagem de voz neste chat")
+            return
+
+        stats = self.transcription_service.transcribe_messages(audio_messages)
+        print(f"📝 Transcrição do chat: {stats}")
+        self.add_system_message(
+            f"📝 {stats['enfileiradas']} áudio(s) na fila de transcrição, "
+            f"{stats['em_cache']} já transcrito(s)"
+        )
 
     def closeEvent(self, event):
         """Fechamento"""
@@ -1512,20 +1950,40 @@ class WhatsAppChatMainWindow(QMainWindow):
         self.whatsapp_status_timer.stop()
 
         # Parar threads
-        if self.db_worker.isRunning():
-            self.db_worker.stop()
+        self._pending_db_task = None
+        for worker in (self.db_worker, self.directory_worker):
+            if worker.isRunning():
+                worker.stop()
 
         self.message_sender.stop_sending()
+        self.message_sender.wait(3000)
+
+        for worker in list(self._operation_workers):
+            worker.wait(3000)
+
+        self.message_sender.close_api()
 
         if self.incremental_updater.isRunning():
             self.incremental_updater.stop()
 
+        self.transcription_service.shutdown()
+        get_avatar_service().shutdown()
+        get_media_task_service().shutdown()
+
+        # Modo de profiling com --profile-trace: grava o trace da sessão
+        profiler = get_ui_profiler()
+        if profiler.trace_path:
+            profiler.stop()
+            profiler.dump_trace()
+
         event.accept()
 
 
 def main():
     """Função principal"""
+    profiler = get_startup_profiler()
     app = QApplication(sys.argv)
+    profiler.mark("QApplication")
 
     app.setApplicationName("WhatsApp Chat - API Real Integrada")
     app.setApplicationVersion("3.0.0")
@@ -1538,7 +1996,16 @@ def main():
 
     try:
         window = WhatsAppChatMainWindow()
+        profiler.watch_first_paint(window)
         window.show()
+        profiler.mark("show")
+
+        # Modo de profiling da interface: --profile (overlay) ou --profile-trace=arquivo.json (grava ao fechar)
+        for arg in sys.argv[1:]:
+            if arg.startswith('--profile-trace='):
+                get_ui_profiler().trace_path = arg.split('=', 1)[1]
+        if get_ui_profiler().trace_path or '--profile' in sys.argv[1:]:
+            window.toggle_profiler()
 
         print("🎉 Interface WhatsApp iniciada!")
         print("💡 RECURSOS:")
@@ -1560,6 +2027,8 @@ def main():
         print("   📎 Clique para anexar arquivos")
         print("   ⚙️ Ctrl+W: Configurações WhatsApp")
         print("   🔍 Ctrl+D: Debug")
+        print("   📝 Ctrl+T: Transcrever todos os áudios do chat")
+        print("   📈 Ctrl+Shift+P: Profiler da interface (Ctrl+Shift+S salva o trace)")
 
         print(f"\n📊 STATUS:")
         print(f"   WhatsApp API: {'🟢 Disponível' if WHATSAPP_API_AVAILABLE else '🔴 Indisponível'}")
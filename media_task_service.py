@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Executor CENTRAL das tarefas de mídia da interface
+Downloads (áudio, imagem, documento) e transcrições locais rodam em pools
+limitados em vez de um QThread por clique. Pedidos iguais compartilham a mesma
+tarefa, que é cancelada quando nenhum widget interessado continua vivo
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Hashable, List, Optional
+
+import requests
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+DOWNLOAD_WORKERS = 4  # Downloads simultâneos
+HEAVY_WORKERS = 1  # Tarefas de CPU (Whisper usa todos os núcleos sozinho)
+CHUNK_SIZE = 64 * 1024
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': '*/*',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+}
+
+
+class MediaTaskError(Exception):
+    """Falha esperada de uma tarefa (mensagem já pronta para o usuário)"""
+
+
+class MediaTaskCancelled(Exception):
+    """A tarefa percebeu que ninguém mais espera o resultado"""
+
+
+class MediaTask(QObject):
+    """
+    Uma unidade de trabalho compartilhada por todos os widgets que pediram a
+    mesma coisa. Os sinais são emitidos pela thread do pool e entregues na
+    thread da interface.
+    """
+
+    progress_updated = pyqtSignal(int)
+    completed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, key: Hashable):
+        super().__init__()
+        self.key = key
+        self.subscribers = 0
+        self.finished = False
+        self.result = None
+        self.error = None
+        self.future = None
+        self._last_progress = -1
+        self._cancel_event = threading.Event()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Para ser chamado pela função da tarefa entre etapas longas"""
+        if self._cancel_event.is_set():
+            raise MediaTaskCancelled()
+
+    def report_progress(self, value: int):
+        value = max(0, min(100, int(value)))
+        # Um evento por ponto percentual, não por bloco baixado
+        if value != self._last_progress and not self._cancel_event.is_set():
+            self._last_progress = value
+            self.progress_updated.emit(value)
+
+
+class MediaRequest:
+    """Inscrição de um widget em uma tarefa; cancel() libera só esta inscrição"""
+
+    __slots__ = ('task', 'service', 'connections', 'active')
+
+    def __init__(self, service: 'MediaTaskService', task: Optional[MediaTask]):
+        self.service = service
+        self.task = task
+        self.connections = []
+        self.active = True
+
+    def cancel(self):
+        self.service.release(self)
+
+    def is_running(self) -> bool:
+        return self.active and self.task is not None and not self.task.finished
+
+
+def _temp_extension(content_type: str, url: str) -> str:
+    """Extensão do arquivo temporário a partir do Content-Type (padrão do WhatsApp: .ogg)"""
+    content_type = (content_type or '').lower()
+    if 'opus' in content_type or 'ogg' in content_type:
+        return '.ogg'
+    if 'mpeg' in content_type or 'mp3' in content_type:
+        return '.mp3'
+    if 'mp4' in content_type or 'm4a' in content_type:
+        return '.m4a'
+    if 'wav' in content_type:
+        return '.wav'
+    if content_type.startswith('image/'):
+        return '.' + content_type.split('/', 1)[1].split(';')[0].replace('jpeg', 'jpg')
+
+    extension = os.path.splitext(url.split('?', 1)[0])[1]
+    return extension if 0 < len(extension) <= 5 else '.ogg'
+
+
+class MediaTaskService(QObject):
+    """
+    Serviço único de tarefas de mídia da aplicação.
+    - download(): arquivo em disco (caminho escolhido ou temporário estável por URL)
+    - fetch(): conteúdo em memória (visualizador de imagem)
+    - submit(): qualquer função pesada, ex.: transcrição local (pool de CPU)
+    Todos aceitam `owner`: quando o widget é destruído a inscrição é liberada e,
+    se era a última, a tarefa é cancelada (downloads param no próximo bloco).
+    """
+
+    def __init__(self, download_workers: int = DOWNLOAD_WORKERS, heavy_workers: int = HEAVY_WORKERS):
+        super().__init__()
+        self._pools = {
+            False: ThreadPoolExecutor(max_workers=download_workers, thread_name_prefix="midia"),
+            True: ThreadPoolExecutor(max_workers=heavy_workers, thread_name_prefix="midia_cpu"),
+        }
+        self._tasks: Dict[Hashable, MediaTask] = {}
+        self._files: Dict[str, str] = {}  # URL -> arquivo temporário já baixado
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.stats = {"started": 0, "coalesced": 0, "file_hits": 0, "cancelled": 0, "failed": 0}
+
+    # ---------- API ----------
+
+    def submit(self, key: Hashable, func: Callable[[MediaTask], object], owner: QObject = None,
+               on_completed: Callable = None, on_failed: Callable = None, on_progress: Callable = None,
+               heavy: bool = False) -> MediaRequest:
+        """
+        Executa `func(task)` no pool, a menos que já exista tarefa com a mesma
+        chave em andamento (nesse caso só inscreve os callbacks nela).
+        """
+        with self._lock:
+            task = self._tasks.get(key)
+            start = task is None or task.is_cancelled()
+            if start:
+                task = MediaTask(key)
+                task.completed.connect(partial(self._finalize, task))
+                task.failed.connect(partial(self._finalize, task))
+                self._tasks[key] = task
+                self.stats["started"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+            request = self._subscribe(task, owner, on_completed, on_failed, on_progress)
+
+        if start:
+            task.future = self._pools[heavy].submit(self._execute, task, func)
+
+        return request
+
+    def download(self, url: str, destination: str = None, prefix: str = "midia", owner: QObject = None,
+                 on_completed: Callable = None, on_failed: Callable = None, on_progress: Callable = None,
+                 timeout: int = 30) -> MediaRequest:
+        """
+        Baixa `url` para `destination`; sem destino, usa um arquivo temporário
+        fixo por URL e reaproveita o download enquanto o arquivo existir.
+        `on_completed` recebe o caminho do arquivo.
+        """
+        if not destination:
+            cached = self._files.get(url)
+            if cached and os.path.exists(cached) and os.path.getsize(cached) > 0:
+                self.stats["file_hits"] += 1
+                return self._completed_request(cached, on_completed)
+
+        func = partial(self._download_job, url, destination, prefix, timeout)
+        return self.submit(('download', url, destination or None), func, owner,
+                           on_completed, on_failed, on_progress)
+
+    def fetch(self, url: str, owner: QObject = None, on_completed: Callable = None,
+              on_failed: Callable = None, on_progress: Callable = None, timeout: int = 10) -> MediaRequest:
+        """Baixa `url` para a memória; `on_completed` recebe os bytes"""
+        func = partial(self._fetch_job, url, timeout)
+        return self.submit(('fetch', url), func, owner, on_completed, on_failed, on_progress)
+
+    def release(self, request: MediaRequest):
+        """Desconecta os callbacks; cancela a tarefa se ninguém mais a espera"""
+        if not request.active:
+            return
+        request.active = False
+
+        for signal, connection in request.connections:
+            try:
+                signal.disconnect(connection)
+            except (TypeError, RuntimeError):
+                pass
+        request.connections = []
+
+        task = request.task
+        if task is None:
+            return
+
+        with self._lock:
+            task.subscribers -= 1
+            if task.subscribers > 0 or task.finished:
+                return
+
+            task._cancel_event.set()
+            if self._tasks.get(task.key) is task:
+                del self._tasks[task.key]
+            if task.future is not None:
+                task.future.cancel()
+            self.stats["cancelled"] += 1
+
+    def running_count(self) -> int:
+        return len(self._tasks)
+
+    def shutdown(self):
+        with self._lock:
+            for task in self._tasks.values():
+                task._cancel_event.set()
+            self._tasks.clear()
+
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- inscrições (thread da interface) ----------
+
+    def _subscribe(self, task: MediaTask, owner, on_completed, on_failed, on_progress) -> MediaRequest:
+        request = MediaRequest(self, task)
+
+        if task.finished:
+            # Terminou entre a emissão e a finalização: entrega o resultado guardado
+            request.task = None
+            if task.error is None:
+                self._deliver_later(request, on_completed, task.result)
+            else:
+                self._deliver_later(request, on_failed, task.error)
+            return request
+
+        for signal, callback in ((task.completed, on_completed), (task.failed, on_failed),
+                                 (task.progress_updated, on_progress)):
+            if callback is not None:
+                request.connections.append((signal, signal.connect(callback)))
+
+        task.subscribers += 1
+
+        if owner is not None:
+            owner.destroyed.connect(lambda *_: self.release(request))
+
+        return request
+
+    def _completed_request(self, result, on_completed) -> MediaRequest:
+        request = MediaRequest(self, None)
+        self._deliver_later(request, on_completed, result)
+        return request
+
+    @staticmethod
+    def _deliver_later(request: MediaRequest, callback: Callable, value):
+        if callback is None:
+            return
+
+        def deliver():
+            if not request.active:
+                return
+            request.active = False
+            try:
+                callback(value)
+            except RuntimeError:
+                # Widget destruído antes da entrega
+                pass
+
+        QTimer.singleShot(0, deliver)
+
+    def _finalize(self, task: MediaTask, *_):
+        with self._lock:
+            if self._tasks.get(task.key) is task:
+                del self._tasks[task.key]
+
+    # ---------- execução (pool) ----------
+
+    def _execute(self, task: MediaTask, func: Callable):
+        if task.is_cancelled():
+            return
+
+        result, error = None, None
+        try:
+            result = func(task)
+        except MediaTaskCancelled:
+            pass
+        except MediaTaskError as e:
+            error = str(e)
+        except Exception as e:
+            print(f"❌ Erro inesperado em tarefa de mídia {task.key[0]}: {e}")
+            error = f"Erro inesperado: {e}"
+
+        with self._lock:
+            task.finished = True
+            task.result, task.error = result, error
+            if task.is_cancelled():
+                return
+            if error is not None:
+                self.stats["failed"] += 1
+
+        if error is not None:
+            task.failed.emit(error)
+        else:
+            task.completed.emit(result)
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            self._local.session = session
+        return session
+
+    def _get(self, url: str, timeout: int, stream: bool):
+        try:
+            response = self._session().get(url, stream=stream, timeout=timeout)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.Timeout:
+            raise MediaTaskError(f"Timeout na conexão ({timeout}s)")
+        except requests.exceptions.ConnectionError:
+            raise MediaTaskError("Erro de conexão com o servidor")
+        except requests.exceptions.HTTPError as e:
+            raise MediaTaskError(f"Erro HTTP: {e.response.status_code}")
+        except requests.exceptions.RequestException as e:
+            raise MediaTaskError(f"Erro na requisição: {e}")
+
+    def _download_job(self, url: str, destination: Optional[str], prefix: str, timeout: int,
+                      task: MediaTask) -> str:
+        print(f"🔄 Iniciando download: {url[:50]}...")
+        task.report_progress(5)
+
+        response = self._get(url, timeout, stream=True)
+        with response:
+            if destination:
+                file_path = destination
+            else:
+                digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+                extension = _temp_extension(response.headers.get('content-type', ''), url)
+                file_path = os.path.join(tempfile.gettempdir(), f"{prefix}_{digest}{extension}")
+
+            total_size = int(response.headers.get('content-length', 0) or 0)
+            downloaded = 0
+            partial_path = f"{file_path}.part"
+
+            try:
+                with open(partial_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        task.check_cancelled()
+                        if chunk:
+                            f.write(chunk)
+                            downloaded += len(chunk)
+                            if total_size > 0:
+                                task.report_progress(5 + downloaded * 90 // total_size)
+
+                if downloaded == 0:
+                    raise MediaTaskError("Arquivo baixado está vazio")
+
+                os.replace(partial_path, file_path)
+            except BaseException:
+                try:
+                    os.remove(partial_path)
+                except OSError:
+                    pass
+                raise
+
+        if not destination:
+            self._files[url] = file_path
+
+        print(f"✅ Download concluído: {downloaded} bytes")
+        task.report_progress(100)
+        return file_path
+
+    def _fetch_job(self, url: str, timeout: int, task: MediaTask) -> bytes:
+        response = self._get(url, timeout, stream=True)
+        with response:
+            total_size = int(response.headers.get('content-length', 0) or 0)
+            chunks: List[bytes] = []
+            downloaded = 0
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                task.check_cancelled()
+                chunks.append(chunk)
+                downloaded += len(chunk)
+                if total_size > 0:
+                    task.report_progress(downloaded * 100 // total_size)
+
+        task.report_progress(100)
+        return b''.join(chunks)
+
+
+_service_instance: Optional[MediaTaskService] = None
+
+
+def get_media_task_service() -> MediaTaskService:
+    """Retorna a instância compartilhada (criada na primeira chamada, na thread da interface)"""
+    global _service_instance
+
+    if _service_instance is None:
+        _service_instance = MediaTaskService()
+
+    return _service_instance
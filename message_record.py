@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro compacto de mensagem usado da ChatDatabaseInterface até o MessageBubble
+"""
+
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class ChatMessage(MutableMapping):
+    """
+    Mensagem de chat com __slots__ no lugar do dicionário de ~20 chaves.
+
+    Antes cada mensagem carregava o webhook inteiro (raw_webhook_data + _db_info),
+    IDs duplicados e o horário já formatado em duas strings. Aqui só ficam os
+    campos usados pela interface; do webhook guarda-se apenas o msgContent
+    (de onde a UI extrai mídia/reação) e os campos de exibição (timestamp_str,
+    date_str, local_message_id) são calculados quando pedidos.
+
+    Continua aceitando acesso como dicionário (msg['content'], msg.get(...),
+    msg['deleted'] = True) para o código existente; código novo pode usar os
+    atributos diretamente (msg.content, msg.timestamp), que são mais rápidos.
+    Chaves fora dos campos fixos (deleted, edited, reaction, temp_id...) vão
+    para `extras`, criado só quando necessário.
+    """
+
+    __slots__ = ('message_id', 'chat_id', 'sender_id', 'sender_name', 'content', 'timestamp',
+                 'from_me', 'is_group', 'message_type', 'media_data', 'msg_content',
+                 '_local_message_id', '_formatos', 'extras')
+
+    # Campos guardados (nome da chave == nome do atributo)
+    CAMPOS = ('message_id', 'chat_id', 'sender_id', 'sender_name', 'content', 'timestamp',
+              'from_me', 'is_group', 'message_type', 'media_data')
+    # Chaves antigas que apontam para o mesmo valor
+    ALIASES = {'webhook_message_id': 'message_id', 'contact_id': 'chat_id'}
+    # Chaves calculadas sob demanda
+    CALCULADOS = ('timestamp_str', 'date_str', 'local_message_id', 'raw_webhook_data')
+
+    _CHAVES_FIXAS = frozenset(CAMPOS) | frozenset(ALIASES) | frozenset(CALCULADOS)
+
+    def __init__(self, message_id: str = '', chat_id: str = '', content: str = '', timestamp: int = 0,
+                 from_me: bool = False, is_group: bool = False, message_type: str = 'text',
+                 media_data: Optional[Dict] = None, sender_id: str = '', sender_name: str = '',
+                 msg_content: Optional[Dict] = None, local_message_id: Optional[str] = None,
+                 extras: Optional[Dict] = None):
+        self.message_id = message_id
+        self.chat_id = chat_id
+        self.sender_id = sender_id
+        self.sender_name = sender_name
+        self.content = content
+        self.timestamp = timestamp
+        self.from_me = from_me
+        self.is_group = is_group
+        self.message_type = message_type
+        self.media_data = media_data
+        self.msg_content = msg_content
+        self._local_message_id = local_message_id
+        self._formatos = None
+        self.extras = extras or None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ChatMessage':
+        """Converte um dicionário no formato antigo (ex: mensagens montadas fora do banco)"""
+        if isinstance(data, ChatMessage):
+            return data
+
+        raw = data.get('raw_webhook_data') or {}
+        extras = {
+            chave: valor for chave, valor in data.items()
+            if chave not in cls._CHAVES_FIXAS
+        }
+
+        return cls(
+            message_id=data.get('webhook_message_id') or data.get('message_id', ''),
+            chat_id=data.get('chat_id') or data.get('contact_id', ''),
+            content=data.get('content', ''),
+            timestamp=data.get('timestamp', 0),
+            from_me=data.get('from_me', False),
+            is_group=data.get('is_group', False),
+            message_type=data.get('message_type', 'text'),
+            media_data=data.get('media_data'),
+            sender_id=data.get('sender_id', ''),
+            sender_name=data.get('sender_name', ''),
+            msg_content=raw.get('msgContent') if isinstance(raw, dict) else None,
+            local_message_id=data.get('local_message_id'),
+            extras=extras
+        )
+
+    # ------------------------------------------------------------------
+    # Campos calculados
+    # ------------------------------------------------------------------
+
+    def _formatar(self):
+        if self._formatos is None or self._formatos[0] != self.timestamp:
+            try:
+                dt = datetime.fromtimestamp(self.timestamp)
+                self._formatos = (self.timestamp, dt.strftime('%H:%M'), dt.strftime('%d/%m/%Y'))
+            except (TypeError, ValueError, OverflowError, OSError):
+                self._formatos = (self.timestamp, 'N/A', 'N/A')
+        return self._formatos
+
+    @property
+    def timestamp_str(self) -> str:
+        return self._formatar()[1]
+
+    @property
+    def date_str(self) -> str:
+        return self._formatar()[2]
+
+    @property
+    def local_message_id(self) -> str:
+        if self._local_message_id is None:
+            return f"local_{self.timestamp}_{hash(self.content[:20]) % 10000}"
+        return self._local_message_id
+
+    @property
+    def raw_webhook_data(self) -> Dict:
+        """Só o msgContent do webhook original (o que a interface consulta)"""
+        return {'msgContent': self.msg_content} if self.msg_content else {}
+
+    # ------------------------------------------------------------------
+    # Protocolo de dicionário
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, chave):
+        chave = self.ALIASES.get(chave, chave)
+        if chave in self._CHAVES_FIXAS:
+            return getattr(self, chave)
+        if self.extras is not None and chave in self.extras:
+            return self.extras[chave]
+        raise KeyError(chave)
+
+    def __setitem__(self, chave, valor):
+        chave = self.ALIASES.get(chave, chave)
+        if chave in self.CAMPOS:
+            setattr(self, chave, valor)
+        elif chave == 'local_message_id':
+            self._local_message_id = valor
+        elif chave == 'raw_webhook_data':
+            self.msg_content = (valor or {}).get('msgContent')
+        elif chave in self.CALCULADOS:
+            # timestamp_str/date_str derivam do timestamp
+            return
+        else:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[chave] = valor
+
+    def __delitem__(self, chave):
+        if self.extras is None or chave not in self.extras:
+            raise KeyError(chave)
+        del self.extras[chave]
+
+    def __contains__(self, chave):
+        return chave in self._CHAVES_FIXAS or (self.extras is not None and chave in self.extras)
+
+    def __iter__(self):
+        yield from self.CAMPOS
+        yield from self.ALIASES
+        yield from self.CALCULADOS
+        if self.extras:
+            yield from self.extras
+
+    def __len__(self):
+        return len(self._CHAVES_FIXAS) + (len(self.extras) if self.extras else 0)
+
+    def get(self, chave, padrao=None):
+        # Mais rápido que o get() genérico de Mapping (sem exceção no caminho comum)
+        chave = self.ALIASES.get(chave, chave)
+        if chave in self._CHAVES_FIXAS:
+            return getattr(self, chave)
+        if self.extras is not None:
+            return self.extras.get(chave, padrao)
+        return padrao
+
+    def copy(self) -> 'ChatMessage':
+        return ChatMessage(
+            message_id=self.message_id, chat_id=self.chat_id, content=self.content,
+            timestamp=self.timestamp, from_me=self.from_me, is_group=self.is_group,
+            message_type=self.message_type, media_data=self.media_data, sender_id=self.sender_id,
+            sender_name=self.sender_name, msg_content=self.msg_content,
+            local_message_id=self._local_message_id, extras=dict(self.extras) if self.extras else None
+        )
+
+    def to_dict(self) -> Dict:
+        """Dicionário completo no formato antigo"""
+        return dict(self.items())
+
+    def __repr__(self):
+        return (f"ChatMessage(id={self.message_id!r}, chat={self.chat_id!r}, "
+                f"type={self.message_type!r}, from_me={self.from_me}, timestamp={self.timestamp})")
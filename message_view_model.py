@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lotes de mensagens prontos para exibição (sem Qt)
+
+Os workers do banco entregam as mensagens já convertidas nas linhas da lista:
+separadores de data com o rótulo final, horários formatados (em cache no
+ChatMessage), reações com a mensagem alvo resolvida e os IDs dos áudios para
+pré-carregar transcrições e formas de onda. A thread da interface só insere as
+linhas no modelo e pinta.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from message_record import ChatMessage
+
+# Tipos de linha da lista de mensagens
+KIND_MESSAGE = 'message'
+KIND_DATE = 'date'
+KIND_SYSTEM = 'system'
+
+DIAS_SEMANA = ('Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo')
+
+
+def format_date_separator(date_str: str, today: Optional[datetime] = None) -> str:
+    """Rótulo do separador para uma data 'DD/MM/YYYY' (Hoje, Ontem, dia da semana ou data)"""
+    try:
+        dt = datetime.strptime(date_str, '%d/%m/%Y')
+
+        today = today or datetime.now()
+        days = (today.date() - dt.date()).days
+        if days == 0:
+            return "Hoje"
+        elif days == 1:
+            return "Ontem"
+        elif days < 7:
+            return DIAS_SEMANA[dt.weekday()]
+        else:
+            return dt.strftime('%d de %B')
+    except:
+        return date_str
+
+
+def resolve_reaction(record: ChatMessage) -> bool:
+    """Marca a mensagem como reação (emoji e mensagem alvo) se o webhook for um reactionMessage"""
+    if record.message_type == 'reaction' and record.get('target_message_id'):
+        return True
+
+    reaction_data = (record.msg_content or {}).get('reactionMessage')
+    if not isinstance(reaction_data, dict):
+        return False
+
+    reaction_text = reaction_data.get('text', '')
+    record['message_type'] = 'reaction'
+    record['content'] = f"Reagiu com {reaction_text}"
+    record['reaction_emoji'] = reaction_text
+    record['target_message_id'] = (reaction_data.get('key') or {}).get('id', '')
+    return True
+
+
+class PreparedMessages:
+    """
+    Lote imutável de linhas da conversa (tipo, valor), na ordem de exibição.
+
+    Sempre abre com o separador do primeiro dia: quem insere o lote descarta
+    esse separador quando ele repete o dia vizinho (first_date/last_date).
+    Os ChatMessage continuam mutáveis, porque edições e reações são aplicadas
+    no registro da lista.
+    """
+
+    __slots__ = ('rows', 'records', 'first_date', 'last_date', 'audio_message_ids')
+
+    def __init__(self, rows: Tuple, records: Tuple[ChatMessage, ...], first_date: Optional[str],
+                 last_date: Optional[str], audio_message_ids: Tuple[str, ...]):
+        self.rows = rows
+        self.records = records
+        self.first_date = first_date
+        self.last_date = last_date
+        self.audio_message_ids = audio_message_ids
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def __repr__(self):
+        return f"PreparedMessages({len(self.records)} mensagens, {len(self.rows)} linhas)"
+
+
+def prepare_messages(messages: Iterable[Dict], today: Optional[datetime] = None) -> PreparedMessages:
+    """Converte mensagens (dicionários ou ChatMessage) em um lote pronto para a lista"""
+    if isinstance(messages, PreparedMessages):
+        return messages
+
+    today = today or datetime.now()
+    rows = []
+    records = []
+    audio_ids = []
+    labels = {}
+    first_date = last_date = None
+
+    for message in messages:
+        record = ChatMessage.from_dict(message)
+        resolve_reaction(record)
+
+        date_str = record.date_str  # Também formata e guarda o horário
+        if date_str and date_str != 'N/A' and date_str != last_date:
+            label = labels.get(date_str)
+            if label is None:
+                label = labels[date_str] = format_date_separator(date_str, today)
+            rows.append((KIND_DATE, label))
+            if first_date is None:
+                first_date = date_str
+            last_date = date_str
+
+        rows.append((KIND_MESSAGE, record))
+        records.append(record)
+        if record.message_type == 'audio' and record.message_id:
+            audio_ids.append(record.message_id)
+
+    return PreparedMessages(tuple(rows), tuple(records), first_date, last_date, tuple(audio_ids))
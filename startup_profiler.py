@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cronômetro da inicialização do app
+
+Cada etapa da abertura (imports, banco, interface, workers, show) marca o
+tempo desde o import deste módulo; a primeira pintura da janela encerra a
+medição e imprime o detalhamento no console. Tudo que depende de rede ou de
+bibliotecas opcionais deve acontecer depois dessa marca.
+"""
+
+import time
+from typing import List, Optional, Tuple
+
+from PyQt6.QtCore import QEvent, QObject
+
+_STARTED_AT = time.perf_counter()
+
+
+class StartupProfiler(QObject):
+    """Marcas de tempo da abertura; encerra na primeira pintura da janela observada"""
+
+    def __init__(self):
+        super().__init__()
+        self.started_at = _STARTED_AT
+        self.marks: List[Tuple[str, float]] = []
+        self.first_paint_at: Optional[float] = None
+        self._window = None
+
+    def elapsed(self) -> float:
+        """Segundos desde o início da medição"""
+        return time.perf_counter() - self.started_at
+
+    def mark(self, label: str):
+        """Registra o fim de uma etapa"""
+        if self.first_paint_at is None:
+            self.marks.append((label, self.elapsed()))
+
+    def watch_first_paint(self, window):
+        """Observa a janela até o primeiro Paint (depois o filtro é removido)"""
+        self._window = window
+        window.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if watched is self._window and event.type() == QEvent.Type.Paint and self.first_paint_at is None:
+            self.mark("primeira pintura")
+            self.first_paint_at = self.elapsed()
+            watched.removeEventFilter(self)
+            self._window = None
+            self.print_report()
+        return False
+
+    def report(self) -> List[Tuple[str, float, float]]:
+        """(etapa, duração da etapa, tempo acumulado) em segundos"""
+        rows = []
+        previous = 0.0
+        for label, at in self.marks:
+            rows.append((label, at - previous, at))
+            previous = at
+        return rows
+
+    def print_report(self):
+        print("\n⏱️ INICIALIZAÇÃO:")
+        for label, duration, total in self.report():
+            print(f"   {label:<28} {duration * 1000:8.1f} ms   (acumulado {total * 1000:8.1f} ms)")
+        if self.first_paint_at is not None:
+            print(f"   🖼️ Primeira pintura em {self.first_paint_at * 1000:.0f} ms")
+
+
+_startup_profiler: Optional[StartupProfiler] = None
+
+
+def get_startup_profiler() -> StartupProfiler:
+    """Cronômetro compartilhado da inicialização"""
+    global _startup_profiler
+    if _startup_profiler is None:
+        _startup_profiler = StartupProfiler()
+    return _startup_profiler
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serviço de transcrição PERSISTENTE para mensagens de voz
+O modelo Whisper é carregado UMA vez em um processo dedicado; pedidos são
+enfileirados, processados em lote e o texto fica salvo no banco por mensagem
+"""
+
+import os
+import queue
+import tempfile
+import importlib.util
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+# Verificar engines sem importar (whisper carrega torch, que é pesado)
+WHISPER_AVAILABLE = importlib.util.find_spec("whisper") is not None
+SPEECH_RECOGNITION_AVAILABLE = importlib.util.find_spec("speech_recognition") is not None
+PYDUB_AVAILABLE = importlib.util.find_spec("pydub") is not None
+
+DEFAULT_MODEL = "base"
+DEFAULT_LANGUAGE = "pt"
+BATCH_SIZE = 8  # Máximo de áudios processados por lote
+DOWNLOAD_WORKERS = 4  # Downloads simultâneos dentro de um lote
+
+
+_whisper_models = {}
+_whisper_models_lock = threading.Lock()
+
+
+def load_whisper_model(model_name: str = DEFAULT_MODEL):
+    """
+    Modelo Whisper compartilhado do processo: carregado no primeiro uso e
+    reutilizado depois (cai para "tiny" se o modelo pedido não carregar).
+    """
+    with _whisper_models_lock:
+        model = _whisper_models.get(model_name)
+        if model is None:
+            import whisper
+            try:
+                model = whisper.load_model(model_name)
+            except Exception as model_error:
+                print(f"⚠️ Erro ao carregar modelo {model_name}, tentando tiny: {model_error}")
+                model = whisper.load_model("tiny")
+            _whisper_models[model_name] = model
+        return model
+
+
+# =============================================================================
+# PROCESSO DE TRANSCRIÇÃO (sem Qt - roda fora da interface)
+# =============================================================================
+
+def _download_audio(audio_url: str, message_id: str) -> str:
+    """Baixa o áudio para um arquivo temporário e retorna o caminho"""
+    import requests
+
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'audio/*,*/*;q=0.9',
+    }
+
+    response = requests.get(audio_url, stream=True, timeout=30, headers=headers)
+    response.raise_for_status()
+
+    content_type = response.headers.get('content-type', '').lower()
+    if 'mpeg' in content_type or 'mp3' in content_type:
+        extension = '.mp3'
+    elif 'mp4' in content_type or 'm4a' in content_type:
+        extension = '.m4a'
+    elif 'wav' in content_type:
+        extension = '.wav'
+    else:
+        extension = '.ogg'  # Padrão do WhatsApp
+
+    safe_id = ''.join(c for c in message_id if c.isalnum())[-32:] or 'audio'
+    file_path = os.path.join(tempfile.gettempdir(), f"transcribe_{safe_id}{extension}")
+
+    with open(file_path, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=65536):
+            if chunk:
+                f.write(chunk)
+
+    if os.path.getsize(file_path) == 0:
+        os.remove(file_path)
+        raise ValueError("Arquivo baixado está vazio")
+
+    return file_path
+
+
+def _convert_to_wav(file_path: str) -> str:
+    """Converte para WAV 16kHz mono (necessário para o Google Speech)"""
+    if file_path.lower().endswith('.wav') or not PYDUB_AVAILABLE:
+        return file_path
+
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(file_path)
+    wav_path = os.path.splitext(file_path)[0] + '_16k.wav'
+    audio.export(wav_path, format="wav", parameters=["-ar", "16000", "-ac", "1", "-sample_fmt", "s16"])
+    return wav_path
+
+
+def _prepare_request(request: Dict) -> Dict:
+    """Garante arquivo local para o pedido (baixando se necessário)"""
+    prepared = dict(request)
+    prepared['cleanup'] = []
+
+    try:
+        file_path = request.get('file_path')
+        if not file_path or not os.path.exists(file_path):
+            if not request.get('audio_url'):
+                raise ValueError("Áudio sem URL e sem arquivo local")
+            file_path = _download_audio(request['audio_url'], request['message_id'])
+            prepared['cleanup'].append(file_path)
+
+        prepared['local_path'] = file_path
+    except Exception as e:
+        prepared['error'] = f"Falha no download: {e}"
+
+    return prepared
+
+
+def _transcription_process_main(request_queue, result_queue, model_name: str, language: str):
+    """
+    Loop do processo de transcrição.
+    Carrega o modelo apenas no primeiro pedido e o reutiliza até o encerramento.
+    """
+    model = None
+    engine = None
+
+    def load_engine():
+        nonlocal model, engine
+        if engine:
+            return
+
+        if WHISPER_AVAILABLE:
+            model = load_whisper_model(model_name)
+            engine = "whisper"
+            print(f"✅ Modelo Whisper carregado no serviço de transcrição ({model_name})")
+        elif SPEECH_RECOGNITION_AVAILABLE:
+            engine = "google"
+        else:
+            raise RuntimeError("Nenhum engine de transcrição disponível")
+
+    def transcribe(path: str) -> Dict:
+        if engine == "whisper":
+            result = model.transcribe(path, language=language, fp16=False, verbose=False)
+            text = result.get("text", "").strip()
+
+            segments = result.get("segments", [])
+            if segments:
+                avg_logprob = sum(seg.get("avg_logprob", 0) for seg in segments) / len(segments)
+                confidence = max(0.0, min(1.0, (avg_logprob + 1) / 2))
+            else:
+                confidence = 0.5
+            return {'text': text, 'confidence': confidence}
+
+        import speech_recognition as sr
+
+        wav_path = _convert_to_wav(path)
+        try:
+            recognizer = sr.Recognizer()
+            recognizer.energy_threshold = 300
+            recognizer.dynamic_energy_threshold = True
+
+            with sr.AudioFile(wav_path) as source:
+                recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                audio = recognizer.record(source)
+
+            text = recognizer.recognize_google(audio, language="pt-BR", show_all=False)
+            return {'text': (text or '').strip(), 'confidence': 0.8}
+        finally:
+            if wav_path != path and os.path.exists(wav_path):
+                os.remove(wav_path)
+
+    executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS)
+
+    try:
+        while True:
+            request = request_queue.get()
+            if request is None:
+                break
+
+            # Montar lote com os pedidos que já estiverem esperando
+            batch = [request]
+            stop_after_batch = False
+            while len(batch) < BATCH_SIZE:
+                try:
+                    extra = request_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is None:
+                    stop_after_batch = True
+                    break
+                batch.append(extra)
+
+            # Downloads do lote em paralelo enquanto o modelo é carregado
+            prepared_futures = [executor.submit(_prepare_request, item) for item in batch]
+
+            try:
+                load_engine()
+                engine_error = None
+            except Exception as e:
+                engine_error = str(e)
+
+            for future in prepared_futures:
+                item = future.result()
+                result = {
+                    'type': 'result',
+                    'message_id': item['message_id'],
+                    'chat_id': item.get('chat_id'),
+                    'audio_seconds': item.get('audio_seconds'),
+                    'engine': engine,
+                    'model_name': model_name if engine == "whisper" else None,
+                    'language': language,
+                    'success': False,
+                    'text': '',
+                    'confidence': 0.0,
+                    'error': None
+                }
+
+                try:
+                    if engine_error:
+                        raise RuntimeError(engine_error)
+                    if item.get('error'):
+                        raise RuntimeError(item['error'])
+
+                    transcribed = transcribe(item['local_path'])
+                    if transcribed['text']:
+                        result.update(success=True, text=transcribed['text'],
+                                      confidence=transcribed['confidence'])
+                    else:
+                        result['error'] = "Nenhum texto detectado no áudio"
+                except Exception as e:
+                    result['error'] = str(e)
+                finally:
+                    for path in item.get('cleanup', []):
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+
+                result_queue.put(result)
+
+            if stop_after_batch:
+                break
+    finally:
+        executor.shutdown(wait=False)
+
+
+# =============================================================================
+# SERVIÇO (lado da interface)
+# =============================================================================
+
+class _ResultListener(QThread):
+    """Lê resultados do processo de transcrição e repassa para a thread da UI"""
+
+    result_received = pyqtSignal(dict)
+
+    def __init__(self, result_queue):
+        super().__init__()
+        self.result_queue = result_queue
+        self.should_stop = False
+
+    def run(self):
+        while not self.should_stop:
+            try:
+                result = self.result_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self.result_received.emit(result)
+
+    def stop(self):
+        self.should_stop = True
+        self.wait(2000)
+
+
+class TranscriptionService(QObject):
+    """
+    Serviço único de transcrição da aplicação.
+    - Consulta primeiro o cache (memória + banco)
+    - Enfileira pedidos para o processo dedicado, sem duplicar mensagens pendentes
+    - Salva cada transcrição concluída no banco, chaveada pelo messageId
+    """
+
+    transcription_ready = pyqtSignal(str, str, float)  # message_id, texto, confiança
+    transcription_failed = pyqtSignal(str, str)  # message_id, erro
+    queue_size_changed = pyqtSignal(int)  # pedidos pendentes
+
+    def __init__(self, db_manager=None, model_name: str = DEFAULT_MODEL, language: str = DEFAULT_LANGUAGE):
+        super().__init__()
+        self.db_manager = db_manager
+        self.model_name = model_name
+        self.language = language
+
+        self._cache: Dict[str, Dict] = {}
+        self._pending: Dict[str, Dict] = {}
+
+        self._process = None
+        self._request_queue = None
+        self._result_queue = None
+        self._listener = None
+
+    # ---------- disponibilidade / cache ----------
+
+    @staticmethod
+    def is_available() -> bool:
+        """Indica se existe algum engine de transcrição instalado"""
+        return WHISPER_AVAILABLE or SPEECH_RECOGNITION_AVAILABLE
+
+    def set_database(self, db_manager):
+        """Define o gerenciador de banco usado para persistir transcrições"""
+        self.db_manager = db_manager
+
+    def get_cached(self, message_id: str) -> Optional[Dict]:
+        """Retorna transcrição já conhecida (memória ou banco), sem enfileirar nada"""
+        if not message_id:
+            return None
+
+        if message_id in self._cache:
+            return self._cache[message_id]
+
+        if self.db_manager:
+            stored = self.db_manager.get_transcription(message_id)
+            if stored:
+                self._cache[message_id] = stored
+                return stored
+
+        return None
+
+    def preload(self, message_ids: List[str]) -> int:
+        """Carrega do banco, em uma única consulta, as transcrições de um chat"""
+        if not self.db_manager:
+            return 0
+
+        missing = [mid for mid in message_ids if mid and mid not in self._cache]
+        if not missing:
+            return 0
+
+        stored = self.db_manager.get_transcriptions(missing)
+        self._cache.update(stored)
+        return len(stored)
+
+    def is_pending(self, message_id: str) -> bool:
+        return message_id in self._pending
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    # ---------- pedidos ----------
+
+    def request_transcription(self, message_id: str, audio_url: str = '', file_path: str = '',
+                              chat_id: str = None, audio_seconds: int = None) -> str:
+        """
+        Solicita a transcrição de uma mensagem de voz.
+        Retorna: 'cached', 'queued', 'pending', 'unavailable' ou 'invalid'
+        """
+        if not message_id or not (audio_url or file_path):
+            return 'invalid'
+
+        cached = self.get_cached(message_id)
+        if cached:
+            # Emitir de forma assíncrona para o chamador já estar conectado
+            QTimer.singleShot(0, lambda: self.transcription_ready.emit(
+                message_id, cached['text'], float(cached.get('confidence') or 0.0)))
+            return 'cached'
+
+        if message_id in self._pending:
+            return 'pending'
+
+        if not self.is_available():
+            return 'unavailable'
+
+        self._ensure_worker()
+
+        request = {
+            'message_id': message_id,
+            'audio_url': audio_url,
+            'file_path': file_path,
+            'chat_id': chat_id,
+            'audio_seconds': audio_seconds,
+            'requested_at': datetime.now().timestamp()
+        }
+        self._pending[message_id] = request
+        self._request_queue.put(request)
+        self.queue_size_changed.emit(len(self._pending))
+
+        print(f"📝 Transcrição enfileirada: {message_id[:20]}... ({len(self._pending)} pendentes)")
+        return 'queued'
+
+    def transcribe_messages(self, messages: List[Dict]) -> Dict:
+        """Enfileira todas as mensagens de voz de uma lista (ex.: um chat inteiro)"""
+        stats = {'enfileiradas': 0, 'em_cache': 0, 'pendentes': 0, 'ignoradas': 0}
+
+        audio_messages = [msg for msg in messages if msg.get('message_type') == 'audio']
+        self.preload([msg.get('webhook_message_id') or msg.get('message_id') for msg in audio_messages])
+
+        for msg in audio_messages:
+            media_data = msg.get('media_data') or {}
+            status = self.request_transcription(
+                msg.get('webhook_message_id') or msg.get('message_id'),
+                audio_url=media_data.get('url', ''),
+                chat_id=msg.get('chat_id'),
+                audio_seconds=media_data.get('seconds')
+            )
+
+            if status == 'queued':
+                stats['enfileiradas'] += 1
+            elif status == 'cached':
+                stats['em_cache'] += 1
+            elif status == 'pending':
+                stats['pendentes'] += 1
+            else:
+                stats['ignoradas'] += 1
+
+        stats['ignoradas'] += len(messages) - len(audio_messages)
+        return stats
+
+    # ---------- processo dedicado ----------
+
+    def _ensure_worker(self):
+        """Inicia (ou reinicia) o processo de transcrição quando necessário"""
+        if self._process and self._process.is_alive():
+            return
+
+        if self._process:
+            print("⚠️ Processo de transcrição encerrado inesperadamente - reiniciando")
+            self._stop_listener()
+
+        self._request_queue = multiprocessing.Queue()
+        self._result_queue = multiprocessing.Queue()
+
+        self._process = multiprocessing.Process(
+            target=_transcription_process_main,
+            args=(self._request_queue, self._result_queue, self.model_name, self.language),
+            name="TranscriptionService",
+            daemon=True
+        )
+        self._process.start()
+
+        self._listener = _ResultListener(self._result_queue)
+        self._listener.result_received.connect(self._on_result)
+        self._listener.start()
+
+        # Reenviar pedidos que ficaram sem resposta
+        for request in self._pending.values():
+            self._request_queue.put(request)
+
+        print(f"🚀 Serviço de transcrição iniciado (PID {self._process.pid})")
+
+    def _on_result(self, result: Dict):
+        """Recebe resultado do processo (thread da UI)"""
+        if result.get('type') != 'result':
+            return
+
+        message_id = result['message_id']
+        self._pending.pop(message_id, None)
+        self.queue_size_changed.emit(len(self._pending))
+
+        if not result.get('success'):
+            print(f"❌ Transcrição falhou ({message_id[:20]}...): {result.get('error')}")
+            self.transcription_failed.emit(message_id, result.get('error') or "Erro desconhecido")
+            return
+
+        info = {
+            'message_id': message_id,
+            'chat_id': result.get('chat_id'),
+            'text': result['text'],
+            'confidence': result.get('confidence'),
+            'engine': result.get('engine'),
+            'model_name': result.get('model_name'),
+            'language': result.get('language'),
+            'audio_seconds': result.get('audio_seconds')
+        }
+        self._cache[message_id] = info
+
+        if self.db_manager:
+            self.db_manager.save_transcription(**info)
+
+        print(f"✅ Transcrição concluída: {message_id[:20]}...")
+        self.transcription_ready.emit(message_id, result['text'], float(result.get('confidence') or 0.0))
+
+    def _stop_listener(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+
+    def shutdown(self):
+        """Encerra o processo de transcrição"""
+        try:
+            if self._process and self._process.is_alive():
+                self._request_queue.put(None)
+                self._process.join(3)
+                if self._process.is_alive():
+                    self._process.terminate()
+            self._stop_listener()
+        except Exception as e:
+            print(f"⚠️ Erro ao encerrar serviço de transcrição: {e}")
+        finally:
+            self._process = None
+
+
+_service_instance: Optional[TranscriptionService] = None
+
+
+def get_transcription_service(db_manager=None) -> TranscriptionService:
+    """Retorna a instância única do serviço de transcrição"""
+    global _service_instance
+
+    if _service_instance is None:
+        _service_instance = TranscriptionService(db_manager)
+    elif db_manager is not None and _service_instance.db_manager is None:
+        _service_instance.set_database(db_manager)
+
+    return _service_instance
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Skins pré-renderizadas de balões e cartões (nine-patch)
+
+Com QGraphicsDropShadowEffect cada repintura do widget passa por um buffer fora
+da tela e por um blur, e o custo cresce com (balões visíveis × raio do blur).
+Aqui cada estilo é desenhado uma única vez, corpo e sombra (com o mesmo efeito
+de antes), em um pixmap pequeno; qualquer tamanho de balão é pintado com nove
+drawPixmap: cantos fixos, bordas e miolo esticados.
+
+Corpos com gradiente não sobrevivem ao esticamento do miolo: nesses estilos o
+pixmap guarda só a sombra e o corpo é preenchido como vetor (sem blur).
+
+As paletas dos textos dos balões também são montadas uma vez e compartilhadas,
+em vez de uma stylesheet interpretada por widget.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from PyQt6.QtWidgets import QApplication, QGraphicsDropShadowEffect, QGraphicsScene
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QColor, QImage, QLinearGradient, QPainter, QPainterPath, QPalette, QPen, QPixmap
+
+# Medidas dos balões de mensagem (as mesmas da stylesheet antiga)
+BUBBLE_RADIUS = 18
+BUBBLE_TAIL_RADIUS = 5
+
+
+class SkinStyle:
+    """Descrição de um estilo: forma, preenchimento, borda e sombra"""
+
+    __slots__ = ('radius', 'tail', 'fill', 'gradient', 'border', 'shadow')
+
+    def __init__(self, radius: int, fill: str, tail: Optional[str] = None,
+                 gradient: Optional[Tuple[str, str, bool]] = None,
+                 border: Optional[Tuple[str, int]] = None,
+                 shadow: Tuple[int, int, Tuple[int, int, int, int]] = (8, 2, (0, 0, 0, 20))):
+        self.radius = radius
+        self.tail = tail            # 'left' / 'right': canto inferior menos arredondado
+        self.fill = fill
+        self.gradient = gradient    # (cor inicial, cor final, diagonal?)
+        self.border = border        # (cor, espessura)
+        self.shadow = shadow        # (blur, deslocamento vertical, rgba)
+
+
+SKIN_STYLES: Dict[str, SkinStyle] = {
+    # Balões de mensagem
+    'sent': SkinStyle(BUBBLE_RADIUS, '#667eea', tail='right', gradient=('#667eea', '#764ba2', True)),
+    'sent_deleted': SkinStyle(BUBBLE_RADIUS, '#ff7675', tail='right', gradient=('#ff7675', '#d63031', True)),
+    'received': SkinStyle(BUBBLE_RADIUS, '#ffffff', tail='left', border=('#e9ecef', 1)),
+    'received_deleted': SkinStyle(BUBBLE_RADIUS, '#ffeaea', tail='left', border=('#e74c3c', 2)),
+
+    # Cartões da lista de conversas (sombras do antigo ContactItemWidget, contidas na margem da linha)
+    'card': SkinStyle(12, '#ffffff', shadow=(6, 1, (0, 0, 0, 12))),
+    'card_hover': SkinStyle(12, '#f8fafc', border=('#e2e8f0', 1), shadow=(8, 2, (0, 0, 0, 25))),
+    'card_selected': SkinStyle(12, '#ffffff', gradient=('#f0f4ff', '#ffffff', False),
+                               border=('#6366f1', 2), shadow=(8, 2, (99, 102, 241, 40))),
+}
+
+
+def rounded_path(rect: QRectF, radius: float, tail_radius: float = None, tail: Optional[str] = None) -> QPainterPath:
+    """Retângulo arredondado; com `tail`, o canto inferior daquele lado fica menos arredondado"""
+    r = radius
+    t = r if tail_radius is None else tail_radius
+    tl, tr = r, r
+    br = t if tail == 'right' else r
+    bl = t if tail == 'left' else r
+
+    path = QPainterPath()
+    path.moveTo(rect.left() + tl, rect.top())
+    path.lineTo(rect.right() - tr, rect.top())
+    path.quadTo(rect.right(), rect.top(), rect.right(), rect.top() + tr)
+    path.lineTo(rect.right(), rect.bottom() - br)
+    path.quadTo(rect.right(), rect.bottom(), rect.right() - br, rect.bottom())
+    path.lineTo(rect.left() + bl, rect.bottom())
+    path.quadTo(rect.left(), rect.bottom(), rect.left(), rect.bottom() - bl)
+    path.lineTo(rect.left(), rect.top() + tl)
+    path.quadTo(rect.left(), rect.top(), rect.left() + tl, rect.top())
+    path.closeSubpath()
+    return path
+
+
+def _style_path(style: SkinStyle, rect: QRectF) -> QPainterPath:
+    # Borda centrada na linha: recua meia espessura para não sair do retângulo
+    inset = (style.border[1] if style.border else 1) / 2
+    return rounded_path(rect.adjusted(inset, inset, -inset, -inset), style.radius, BUBBLE_TAIL_RADIUS, style.tail)
+
+
+def _paint_body(painter: QPainter, style: SkinStyle, rect: QRectF):
+    path = _style_path(style, rect)
+    if style.gradient:
+        start, end, diagonal = style.gradient
+        gradient = QLinearGradient(rect.topLeft(), rect.bottomRight() if diagonal else rect.topRight())
+        gradient.setColorAt(0, QColor(start))
+        gradient.setColorAt(1, QColor(end))
+        painter.setBrush(gradient)
+    else:
+        painter.setBrush(QColor(style.fill))
+    painter.setPen(QPen(QColor(style.border[0]), style.border[1]) if style.border else Qt.PenStyle.NoPen)
+    painter.drawPath(path)
+
+
+class NinePatch:
+    """Pixmap dividido em 3×3: cantos com tamanho fixo, bordas e miolo esticados"""
+
+    def __init__(self, pixmap: QPixmap, margin: int, outset: int):
+        self.pixmap = pixmap
+        self.margin = margin    # tamanho lógico dos cantos
+        self.outset = outset    # quanto o pixmap passa do retângulo do corpo (sombra)
+        self.size = round(pixmap.width() / pixmap.devicePixelRatio())
+
+    def draw(self, painter: QPainter, rect: QRectF):
+        target = rect.adjusted(-self.outset, -self.outset, self.outset, self.outset)
+        ratio = self.pixmap.devicePixelRatio()
+        size, margin = self.size, self.margin
+
+        # Retângulos menores que dois cantos: os cantos encolhem junto
+        margin_x = min(margin, target.width() / 2)
+        margin_y = min(margin, target.height() / 2)
+
+        source_cuts = (0, margin * ratio, (size - margin) * ratio, size * ratio)
+        xs = (target.left(), target.left() + margin_x, target.right() - margin_x, target.right())
+        ys = (target.top(), target.top() + margin_y, target.bottom() - margin_y, target.bottom())
+
+        for row in range(3):
+            height = ys[row + 1] - ys[row]
+            if height <= 0:
+                continue
+            for column in range(3):
+                width = xs[column + 1] - xs[column]
+                if width <= 0:
+                    continue
+                painter.drawPixmap(
+                    QRectF(xs[column], ys[row], width, height), self.pixmap,
+                    QRectF(source_cuts[column], source_cuts[row],
+                           source_cuts[column + 1] - source_cuts[column],
+                           source_cuts[row + 1] - source_cuts[row]))
+
+
+class Skin:
+    """Sombra (e corpo, quando sólido) em um nine-patch; corpo com gradiente desenhado por cima"""
+
+    def __init__(self, style: SkinStyle, ratio: float = 1.0):
+        self.style = style
+        self.patch = self._render(style, ratio)
+
+    @staticmethod
+    def _render(style: SkinStyle, ratio: float) -> NinePatch:
+        blur, offset, rgba = style.shadow
+        pad = blur + abs(offset)
+        corner = style.radius + blur        # até onde o canto ainda influencia a sombra
+        body_size = 2 * corner + 2          # miolo de 2px, esticado
+        size = body_size + 2 * pad
+
+        # Corpo de referência, em pixels do dispositivo
+        body = QImage(round(body_size * ratio), round(body_size * ratio), QImage.Format.Format_ARGB32_Premultiplied)
+        body.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(body)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.scale(ratio, ratio)
+        _paint_body(painter, style, QRectF(0, 0, body_size, body_size))
+        painter.end()
+
+        # A mesma sombra do QGraphicsDropShadowEffect de antes, calculada uma vez
+        scene = QGraphicsScene()
+        item = scene.addPixmap(QPixmap.fromImage(body))
+        effect = QGraphicsDropShadowEffect()
+        effect.setBlurRadius(blur * ratio)
+        effect.setColor(QColor(*rgba))
+        effect.setOffset(0, offset * ratio)
+        item.setGraphicsEffect(effect)
+
+        device_size = round(size * ratio)
+        image = QImage(device_size, device_size, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        scene.render(painter, QRectF(0, 0, device_size, device_size),
+                     QRectF(-pad * ratio, -pad * ratio, device_size, device_size))
+
+        if style.gradient:
+            # Só a sombra: o corpo com gradiente é pintado como vetor em paint()
+            painter.scale(ratio, ratio)
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Clear)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(Qt.GlobalColor.black)
+            painter.drawPath(_style_path(style, QRectF(pad, pad, body_size, body_size)))
+        painter.end()
+
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(ratio)
+        return NinePatch(pixmap, pad + corner, pad)
+
+    def paint(self, painter: QPainter, rect: QRectF):
+        """Pinta sombra e corpo do retângulo `rect` (o corpo; a sombra sai para fora dele)"""
+        self.patch.draw(painter, rect)
+        if self.style.gradient:
+            _paint_body(painter, self.style, rect)
+
+
+_skins: Dict[Tuple[str, float], Skin] = {}
+
+
+def get_skin(name: str, ratio: float = None) -> Skin:
+    """Skin compartilhada do estilo (criada no primeiro uso, por densidade de tela)"""
+    if ratio is None:
+        app = QApplication.instance()
+        ratio = app.devicePixelRatio() if app else 1.0
+    key = (name, ratio)
+    skin = _skins.get(key)
+    if skin is None:
+        skin = _skins[key] = Skin(SKIN_STYLES[name], ratio)
+    return skin
+
+
+def bubble_skin_name(from_me: bool, deleted: bool = False) -> str:
+    name = 'sent' if from_me else 'received'
+    return f"{name}_deleted" if deleted else name
+
+
+# ---------- textos dos balões ----------
+
+_palettes: Dict[Tuple[str, Optional[str]], QPalette] = {}
+
+
+def text_palette(color, highlight=None) -> QPalette:
+    """
+    Paleta compartilhada para rótulos dentro dos balões (cor do texto e da
+    seleção). QLabel sem stylesheet já tem fundo transparente.
+    """
+    key = (QColor(color).name(QColor.NameFormat.HexArgb),
+           QColor(highlight).name(QColor.NameFormat.HexArgb) if highlight is not None else None)
+    palette = _palettes.get(key)
+    if palette is None:
+        palette = QPalette()
+        text_color = QColor(color)
+        for role in (QPalette.ColorRole.WindowText, QPalette.ColorRole.Text):
+            palette.setColor(role, text_color)
+        if highlight is not None:
+            palette.setColor(QPalette.ColorRole.Highlight, QColor(highlight))
+            palette.setColor(QPalette.ColorRole.HighlightedText, text_color)
+        _palettes[key] = palette
+    return palette
+
+
+def bubble_text_colors(from_me: bool) -> Tuple[QColor, QColor]:
+    """(cor do texto, cor do horário) de um balão"""
+    if from_me:
+        return QColor('#ffffff'), QColor(255, 255, 255, 204)
+    return QColor('#2c3e50'), QColor('#7f8c8d')
@@ -7,19 +7,19 @@ Suporte a menu de contexto, reações, anexos e REPRODUÇÃO/TRANSCRIÇÃO DE Á
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame,
-    QGraphicsDropShadowEffect, QPushButton, QScrollArea,
+    QGraphicsDropShadowEffect, QPushButton,
     QSizePolicy, QApplication, QMenu, QFileDialog,
     QDialog, QLineEdit, QComboBox, QTextEdit, QWidgetAction, QGridLayout, QMessageBox,
     QProgressBar, QSlider
 )
 from PyQt6.QtCore import Qt, QPropertyAnimation, QRect, QEasingCurve, QTimer, pyqtSignal, QSize, QPoint, QEvent, \
-    QThread, QUrl
+    QObject, QUrl, QRectF
 from PyQt6.QtGui import QFont, QColor, QPainter, QPainterPath, QPixmap, QIcon, QAction
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from datetime import datetime
+from functools import partial
 from typing import Dict, Optional, List, Callable
-import requests
 import tempfile
+import importlib.util
 import os
 import base64
 
@@ -30,175 +30,58 @@ sys.path.append('.')
 sys.path.append('./backend')
 sys.path.append('./backend/wapi')
 
-# Import condicional do WhatsAppApi
-try:
-    from WhatsAppApi import WhatsAppAPI
-except ImportError:
-    try:
-        from backend.wapi.__whatsAppApi import WhatsAppAPI
-    except ImportError:
-        print("⚠️ WhatsAppAPI não encontrada, algumas funcionalidades estarão indisponíveis")
-
-# Imports para transcrição
-try:
-    import speech_recognition as sr
-
-    SPEECH_RECOGNITION_AVAILABLE = True
-    print("✅ SpeechRecognition disponível")
-except ImportError:
-    SPEECH_RECOGNITION_AVAILABLE = False
-    print("⚠️ SpeechRecognition não encontrado. Execute: pip install SpeechRecognition")
+from message_record import ChatMessage
+from message_view_model import format_date_separator
+from media_task_service import get_media_task_service, MediaTaskError
+from ui.message_list_view import MessageListView
+from ui.bubble_skin import bubble_skin_name, bubble_text_colors, get_skin, text_palette
 
-try:
-    import whisper
-
-    WHISPER_AVAILABLE = True
-    print("✅ Whisper disponível")
-except ImportError:
-    WHISPER_AVAILABLE = False
-    print("⚠️ Whisper não encontrado. Execute: pip install openai-whisper")
+# Engines de transcrição e conversão: só verifica se existem (whisper carrega
+# torch e o pydub procura o ffmpeg); o import acontece no primeiro uso
+SPEECH_RECOGNITION_AVAILABLE = importlib.util.find_spec("speech_recognition") is not None
+WHISPER_AVAILABLE = importlib.util.find_spec("whisper") is not None
+PYDUB_AVAILABLE = importlib.util.find_spec("pydub") is not None
 
+# Serviço de transcrição persistente (modelo carregado uma única vez)
 try:
-    from pydub import AudioSegment
+    from transcription_service import get_transcription_service
 
-    PYDUB_AVAILABLE = True
-    print("✅ PyDub disponível")
+    TRANSCRIPTION_SERVICE_AVAILABLE = True
 except ImportError:
-    PYDUB_AVAILABLE = False
-    print("⚠️ PyDub não encontrado. Execute: pip install pydub")
-
-
-class AudioDownloadWorker(QThread):
-    """Worker para baixar áudio do WhatsApp - VERSÃO CORRIGIDA"""
-
-    download_completed = pyqtSignal(str)  # file_path
-    download_failed = pyqtSignal(str)  # error_message
-    progress_updated = pyqtSignal(int)  # progress percentage
-
-    def __init__(self, audio_url, filename="audio"):
-        super().__init__()
-        self.audio_url = audio_url
-        self.filename = filename
-        self.should_stop = False
-
-    def run(self):
-        """Baixa o áudio com tratamento robusto de erros"""
-        try:
-            print(f"🔄 Iniciando download: {self.audio_url[:50]}...")
-            self.progress_updated.emit(10)
-
-            if self.should_stop:
-                return
-
-            # Configurar headers para WhatsApp
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'audio/*,*/*;q=0.9',
-                'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-
-            # Fazer request
-            response = requests.get(
-                self.audio_url,
-                stream=True,
-                timeout=30,
-                headers=headers,
-                verify=True  # Verificar SSL
-            )
-            response.raise_for_status()
+    TRANSCRIPTION_SERVICE_AVAILABLE = False
 
-            print(f"✅ Response status: {response.status_code}")
-            print(f"📊 Content-Type: {response.headers.get('content-type')}")
 
-            self.progress_updated.emit(30)
+def _transcription_job(file_path: str, method: str, task) -> str:
+    """Roda o AudioTranscriptionWorker dentro do pool de CPU do serviço de mídia"""
+    worker = AudioTranscriptionWorker(file_path, method)
+    outcome = {}
 
-            if self.should_stop:
-                return
-
-            # Determinar extensão baseada no content-type
-            content_type = response.headers.get('content-type', '').lower()
-
-            if 'opus' in content_type or 'ogg' in content_type:
-                extension = '.ogg'
-            elif 'mpeg' in content_type or 'mp3' in content_type:
-                extension = '.mp3'
-            elif 'mp4' in content_type or 'm4a' in content_type:
-                extension = '.m4a'
-            elif 'wav' in content_type:
-                extension = '.wav'
-            else:
-                # Default para WhatsApp
-                extension = '.ogg'
-
-            # Salvar em arquivo temporário
-            temp_dir = tempfile.gettempdir()
-            file_path = os.path.join(temp_dir, f"{self.filename}{extension}")
-
-            print(f"💾 Salvando em: {file_path}")
-
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if self.should_stop:
-                        f.close()
-                        try:
-                            os.remove(file_path)
-                        except:
-                            pass
-                        return
-
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-
-                        # Atualizar progresso
-                        if total_size > 0:
-                            progress = 30 + int((downloaded / total_size) * 60)
-                            self.progress_updated.emit(min(progress, 90))
-
-            self.progress_updated.emit(95)
+    direct = Qt.ConnectionType.DirectConnection
+    worker.progress_updated.connect(task.report_progress, direct)
+    worker.transcription_completed.connect(lambda text: outcome.setdefault('text', text), direct)
+    worker.transcription_failed.connect(lambda error: outcome.setdefault('error', error), direct)
+    worker.run()
 
-            # Verificar se arquivo foi criado corretamente
-            if not os.path.exists(file_path):
-                self.download_failed.emit("Arquivo não foi criado")
-                return
-
-            file_size = os.path.getsize(file_path)
-            if file_size == 0:
-                self.download_failed.emit("Arquivo baixado está vazio")
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-                return
+    if 'error' in outcome:
+        raise MediaTaskError(outcome['error'])
+    return outcome.get('text', '')
 
-            print(f"✅ Download concluído: {file_size} bytes")
-            self.progress_updated.emit(100)
-            self.download_completed.emit(file_path)
-
-        except requests.exceptions.Timeout:
-            self.download_failed.emit("Timeout na conexão (30s)")
-        except requests.exceptions.ConnectionError:
-            self.download_failed.emit("Erro de conexão com o servidor")
-        except requests.exceptions.HTTPError as e:
-            self.download_failed.emit(f"Erro HTTP: {e.response.status_code}")
-        except requests.exceptions.RequestException as e:
-            self.download_failed.emit(f"Erro na requisição: {str(e)}")
-        except Exception as e:
-            print(f"❌ Erro inesperado no download: {e}")
-            self.download_failed.emit(f"Erro inesperado: {str(e)}")
 
-    def stop(self):
-        """Para o download"""
+def request_transcription_job(file_path: str, method: str, owner=None, on_completed=None,
+                              on_failed=None, on_progress=None):
+    """Enfileira a transcrição local no pool de CPU (uma por arquivo/método)"""
+    return get_media_task_service().submit(
+        ('transcribe', file_path, method), partial(_transcription_job, file_path, method),
+        owner=owner, on_completed=on_completed, on_failed=on_failed, on_progress=on_progress,
+        heavy=True
+    )
 
 
-class AudioTranscriptionWorker(QThread):
-    """Worker para transcrição de áudio - CORRIGIDO"""
+class AudioTranscriptionWorker(QObject):
+    """
+    Transcrição de um arquivo de áudio - CORRIGIDO
+    Não é mais uma thread: run() é executado pelo pool do serviço de mídia
+    """
 
     transcription_completed = pyqtSignal(str)
     transcription_failed = pyqtSignal(str)
@@ -229,17 +112,13 @@ class AudioTranscriptionWorker(QThread):
     def _transcribe_with_whisper(self):
         """Transcrição usando Whisper - CORRIGIDO"""
         try:
-            import whisper
+            from transcription_service import load_whisper_model
 
             self.progress_updated.emit(20)
             print("🔄 Carregando modelo Whisper...")
 
-            # CORREÇÃO: Usar modelo menor para melhor performance
-            try:
-                model = whisper.load_model("base")
-            except Exception as model_error:
-                print(f"⚠️ Erro ao carregar modelo base, tentando tiny: {model_error}")
-                model = whisper.load_model("tiny")
+            # Modelo compartilhado: só a primeira transcrição paga o carregamento
+            model = load_whisper_model("base")
 
             self.progress_updated.emit(50)
 
@@ -289,6 +168,8 @@ class AudioTranscriptionWorker(QThread):
                 print("⚠️ PyDub não disponível, tentando usar arquivo original")
                 return self.audio_file_path
 
+            from pydub import AudioSegment
+
             # CORREÇÃO: Verificar se FFmpeg está disponível
             try:
                 from pydub.utils import which
@@ -355,9 +236,10 @@ class AudioTranscriptionWorker(QThread):
 
     def _transcribe_with_google(self):
         """Transcrição usando Google Speech Recognition - CORRIGIDO"""
-        try:
-            import speech_recognition as sr
+        # Fora do try: os except abaixo usam as exceções do módulo
+        import speech_recognition as sr
 
+        try:
             self.progress_updated.emit(20)
             print("🔄 Iniciando transcrição com Google...")
 
@@ -940,75 +822,15 @@ class AudioTranscriptionWorker(QThread):
             self._download_media_file(url, filename, "sticker")
 
     def _download_media_file(self, url: str, filename: str, media_type: str):
-        """NOVO: Download genérico de arquivo de mídia"""
+        """NOVO: Download genérico de arquivo de mídia (pool compartilhado do serviço de mídia)"""
         try:
             from PyQt6.QtWidgets import QProgressDialog
-            from PyQt6.QtCore import QThread, pyqtSignal
 
             # Progress dialog
             progress = QProgressDialog(f"Baixando {media_type}...", "Cancelar", 0, 100, self)
             progress.setWindowModality(Qt.WindowModality.WindowModal)
             progress.show()
 
-            # Worker thread para download
-            class MediaDownloadWorker(QThread):
-                progress_updated = pyqtSignal(int)
-                download_completed = pyqtSignal(str)
-                download_failed = pyqtSignal(str)
-
-                def __init__(self, url, filename):
-                    super().__init__()
-                    self.url = url
-                    self.filename = filename
-                    self.should_stop = False
-
-                def run(self):
-                    try:
-                        headers = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                            'Accept': '*/*'
-                        }
-
-                        response = requests.get(self.url, stream=True, headers=headers, timeout=30)
-                        response.raise_for_status()
-
-                        total_size = int(response.headers.get('content-length', 0))
-                        downloaded = 0
-
-                        with open(self.filename, 'wb') as f:
-                            for chunk in response.iter_content(chunk_size=8192):
-                                if self.should_stop:
-                                    f.close()
-                                    try:
-                                        os.remove(self.filename)
-                                    except:
-                                        pass
-                                    return
-
-                                if chunk:
-                                    f.write(chunk)
-                                    downloaded += len(chunk)
-
-                                    if total_size > 0:
-                                        progress_percent = int((downloaded / total_size) * 100)
-                                        self.progress_updated.emit(progress_percent)
-
-                        self.download_completed.emit(self.filename)
-
-                    except Exception as e:
-                        self.download_failed.emit(str(e))
-
-                def stop(self):
-                    self.should_stop = True
-
-            # Criar e iniciar worker
-            worker = MediaDownloadWorker(url, filename)
-
-            def on_progress(value):
-                progress.setValue(value)
-                if progress.wasCanceled():
-                    worker.stop()
-
             def on_completed(filepath):
                 progress.close()
                 QMessageBox.information(self, "Sucesso", f"{media_type.capitalize()} salvo em:\n{filepath}")
@@ -1017,10 +839,11 @@ class AudioTranscriptionWorker(QThread):
                 progress.close()
                 QMessageBox.critical(self, "Erro", f"Falha no download:\n{error}")
 
-            worker.progress_updated.connect(on_progress)
-            worker.download_completed.connect(on_completed)
-            worker.download_failed.connect(on_failed)
-            worker.start()
+            request = get_media_task_service().download(
+                url, destination=filename, owner=self,
+                on_completed=on_completed, on_failed=on_failed, on_progress=progress.setValue
+            )
+            progress.canceled.connect(request.cancel)
 
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao iniciar download:\n{str(e)}")
@@ -1050,7 +873,6 @@ class AudioTranscriptionWorker(QThread):
         try:
             from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel
             from PyQt6.QtGui import QPixmap
-            from PyQt6.QtCore import QThread, pyqtSignal
 
             # Dialog
             dialog = QDialog(self)
@@ -1066,26 +888,6 @@ class AudioTranscriptionWorker(QThread):
             loading_label.setStyleSheet("font-size: 16px; color: #666; padding: 50px;")
             layout.addWidget(loading_label)
 
-            # Worker para carregar imagem
-            class ImageLoadWorker(QThread):
-                image_loaded = pyqtSignal(bytes)
-                load_failed = pyqtSignal(str)
-
-                def __init__(self, url):
-                    super().__init__()
-                    self.url = url
-
-                def run(self):
-                    try:
-                        headers = {
-                            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                        }
-                        response = requests.get(self.url, headers=headers, timeout=10)
-                        response.raise_for_status()
-                        self.image_loaded.emit(response.content)
-                    except Exception as e:
-                        self.load_failed.emit(str(e))
-
             def on_image_loaded(image_data):
                 try:
                     # Remover label de loading
@@ -1152,11 +954,11 @@ class AudioTranscriptionWorker(QThread):
             """)
             layout.addWidget(close_btn)
 
-            # Carregar imagem
-            worker = ImageLoadWorker(url)
-            worker.image_loaded.connect(on_image_loaded)
-            worker.load_failed.connect(on_load_failed)
-            worker.start()
+            # Carregar imagem (cancelado se o diálogo fechar antes)
+            request = get_media_task_service().fetch(
+                url, owner=dialog, on_completed=on_image_loaded, on_failed=on_load_failed
+            )
+            dialog.finished.connect(lambda _: request.cancel())
 
             dialog.exec()
 
@@ -1165,6 +967,10 @@ class AudioTranscriptionWorker(QThread):
 
     def _handle_reaction_message(self) -> bool:
         """NOVO: Detecta e trata mensagens de reação para não criar nova mídia"""
+        # Lotes do banco já chegam com a reação resolvida (message_view_model)
+        if self.message_data.get('message_type') == 'reaction' and self.message_data.get('target_message_id'):
+            return True
+
         try:
             # Verificar se é uma mensagem de reação
             raw_data = self.message_data.get('raw_webhook_data', {})
@@ -1650,14 +1456,23 @@ class AudioPlayerWidget(QWidget):
 
     transcription_requested = pyqtSignal(str)
 
-    def __init__(self, audio_data, parent=None):
+    def __init__(self, audio_data, parent=None, message_id=None):
         super().__init__(parent)
         self.audio_data = audio_data
         self.audio_url = audio_data.get('url', '')
         self.duration_seconds = audio_data.get('seconds', 0)
         self.is_ptt = audio_data.get('ptt', False)
 
-        # Player
+        # Transcrição persistente (cache por mensagem)
+        self.message_id = message_id or audio_data.get('message_id', '')
+        self.chat_id = audio_data.get('chat_id')
+        self.cached_transcription = None
+        self.awaiting_transcription = False
+        self.transcription_service = get_transcription_service() if TRANSCRIPTION_SERVICE_AVAILABLE else None
+
+        # Player (QtMultimedia só é carregado quando o primeiro áudio aparece)
+        from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+
         self.media_player = QMediaPlayer()
         self.audio_output = QAudioOutput()
         self.media_player.setAudioOutput(self.audio_output)
@@ -1669,13 +1484,14 @@ class AudioPlayerWidget(QWidget):
         self.local_audio_file = None
         self.slider_pressed = False
 
-        # Workers
-        self.download_worker = None
-        self.transcription_worker = None
+        # Pedidos ao serviço de mídia (pool compartilhado)
+        self.download_request = None
+        self.transcription_request = None
 
         # Inicializar UI primeiro
         self.setup_ui()
         self.connect_signals()
+        self.connect_transcription_service()
 
     def setup_ui(self):
         """CORRIGIDO: Configura interface do player"""
@@ -1809,8 +1625,60 @@ class AudioPlayerWidget(QWidget):
         self.media_player.playbackStateChanged.connect(self.on_playback_state_changed)
         self.media_player.errorOccurred.connect(self.on_player_error)
 
+    def connect_transcription_service(self):
+        """NOVO: Conecta ao serviço de transcrição e mostra transcrição já salva"""
+        if not self.transcription_service or not self.message_id:
+            return
+
+        self.transcription_service.transcription_ready.connect(self.on_service_transcription_ready)
+        self.transcription_service.transcription_failed.connect(self.on_service_transcription_failed)
+
+        cached = self.transcription_service.get_cached(self.message_id)
+        if cached:
+            self.set_cached_transcription(cached['text'])
+        elif self.transcription_service.is_pending(self.message_id):
+            self.transcribe_button.setEnabled(False)
+            self.transcribe_button.setText("⏳")
+
+    def set_cached_transcription(self, text):
+        """Marca o player com a transcrição disponível (exibição imediata)"""
+        self.cached_transcription = text
+        self.transcribe_button.setEnabled(True)
+        self.transcribe_button.setText("📄")
+        preview = text if len(text) <= 200 else text[:197] + "..."
+        self.transcribe_button.setToolTip(f"Transcrição: {preview}")
+
+    def reset_transcribe_button(self):
+        """Volta o botão de transcrição ao estado de repouso"""
+        self.transcribe_button.setText("📄" if self.cached_transcription else "📝")
+
+    def on_service_transcription_ready(self, message_id, text, confidence):
+        """Transcrição concluída pelo serviço (pedido individual ou do chat inteiro)"""
+        if message_id != self.message_id:
+            return
+
+        self.set_cached_transcription(text)
+
+        if self.awaiting_transcription:
+            self.awaiting_transcription = False
+            self.on_transcription_completed(text)
+
+    def on_service_transcription_failed(self, message_id, error_message):
+        """Falha reportada pelo serviço de transcrição"""
+        if message_id != self.message_id:
+            return
+
+        if self.awaiting_transcription:
+            self.awaiting_transcription = False
+            self.on_transcription_failed(error_message)
+        else:
+            self.transcribe_button.setEnabled(True)
+            self.reset_transcribe_button()
+
     def on_player_error(self, error):
         """CORRIGIDO: Tratamento mais específico de erros do player"""
+        from PyQt6.QtMultimedia import QMediaPlayer
+
         error_messages = {
             QMediaPlayer.Error.NoError: "Sem erro",
             QMediaPlayer.Error.ResourceError: "Erro no recurso de mídia",
@@ -1873,13 +1741,13 @@ class AudioPlayerWidget(QWidget):
             self.on_audio_downloaded(self.local_audio_file)
             return
 
-        # Iniciar download
-        self.download_worker = AudioDownloadWorker(self.audio_url, f"audio_{int(datetime.now().timestamp())}")
-        self.download_worker.download_completed.connect(self.on_audio_downloaded)
-        self.download_worker.download_failed.connect(self.on_download_failed)
-        self.download_worker.progress_updated.connect(self.on_download_progress)
-        self.download_worker.start()
-        self.download_worker.start()
+        # Iniciar download (compartilhado com outros pedidos da mesma URL)
+        self.download_request = get_media_task_service().download(
+            self.audio_url, prefix="audio", owner=self,
+            on_completed=self.on_audio_downloaded,
+            on_failed=self.on_download_failed,
+            on_progress=self.on_download_progress
+        )
 
     def on_audio_downloaded(self, file_path):
         """CORRIGIDO: Callback com conversão automática para formato compatível"""
@@ -1923,6 +1791,8 @@ class AudioPlayerWidget(QWidget):
                 print("⚠️ PyDub não disponível, tentando arquivo original")
                 return file_path
 
+            from pydub import AudioSegment
+
             # Verificar se é OGG/Opus (problemático no Windows)
             file_extension = os.path.splitext(file_path)[1].lower()
 
@@ -2014,6 +1884,8 @@ class AudioPlayerWidget(QWidget):
 
     def on_media_status_changed(self, status):
         """Callback para mudanças no status da mídia"""
+        from PyQt6.QtMultimedia import QMediaPlayer
+
         if status == QMediaPlayer.MediaStatus.LoadedMedia:
             self.is_loaded = True
             self.play_button.setEnabled(True)
@@ -2021,6 +1893,8 @@ class AudioPlayerWidget(QWidget):
 
     def on_playback_state_changed(self, state):
         """Callback para mudanças no estado de reprodução"""
+        from PyQt6.QtMultimedia import QMediaPlayer
+
         if state == QMediaPlayer.PlaybackState.PlayingState:
             self.is_playing = True
             self.play_button.setText("⏸")
@@ -2043,6 +1917,8 @@ class AudioPlayerWidget(QWidget):
 
     def on_slider_released(self):
         """Callback quando slider é solto"""
+        from PyQt6.QtMultimedia import QMediaPlayer
+
         self.slider_pressed = False
         if self.is_loaded:
             position = self.progress_slider.value() * 1000  # Converter s para ms
@@ -2060,6 +1936,27 @@ class AudioPlayerWidget(QWidget):
 
     def start_transcription(self):
         """Inicia processo de transcrição"""
+        # Transcrição já salva: mostrar imediatamente
+        if self.cached_transcription:
+            self.show_transcription_result(self.cached_transcription)
+            return
+
+        # Serviço persistente: download + transcrição fora da interface
+        if self.transcription_service and self.message_id:
+            status = self.transcription_service.request_transcription(
+                self.message_id,
+                audio_url=self.audio_url,
+                file_path=self.local_audio_file or '',
+                chat_id=self.chat_id,
+                audio_seconds=self.duration_seconds
+            )
+
+            if status in ('queued', 'pending', 'cached'):
+                self.awaiting_transcription = True
+                self.transcribe_button.setEnabled(False)
+                self.transcribe_button.setText("⏳")
+                return
+
         if not self.local_audio_file and self.audio_url:
             # Precisa baixar primeiro
             print("📝 Baixando áudio para transcrição...")
@@ -2067,10 +1964,11 @@ class AudioPlayerWidget(QWidget):
             self.transcribe_button.setText("⏳")
 
             # Baixar áudio
-            self.download_worker = AudioDownloadWorker(self.audio_url, f"transcribe_{int(datetime.now().timestamp())}")
-            self.download_worker.download_completed.connect(self.on_audio_ready_for_transcription)
-            self.download_worker.download_failed.connect(self.on_transcription_download_failed)
-            self.download_worker.start()
+            self.download_request = get_media_task_service().download(
+                self.audio_url, prefix="transcribe", owner=self,
+                on_completed=self.on_audio_ready_for_transcription,
+                on_failed=self.on_transcription_download_failed
+            )
 
         elif self.local_audio_file:
             # Já temos o arquivo, transcrever diretamente
@@ -2116,11 +2014,12 @@ class AudioPlayerWidget(QWidget):
             return
 
         # Iniciar transcrição
-        self.transcription_worker = AudioTranscriptionWorker(file_path, method)
-        self.transcription_worker.transcription_completed.connect(self.on_transcription_completed)
-        self.transcription_worker.transcription_failed.connect(self.on_transcription_failed)
-        self.transcription_worker.progress_updated.connect(self.on_transcription_progress)
-        self.transcription_worker.start()
+        self.transcription_request = request_transcription_job(
+            file_path, method, owner=self,
+            on_completed=self.on_transcription_completed,
+            on_failed=self.on_transcription_failed,
+            on_progress=self.on_transcription_progress
+        )
 
     def on_transcription_completed(self, transcribed_text):
         """Callback quando transcrição é concluída"""
@@ -2132,7 +2031,7 @@ class AudioPlayerWidget(QWidget):
         self.show_transcription_result(transcribed_text)
 
         # Resetar botão após 2 segundos
-        QTimer.singleShot(2000, lambda: self.transcribe_button.setText("📝"))
+        QTimer.singleShot(2000, self.reset_transcribe_button)
 
     def on_transcription_failed(self, error_message):
         """Callback quando transcrição falha"""
@@ -2143,7 +2042,7 @@ class AudioPlayerWidget(QWidget):
         QMessageBox.warning(self, "Erro na Transcrição", f"Não foi possível transcrever o áudio:\n{error_message}")
 
         # Resetar botão após 2 segundos
-        QTimer.singleShot(2000, lambda: self.transcribe_button.setText("📝"))
+        QTimer.singleShot(2000, self.reset_transcribe_button)
 
     def on_transcription_progress(self, progress):
         """Callback para progresso da transcrição"""
@@ -2236,14 +2135,12 @@ class AudioPlayerWidget(QWidget):
             if hasattr(self, 'position_timer') and self.position_timer.isActive():
                 self.position_timer.stop()
 
-            # Parar workers se estiverem rodando
-            if self.download_worker and self.download_worker.isRunning():
-                self.download_worker.terminate()
-                self.download_worker.wait()
+            # Liberar pedidos em andamento (a tarefa para se ninguém mais a espera)
+            if self.download_request:
+                self.download_request.cancel()
 
-            if self.transcription_worker and self.transcription_worker.isRunning():
-                self.transcription_worker.terminate()
-                self.transcription_worker.wait()
+            if self.transcription_request:
+                self.transcription_request.cancel()
 
             # Limpar arquivo temporário
             if self.local_audio_file and os.path.exists(self.local_audio_file):
@@ -2291,6 +2188,7 @@ class MessageBubble(QFrame):
     message_deleted = pyqtSignal(str, str)  # webhook_message_id, chat_id
     message_edited = pyqtSignal(str, str, str)  # webhook_message_id, novo_texto, chat_id
     message_reaction = pyqtSignal(str, str, str)  # webhook_message_id, emoji, chat_id
+    operation_requested = pyqtSignal(list)  # [(operação, chat_id, message_id, args)]
 
     def __init__(self, message_data: Dict, is_from_me: bool = False, whatsapp_api=None):
         super().__init__()
@@ -2299,10 +2197,17 @@ class MessageBubble(QFrame):
         self.is_fully_setup = False
         self.whatsapp_api = whatsapp_api
 
+        # Quando True, editar/apagar/reagir são pedidos via operation_requested e
+        # executados fora da thread da UI; o resultado volta em apply_operation_result()
+        self.async_operations = False
+
         # NOVO: Flags para controle de mensagens temporárias
         self.is_temporary_sent = False
         self.temp_id = None
 
+        # True enquanto aguarda o resultado do serviço de transcrição (singleton)
+        self._awaiting_service_transcription = False
+
         # IDs importantes
         self.webhook_message_id = message_data.get('webhook_message_id', message_data.get('message_id', ''))
         self.local_message_id = message_data.get('local_message_id', '')
@@ -2334,7 +2239,8 @@ class MessageBubble(QFrame):
             if sender_name != 'Você':  # Não mostrar "Você" em grupos
                 sender_label = QLabel(sender_name)
                 sender_label.setFont(QFont('Segoe UI', 9, QFont.Weight.Bold))
-                sender_label.setStyleSheet("color: #667eea; margin-left: 15px; margin-bottom: 2px;")
+                sender_label.setPalette(text_palette('#667eea'))
+                sender_label.setContentsMargins(15, 0, 0, 2)
                 main_layout.addWidget(sender_label)
 
         # Container do balão
@@ -2364,16 +2270,8 @@ class MessageBubble(QFrame):
         # Configurar o layout principal
         self.setLayout(main_layout)
 
-        # Estilo do container principal
-        self.setStyleSheet("""
-           MessageBubble { 
-               background-color: transparent; 
-               border: none; 
-           }
-           MessageBubble:hover { 
-               background-color: transparent; 
-           }
-       """)
+        # Container transparente (QFrame sem stylesheet); o fundo do balão é
+        # pintado em paintEvent a partir da skin compartilhada
 
         # Garantir visibilidade
         self.setVisible(True)
@@ -2414,13 +2312,8 @@ class MessageBubble(QFrame):
             status_icon = QLabel("✓✓")
             status_icon.setObjectName('delivery_status_indicator')
             status_icon.setFont(QFont('Segoe UI', 8, QFont.Weight.Bold))
-            status_icon.setStyleSheet("""
-                QLabel {
-                    color: #4CAF50; 
-                    background: transparent;
-                    margin-left: 3px;
-                }
-            """)
+            status_icon.setPalette(text_palette('#4CAF50'))
+            status_icon.setContentsMargins(3, 0, 0, 0)
             status_icon.setToolTip("Entregue")
 
             # Adicionar ao layout
@@ -2517,14 +2410,9 @@ class MessageBubble(QFrame):
         self.content_label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
         self.content_label.setSizePolicy(QSizePolicy.Policy.Preferred, QSizePolicy.Policy.Minimum)
 
-        # Cor do texto baseada no tema
-        text_color = "#ffffff" if self.is_from_me else "#2c3e50"
-        self.content_label.setStyleSheet(f"""
-           color: {text_color}; 
-           background: transparent; 
-           border: none;
-           selection-background-color: rgba(255, 255, 255, 0.3);
-       """)
+        # Cor do texto baseada no tema (paleta compartilhada, sem stylesheet por balão)
+        text_color, time_color = bubble_text_colors(self.is_from_me)
+        self.content_label.setPalette(text_palette(text_color, QColor(255, 255, 255, 77)))
 
         content_container.addWidget(self.content_label)
 
@@ -2575,28 +2463,26 @@ class MessageBubble(QFrame):
             else:
                 self.time_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
 
-            time_color = "rgba(255,255,255,0.8)" if self.is_from_me else "#7f8c8d"
-            self.time_label.setStyleSheet(f"color: {time_color}; background: transparent; margin-top: 3px;")
+            self.time_label.setPalette(text_palette(time_color))
+            self.time_label.setContentsMargins(0, 3, 0, 0)
 
             status_layout.addWidget(self.time_label, 1)
 
             # Adicionar indicador de editada se necessário
             if self.message_data.get('edited'):
                 edited_indicator = QLabel("editada")
-                edited_indicator.setFont(QFont('Segoe UI', 7))
-                edited_indicator.setStyleSheet(f"""
-                   color: {time_color};
-                   font-style: italic;
-                   margin-left: 5px;
-                   margin-top: 3px;
-               """)
+                edited_font = QFont('Segoe UI', 7)
+                edited_font.setItalic(True)
+                edited_indicator.setFont(edited_font)
+                edited_indicator.setPalette(text_palette(time_color))
+                edited_indicator.setContentsMargins(5, 3, 0, 0)
                 status_layout.addWidget(edited_indicator)
 
             # Adicionar ícone de status para mensagens enviadas
             if self.is_from_me:
                 status_icon = QLabel("✓")  # Checkmark for delivered
                 status_icon.setFont(QFont('Segoe UI', 8))
-                status_icon.setStyleSheet(f"color: {time_color}; background: transparent;")
+                status_icon.setPalette(text_palette(time_color))
                 status_layout.addWidget(status_icon)
 
         content_container.addLayout(status_layout)
@@ -2617,44 +2503,24 @@ class MessageBubble(QFrame):
                 'deleted') else None
             bubble.leaveEvent = lambda e: self.options_button.setVisible(False)
 
-        # Aplicar estilo visual ao balão
-        self._apply_bubble_style(bubble)
-
-        # Adicionar sombra suave
-        self._add_shadow(bubble)
-
         return bubble
 
-    def _apply_bubble_style(self, bubble: QFrame):
-        """Aplica estilo visual ao balão"""
-        if self.is_from_me:
-            # Mensagens enviadas - gradiente azul/roxo
-            bubble.setStyleSheet("""
-                QFrame {
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                        stop:0 #667eea, stop:1 #764ba2);
-                    border-radius: 18px;
-                    border-bottom-right-radius: 5px;
-                }
-            """)
-        else:
-            # Mensagens recebidas - branco com borda suave
-            bubble.setStyleSheet("""
-                QFrame {
-                    background-color: #ffffff;
-                    border: 1px solid #e9ecef;
-                    border-radius: 18px;
-                    border-bottom-left-radius: 5px;
-                }
-            """)
+    def paintEvent(self, event):
+        """
+        Pinta fundo e sombra do balão atrás do bubble_frame com a skin
+        pré-renderizada (nine-patch), sem QGraphicsDropShadowEffect por balão
+        """
+        super().paintEvent(event)
+        bubble = getattr(self, 'bubble_frame', None)
+        if bubble is None or not bubble.isVisible():
+            return
 
-    def _add_shadow(self, bubble: QFrame):
-        """Adiciona sombra ao balão"""
-        shadow = QGraphicsDropShadowEffect()
-        shadow.setBlurRadius(8)
-        shadow.setColor(QColor(0, 0, 0, 20))
-        shadow.setOffset(0, 2)
-        bubble.setGraphicsEffect(shadow)
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        skin = get_skin(bubble_skin_name(self.is_from_me, bool(self.message_data.get('deleted'))),
+                        self.devicePixelRatioF())
+        skin.paint(painter, QRectF(bubble.geometry()))
+        painter.end()
 
     def _get_type_icon(self, message_type: str) -> str:
         """Retorna ícone baseado no tipo da mensagem"""
@@ -2754,7 +2620,8 @@ class MessageBubble(QFrame):
                     # Temos URL - criar player completo
                     print("✅ Criando AudioPlayerWidget completo")
                     try:
-                        audio_player = AudioPlayerWidget(audio_data, self)
+                        audio_data.setdefault('chat_id', self.message_data.get('chat_id'))
+                        audio_player = AudioPlayerWidget(audio_data, self, message_id=self.webhook_message_id)
                         preview_layout.addWidget(audio_player)
                         return preview_widget
                     except Exception as player_error:
@@ -2972,12 +2839,6 @@ class MessageBubble(QFrame):
             progress.setWindowModality(Qt.WindowModality.WindowModal)
             progress.show()
 
-            # Worker de download
-            self.temp_download_worker = AudioDownloadWorker(
-                audio_data.get('url'),
-                f"temp_audio_{int(datetime.now().timestamp())}"
-            )
-
             def on_download_complete(file_path):
                 progress.close()
                 # Criar player temporário
@@ -2987,15 +2848,14 @@ class MessageBubble(QFrame):
                 progress.close()
                 QMessageBox.warning(self, "Erro", f"Falha no download: {error}")
 
-            def on_progress(value):
-                progress.setValue(value)
-                if progress.wasCanceled():
-                    self.temp_download_worker.terminate()
-
-            self.temp_download_worker.download_completed.connect(on_download_complete)
-            self.temp_download_worker.download_failed.connect(on_download_failed)
-            self.temp_download_worker.progress_updated.connect(on_progress)
-            self.temp_download_worker.start()
+            # Download pelo pool compartilhado
+            self.temp_download_request = get_media_task_service().download(
+                audio_data.get('url'), prefix="temp_audio", owner=self,
+                on_completed=on_download_complete,
+                on_failed=on_download_failed,
+                on_progress=progress.setValue
+            )
+            progress.canceled.connect(self.temp_download_request.cancel)
 
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao baixar áudio: {e}")
@@ -3053,19 +2913,33 @@ class MessageBubble(QFrame):
             QMessageBox.warning(self, "Erro", "URL do áudio não disponível para transcrição")
             return
 
-        try:
-            # Baixar primeiro
-            self.transcription_download_worker = AudioDownloadWorker(
-                audio_data.get('url'),
-                f"transcribe_{int(datetime.now().timestamp())}"
+        # Serviço persistente: usa transcrição salva ou enfileira no processo dedicado
+        if TRANSCRIPTION_SERVICE_AVAILABLE and self.webhook_message_id:
+            service = get_transcription_service()
+            cached = service.get_cached(self.webhook_message_id)
+            if cached:
+                self._show_transcription_result(cached['text'])
+                return
+
+            # Métodos ligados (não closures): o PyQt desconecta sozinho quando o balão é destruído
+            self._connect_transcription_service(service)
+
+            status = service.request_transcription(
+                self.webhook_message_id,
+                audio_url=audio_data.get('url'),
+                chat_id=self.message_data.get('chat_id'),
+                audio_seconds=audio_data.get('seconds')
             )
+            if status in ('queued', 'pending', 'cached'):
+                return
+
+            self._disconnect_transcription_service()
 
+        try:
             def on_ready_for_transcription(file_path):
                 # Agora transcrever
                 method = "whisper" if WHISPER_AVAILABLE else "google"
 
-                transcription_worker = AudioTranscriptionWorker(file_path, method)
-
                 def on_transcription_done(text):
                     # Mostrar resultado
                     self._show_transcription_result(text)
@@ -3082,20 +2956,52 @@ class MessageBubble(QFrame):
                     except:
                         pass
 
-                transcription_worker.transcription_completed.connect(on_transcription_done)
-                transcription_worker.transcription_failed.connect(on_transcription_error)
-                transcription_worker.start()
+                self.transcription_request = request_transcription_job(
+                    file_path, method, owner=self,
+                    on_completed=on_transcription_done,
+                    on_failed=on_transcription_error
+                )
 
             def on_transcription_download_failed(error):
                 QMessageBox.warning(self, "Erro", f"Falha no download para transcrição: {error}")
 
-            self.transcription_download_worker.download_completed.connect(on_ready_for_transcription)
-            self.transcription_download_worker.download_failed.connect(on_transcription_download_failed)
-            self.transcription_download_worker.start()
+            # Baixar primeiro
+            self.transcription_download_request = get_media_task_service().download(
+                audio_data.get('url'), prefix="transcribe", owner=self,
+                on_completed=on_ready_for_transcription,
+                on_failed=on_transcription_download_failed
+            )
 
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao preparar transcrição: {e}")
 
+    def _connect_transcription_service(self, service):
+        if not self._awaiting_service_transcription:
+            service.transcription_ready.connect(self._on_service_transcription_ready)
+            service.transcription_failed.connect(self._on_service_transcription_failed)
+            self._awaiting_service_transcription = True
+
+    def _disconnect_transcription_service(self):
+        if not self._awaiting_service_transcription:
+            return
+        self._awaiting_service_transcription = False
+        service = get_transcription_service()
+        try:
+            service.transcription_ready.disconnect(self._on_service_transcription_ready)
+            service.transcription_failed.disconnect(self._on_service_transcription_failed)
+        except (TypeError, RuntimeError):
+            pass  # Já desconectado (ex: o PyQt desfez a conexão ao destruir o balão)
+
+    def _on_service_transcription_ready(self, message_id, text, confidence):
+        if message_id == self.webhook_message_id:
+            self._disconnect_transcription_service()
+            self._show_transcription_result(text)
+
+    def _on_service_transcription_failed(self, message_id, error):
+        if message_id == self.webhook_message_id:
+            self._disconnect_transcription_service()
+            QMessageBox.warning(self, "Erro na Transcrição", error)
+
     def _show_transcription_result(self, transcribed_text):
         """Mostra resultado da transcrição - REUTILIZADO"""
         from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QLabel
@@ -3432,7 +3338,11 @@ class MessageBubble(QFrame):
         if dialog.exec() == QDialog.DialogCode.Accepted:
             new_text = edit_field.toPlainText()
 
-            if new_text != current_text and self.whatsapp_api:
+            if new_text != current_text and self.async_operations:
+                phone_number = self.chat_id or self.message_data.get('sender_id', '')
+                self.operation_requested.emit([('edit', phone_number, self.webhook_message_id, {'text': new_text})])
+
+            elif new_text != current_text and self.whatsapp_api:
                 try:
                     phone_number = self.chat_id or self.message_data.get('sender_id', '')
 
@@ -3480,15 +3390,13 @@ class MessageBubble(QFrame):
                             # Adicionar indicador de editada
                             if not hasattr(self, 'edited_indicator'):
                                 self.edited_indicator = QLabel("editada")
-                                self.edited_indicator.setFont(QFont('Segoe UI', 7))
+                                edited_font = QFont('Segoe UI', 7)
+                                edited_font.setItalic(True)
+                                self.edited_indicator.setFont(edited_font)
 
                                 # CORREÇÃO: Usar apenas cor sem sobrescrever background
-                                time_color = "rgba(255,255,255,0.8)" if self.is_from_me else "#7f8c8d"
-                                self.edited_indicator.setStyleSheet(f"""
-                                   color: {time_color};
-                                   font-style: italic;
-                                   margin-left: 5px;
-                               """)
+                                self.edited_indicator.setPalette(text_palette(bubble_text_colors(self.is_from_me)[1]))
+                                self.edited_indicator.setContentsMargins(5, 0, 0, 0)
                                 status_layout.addWidget(self.edited_indicator)
                             break
 
@@ -3550,6 +3458,10 @@ class MessageBubble(QFrame):
                     QMessageBox.warning(self, "Erro", "Não foi possível identificar o destinatário.")
                     return
 
+                if self.async_operations:
+                    self.operation_requested.emit([('delete', phone_number, self.webhook_message_id, {})])
+                    return
+
                 # Fazer a chamada para a API
                 result = self.whatsapp_api.deleta_mensagem(
                     phone_number=phone_number,
@@ -3584,32 +3496,13 @@ class MessageBubble(QFrame):
             self.content_label.setText(deleted_text)
 
             # CORREÇÃO: Manter cor de texto sem afetar background
-            self.content_label.setStyleSheet("""
-               color: #e74c3c; 
-               font-style: italic;
-           """)
+            deleted_font = QFont(self.content_label.font())
+            deleted_font.setItalic(True)
+            self.content_label.setFont(deleted_font)
+            self.content_label.setPalette(text_palette('#e74c3c'))
 
-            # CORREÇÃO: Aplicar estilo apenas ao bubble_frame
-            if self.is_from_me:
-                self.bubble_frame.setStyleSheet("""
-                   QFrame {
-                       background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                           stop:0 #ff7675, stop:1 #d63031);
-                       border-radius: 18px;
-                       border-bottom-right-radius: 5px;
-                       opacity: 0.8;
-                   }
-               """)
-            else:
-                self.bubble_frame.setStyleSheet("""
-                   QFrame {
-                       background-color: #ffeaea;
-                       border: 2px solid #e74c3c;
-                       border-radius: 18px;
-                       border-bottom-left-radius: 5px;
-                       opacity: 0.8;
-                   }
-               """)
+            # Fundo de apagada: outra skin, pintada em paintEvent
+            self.update()
 
             # Desabilitar menu de opções
             if hasattr(self, 'options_button'):
@@ -3632,6 +3525,15 @@ class MessageBubble(QFrame):
         if not self.webhook_message_id or not self.whatsapp_api:
             return
 
+        if self.async_operations:
+            phone_number = self.chat_id or self.message_data.get('sender_id', '')
+            if reaction:
+                operation = ('react', phone_number, self.webhook_message_id, {'reaction': reaction, 'delay': 1})
+            else:
+                operation = ('unreact', phone_number, self.webhook_message_id, {'delay': 1})
+            self.operation_requested.emit([operation])
+            return
+
         try:
             phone_number = self.chat_id or self.message_data.get('sender_id', '')
 
@@ -3664,6 +3566,33 @@ class MessageBubble(QFrame):
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao reagir à mensagem: {str(e)}")
 
+    def apply_operation_result(self, result: Dict):
+        """Aplica na interface o resultado de uma operação executada em segundo plano"""
+        if not result.get('success'):
+            print(f"❌ Falha em '{result.get('operation')}' ({self.webhook_message_id}): {result.get('error')}")
+            return
+
+        operation = result.get('operation')
+        args = result.get('args') or {}
+
+        if operation == 'delete':
+            self.message_data['deleted'] = True
+            self._show_as_deleted()
+            self.message_deleted.emit(self.webhook_message_id, self.chat_id)
+
+        elif operation == 'edit':
+            new_text = args.get('text', '')
+            self.message_data['content'] = new_text
+            self.message_data['edited'] = True
+            self._show_as_edited(new_text)
+            self.message_edited.emit(self.webhook_message_id, new_text, self.chat_id)
+
+        elif operation in ('react', 'unreact'):
+            reaction = args.get('reaction') if operation == 'react' else None
+            self.message_data['reaction'] = reaction
+            self._update_reaction_display(reaction)
+            self.message_reaction.emit(self.webhook_message_id, reaction or '', self.chat_id)
+
     def _update_reaction_display(self, reaction: Optional[str]):
         """Atualiza a exibição da reação na interface"""
         try:
@@ -3721,6 +3650,10 @@ class MessageBubble(QFrame):
 
     def cleanup(self):
         """Limpa recursos quando widget é destruído"""
+        # Resultado de transcrição pendente não deve mais chegar a este balão
+        if getattr(self, '_awaiting_service_transcription', False):
+            self._disconnect_transcription_service()
+
         # Limpar players de áudio
         try:
             # Procurar por AudioPlayerWidgets no bubble
@@ -3958,10 +3891,11 @@ class MessageRenderer:
         Returns:
             Widget da mensagem renderizada
         """
-        from_me = message_data.get('from_me', False)
+        # Dicionários no formato antigo viram ChatMessage (menos memória por balão)
+        message_data = ChatMessage.from_dict(message_data)
 
         # Criar balão da mensagem com integração WhatsApp
-        message_bubble = MessageBubble(message_data, is_from_me=from_me, whatsapp_api=whatsapp_api)
+        message_bubble = MessageBubble(message_data, is_from_me=message_data.from_me, whatsapp_api=whatsapp_api)
 
         return message_bubble
 
@@ -4001,24 +3935,7 @@ class MessageRenderer:
         Returns:
             Data formatada para exibição
         """
-        try:
-            # Tentar parsear e reformatar
-            from datetime import datetime
-            dt = datetime.strptime(date_str, '%d/%m/%Y')
-
-            # Verificar se é hoje, ontem, etc.
-            today = datetime.now()
-            if dt.date() == today.date():
-                return "Hoje"
-            elif (today.date() - dt.date()).days == 1:
-                return "Ontem"
-            elif (today.date() - dt.date()).days < 7:
-                dias_semana = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
-                return dias_semana[dt.weekday()]
-            else:
-                return dt.strftime('%d de %B')
-        except:
-            return date_str
+        return format_date_separator(date_str)
 
 
 class TypingIndicator(QWidget):
@@ -4075,8 +3992,8 @@ class TypingIndicator(QWidget):
         dot.setStyleSheet(f"font-size: 18px; color: #555; opacity: {new_opacity};")
 
 
-class MessagesContainer(QScrollArea):
-    """Container otimizado para mensagens"""
+class MessagesContainer(MessageListView):
+    """Container otimizado para mensagens (lista virtualizada, ver ui/message_list_view.py)"""
 
     def __init__(self):
         super().__init__()
@@ -4084,13 +4001,11 @@ class MessagesContainer(QScrollArea):
 
     def setup_ui(self):
         """Configura o container de mensagens"""
-        self.setWidgetResizable(True)
-        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.setStyleSheet("""
-            QScrollArea {
+            QListView {
                 border: none;
                 background-color: #f8f9fa;
+                padding: 8px 0px;
             }
             QScrollBar:vertical {
                 background: #f1f3f4;
@@ -4112,54 +4027,27 @@ class MessagesContainer(QScrollArea):
             }
         """)
 
-        # Widget interno para as mensagens
-        self.messages_widget = QWidget()
-        self.messages_widget.setStyleSheet("background-color: transparent;")
-
-        # Layout para as mensagens
-        self.messages_layout = QVBoxLayout(self.messages_widget)
-        self.messages_layout.setContentsMargins(8, 8, 8, 8)
-        self.messages_layout.setSpacing(3)
-        self.messages_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-
-        # Definir o widget interno
-        self.setWidget(self.messages_widget)
-
     def add_message_widget(self, widget):
-        """Adiciona um widget de mensagem ao container"""
-        # Garantir que o widget seja visível
-        widget.setVisible(True)
-
-        # Adicionar ao layout
-        self.messages_layout.addWidget(widget)
-
-        # Atualizar geometria
-        self.messages_widget.updateGeometry()
-
-        # Processar eventos
-        QApplication.processEvents()
-
-        # Rolar para o final
-        QTimer.singleShot(50, self.scroll_to_bottom)
-
-    def clear_messages(self):
-        """Limpa todas as mensagens"""
-        while self.messages_layout.count() > 0:
-            child = self.messages_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+        """
+        Adiciona a mensagem de um MessageBubble já criado. Só os dados entram
+        na lista (desenhada pelo delegate); o widget é descartado.
+        """
+        self.add_message_widgets([widget])
 
-        # Processar eventos para garantir limpeza
-        QApplication.processEvents()
+    def add_message_widgets(self, widgets: List[QWidget]):
+        """Versão em lote de add_message_widget: uma inserção e uma rolagem para todos"""
+        messages = []
+        for widget in widgets:
+            message_data = getattr(widget, 'message_data', None)
+            if message_data is not None:
+                messages.append(message_data)
+            widget.deleteLater()
 
-    def scroll_to_bottom(self):
-        """Rola para o final das mensagens"""
-        scrollbar = self.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
+        self.add_messages(messages)
 
     def add_stretch(self):
-        """Adiciona stretch no final para empurrar mensagens para cima"""
-        self.messages_layout.addStretch()
+        """Mantido por compatibilidade: a lista já alinha as mensagens no topo"""
+        pass
 
 
 class ChatInputArea(QWidget):
@@ -4463,8 +4351,8 @@ class ChatHeader(QWidget):
 #
 # 📋 PRINCIPAIS RECURSOS ADICIONADOS:
 # ✅ AudioPlayerWidget - Player completo de áudio
-# ✅ AudioDownloadWorker - Download assíncrono de áudio do WhatsApp
-# ✅ AudioTranscriptionWorker - Transcrição usando Whisper ou Google
+# ✅ MediaTaskService - Downloads em pool compartilhado (sem thread por clique)
+# ✅ AudioTranscriptionWorker - Transcrição usando Whisper ou Google (pool de CPU)
 # ✅ Reprodução com controles (play/pause/seek)
 # ✅ Indicador de progresso visual
 # ✅ Transcrição automática com múltiplos engines
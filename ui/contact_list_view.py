@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lista de conversas (model/view) com atualização por diferença
+
+O modelo é indexado pelo id do chat: cada recarga compara o novo retrato com o
+anterior e aplica só as inserções, remoções, movimentos e alterações de linha
+necessários, então a seleção, a rolagem e os avatares já pintados continuam
+onde estavam. O delegate desenha o cartão do contato com QPainter (sem um
+ContactItemWidget com layouts, stylesheets e sombra por linha).
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QRectF, QSize, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QLinearGradient, QPainter, QPen
+
+from avatar_service import get_avatar_service
+from ui_profiler import ProfileSection
+from ui.bubble_skin import get_skin
+from ui.contact_search import ContactSearchIndex, ContactFilterProxyModel
+
+# Papéis de dados do modelo
+ROLE_CONTACT = Qt.ItemDataRole.UserRole + 1
+ROLE_CONTACT_ID = Qt.ItemDataRole.UserRole + 2
+
+AVATAR_SIZE = 52
+
+# Cores profissionais e suaves para o avatar com inicial (cor → tom mais escuro do gradiente)
+AVATAR_COLORS = {
+    "#6366f1": "#4f46e5",  # Indigo moderno
+    "#8b5cf6": "#7c3aed",  # Violeta suave
+    "#06b6d4": "#0891b2",  # Cyan profissional
+    "#10b981": "#059669",  # Emerald elegante
+    "#f59e0b": "#d97706",  # Âmbar corporativo
+    "#ef4444": "#dc2626",  # Vermelho suave
+    "#ec4899": "#db2777",  # Rosa profissional
+    "#84cc16": "#65a30d",  # Lima corporativo
+    "#6b7280": "#4b5563",  # Cinza elegante
+    "#0ea5e9": "#0284c7"  # Azul céu
+}
+_AVATAR_PALETTE = list(AVATAR_COLORS)
+
+
+def avatar_color(name: str) -> str:
+    """Cor do avatar derivada do nome (estável entre execuções)"""
+    hash_val = sum(ord(c) for c in (name or 'default'))
+    return _AVATAR_PALETTE[hash_val % len(_AVATAR_PALETTE)]
+
+
+def darken_color(color: str) -> str:
+    """Tom mais escuro usado no gradiente do avatar"""
+    return AVATAR_COLORS.get(color, "#4b5563")
+
+
+class ContactListModel(QAbstractListModel):
+    """
+    Conversas na ordem exibida, com índice id do chat → linha.
+    O índice de busca acompanha cada alteração e é atualizado antes dos
+    sinais de fim de operação, para o proxy de filtro já ver o texto novo.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._contacts: List[Dict] = []
+        self._ids: List[str] = []
+        self._row_by_id: Dict[str, int] = {}
+        self.search_index = ContactSearchIndex()
+
+    # ---------- Qt ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._contacts)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._contacts):
+            return None
+
+        contact = self._contacts[index.row()]
+        if role == ROLE_CONTACT:
+            return contact
+        if role == ROLE_CONTACT_ID:
+            return contact['contact_id']
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return contact.get('contact_name', '')
+        return None
+
+    # ---------- consulta ----------
+
+    def contact_at(self, row: int) -> Optional[Dict]:
+        if 0 <= row < len(self._contacts):
+            return self._contacts[row]
+        return None
+
+    def row_for_contact(self, contact_id: str) -> int:
+        return self._row_by_id.get(contact_id, -1)
+
+    def contacts(self) -> List[Dict]:
+        return list(self._contacts)
+
+    def _reindex(self, start: int = 0, end: Optional[int] = None):
+        end = len(self._ids) - 1 if end is None else end
+        for row in range(start, end + 1):
+            self._row_by_id[self._ids[row]] = row
+
+    # ---------- atualização ----------
+
+    def apply_snapshot(self, contacts: Iterable[Dict]) -> Dict[str, int]:
+        """
+        Leva a lista ao novo retrato (na ordem recebida) com o mínimo de
+        operações de modelo. Retorna a contagem de cada tipo de operação.
+        """
+        ordered = []
+        seen = set()
+        for contact in contacts:
+            contact_id = contact.get('contact_id')
+            if contact_id and contact_id not in seen:
+                seen.add(contact_id)
+                ordered.append(contact)
+
+        stats = {'inserted': 0, 'removed': 0, 'moved': 0, 'updated': 0}
+
+        # Primeira carga: um reset é mais barato que N inserções
+        if not self._contacts:
+            if ordered:
+                self.beginResetModel()
+                self._contacts = ordered
+                self._ids = [contact['contact_id'] for contact in ordered]
+                self._row_by_id = {}
+                self._reindex()
+                self.search_index.rebuild(ordered)
+                self.endResetModel()
+                stats['inserted'] = len(ordered)
+            return stats
+
+        # 1. Remoções, de baixo para cima e em blocos contíguos
+        row = len(self._ids) - 1
+        removed_any = False
+        while row >= 0:
+            if self._ids[row] in seen:
+                row -= 1
+                continue
+            end = row
+            while row > 0 and self._ids[row - 1] not in seen:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row, end)
+            for contact_id in self._ids[row:end + 1]:
+                del self._row_by_id[contact_id]
+                self.search_index.remove(contact_id)
+            del self._ids[row:end + 1]
+            del self._contacts[row:end + 1]
+            self.endRemoveRows()
+            stats['removed'] += end - row + 1
+            removed_any = True
+            row -= 1
+
+        if removed_any:
+            self._reindex()
+
+        # 2. Posição a posição: tudo antes de `target` já está na ordem final,
+        #    então a linha atual de um contato existente é sempre >= target
+        for target, contact in enumerate(ordered):
+            contact_id = contact['contact_id']
+            current = self._row_by_id.get(contact_id)
+
+            if current is None:
+                self.beginInsertRows(QModelIndex(), target, target)
+                self._ids.insert(target, contact_id)
+                self._contacts.insert(target, contact)
+                self.search_index.add(contact)
+                self.endInsertRows()
+                self._reindex(target)
+                stats['inserted'] += 1
+                continue
+
+            if current != target:
+                self._move_row(current, target)
+                stats['moved'] += 1
+
+            if self._contacts[target] != contact:
+                self._contacts[target] = contact
+                self.search_index.add(contact)
+                index = self.index(target)
+                self.dataChanged.emit(index, index)
+                stats['updated'] += 1
+
+        return stats
+
+    def _move_row(self, source: int, target: int):
+        destination = target if target < source else target + 1
+        self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), destination)
+        self._ids.insert(target, self._ids.pop(source))
+        self._contacts.insert(target, self._contacts.pop(source))
+        self.endMoveRows()
+        self._reindex(min(source, target), max(source, target))
+
+    def update_contact(self, contact_id: str, changes: Dict, move_to_top: bool = False) -> Optional[Dict]:
+        """
+        Aplica alterações vindas da ingestão (nova mensagem, envio) sem esperar
+        a próxima recarga. Retorna o contato atualizado, ou None se não estiver na lista.
+        """
+        row = self._row_by_id.get(contact_id)
+        if row is None:
+            return None
+
+        contact = dict(self._contacts[row])
+        contact.update(changes)
+        self._contacts[row] = contact
+        self.search_index.add(contact)
+
+        if move_to_top and row != 0:
+            self._move_row(row, 0)
+            row = 0
+
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+        return contact
+
+    def upsert_contact(self, contact: Dict, move_to_top: bool = False) -> int:
+        """Insere (no fim, ou no topo) ou atualiza um contato; retorna a linha"""
+        contact_id = contact['contact_id']
+        if contact_id in self._row_by_id:
+            self.update_contact(contact_id, contact, move_to_top)
+            return self._row_by_id[contact_id]
+
+        row = 0 if move_to_top else len(self._contacts)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._ids.insert(row, contact_id)
+        self._contacts.insert(row, contact)
+        self.search_index.add(contact)
+        self.endInsertRows()
+        self._reindex(row)
+        return row
+
+    def refresh_contact(self, contact_id: str):
+        """Repinta a linha (ex: avatar que acabou de chegar)"""
+        row = self._row_by_id.get(contact_id)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def clear(self):
+        self.beginResetModel()
+        self._contacts = []
+        self._ids = []
+        self._row_by_id = {}
+        self.search_index.clear(keep_query=True)
+        self.endResetModel()
+
+
+class ContactItemDelegate(QStyledItemDelegate):
+    """Desenha o cartão do contato: avatar, nome, última mensagem, hora e não lidas"""
+
+    ROW_HEIGHT = 86
+    CARD_MARGIN = 4
+    PADDING_H = 16
+    SPACING = 14
+    TIME_WIDTH = 56
+
+    def __init__(self, model: ContactListModel, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.name_font = QFont('Segoe UI', 12, QFont.Weight.DemiBold)
+        self.message_font = QFont('Segoe UI', 10)
+        self.time_font = QFont('Segoe UI', 9)
+        self.badge_font = QFont('Segoe UI', 8, QFont.Weight.DemiBold)
+        self.initial_font = QFont('Segoe UI', 14, QFont.Weight.DemiBold)
+        self._name_metrics = QFontMetrics(self.name_font)
+        self._message_metrics = QFontMetrics(self.message_font)
+        self._time_cache: Dict[object, str] = {}
+        self._requested = set()
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def _format_time(self, timestamp) -> str:
+        text = self._time_cache.get(timestamp)
+        if text is None:
+            try:
+                text = datetime.fromtimestamp(timestamp).strftime('%H:%M') if timestamp else ''
+            except (TypeError, ValueError, OverflowError, OSError):
+                text = ''
+            if len(self._time_cache) > 2000:
+                self._time_cache.clear()
+            self._time_cache[timestamp] = text
+        return text
+
+    def _avatar_pixmap(self, contact: Dict):
+        url = contact.get('profile_picture') or ''
+        if not url.startswith('http'):
+            return None
+
+        service = get_avatar_service()
+        pixmap = service.cached_pixmap(url, AVATAR_SIZE)
+        if pixmap is None and url not in self._requested:
+            # Um pedido por URL; a linha é repintada quando a foto chegar
+            contact_id = contact['contact_id']
+
+            def on_avatar(loaded, url=url):
+                self._requested.discard(url)
+                if loaded is not None:
+                    self.model.refresh_contact(contact_id)
+
+            pixmap = service.request_avatar(url, AVATAR_SIZE, on_avatar)
+            # Só marca se o callback ficou na fila; falha recente (FAILURE_TTL) volta None sem
+            # agendar nada, e a URL precisa poder ser pedida de novo numa próxima pintura
+            if pixmap is None and service.is_pending(url, AVATAR_SIZE):
+                self._requested.add(url)
+        return pixmap
+
+    def paint(self, painter: QPainter, option, index):
+        contact = index.data(ROLE_CONTACT)
+        if not contact:
+            return
+
+        selected = bool(option.state & QStyle.StateFlag.State_Selected)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+
+        card = QRectF(option.rect.adjusted(self.CARD_MARGIN, self.CARD_MARGIN,
+                                           -self.CARD_MARGIN, -self.CARD_MARGIN))
+
+        # Cartão e sombra suave (mais forte no hover e na seleção) da skin pré-renderizada;
+        # a sombra fica presa à linha para não sobrar nas vizinhas ao repintar só esta
+        skin_name = 'card_selected' if selected else 'card_hover' if hovered else 'card'
+        painter.save()
+        painter.setClipRect(option.rect)
+        get_skin(skin_name, painter.device().devicePixelRatioF()).paint(painter, card)
+        painter.restore()
+
+        # Avatar
+        avatar_rect = QRect(int(card.left()) + self.PADDING_H,
+                            int(card.center().y()) - AVATAR_SIZE // 2, AVATAR_SIZE, AVATAR_SIZE)
+        pixmap = self._avatar_pixmap(contact)
+        if pixmap is not None:
+            painter.drawPixmap(avatar_rect, pixmap)
+            painter.setPen(QPen(QColor('#e2e8f0'), 2))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawEllipse(QRectF(avatar_rect).adjusted(1, 1, -1, -1))
+        else:
+            name = contact.get('contact_name') or ''
+            color = avatar_color(name)
+            gradient = QLinearGradient(QRectF(avatar_rect).topLeft(), QRectF(avatar_rect).bottomRight())
+            gradient.setColorAt(0, QColor(color))
+            gradient.setColorAt(1, QColor(darken_color(color)))
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(gradient)
+            painter.drawEllipse(avatar_rect)
+            painter.setFont(self.initial_font)
+            painter.setPen(QColor('white'))
+            painter.drawText(avatar_rect, Qt.AlignmentFlag.AlignCenter, name[0].upper() if name else '?')
+
+        # Coluna da direita: hora e não lidas
+        right = int(card.right()) - self.PADDING_H
+        time_rect = QRect(right - self.TIME_WIDTH, int(card.top()) + 16, self.TIME_WIDTH, 18)
+        painter.setFont(self.time_font)
+        painter.setPen(QColor('#9ca3af'))
+        painter.drawText(time_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                         self._format_time(contact.get('last_message_time')))
+
+        unread = contact.get('unread_count', 0) or 0
+        if unread > 0:
+            badge = QRect(right - 20, time_rect.bottom() + 6, 20, 20)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor('#ef4444'))
+            painter.drawEllipse(badge)
+            painter.setFont(self.badge_font)
+            painter.setPen(QColor('white'))
+            painter.drawText(badge, Qt.AlignmentFlag.AlignCenter, str(unread) if unread < 100 else '99+')
+
+        # Nome e última mensagem
+        text_left = avatar_rect.right() + 1 + self.SPACING
+        text_width = max(0, time_rect.left() - 8 - text_left)
+
+        painter.setFont(self.name_font)
+        painter.setPen(QColor('#1f2937'))
+        name_rect = QRect(text_left, int(card.top()) + 14, text_width, 22)
+        painter.drawText(name_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                         self._name_metrics.elidedText(contact.get('contact_name') or '',
+                                                       Qt.TextElideMode.ElideRight, text_width))
+
+        last_message = (contact.get('last_message') or '').replace('\n', ' ')
+        if contact.get('last_message_from_me'):
+            last_message = f"Você: {last_message}"
+        message_width = max(0, int(card.right()) - self.PADDING_H - text_left - (28 if unread else 0))
+        painter.setFont(self.message_font)
+        painter.setPen(QColor('#6b7280'))
+        message_rect = QRect(text_left, name_rect.bottom() + 4, message_width, 20)
+        painter.drawText(message_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                         self._message_metrics.elidedText(last_message, Qt.TextElideMode.ElideRight,
+                                                          message_width))
+
+        painter.restore()
+
+
+class ContactListView(QListView):
+    """
+    Lista de conversas virtualizada; emite contact_clicked(contact_id).
+    A view mostra o modelo através de um proxy de filtro ligado à busca.
+    """
+
+    contact_clicked = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.contact_model = ContactListModel(self)
+        self.filter_model = ContactFilterProxyModel(self.contact_model, self)
+        self.setModel(self.filter_model)
+        self.contact_delegate = ContactItemDelegate(self.contact_model, self)
+        self.setItemDelegate(self.contact_delegate)
+
+        self.setUniformItemSizes(True)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WidgetAttribute.WA_Hover)
+        self.viewport().setCursor(Qt.CursorShape.PointingHandCursor)
+
+        self.clicked.connect(self._on_clicked)
+
+    def paintEvent(self, event):
+        with ProfileSection('lista de conversas'):
+            super().paintEvent(event)
+
+    def _on_clicked(self, index):
+        contact_id = index.data(ROLE_CONTACT_ID)
+        if contact_id:
+            self.contact_clicked.emit(contact_id)
+
+    def selected_contact_id(self) -> Optional[str]:
+        indexes = self.selectionModel().selectedIndexes()
+        return indexes[0].data(ROLE_CONTACT_ID) if indexes else None
+
+    def select_contact(self, contact_id: str) -> bool:
+        """Seleciona a linha do contato sem emitir contact_clicked"""
+        row = self.contact_model.row_for_contact(contact_id)
+        if row < 0:
+            return False
+        index = self.filter_model.mapFromSource(self.contact_model.index(row))
+        if not index.isValid():
+            return False  # Escondido pela busca
+        self.setCurrentIndex(index)
+        return True
+
+    def set_search_text(self, text: str) -> int:
+        """Filtra a lista pelo texto digitado; retorna quantas conversas aparecem"""
+        return self.filter_model.set_query(text)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Busca de conversas por índice
+
+O texto de cada conversa (nome, número e última mensagem) é normalizado uma vez
+(minúsculas, sem acentos) e entra em dois índices invertidos: trigramas, para
+buscas de 3+ caracteres em qualquer ponto do texto, e prefixos de 1-2 letras
+das palavras, para o começo da digitação. Uma busca cruza poucos conjuntos e só
+confere o texto dos candidatos; o índice é atualizado contato a contato quando a
+lista muda, nunca reconstruído a cada tecla.
+"""
+
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set
+
+from PyQt6.QtCore import QSortFilterProxyModel
+
+SHORT_PREFIX = 2  # Consultas menores que um trigrama usam prefixo de palavra
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços simples ('João  Açaí' → 'joao acai')"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    folded = ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+    return ' '.join(folded.split())
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _word_prefixes(text: str) -> Set[str]:
+    prefixes = set()
+    for word in text.split():
+        for size in range(1, min(SHORT_PREFIX, len(word)) + 1):
+            prefixes.add(word[:size])
+    return prefixes
+
+
+class ContactSearchIndex:
+    """
+    Índice invertido das conversas, chaveado pelo id do chat.
+
+    Mantém também o resultado da busca ativa (`results`): cada add/remove
+    confere só o contato alterado, então filtros que consultam accepts()
+    continuam corretos sem refazer a busca.
+    """
+
+    def __init__(self):
+        self._docs: Dict[str, str] = {}
+        self._trigram_index: Dict[str, Set[str]] = {}
+        self._prefix_index: Dict[str, Set[str]] = {}
+
+        self.query = ''
+        self._terms: List[str] = []
+        self.results: Optional[Set[str]] = None  # None = sem busca ativa
+
+    @staticmethod
+    def document_for(contact: Dict) -> str:
+        # Do id só o número (o sufixo '@s.whatsapp.net' estaria em todos os documentos)
+        return normalize_text(' '.join((
+            contact.get('contact_name') or '',
+            (contact.get('contact_id') or '').split('@', 1)[0],
+            contact.get('last_message') or ''
+        )))
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, contact_id):
+        return contact_id in self._docs
+
+    # ---------- manutenção ----------
+
+    def add(self, contact: Dict):
+        """Indexa (ou reindexa) um contato"""
+        contact_id = contact.get('contact_id')
+        if not contact_id:
+            return
+
+        document = self.document_for(contact)
+        previous = self._docs.get(contact_id)
+        if previous == document:
+            return
+        if previous is not None:
+            self._unindex(contact_id, previous)
+
+        self._docs[contact_id] = document
+        for gram in _trigrams(document):
+            self._trigram_index.setdefault(gram, set()).add(contact_id)
+        for prefix in _word_prefixes(document):
+            self._prefix_index.setdefault(prefix, set()).add(contact_id)
+
+        if self.results is not None:
+            if self._matches(document, self._terms):
+                self.results.add(contact_id)
+            else:
+                self.results.discard(contact_id)
+
+    def remove(self, contact_id: str):
+        document = self._docs.pop(contact_id, None)
+        if document is not None:
+            self._unindex(contact_id, document)
+        if self.results is not None:
+            self.results.discard(contact_id)
+
+    def _unindex(self, contact_id: str, document: str):
+        for index, keys in ((self._trigram_index, _trigrams(document)),
+                            (self._prefix_index, _word_prefixes(document))):
+            for key in keys:
+                ids = index.get(key)
+                if ids is not None:
+                    ids.discard(contact_id)
+                    if not ids:
+                        del index[key]
+
+    def rebuild(self, contacts: Iterable[Dict]):
+        self.clear(keep_query=True)
+        for contact in contacts:
+            self.add(contact)
+        if self.query:
+            self.set_query(self.query)
+
+    def clear(self, keep_query: bool = False):
+        self._docs.clear()
+        self._trigram_index.clear()
+        self._prefix_index.clear()
+        if self.results is not None:
+            self.results = set()
+        if not keep_query:
+            self.query, self._terms, self.results = '', [], None
+
+    # ---------- busca ----------
+
+    @staticmethod
+    def _matches(document: str, terms: List[str]) -> bool:
+        for term in terms:
+            if len(term) > SHORT_PREFIX:
+                if term not in document:
+                    return False
+            elif not any(word.startswith(term) for word in document.split()):
+                return False
+        return True
+
+    def _candidates(self, term: str) -> Set[str]:
+        if len(term) <= SHORT_PREFIX:
+            return self._prefix_index.get(term, set())
+
+        candidates = None
+        # Menores conjuntos primeiro: a interseção encolhe rápido
+        for ids in sorted((self._trigram_index.get(gram, set()) for gram in _trigrams(term)), key=len):
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                break
+        return candidates or set()
+
+    def search(self, query: str, within: Optional[Set[str]] = None) -> Optional[Set[str]]:
+        """Ids que contêm todos os termos da busca; None se a busca estiver vazia"""
+        terms = normalize_text(query).split()
+        if not terms:
+            return None
+
+        candidates = within
+        for term in sorted(terms, key=len, reverse=True):
+            term_ids = self._candidates(term)
+            candidates = set(term_ids) if candidates is None else candidates & term_ids
+            if not candidates:
+                return set()
+
+        return {contact_id for contact_id in candidates
+                if self._matches(self._docs.get(contact_id, ''), terms)}
+
+    def set_query(self, query: str) -> Optional[Set[str]]:
+        """Define a busca ativa (refina o resultado anterior quando a digitação só acrescenta)"""
+        normalized = normalize_text(query)
+        terms = normalized.split()
+        previous = self._terms
+
+        # Só o último termo cresceu e já era busca por trecho: basta filtrar o resultado anterior
+        within = None
+        if (self.results is not None and previous and len(terms) == len(previous)
+                and terms[:-1] == previous[:-1] and len(previous[-1]) > SHORT_PREFIX
+                and terms[-1].startswith(previous[-1])):
+            within = self.results
+
+        self.query = normalized
+        self._terms = terms
+        self.results = self.search(normalized, within) if normalized else None
+        return self.results
+
+    def accepts(self, contact_id: str) -> bool:
+        return self.results is None or contact_id in self.results
+
+
+class ContactFilterProxyModel(QSortFilterProxyModel):
+    """Filtra a lista de conversas pela busca ativa do índice do modelo (sem ordenar)"""
+
+    def __init__(self, source_model, parent=None):
+        super().__init__(parent)
+        self.setSourceModel(source_model)
+        self.setDynamicSortFilter(True)
+        self.search_index: ContactSearchIndex = source_model.search_index
+
+    def set_query(self, query: str) -> int:
+        """Aplica a busca; retorna quantas conversas aparecem"""
+        self.search_index.set_query(query)
+        self.invalidateFilter()
+        return self.rowCount()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        results = self.search_index.results
+        if results is None:
+            return True
+        contact = self.sourceModel().contact_at(source_row)
+        return contact is not None and contact['contact_id'] in results
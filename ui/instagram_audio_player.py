@@ -10,104 +10,157 @@ from PyQt6.QtWidgets import (
     QProgressBar, QSlider, QFrame, QGraphicsDropShadowEffect,
     QApplication, QMessageBox, QDialog, QTextEdit
 )
-from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QTimer, pyqtSignal, QThread, QUrl
+from PyQt6.QtCore import Qt, QPropertyAnimation, QEasingCurve, QTimer, pyqtSignal, QThread, QUrl, QRect, QRectF
 from PyQt6.QtGui import QFont, QColor, QPainter, QPainterPath, QPixmap, QPalette
-from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from datetime import datetime
-import requests
+from functools import partial
 import tempfile
+import importlib.util
 import os
-import base64
 
-# Imports para transcrição
-try:
-    import speech_recognition as sr
+# Engines de transcrição e conversão: só verifica se existem, o import
+# acontece no primeiro uso (whisper carrega torch)
+SPEECH_RECOGNITION_AVAILABLE = importlib.util.find_spec("speech_recognition") is not None
+WHISPER_AVAILABLE = importlib.util.find_spec("whisper") is not None
+PYDUB_AVAILABLE = importlib.util.find_spec("pydub") is not None
 
-    SPEECH_RECOGNITION_AVAILABLE = True
-except ImportError:
-    SPEECH_RECOGNITION_AVAILABLE = False
+from waveform_service import get_waveform_service, resample_levels
+from media_task_service import get_media_task_service
 
 try:
-    import whisper
+    from transcription_service import get_transcription_service
 
-    WHISPER_AVAILABLE = True
+    TRANSCRIPTION_SERVICE_AVAILABLE = True
 except ImportError:
-    WHISPER_AVAILABLE = False
-
-try:
-    from pydub import AudioSegment
-
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
+    TRANSCRIPTION_SERVICE_AVAILABLE = False
 
 
 class WaveformWidget(QWidget):
-    """Widget personalizado para visualização de forma de onda"""
+    """
+    Widget personalizado para visualização de forma de onda
+    As barras são desenhadas uma única vez em pixmaps (tocado / não tocado);
+    a cada tick de progresso só a faixa que mudou é repintada
+    """
+
+    BAR_WIDTH = 3
+    BAR_SPACING = 1
 
     def __init__(self, waveform_data=None):
         super().__init__()
-        self.waveform_data = waveform_data or []
+        self.levels = b''
         self.progress = 0.0
         self.setFixedHeight(32)
         self.setMinimumWidth(120)
 
-        # Gerar dados fake se não tiver waveform real
-        if not self.waveform_data:
-            import random
-            self.waveform_data = [random.randint(3, 25) for _ in range(40)]
+        # Pixmaps em cache (recriados apenas em resize ou troca de dados)
+        self._played_pixmap = None
+        self._unplayed_pixmap = None
 
-    def set_progress(self, progress):
-        """Define progresso da reprodução (0.0 a 1.0)"""
-        self.progress = max(0.0, min(1.0, progress))
-        self.update()
+        self.set_waveform(waveform_data)
 
-    def paintEvent(self, event):
-        """Desenha a forma de onda"""
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    def set_waveform(self, waveform_data):
+        """Define os níveis (bytes uint8 ou lista de amplitudes) e invalida o cache"""
+        if waveform_data is None:
+            waveform_data = b''
+        self.levels = waveform_data
+        self._invalidate_cache()
+        self.update()
 
-        # Configurações
-        width = self.width()
-        height = self.height()
-        bar_width = max(2, width // len(self.waveform_data))
-        spacing = 1
+    def set_progress(self, progress):
+        """Define progresso da reprodução (0.0 a 1.0) repintando só a faixa alterada"""
+        progress = max(0.0, min(1.0, progress))
+        old_x = int(self.width() * self.progress)
+        new_x = int(self.width() * progress)
+        self.progress = progress
+
+        if old_x != new_x:
+            left = min(old_x, new_x)
+            self.update(QRect(left - 1, 0, abs(new_x - old_x) + 2, self.height()))
+
+    def _invalidate_cache(self):
+        self._played_pixmap = None
+        self._unplayed_pixmap = None
+
+    def _build_cache(self):
+        """Desenha as barras nos pixmaps de cache"""
+        width = max(1, self.width())
+        height = max(1, self.height())
+        ratio = self.devicePixelRatioF()
+
+        bar_step = self.BAR_WIDTH + self.BAR_SPACING
+        bar_count = max(1, width // bar_step)
+        bar_levels = resample_levels(self.levels, bar_count)
 
         # Cores
         played_color = QColor("#1DB954")  # Verde Spotify/Instagram
         unplayed_color = QColor("#E1E1E1")
 
-        # Desenhar barras
-        x = 0
-        progress_x = width * self.progress
+        pixmaps = []
+        for color in (played_color, unplayed_color):
+            pixmap = QPixmap(int(width * ratio), int(height * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.GlobalColor.transparent)
+
+            painter = QPainter(pixmap)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(color)
 
-        for i, amplitude in enumerate(self.waveform_data):
-            if x >= width:
-                break
+            for i, level in enumerate(bar_levels):
+                bar_height = max(2.0, level * height)
+                y = (height - bar_height) / 2
+                painter.drawRoundedRect(QRectF(i * bar_step, y, self.BAR_WIDTH, bar_height), 1.5, 1.5)
 
-            # Altura da barra baseada na amplitude
-            bar_height = (amplitude / 30.0) * height
-            y = (height - bar_height) / 2
+            painter.end()
+            pixmaps.append(pixmap)
 
-            # Cor baseada no progresso
-            color = played_color if x < progress_x else unplayed_color
-            painter.fillRect(x, y, bar_width - spacing, bar_height, color)
+        self._played_pixmap, self._unplayed_pixmap = pixmaps
 
-            x += bar_width
+    def resizeEvent(self, event):
+        self._invalidate_cache()
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        """Compõe os pixmaps em cache conforme o progresso"""
+        if self._played_pixmap is None:
+            self._build_cache()
+
+        painter = QPainter(self)
+        dirty = event.rect()
+        progress_x = int(self.width() * self.progress)
+        height = self.height()
+
+        # Parte tocada (à esquerda do progresso)
+        played = dirty.intersected(QRect(0, 0, progress_x, height))
+        if not played.isEmpty():
+            painter.drawPixmap(played, self._played_pixmap, self._source_rect(played))
+
+        # Parte restante
+        unplayed = dirty.intersected(QRect(progress_x, 0, self.width() - progress_x, height))
+        if not unplayed.isEmpty():
+            painter.drawPixmap(unplayed, self._unplayed_pixmap, self._source_rect(unplayed))
 
         painter.end()
 
+    def _source_rect(self, rect):
+        """Converte retângulo lógico para coordenadas do pixmap (HiDPI)"""
+        ratio = self.devicePixelRatioF()
+        return QRectF(rect.x() * ratio, rect.y() * ratio, rect.width() * ratio, rect.height() * ratio)
+
     def mousePressEvent(self, event):
         """Permite buscar posição clicando na waveform"""
         if self.width() > 0:
-            progress = event.position().x() / self.width()
-            self.progress = max(0.0, min(1.0, progress))
-            self.update()
+            self.set_progress(event.position().x() / self.width())
             # Emitir sinal personalizado se necessário
             if hasattr(self.parent(), 'seek_to_position'):
                 self.parent().seek_to_position(self.progress)
 
 
+def _waveform_job(message_id, file_path, task):
+    """Calcula a forma de onda real do áudio baixado (roda no pool de CPU do serviço de mídia)"""
+    return get_waveform_service().extract_from_file(message_id, file_path)
+
+
 class ModernAudioDownloadWorker(QThread):
     """Worker melhorado para download de áudio"""
 
@@ -124,6 +177,8 @@ class ModernAudioDownloadWorker(QThread):
     def run(self):
         """Download otimizado com melhor tratamento"""
         try:
+            import requests
+
             print(f"🎵 Iniciando download: {self.audio_url[:50]}...")
             self.progress_updated.emit(10)
 
@@ -204,6 +259,8 @@ class ModernAudioDownloadWorker(QThread):
             if not PYDUB_AVAILABLE:
                 return file_path
 
+            from pydub import AudioSegment
+
             # Verificar se é OGG/Opus
             if not file_path.lower().endswith('.ogg'):
                 return file_path
@@ -277,12 +334,12 @@ class ModernTranscriptionWorker(QThread):
     def _transcribe_with_whisper(self):
         """Transcrição com Whisper melhorada"""
         try:
-            import whisper
+            from transcription_service import load_whisper_model
 
             self.progress_updated.emit(20, "Carregando modelo Whisper...")
 
-            # Usar modelo otimizado
-            model = whisper.load_model("base")
+            # Modelo compartilhado: só a primeira transcrição paga o carregamento
+            model = load_whisper_model("base")
 
             self.progress_updated.emit(50, "Processando áudio...")
 
@@ -317,9 +374,10 @@ class ModernTranscriptionWorker(QThread):
 
     def _transcribe_with_google(self):
         """Transcrição com Google melhorada"""
-        try:
-            import speech_recognition as sr
+        # Fora do try: o except abaixo usa a exceção do módulo
+        import speech_recognition as sr
 
+        try:
             self.progress_updated.emit(30, "Preparando Google Speech...")
 
             recognizer = sr.Recognizer()
@@ -367,6 +425,8 @@ class ModernTranscriptionWorker(QThread):
             return self.audio_file_path
 
         try:
+            from pydub import AudioSegment
+
             audio = AudioSegment.from_file(self.audio_file_path)
             wav_path = self.audio_file_path.replace(
                 os.path.splitext(self.audio_file_path)[1],
@@ -382,14 +442,23 @@ class ModernTranscriptionWorker(QThread):
 class InstagramStyleAudioPlayer(QWidget):
     """Player de áudio estilo Instagram - MODERNO E FUNCIONAL"""
 
-    def __init__(self, audio_data, parent=None):
+    def __init__(self, audio_data, parent=None, message_id=None):
         super().__init__(parent)
         self.audio_data = audio_data
         self.audio_url = audio_data.get('url', '')
         self.duration_seconds = audio_data.get('seconds', 0)
         self.is_ptt = audio_data.get('ptt', False)
 
-        # Player
+        # Transcrição persistente (cache por mensagem)
+        self.message_id = message_id or audio_data.get('message_id', '')
+        self.chat_id = audio_data.get('chat_id')
+        self.cached_transcription = None
+        self.awaiting_transcription = False
+        self.transcription_service = get_transcription_service() if TRANSCRIPTION_SERVICE_AVAILABLE else None
+
+        # Player (QtMultimedia só é carregado quando o primeiro áudio aparece)
+        from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
+
         self.media_player = QMediaPlayer()
         self.audio_output = QAudioOutput()
         self.media_player.setAudioOutput(self.audio_output)
@@ -404,10 +473,12 @@ class InstagramStyleAudioPlayer(QWidget):
         # Workers
         self.download_worker = None
         self.transcription_worker = None
+        self.waveform_request = None
 
         # UI
         self.setup_modern_ui()
         self.connect_signals()
+        self.connect_transcription_service()
 
         # Animações
         self.setup_animations()
@@ -581,23 +652,25 @@ class InstagramStyleAudioPlayer(QWidget):
         return button
 
     def _extract_waveform_data(self):
-        """Extrai dados da waveform do áudio"""
-        waveform_b64 = self.audio_data.get('waveform', '')
+        """Níveis da forma de onda: cache/banco, campo do webhook ou vazio (barras planas)"""
+        waveform = get_waveform_service().get_waveform(self.message_id, self.audio_data)
+        return waveform['levels'] if waveform else b''
 
-        if waveform_b64:
-            try:
-                # Decodificar base64
-                waveform_bytes = base64.b64decode(waveform_b64)
-                # Converter para lista de amplitudes
-                waveform_data = [b for b in waveform_bytes[:40]]  # Primeiros 40 pontos
-                return waveform_data
-            except:
-                pass
+    def _start_waveform_extraction(self, file_path):
+        """Calcula a forma de onda real a partir do arquivo baixado (uma vez por mensagem)"""
+        if not self.message_id or not get_waveform_service().needs_extraction(self.message_id):
+            return
 
-        # Gerar waveform fake baseada na duração
-        import random
-        num_bars = min(60, max(20, self.duration_seconds * 10))
-        return [random.randint(5, 30) for _ in range(num_bars)]
+        # Pool compartilhado em vez de uma QThread por player; uma extração por mensagem
+        self.waveform_request = get_media_task_service().submit(
+            ('waveform', self.message_id), partial(_waveform_job, self.message_id, file_path),
+            owner=self, on_completed=self._on_waveform_extracted, heavy=True
+        )
+
+    def _on_waveform_extracted(self, levels):
+        self.waveform_request = None
+        if levels:
+            self.waveform.set_waveform(levels)
 
     def _format_duration(self, seconds):
         """Formata duração em mm:ss"""
@@ -622,6 +695,56 @@ class InstagramStyleAudioPlayer(QWidget):
         self.media_player.playbackStateChanged.connect(self.on_playback_state_changed)
         self.media_player.errorOccurred.connect(self.on_player_error)
 
+    def connect_transcription_service(self):
+        """Conecta ao serviço de transcrição e mostra transcrição já salva"""
+        if not self.transcription_service or not self.message_id:
+            return
+
+        self.transcription_service.transcription_ready.connect(self.on_service_transcription_ready)
+        self.transcription_service.transcription_failed.connect(self.on_service_transcription_failed)
+
+        cached = self.transcription_service.get_cached(self.message_id)
+        if cached:
+            self.set_cached_transcription(cached['text'], cached.get('confidence') or 0.0)
+        elif self.transcription_service.is_pending(self.message_id):
+            self.transcribe_button.setEnabled(False)
+            self.transcribe_button.setText("⏳")
+
+    def set_cached_transcription(self, text, confidence):
+        """Marca o player com a transcrição disponível"""
+        self.cached_transcription = (text, confidence)
+        self.transcribe_button.setEnabled(True)
+        self.transcribe_button.setText("📄")
+        preview = text if len(text) <= 200 else text[:197] + "..."
+        self.transcribe_button.setToolTip(f"Transcrição: {preview}")
+
+    def reset_transcribe_button(self):
+        """Volta o botão de transcrição ao estado de repouso"""
+        self.transcribe_button.setText("📄" if self.cached_transcription else "📝")
+
+    def on_service_transcription_ready(self, message_id, text, confidence):
+        """Transcrição concluída pelo serviço"""
+        if message_id != self.message_id:
+            return
+
+        self.set_cached_transcription(text, confidence)
+
+        if self.awaiting_transcription:
+            self.awaiting_transcription = False
+            self.on_transcription_completed(text, confidence)
+
+    def on_service_transcription_failed(self, message_id, error):
+        """Falha reportada pelo serviço de transcrição"""
+        if message_id != self.message_id:
+            return
+
+        if self.awaiting_transcription:
+            self.awaiting_transcription = False
+            self.on_transcription_failed(error)
+        else:
+            self.transcribe_button.setEnabled(True)
+            self.reset_transcribe_button()
+
     def toggle_playback(self):
         """Alterna reprodução"""
         if not self.is_loaded:
@@ -661,6 +784,9 @@ class InstagramStyleAudioPlayer(QWidget):
             self.media_player.setSource(file_url)
             self.is_loaded = True
 
+            # Forma de onda real (substitui a do webhook)
+            self._start_waveform_extraction(file_path)
+
             # Restaurar interface
             self.play_button.setEnabled(True)
             self.play_button.setText("▶")
@@ -700,6 +826,8 @@ class InstagramStyleAudioPlayer(QWidget):
 
     def on_playback_state_changed(self, state):
         """Estado de reprodução mudou"""
+        from PyQt6.QtMultimedia import QMediaPlayer
+
         if state == QMediaPlayer.PlaybackState.PlayingState:
             self.is_playing = True
             self.play_button.setText("⏸")
@@ -726,6 +854,25 @@ class InstagramStyleAudioPlayer(QWidget):
 
     def start_transcription(self):
         """Inicia transcrição"""
+        if self.cached_transcription:
+            self.show_transcription_result(*self.cached_transcription)
+            return
+
+        if self.transcription_service and self.message_id:
+            status = self.transcription_service.request_transcription(
+                self.message_id,
+                audio_url=self.audio_url,
+                file_path=self.local_audio_file or '',
+                chat_id=self.chat_id,
+                audio_seconds=self.duration_seconds
+            )
+
+            if status in ('queued', 'pending', 'cached'):
+                self.awaiting_transcription = True
+                self.transcribe_button.setEnabled(False)
+                self.transcribe_button.setText("⏳")
+                return
+
         if not self.local_audio_file:
             if self.audio_url:
                 self.transcribe_button.setText("⏳")
@@ -775,14 +922,14 @@ class InstagramStyleAudioPlayer(QWidget):
         self.show_transcription_result(text, confidence)
 
         # Resetar botão
-        QTimer.singleShot(3000, lambda: self.transcribe_button.setText("📝"))
+        QTimer.singleShot(3000, self.reset_transcribe_button)
 
     def on_transcription_failed(self, error):
         """Transcrição falhou"""
         self.transcribe_button.setEnabled(True)
         self.transcribe_button.setText("❌")
         self.show_error(f"Erro na transcrição: {error}")
-        QTimer.singleShot(2000, lambda: self.transcribe_button.setText("📝"))
+        QTimer.singleShot(2000, self.reset_transcribe_button)
 
     def on_transcription_progress(self, progress, status):
         """Progresso da transcrição"""
@@ -808,6 +955,10 @@ class InstagramStyleAudioPlayer(QWidget):
                 self.download_worker.stop()
                 self.download_worker.wait()
 
+            if self.waveform_request:
+                get_media_task_service().release(self.waveform_request)
+                self.waveform_request = None
+
             if self.transcription_worker and self.transcription_worker.isRunning():
                 self.transcription_worker.terminate()
                 self.transcription_worker.wait()
@@ -1012,7 +1163,9 @@ def create_instagram_style_audio_preview(message_data):
             return None
 
         # Criar player moderno
-        player = InstagramStyleAudioPlayer(audio_data)
+        audio_data.setdefault('chat_id', message_data.get('chat_id'))
+        message_id = message_data.get('webhook_message_id') or message_data.get('message_id')
+        player = InstagramStyleAudioPlayer(audio_data, message_id=message_id)
         return player
 
     except Exception as e:
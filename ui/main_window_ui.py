@@ -7,11 +7,14 @@ Paleta moderna e elegante para interface empresarial
 
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
-    QScrollArea, QLabel, QLineEdit, QPushButton, QFrame, QListWidget,
-    QListWidgetItem, QTextEdit, QGraphicsDropShadowEffect, QStackedWidget
+    QLabel, QLineEdit, QPushButton, QFrame, QTextEdit, QStackedWidget
 )
-from PyQt6.QtCore import Qt, QSize, pyqtSignal
-from PyQt6.QtGui import QFont, QColor, QPalette, QPixmap, QPainter
+from PyQt6.QtCore import Qt, QRectF, QSize, pyqtSignal
+from PyQt6.QtGui import QFont, QPalette, QPixmap, QPainter
+
+from ui.message_list_view import MessageListView
+from ui.contact_list_view import ContactListView, avatar_color, darken_color
+from ui.bubble_skin import get_skin
 
 
 class ContactItemWidget(QWidget):
@@ -19,6 +22,8 @@ class ContactItemWidget(QWidget):
 
     clicked = pyqtSignal(str)
 
+    CARD_MARGIN = 4  # Espaço para a sombra dentro do widget
+
     def __init__(self, contact_data: dict):
         super().__init__()
         self.contact_data = contact_data
@@ -119,95 +124,45 @@ class ContactItemWidget(QWidget):
 
         self.setLayout(layout)
 
-        # Estilo profissional base
-        self.setStyleSheet("""
-            ContactItemWidget {
-                background-color: #ffffff;
-                border-radius: 12px;
-                margin: 1px;
-                border: 1px solid transparent;
-            }
-            ContactItemWidget:hover {
-                background-color: #f8fafc;
-                border: 1px solid #e2e8f0;
-            }
-        """)
-
-        # Sombra suave profissional
-        self._apply_shadow(False)
+        # Cartão e sombra suave vêm das skins compartilhadas (pintados em paintEvent)
+        self._skin_name = 'card'
 
     def _load_profile_picture(self, url: str):
-        """CORRIGIDO: Carrega imagem de perfil real e mantém fixa"""
+        """Carrega a foto de perfil pelo serviço de avatares (memória → disco → rede)"""
         try:
-            import requests
-            from PyQt6.QtGui import QPixmap
-            from PyQt6.QtCore import QThread, pyqtSignal
-
-            # Thread para carregar imagem
-            class ImageLoader(QThread):
-                image_loaded = pyqtSignal(bytes)
-
-                def __init__(self, url):
-                    super().__init__()
-                    self.url = url
-
-                def run(self):
-                    try:
-                        response = requests.get(self.url, timeout=5)
-                        if response.status_code == 200:
-                            self.image_loaded.emit(response.content)
-                    except Exception as e:
-                        print(f"Erro ao carregar imagem: {e}")
-
-            def on_image_loaded(image_data):
-                try:
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(image_data)
-
-                    if not pixmap.isNull():
-                        # Redimensionar e aplicar máscara circular
-                        scaled_pixmap = pixmap.scaled(52, 52, Qt.AspectRatioMode.KeepAspectRatioByExpanding,
-                                                      Qt.TransformationMode.SmoothTransformation)
-
-                        # Criar máscara circular
-                        from PyQt6.QtGui import QPainter, QBrush
-                        circular_pixmap = QPixmap(52, 52)
-                        circular_pixmap.fill(Qt.GlobalColor.transparent)
-
-                        painter = QPainter(circular_pixmap)
-                        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-                        painter.setBrush(QBrush(scaled_pixmap))
-                        painter.setPen(Qt.PenStyle.NoPen)
-                        painter.drawEllipse(0, 0, 52, 52)
-                        painter.end()
-
-                        # CORREÇÃO: Armazenar pixmap para não perder
-                        self.profile_pixmap = circular_pixmap
-                        self.has_profile_image = True
-
-                        self.avatar_label.setPixmap(circular_pixmap)
-                        self.avatar_label.setText("")  # Limpar texto
-                        self.avatar_label.setStyleSheet("""
-                            QLabel {
-                                border: 2px solid #e2e8f0;
-                                border-radius: 26px;
-                                background-color: white;
-                            }
-                        """)
-                    else:
-                        self._set_initial_avatar()
-                except Exception as e:
-                    print(f"Erro ao processar imagem: {e}")
-                    self._set_initial_avatar()
-
-            self.image_loader = ImageLoader(url)
-            self.image_loader.image_loaded.connect(on_image_loaded)
-            self.image_loader.start()
+            from avatar_service import get_avatar_service
+
+            # Pixmap já recortado em memória: pinta na hora, sem thread nem download
+            pixmap = get_avatar_service().request_avatar(url, 52, self._on_profile_picture_loaded)
+            if pixmap is not None:
+                self._show_profile_pixmap(pixmap)
+            else:
+                # Inicial enquanto a foto não chega
+                self._set_initial_avatar()
 
         except Exception as e:
             print(f"Erro ao configurar carregamento: {e}")
             self._set_initial_avatar()
 
+    def _on_profile_picture_loaded(self, pixmap):
+        if pixmap is not None:
+            self._show_profile_pixmap(pixmap)
+
+    def _show_profile_pixmap(self, pixmap):
+        # CORREÇÃO: Armazenar pixmap para não perder
+        self.profile_pixmap = pixmap
+        self.has_profile_image = True
+
+        self.avatar_label.setPixmap(pixmap)
+        self.avatar_label.setText("")  # Limpar texto
+        self.avatar_label.setStyleSheet("""
+            QLabel {
+                border: 2px solid #e2e8f0;
+                border-radius: 26px;
+                background-color: white;
+            }
+        """)
+
     def _set_initial_avatar(self):
         """CORRIGIDO: Define avatar com inicial mantendo flag de imagem"""
         # CORREÇÃO: Só definir inicial se não tiver imagem carregada
@@ -231,58 +186,28 @@ class ContactItemWidget(QWidget):
 
     def _get_professional_avatar_color(self, name: str) -> str:
         """Retorna cores profissionais e suaves"""
-        colors = [
-            "#6366f1",  # Indigo moderno
-            "#8b5cf6",  # Violeta suave
-            "#06b6d4",  # Cyan profissional
-            "#10b981",  # Emerald elegante
-            "#f59e0b",  # Âmbar corporativo
-            "#ef4444",  # Vermelho suave
-            "#ec4899",  # Rosa profissional
-            "#84cc16",  # Lima corporativo
-            "#6b7280",  # Cinza elegante
-            "#0ea5e9"  # Azul céu
-        ]
-
-        hash_val = sum(ord(c) for c in (name or 'default'))
-        return colors[hash_val % len(colors)]
+        return avatar_color(name)
 
     def _darken_color(self, color: str) -> str:
         """Escurece a cor para criar gradiente"""
-        # Mapeamento de cores mais escuras
-        color_map = {
-            "#6366f1": "#4f46e5",
-            "#8b5cf6": "#7c3aed",
-            "#06b6d4": "#0891b2",
-            "#10b981": "#059669",
-            "#f59e0b": "#d97706",
-            "#ef4444": "#dc2626",
-            "#ec4899": "#db2777",
-            "#84cc16": "#65a30d",
-            "#6b7280": "#4b5563",
-            "#0ea5e9": "#0284c7"
-        }
-        return color_map.get(color, "#4b5563")
+        return darken_color(color)
 
     def _apply_shadow(self, elevated: bool, selected: bool = False):
-        """Aplica sombra baseada no estado"""
-        shadow = QGraphicsDropShadowEffect()
-
+        """Escolhe a skin do cartão pelo estado (sombra pré-renderizada, sem QGraphicsDropShadowEffect)"""
         if selected:
-            # Sombra especial para item selecionado
-            shadow.setBlurRadius(20)
-            shadow.setColor(QColor(99, 102, 241, 40))  # Cor da marca com transparência
-            shadow.setOffset(0, 6)
+            self._skin_name = 'card_selected'
         elif elevated:
-            shadow.setBlurRadius(16)
-            shadow.setColor(QColor(0, 0, 0, 25))
-            shadow.setOffset(0, 4)
+            self._skin_name = 'card_hover'
         else:
-            shadow.setBlurRadius(8)
-            shadow.setColor(QColor(0, 0, 0, 12))
-            shadow.setOffset(0, 2)
+            self._skin_name = 'card'
+        self.update()
 
-        self.setGraphicsEffect(shadow)
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        card = QRectF(self.rect()).adjusted(self.CARD_MARGIN, self.CARD_MARGIN, -self.CARD_MARGIN, -self.CARD_MARGIN)
+        get_skin(self._skin_name, self.devicePixelRatioF()).paint(painter, card)
+        painter.end()
 
     def set_selected(self, selected: bool):
         """CORRIGIDO: Define se o item está selecionado preservando imagem"""
@@ -290,15 +215,6 @@ class ContactItemWidget(QWidget):
 
         if selected:
             # Estilo para item selecionado
-            self.setStyleSheet("""
-                ContactItemWidget {
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                        stop:0 #f0f4ff, stop:1 #ffffff);
-                    border-radius: 12px;
-                    margin: 1px;
-                    border: 2px solid #6366f1;
-                }
-            """)
             self._apply_shadow(False, True)
 
             # CORREÇÃO: Preservar imagem de perfil quando selecionado
@@ -306,18 +222,6 @@ class ContactItemWidget(QWidget):
                 self.avatar_label.setPixmap(self.profile_pixmap)
         else:
             # Voltar ao estilo normal
-            self.setStyleSheet("""
-                ContactItemWidget {
-                    background-color: #ffffff;
-                    border-radius: 12px;
-                    margin: 1px;
-                    border: 1px solid transparent;
-                }
-                ContactItemWidget:hover {
-                    background-color: #f8fafc;
-                    border: 1px solid #e2e8f0;
-                }
-            """)
             self._apply_shadow(self.is_elevated, False)
 
             # CORREÇÃO: Preservar imagem de perfil quando não selecionado
@@ -352,11 +256,7 @@ class ContactItemWidget(QWidget):
         """CORRIGIDO: Efeito de clique preservando imagem"""
         if event.button() == Qt.MouseButton.LeftButton:
             # Elevação extra no clique
-            shadow = QGraphicsDropShadowEffect()
-            shadow.setBlurRadius(25)
-            shadow.setColor(QColor(99, 102, 241, 50))
-            shadow.setOffset(0, 8)
-            self.setGraphicsEffect(shadow)
+            self._apply_shadow(False, True)
 
             # CORREÇÃO: Preservar imagem no clique
             if self.has_profile_image and self.profile_pixmap:
@@ -375,7 +275,6 @@ class MainWindowUI:
 
     def __init__(self, main_window: QMainWindow):
         self.main_window = main_window
-        self.selected_contact_widget = None  # Rastrear contato selecionado
         self.setup_window()
         self.setup_layout()
         self.apply_professional_styles()
@@ -490,23 +389,14 @@ class MainWindowUI:
 
         search_layout.addWidget(self.search_input)
 
-        # Lista de contatos profissional
-        self.contacts_list = QListWidget()
+        # Lista de contatos profissional (modelo por id do chat, cartões desenhados pelo delegate)
+        self.contacts_list = ContactListView()
         self.contacts_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #f8fafc;
                 border: none;
                 outline: none;
-                padding: 8px;
-            }
-            QListWidget::item {
-                border: none;
-                padding: 4px;
-                margin-bottom: 2px;
-                background-color: transparent;
-            }
-            QListWidget::item:selected {
-                background-color: transparent;
+                padding: 8px 4px;
             }
         """)
 
@@ -635,15 +525,13 @@ class MainWindowUI:
         header_layout.addStretch()
         header_layout.addWidget(self.refresh_btn)
 
-        # Área de mensagens profissional
-        self.messages_scroll = QScrollArea()
-        self.messages_scroll.setWidgetResizable(True)
-        self.messages_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.messages_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        self.messages_scroll.setStyleSheet("""
-            QScrollArea {
+        # Área de mensagens profissional (lista virtualizada: só as linhas visíveis são desenhadas)
+        self.messages_view = MessageListView()
+        self.messages_view.setStyleSheet("""
+            QListView {
                 border: none;
                 background-color: #f8fafc;
+                padding: 12px 0px;
             }
             QScrollBar:vertical {
                 background: #f1f5f9;
@@ -665,16 +553,6 @@ class MainWindowUI:
             }
         """)
 
-        # Widget das mensagens
-        self.messages_widget = QWidget()
-        self.messages_widget.setStyleSheet("background-color: transparent;")
-        self.messages_layout = QVBoxLayout(self.messages_widget)
-        self.messages_layout.setContentsMargins(12, 20, 12, 20)
-        self.messages_layout.setSpacing(8)
-        self.messages_layout.addStretch()
-
-        self.messages_scroll.setWidget(self.messages_widget)
-
         # Área de entrada profissional
         input_frame = QFrame()
         input_frame.setFixedHeight(76)
@@ -786,7 +664,7 @@ class MainWindowUI:
 
         # Montar tela do chat
         chat_layout.addWidget(self.chat_header)
-        chat_layout.addWidget(self.messages_scroll, 1)
+        chat_layout.addWidget(self.messages_view, 1)
         chat_layout.addWidget(input_frame)
 
         self.chat_stack.addWidget(chat_widget)
@@ -851,44 +729,23 @@ class MainWindowUI:
 
     def clear_messages(self):
         """Limpa todas as mensagens"""
-        while self.messages_layout.count() > 1:
-            child = self.messages_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
+        self.messages_view.clear_messages()
 
     def scroll_to_bottom(self):
         """Rola suavemente para o final"""
-        scrollbar = self.messages_scroll.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
-
-    def add_contact_to_list(self, contact_data: dict):
-        """Adiciona contato à lista com widget profissional"""
-        item = QListWidgetItem()
-        contact_widget = ContactItemWidget(contact_data)
-
-        # Conectar sinal de clique para gerenciar seleção
-        contact_widget.clicked.connect(lambda contact_id: self._on_contact_selected(contact_widget))
-
-        item.setSizeHint(contact_widget.sizeHint())
-        self.contacts_list.addItem(item)
-        self.contacts_list.setItemWidget(item, contact_widget)
-
-        return contact_widget
+        self.messages_view.scroll_to_bottom()
 
-    def _on_contact_selected(self, selected_widget):
-        """Gerencia seleção visual do contato"""
-        # Desmarcar contato anterior
-        if self.selected_contact_widget and self.selected_contact_widget != selected_widget:
-            self.selected_contact_widget.set_selected(False)
+    def add_contact_to_list(self, contact_data: dict) -> int:
+        """Adiciona (ou atualiza) um contato no fim da lista; retorna a linha"""
+        return self.contacts_list.contact_model.upsert_contact(contact_data)
 
-        # Marcar novo contato como selecionado
-        self.selected_contact_widget = selected_widget
-        selected_widget.set_selected(True)
+    def update_contacts_list(self, contacts: list) -> dict:
+        """Aplica um novo retrato da lista só com as operações necessárias (sem recriar linhas)"""
+        return self.contacts_list.contact_model.apply_snapshot(contacts)
 
     def clear_contacts_list(self):
         """Limpa lista de contatos"""
-        self.selected_contact_widget = None
-        self.contacts_list.clear()
+        self.contacts_list.contact_model.clear()
 
     def show_typing_indicator(self, contact_name: str):
         """Indicador de digitação profissional"""
@@ -0,0 +1,969 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lista de mensagens virtualizada (model/view)
+
+Em vez de um MessageBubble (QFrame com layouts, stylesheets, sombra e às vezes
+um player de áudio) por mensagem, a conversa é um QListView: o modelo guarda só
+os registros (ChatMessage) e o delegate desenha os balões visíveis com QPainter.
+Um MessageBubble de verdade só é criado quando o usuário interage com a linha
+(mídia, menu de opções, seleção de texto) e no máximo MAX_BOLHAS ficam vivos.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PyQt6.QtCore import (Qt, QAbstractListModel, QModelIndex, QPersistentModelIndex, QRect, QRectF,
+                          QSize, QTimer, pyqtSignal)
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen
+
+from message_record import ChatMessage
+from message_view_model import KIND_DATE, KIND_MESSAGE, KIND_SYSTEM, prepare_messages
+from ui_profiler import ProfileSection
+from ui.bubble_skin import BUBBLE_RADIUS, BUBBLE_TAIL_RADIUS, bubble_skin_name, get_skin
+
+# Papéis de dados do modelo
+ROLE_KIND = Qt.ItemDataRole.UserRole + 1
+ROLE_MESSAGE = Qt.ItemDataRole.UserRole + 2
+
+TYPE_ICONS = {
+    'text': '',
+    'sticker': '🏷️ ',
+    'image': '📷 ',
+    'video': '🎥 ',
+    'audio': '🎵 ',
+    'document': '📄 ',
+    'location': '📍 ',
+    'poll': '📊 ',
+    'reaction': '',
+    'unknown': '📱 '
+}
+
+# Texto do cartão desenhado no lugar do preview de mídia (o preview real é criado no clique)
+MEDIA_ACTIONS = {
+    'audio': '▶  Ouvir áudio',
+    'image': '🖼️  Ver imagem',
+    'video': '▶  Ver vídeo',
+    'sticker': '🏷️  Ver figurinha',
+    'document': '📄  Abrir documento',
+    'location': '📍  Ver localização',
+    'poll': '📊  Ver enquete'
+}
+
+
+class MessageListModel(QAbstractListModel):
+    """
+    Linhas da conversa: mensagens, separadores de data e avisos do sistema.
+
+    Cada linha é uma tupla (tipo, valor): o ChatMessage para mensagens e o
+    texto já formatado para separadores/avisos.
+
+    Linhas só entram ou saem pelas pontas, então cada uma tem uma posição
+    absoluta estável (linha + _first_seq) mesmo quando o histórico é inserido
+    no topo. O índice de IDs (webhook, local e temporário) aponta para essa
+    posição: achar a linha de uma reação/edição/exclusão não percorre a lista.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._last_date = None
+        self._first_seq = 0  # Posição absoluta da linha 0
+        self._seqs_by_id: Dict[str, Set[int]] = {}
+        self._ids_by_seq: Dict[int, tuple] = {}
+
+    # ------------------------------------------------------------------
+    # QAbstractListModel
+    # ------------------------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+
+        kind, value = self._rows[index.row()]
+        if role == ROLE_KIND:
+            return kind
+        if role == ROLE_MESSAGE:
+            return value if kind == KIND_MESSAGE else None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return value.content if kind == KIND_MESSAGE else value
+        return None
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled if index.isValid() else Qt.ItemFlag.NoItemFlags
+
+    # ------------------------------------------------------------------
+    # Índice de IDs
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _record_ids(record: ChatMessage) -> tuple:
+        """IDs pelos quais a mensagem pode ser procurada"""
+        return tuple(key for key in (record.message_id, record._local_message_id, record.get('temp_id')) if key)
+
+    def _index_rows(self, first: int, last: int):
+        """Indexa as linhas [first, last]"""
+        for row in range(first, last + 1):
+            kind, record = self._rows[row]
+            if kind != KIND_MESSAGE:
+                continue
+            seq = row + self._first_seq
+            keys = self._record_ids(record)
+            self._ids_by_seq[seq] = keys
+            for key in keys:
+                self._seqs_by_id.setdefault(key, set()).add(seq)
+
+    def _unindex_row(self, row: int):
+        seq = row + self._first_seq
+        for key in self._ids_by_seq.pop(seq, ()):
+            seqs = self._seqs_by_id.get(key)
+            if seqs is not None:
+                seqs.discard(seq)
+                if not seqs:
+                    del self._seqs_by_id[key]
+
+    def _reset_index(self):
+        self._first_seq = 0
+        self._seqs_by_id = {}
+        self._ids_by_seq = {}
+        if self._rows:
+            self._index_rows(0, len(self._rows) - 1)
+
+    # ------------------------------------------------------------------
+    # Inserção: lote pronto dos workers (PreparedMessages) ou mensagens
+    # avulsas, preparadas aqui mesmo
+    # ------------------------------------------------------------------
+
+    def set_messages(self, messages: Iterable[Dict]):
+        """Substitui a conversa inteira (um único reset do modelo)"""
+        prepared = prepare_messages(messages)
+        self.beginResetModel()
+        self._rows = list(prepared.rows)
+        self._last_date = prepared.last_date
+        self._reset_index()
+        self.endResetModel()
+
+    def append_messages(self, messages: Iterable[Dict]) -> int:
+        """Adiciona mensagens no final; retorna quantas linhas entraram"""
+        prepared = prepare_messages(messages)
+        rows = list(prepared.rows)
+        if prepared.first_date is not None and prepared.first_date == self._last_date:
+            # Mesmo dia da última mensagem da lista: o separador de abertura do lote sobra
+            del rows[next(i for i, (kind, _) in enumerate(rows) if kind == KIND_DATE)]
+        if not rows:
+            return 0
+        last_date = prepared.last_date or self._last_date
+
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self._last_date = last_date
+        self._index_rows(first, len(self._rows) - 1)
+        self.endInsertRows()
+        return len(rows)
+
+    def prepend_messages(self, messages: Iterable[Dict]) -> int:
+        """Insere mensagens mais antigas no topo; retorna quantas mensagens entraram"""
+        prepared = prepare_messages(messages)
+        if not prepared.records:
+            return 0
+
+        rows, last_date = list(prepared.rows), prepared.last_date
+
+        # O lote termina no mesmo dia que abria a lista: o separador antigo do topo sobra
+        first_record = next((value for kind, value in self._rows if kind == KIND_MESSAGE), None)
+        if self._rows and self._rows[0][0] == KIND_DATE and first_record is not None \
+                and first_record.date_str == last_date:
+            self.beginRemoveRows(QModelIndex(), 0, 0)
+            del self._rows[0]
+            self._first_seq += 1
+            self.endRemoveRows()
+
+        self.beginInsertRows(QModelIndex(), 0, len(rows) - 1)
+        self._rows[0:0] = rows
+        self._first_seq -= len(rows)
+        if self._last_date is None:
+            self._last_date = last_date
+        self._index_rows(0, len(rows) - 1)
+        self.endInsertRows()
+        return len(prepared.records)
+
+    def add_system_message(self, text: str):
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first)
+        self._rows.append((KIND_SYSTEM, text))
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self._last_date = None
+        self._reset_index()
+        self.endResetModel()
+
+    # ------------------------------------------------------------------
+    # Consulta e atualização
+    # ------------------------------------------------------------------
+
+    def message_at(self, row: int) -> Optional[ChatMessage]:
+        if 0 <= row < len(self._rows):
+            kind, value = self._rows[row]
+            if kind == KIND_MESSAGE:
+                return value
+        return None
+
+    def oldest_message(self) -> Optional[ChatMessage]:
+        return next((value for kind, value in self._rows if kind == KIND_MESSAGE), None)
+
+    def message_count(self) -> int:
+        return sum(1 for kind, _ in self._rows if kind == KIND_MESSAGE)
+
+    def row_for_message_id(self, message_id: str) -> int:
+        """Linha da mensagem pelo ID do webhook ou ID local/temporário (-1 se não existir)"""
+        seqs = self._seqs_by_id.get(message_id) if message_id else None
+        if not seqs:
+            return -1
+        # ID repetido (ex.: histórico sobreposto): vale a linha mais recente
+        return max(seqs) - self._first_seq
+
+    def refresh_row(self, row: int):
+        """Avisa a view que o registro da linha mudou (redesenho e nova altura)"""
+        # O registro pode ter ganho outro ID (temporária → definitiva)
+        if self.message_at(row) is not None:
+            self._unindex_row(row)
+            self._index_rows(row, row)
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def update_message(self, message_id: str, changes: Dict) -> int:
+        """Aplica `changes` ao registro e devolve a linha (-1 se não encontrada)"""
+        row = self.row_for_message_id(message_id)
+        if row >= 0:
+            record = self._rows[row][1]
+            for key, value in changes.items():
+                record[key] = value
+            self.refresh_row(row)
+        return row
+
+
+class _BubbleGeometry:
+    """Retângulos de um balão, relativos ao topo-esquerdo da linha"""
+
+    __slots__ = ('height', 'bubble', 'sender', 'text', 'media', 'reaction', 'status', 'options')
+
+    def __init__(self):
+        self.height = 0
+        self.bubble = self.sender = self.text = None
+        self.media = self.reaction = self.status = self.options = None
+
+
+class MessageBubbleDelegate(QStyledItemDelegate):
+    """
+    Desenha balões, separadores de data e avisos do sistema com QPainter,
+    nas mesmas cores/medidas do MessageBubble. As geometrias ficam em cache por
+    registro e largura, então rolar não refaz a quebra de texto.
+    """
+
+    ROW_MARGIN_H = 12       # margem lateral da lista
+    ROW_PADDING_V = 8       # espaço acima/abaixo de cada balão
+    SIDE_GAP = 120          # espaço livre do lado oposto ao balão
+    NEAR_GAP = 5
+    BUBBLE_PADDING_H = 20
+    BUBBLE_PADDING_V = 12
+    LINE_SPACING = 5
+    RADIUS = BUBBLE_RADIUS
+    TAIL_RADIUS = BUBBLE_TAIL_RADIUS
+    MIN_BUBBLE_WIDTH = 120
+    MAX_WIDTH_SENT = 400
+    MAX_WIDTH_RECEIVED = 450
+    MEDIA_HEIGHT = 40
+    REACTION_HEIGHT = 30
+    OPTIONS_SIZE = 24
+    DATE_HEIGHT = 45
+    SYSTEM_HEIGHT = 60
+
+    DELETED_TEXT = "🗑️ Esta mensagem foi apagada"
+
+    def __init__(self, view: 'MessageListView'):
+        super().__init__(view)
+        self._view = view
+
+        self.content_font = QFont('Segoe UI', 11)
+        self.time_font = QFont('Segoe UI', 8)
+        self.edited_font = QFont('Segoe UI', 7)
+        self.edited_font.setItalic(True)
+        self.sender_font = QFont('Segoe UI', 9, QFont.Weight.Bold)
+        self.date_font = QFont('Segoe UI', 9, QFont.Weight.Bold)
+        self.system_font = QFont('Segoe UI', 10)
+        self.system_font.setItalic(True)
+        self.reaction_font = QFont('Segoe UI', 12)
+        self.deleted_font = QFont('Segoe UI', 11)
+        self.deleted_font.setItalic(True)
+
+        self._content_metrics = QFontMetrics(self.content_font)
+        self._time_metrics = QFontMetrics(self.time_font)
+        self._edited_metrics = QFontMetrics(self.edited_font)
+        self._sender_metrics = QFontMetrics(self.sender_font)
+        self._date_metrics = QFontMetrics(self.date_font)
+        self._reaction_metrics = QFontMetrics(self.reaction_font)
+
+        # id(registro) -> (assinatura, _BubbleGeometry); uma entrada por linha viva do modelo
+        self._geometry_cache = {}
+
+    def clear_cache(self):
+        self._geometry_cache.clear()
+
+    def forget_rows(self, parent: QModelIndex, first: int, last: int):
+        """Descarta a geometria das linhas que vão sair do modelo"""
+        model = self._view.model()
+        for row in range(first, last + 1):
+            record = model.index(row, 0, parent).data(ROLE_MESSAGE)
+            if record is not None:
+                self._geometry_cache.pop(id(record), None)
+
+    # ------------------------------------------------------------------
+    # Geometria
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def display_text(record: ChatMessage) -> str:
+        if record.get('deleted'):
+            return MessageBubbleDelegate.DELETED_TEXT
+        text = f"{TYPE_ICONS.get(record.message_type, '📱 ')}{record.content or ''}"
+        if record.get('edited'):
+            text += " ✏️"
+        return text
+
+    def _show_sender(self, record: ChatMessage) -> bool:
+        return (not record.from_me and record.is_group and bool(record.sender_name)
+                and record.sender_name != 'Você')
+
+    def _status_parts(self, record: ChatMessage):
+        parts = [record.timestamp_str] if record.timestamp_str else []
+        if parts and record.get('edited'):
+            parts.append('editada')
+        if parts and record.from_me:
+            parts.append('✓')
+        return parts
+
+    def geometry(self, record: ChatMessage, width: int) -> _BubbleGeometry:
+        deleted = bool(record.get('deleted'))
+        # Tudo que muda o layout do balão entra na assinatura
+        signature = (width, record.content, record.message_type, deleted,
+                     bool(record.get('edited')), record.get('reaction'), record.from_me,
+                     record.is_group, record.sender_name, record.timestamp)
+
+        cached = self._geometry_cache.get(id(record))
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        geo = _BubbleGeometry()
+        from_me = record.from_me
+        max_width = self.MAX_WIDTH_SENT if from_me else self.MAX_WIDTH_RECEIVED
+
+        # Faixa horizontal disponível (margem grande do lado oposto, como no MessageBubble)
+        if from_me:
+            left = self.ROW_MARGIN_H + self.SIDE_GAP
+            right = width - self.ROW_MARGIN_H - self.NEAR_GAP
+        else:
+            left = self.ROW_MARGIN_H + self.NEAR_GAP
+            right = width - self.ROW_MARGIN_H - self.SIDE_GAP
+        available = max(self.MIN_BUBBLE_WIDTH, min(max_width, right - left))
+        text_max = available - 2 * self.BUBBLE_PADDING_H - self.OPTIONS_SIZE
+
+        # Texto principal
+        text_rect = self._content_metrics.boundingRect(
+            QRect(0, 0, text_max, 100000), Qt.TextFlag.TextWordWrap, self.display_text(record))
+        inner_width = text_rect.width()
+        inner_height = text_rect.height()
+
+        # Só tipos que o MessageBubble exibe como mídia (respostas, links e reações não têm cartão)
+        has_media = not deleted and record.message_type in MEDIA_ACTIONS
+        reaction = None if deleted else record.get('reaction')
+        status_parts = [] if deleted else self._status_parts(record)
+
+        if has_media:
+            inner_width = max(inner_width, min(text_max, 200))
+            inner_height += self.LINE_SPACING + self.MEDIA_HEIGHT
+        if reaction:
+            inner_width = max(inner_width, self._reaction_metrics.horizontalAdvance(reaction) + 16)
+            inner_height += self.LINE_SPACING + self.REACTION_HEIGHT
+        if status_parts:
+            status_width = sum(self._time_metrics.horizontalAdvance(p) + 6 for p in status_parts)
+            inner_width = max(inner_width, status_width)
+            inner_height += self.LINE_SPACING + self._time_metrics.height()
+
+        bubble_width = max(self.MIN_BUBBLE_WIDTH,
+                           min(available, inner_width + 2 * self.BUBBLE_PADDING_H + self.OPTIONS_SIZE))
+        bubble_height = inner_height + 2 * self.BUBBLE_PADDING_V
+
+        top = self.ROW_PADDING_V
+        if self._show_sender(record):
+            geo.sender = QRect(left + 15, top, available, self._sender_metrics.height())
+            top += self._sender_metrics.height() + 2
+
+        bubble_left = right - bubble_width if from_me else left
+        geo.bubble = QRect(bubble_left, top, bubble_width, bubble_height)
+
+        content_left = bubble_left + self.BUBBLE_PADDING_H
+        content_width = bubble_width - 2 * self.BUBBLE_PADDING_H - self.OPTIONS_SIZE
+        y = top + self.BUBBLE_PADDING_V
+        geo.text = QRect(content_left, y, content_width, text_rect.height())
+        y += text_rect.height()
+
+        if has_media:
+            y += self.LINE_SPACING
+            geo.media = QRect(content_left, y, content_width, self.MEDIA_HEIGHT)
+            y += self.MEDIA_HEIGHT
+        if reaction:
+            y += self.LINE_SPACING
+            geo.reaction = QRect(content_left, y,
+                                 self._reaction_metrics.horizontalAdvance(reaction) + 16, self.REACTION_HEIGHT)
+            y += self.REACTION_HEIGHT
+        if status_parts:
+            y += self.LINE_SPACING
+            geo.status = QRect(content_left, y, content_width, self._time_metrics.height())
+
+        if not deleted:
+            geo.options = QRect(bubble_left + bubble_width - self.OPTIONS_SIZE - 8,
+                                top + 6, self.OPTIONS_SIZE, self.OPTIONS_SIZE)
+
+        geo.height = top + bubble_height + self.ROW_PADDING_V
+        self._geometry_cache[id(record)] = (signature, geo)
+        return geo
+
+    def hit_test(self, index: QModelIndex, pos) -> Optional[str]:
+        """'options', 'media' ou 'bubble' para um ponto (coordenadas do viewport)"""
+        record = index.data(ROLE_MESSAGE)
+        if record is None:
+            return None
+        rect = self._view.visualRect(index)
+        geo = self.geometry(record, rect.width())
+        local = pos - rect.topLeft()
+        if geo.options and geo.options.contains(local):
+            return 'options'
+        if geo.media and geo.media.contains(local):
+            return 'media'
+        if geo.bubble.contains(local):
+            return 'bubble'
+        return None
+
+    # ------------------------------------------------------------------
+    # QStyledItemDelegate
+    # ------------------------------------------------------------------
+
+    def sizeHint(self, option, index):
+        width = max(option.rect.width(), self._view.viewport().width())
+        kind = index.data(ROLE_KIND)
+
+        if kind == KIND_DATE:
+            return QSize(width, self.DATE_HEIGHT)
+        if kind == KIND_SYSTEM:
+            return QSize(width, self.SYSTEM_HEIGHT)
+
+        record = index.data(ROLE_MESSAGE)
+        bubble = self._view.bubble_for_record(record)
+        if bubble is not None:
+            # Linha materializada: a altura é a do widget real
+            bubble_width = self._bubble_widget_width(bubble, width)
+            if bubble.hasHeightForWidth():
+                height = bubble.heightForWidth(bubble_width)
+            else:
+                height = bubble.sizeHint().height()
+            return QSize(width, max(height, bubble.minimumSizeHint().height()))
+
+        return QSize(width, self.geometry(record, width).height)
+
+    def _bubble_widget_width(self, bubble, row_width: int) -> int:
+        return max(0, min(row_width - 2 * self.ROW_MARGIN_H, bubble.maximumWidth()))
+
+    def updateEditorGeometry(self, editor, option, index):
+        """Balão materializado do mesmo lado em que era desenhado"""
+        rect = option.rect
+        width = self._bubble_widget_width(editor, rect.width())
+        if getattr(editor, 'is_from_me', False):
+            left = rect.right() - self.ROW_MARGIN_H - width + 1
+        else:
+            left = rect.left() + self.ROW_MARGIN_H
+        editor.setGeometry(QRect(left, rect.top(), width, rect.height()))
+
+    def paint(self, painter: QPainter, option, index):
+        kind = index.data(ROLE_KIND)
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        try:
+            if kind == KIND_DATE:
+                self._paint_date(painter, option.rect, index.data())
+            elif kind == KIND_SYSTEM:
+                self._paint_system(painter, option.rect, index.data())
+            else:
+                record = index.data(ROLE_MESSAGE)
+                if self._view.bubble_for_record(record) is None:
+                    progress = self._view.animation_progress(record)
+                    if progress < 1.0:
+                        # Entrada: aparece subindo alguns pixels
+                        painter.setOpacity(progress)
+                        painter.translate(0, round((1.0 - progress) * 12))
+                    hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+                    self._paint_message(painter, option.rect, record, hovered)
+        finally:
+            painter.restore()
+
+    # ------------------------------------------------------------------
+    # Pintura
+    # ------------------------------------------------------------------
+
+    def _paint_date(self, painter: QPainter, rect: QRect, text: str):
+        center_y = rect.center().y()
+        text_width = self._date_metrics.horizontalAdvance(text) + 28
+        pill = QRect(rect.center().x() - text_width // 2, center_y - 11, text_width, 22)
+
+        painter.setPen(QPen(QColor('#e3e6ea'), 1))
+        painter.drawLine(rect.left() + 20, center_y, pill.left() - 8, center_y)
+        painter.drawLine(pill.right() + 8, center_y, rect.right() - 20, center_y)
+
+        painter.setBrush(QColor('#fafbfc'))
+        painter.drawRoundedRect(QRectF(pill), 11, 11)
+        painter.setFont(self.date_font)
+        painter.setPen(QColor('#6c757d'))
+        painter.drawText(pill, Qt.AlignmentFlag.AlignCenter, text)
+
+    def _paint_system(self, painter: QPainter, rect: QRect, text: str):
+        box = rect.adjusted(50, 10, -50, -10)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor('#f8f9fa'))
+        painter.drawRoundedRect(QRectF(box), 15, 15)
+        painter.setFont(self.system_font)
+        painter.setPen(QColor('#95a5a6'))
+        painter.drawText(box, Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap, text)
+
+    def _paint_message(self, painter: QPainter, rect: QRect, record: ChatMessage, hovered: bool):
+        geo = self.geometry(record, rect.width())
+        painter.translate(rect.topLeft())
+
+        from_me = record.from_me
+        deleted = bool(record.get('deleted'))
+
+        if geo.sender:
+            painter.setFont(self.sender_font)
+            painter.setPen(QColor('#667eea'))
+            painter.drawText(geo.sender, Qt.AlignmentFlag.AlignLeft, record.sender_name)
+
+        # Fundo e sombra com blur vêm da skin pré-renderizada (nine-patch)
+        skin = get_skin(bubble_skin_name(from_me, deleted), painter.device().devicePixelRatioF())
+        skin.paint(painter, QRectF(geo.bubble))
+
+        text_color = QColor('#ffffff') if from_me else QColor('#2c3e50')
+        time_color = QColor(255, 255, 255, 204) if from_me else QColor('#7f8c8d')
+
+        # Texto
+        painter.setFont(self.deleted_font if deleted else self.content_font)
+        painter.setPen(QColor('#e74c3c') if deleted and not from_me else text_color)
+        painter.drawText(geo.text, Qt.AlignmentFlag.AlignLeft | Qt.TextFlag.TextWordWrap,
+                         self.display_text(record))
+
+        # Cartão de mídia (o player/preview real é criado ao clicar)
+        if geo.media:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(255, 255, 255, 46) if from_me else QColor('#f1f3f5'))
+            painter.drawRoundedRect(QRectF(geo.media), 10, 10)
+            painter.setFont(self.time_font)
+            painter.setPen(text_color)
+            painter.drawText(geo.media.adjusted(12, 0, -12, 0),
+                             Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+                             MEDIA_ACTIONS.get(record.message_type, '📎  Abrir mídia'))
+
+        if geo.reaction:
+            painter.setPen(QPen(QColor('#e9ecef'), 1))
+            painter.setBrush(QColor(255, 255, 255, 230))
+            painter.drawRoundedRect(QRectF(geo.reaction), 12, 12)
+            painter.setFont(self.reaction_font)
+            painter.setPen(QColor('#2c3e50'))
+            painter.drawText(geo.reaction, Qt.AlignmentFlag.AlignCenter, record.get('reaction'))
+
+        if geo.status:
+            align = Qt.AlignmentFlag.AlignRight if from_me else Qt.AlignmentFlag.AlignLeft
+            parts = self._status_parts(record)
+            painter.setPen(time_color)
+            x = geo.status.right() if from_me else geo.status.left()
+            # Hora, "editada" e ✓ na mesma linha
+            for part in (reversed(parts) if from_me else parts):
+                font = self.edited_font if part == 'editada' else self.time_font
+                metrics = self._edited_metrics if part == 'editada' else self._time_metrics
+                advance = metrics.horizontalAdvance(part)
+                painter.setFont(font)
+                if from_me:
+                    x -= advance
+                    painter.drawText(QRect(x, geo.status.top(), advance, geo.status.height()), align, part)
+                    x -= 6
+                else:
+                    painter.drawText(QRect(x, geo.status.top(), advance, geo.status.height()), align, part)
+                    x += advance + 6
+
+        if hovered and geo.options:
+            painter.setFont(QFont('Segoe UI', 12, QFont.Weight.Bold))
+            painter.setPen(time_color)
+            painter.drawText(geo.options, Qt.AlignmentFlag.AlignCenter, "⋮")
+
+
+class MessageListView(QListView):
+    """
+    Lista de mensagens virtualizada.
+
+    Só as linhas visíveis são desenhadas. Ao clicar na mídia, no "⋮", com o
+    botão direito ou com duplo clique, a linha vira um MessageBubble real
+    (setIndexWidget) para player de áudio, menu de opções e seleção de texto.
+    Os balões materializados formam um LRU de no máximo MAX_BOLHAS.
+    """
+
+    # Emitido para cada MessageBubble criado (para conectar sinais de editar/apagar/reagir)
+    bubble_created = pyqtSignal(object)
+    # Usuário chegou perto do topo: carregar a página anterior do histórico
+    history_requested = pyqtSignal()
+
+    MAX_BOLHAS = 12
+    # Só as últimas mensagens de um lote ganham animação de entrada
+    LINHAS_ANIMADAS = 5
+    DURACAO_ANIMACAO = 0.15  # segundos (a mesma do MessageBubble.animate_in)
+    # Distância do topo (px) que dispara o carregamento de mensagens antigas
+    LIMIAR_HISTORICO = 80
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        # Callable(ChatMessage) -> MessageBubble; padrão: MessageRenderer sem API
+        self.bubble_factory: Optional[Callable] = None
+
+        self.message_model = MessageListModel(self)
+        self.setModel(self.message_model)
+        self.bubble_delegate = MessageBubbleDelegate(self)
+        self.setItemDelegate(self.bubble_delegate)
+
+        # id(registro) -> (QPersistentModelIndex, MessageBubble), em ordem de uso
+        self._bubbles = OrderedDict()
+
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        # Layout em passada única: as alturas vêm do cache de geometria do delegate,
+        # e o modo em lotes recomeçaria do topo a cada mudança de altura
+        self.setLayoutMode(QListView.LayoutMode.SinglePass)
+        self.setUniformItemSizes(False)
+        self.setMouseTracking(True)
+        self.verticalScrollBar().setSingleStep(20)
+
+        # Com layout em lotes a altura total cresce aos poucos: enquanto "preso"
+        # ao final, cada aumento do intervalo da barra rola de novo para baixo
+        self._stick_to_bottom = False
+        self.verticalScrollBar().rangeChanged.connect(self._on_scroll_range_changed)
+        self.verticalScrollBar().actionTriggered.connect(self._on_user_scroll)
+
+        # Uma rolagem por lote, não uma por mensagem
+        self._scroll_timer = QTimer(self)
+        self._scroll_timer.setSingleShot(True)
+        self._scroll_timer.timeout.connect(self.scroll_to_bottom)
+
+        # Animações de entrada: id(registro) -> início; um único timer redesenha o viewport
+        self._animations = {}
+        self._animation_timer = QTimer(self)
+        self._animation_timer.setInterval(16)
+        self._animation_timer.timeout.connect(self._advance_animations)
+
+        # Paginação para cima: ativa após set_messages, desativa quando o histórico acaba
+        self.history_enabled = False
+        self._history_loading = False
+
+        self.message_model.modelAboutToBeReset.connect(self._release_bubbles)
+        self.message_model.modelReset.connect(self.bubble_delegate.clear_cache)
+        self.message_model.rowsAboutToBeRemoved.connect(self.bubble_delegate.forget_rows)
+        # QListView não recalcula alturas em dataChanged: pedir novo layout
+        self.message_model.dataChanged.connect(
+            lambda top_left, *args: self.bubble_delegate.sizeHintChanged.emit(top_left))
+
+    # ------------------------------------------------------------------
+    # Balões materializados
+    # ------------------------------------------------------------------
+
+    def bubble_for_record(self, record) -> Optional[object]:
+        if record is None:
+            return None
+        entry = self._bubbles.get(id(record))
+        return entry[1] if entry else None
+
+    def bubble_for_row(self, row: int) -> Optional[object]:
+        return self.bubble_for_record(self.message_model.message_at(row))
+
+    def bubble_for_message_id(self, message_id: str) -> Optional[object]:
+        row = self.message_model.row_for_message_id(message_id)
+        return self.bubble_for_row(row) if row >= 0 else None
+
+    def live_bubble_count(self) -> int:
+        return len(self._bubbles)
+
+    def _create_bubble(self, record: ChatMessage):
+        if self.bubble_factory:
+            return self.bubble_factory(record)
+        from ui.chat_widget import MessageRenderer
+        return MessageRenderer.create_message_widget(record)
+
+    def materialize(self, row: int):
+        """Cria (ou reaproveita) o MessageBubble real da linha"""
+        record = self.message_model.message_at(row)
+        if record is None:
+            return None
+
+        key = id(record)
+        if key in self._bubbles:
+            self._bubbles.move_to_end(key)
+            return self._bubbles[key][1]
+
+        bubble = self._create_bubble(record)
+        if bubble is None:
+            return None
+        bubble.message_date = record.date_str
+        self.bubble_created.emit(bubble)
+
+        index = self.message_model.index(row)
+        self._bubbles[key] = (QPersistentModelIndex(index), bubble)
+        self.setIndexWidget(index, bubble)
+
+        # Reação/edição/exclusão mudam a altura do widget
+        for signal in (bubble.message_deleted, bubble.message_edited, bubble.message_reaction):
+            signal.connect(lambda *args, b=bubble: QTimer.singleShot(0, lambda: self._refresh_bubble_height(b)))
+
+        self.bubble_delegate.sizeHintChanged.emit(index)
+        self._evict_bubbles()
+        return bubble
+
+    def _refresh_bubble_height(self, bubble):
+        for persistent, live in self._bubbles.values():
+            if live is bubble and persistent.isValid():
+                self.bubble_delegate.sizeHintChanged.emit(self.message_model.index(persistent.row()))
+                return
+
+    def _dispose_bubble(self, bubble):
+        try:
+            bubble.cleanup()
+        except Exception as e:
+            print(f"⚠️ Erro ao liberar balão: {e}")
+        bubble.hide()
+        bubble.deleteLater()
+
+    def _evict_bubbles(self):
+        """Descarta os balões menos usados que estão fora da área visível"""
+        viewport = self.viewport().rect()
+        for key in list(self._bubbles):
+            if len(self._bubbles) <= self.MAX_BOLHAS:
+                break
+            persistent, bubble = self._bubbles[key]
+            if persistent.isValid():
+                index = self.message_model.index(persistent.row())
+                if self.visualRect(index).intersects(viewport):
+                    continue
+            del self._bubbles[key]
+            self._dispose_bubble(bubble)
+            if persistent.isValid():
+                self.bubble_delegate.sizeHintChanged.emit(self.message_model.index(persistent.row()))
+
+    def _release_bubbles(self):
+        for _, bubble in self._bubbles.values():
+            self._dispose_bubble(bubble)
+        self._bubbles.clear()
+
+    # ------------------------------------------------------------------
+    # Interação
+    # ------------------------------------------------------------------
+
+    def _open_options(self, bubble):
+        if getattr(bubble, 'options_button', None) is not None and not bubble.message_data.get('deleted'):
+            bubble.show_options_menu()
+
+    def mousePressEvent(self, event):
+        pos = event.position().toPoint()
+        index = self.indexAt(pos)
+        if index.isValid() and index.data(ROLE_KIND) == KIND_MESSAGE \
+                and self.bubble_for_record(index.data(ROLE_MESSAGE)) is None:
+            area = self.bubble_delegate.hit_test(index, pos)
+            right_click = event.button() == Qt.MouseButton.RightButton
+            if area and (right_click or area in ('options', 'media')):
+                bubble = self.materialize(index.row())
+                if bubble is not None and (right_click or area == 'options'):
+                    # Depois do layout, para o menu abrir na posição do botão
+                    QTimer.singleShot(0, lambda: self._open_options(bubble))
+                event.accept()
+                return
+        super().mousePressEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        pos = event.position().toPoint()
+        index = self.indexAt(pos)
+        if index.isValid() and self.bubble_delegate.hit_test(index, pos):
+            # Texto selecionável exige o QLabel do balão real
+            self.materialize(index.row())
+            event.accept()
+            return
+        super().mouseDoubleClickEvent(event)
+
+    def paintEvent(self, event):
+        with ProfileSection('lista de mensagens'):
+            super().paintEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Larguras novas: a quebra de texto das linhas materializadas muda
+        for persistent, _ in self._bubbles.values():
+            if persistent.isValid():
+                self.bubble_delegate.sizeHintChanged.emit(self.message_model.index(persistent.row()))
+
+    # ------------------------------------------------------------------
+    # Inserção em lote
+    # ------------------------------------------------------------------
+
+    def set_messages(self, messages: Iterable[Dict], animate: bool = True):
+        """Carrega a conversa inteira: um reset do modelo, um layout e uma rolagem"""
+        prepared = prepare_messages(messages)
+        records = prepared.records
+        self.setUpdatesEnabled(False)
+        try:
+            self.message_model.set_messages(prepared)
+        finally:
+            self.setUpdatesEnabled(True)
+
+        self.history_enabled = bool(records)
+        self._history_loading = False
+
+        self.request_scroll_to_bottom()
+        if animate:
+            self.animate_records(records[-self.LINHAS_ANIMADAS:])
+        return len(records)
+
+    def add_messages(self, messages: Iterable[Dict], scroll: bool = True, animate: bool = True) -> int:
+        """
+        Adiciona N mensagens de uma vez: uma única inserção no modelo (um
+        layout), no máximo uma rolagem e animação só nas últimas linhas.
+        """
+        prepared = prepare_messages(messages)
+        records = prepared.records
+        if not records:
+            return 0
+
+        self.setUpdatesEnabled(False)
+        try:
+            self.message_model.append_messages(prepared)
+        finally:
+            self.setUpdatesEnabled(True)
+
+        if scroll:
+            self.request_scroll_to_bottom()
+        if animate:
+            self.animate_records(records[-self.LINHAS_ANIMADAS:])
+        return len(records)
+
+    def finish_history_load(self, messages: Iterable[Dict], exhausted: bool = False) -> int:
+        """
+        Insere a página de mensagens antigas no topo mantendo na tela o que o
+        usuário estava vendo (a distância até o final não muda).
+        """
+        scrollbar = self.verticalScrollBar()
+        distance_from_bottom = scrollbar.maximum() - scrollbar.value()
+
+        self.setUpdatesEnabled(False)
+        try:
+            added = self.message_model.prepend_messages(messages)
+            if added:
+                self.executeDelayedItemsLayout()
+                scrollbar.setValue(scrollbar.maximum() - distance_from_bottom)
+        finally:
+            self.setUpdatesEnabled(True)
+
+        self._history_loading = False
+        if exhausted:
+            self.history_enabled = False
+        return added
+
+    def continue_history_load(self):
+        """Pede a próxima página se a rolagem ainda estiver no topo (página sem mensagens exibíveis)"""
+        self._maybe_request_history()
+
+    def _maybe_request_history(self):
+        if (self.history_enabled and not self._history_loading
+                and self.verticalScrollBar().value() <= self.LIMIAR_HISTORICO):
+            self._history_loading = True
+            self.history_requested.emit()
+
+    def request_scroll_to_bottom(self, delay_ms: int = 0):
+        """Agenda a rolagem para o final; pedidos seguidos viram uma só"""
+        self._stick_to_bottom = True
+        self._scroll_timer.start(delay_ms)
+
+    def animate_records(self, records: List[ChatMessage]):
+        now = time.monotonic()
+        for record in records:
+            self._animations[id(record)] = now
+        if self._animations and not self._animation_timer.isActive():
+            self._animation_timer.start()
+
+    def animation_progress(self, record) -> float:
+        start = self._animations.get(id(record))
+        if start is None:
+            return 1.0
+        progress = (time.monotonic() - start) / self.DURACAO_ANIMACAO
+        # Curva de saída (desacelera no final), como o OutQuart do MessageBubble
+        return 1.0 if progress >= 1.0 else 1.0 - (1.0 - progress) ** 4
+
+    def _advance_animations(self):
+        now = time.monotonic()
+        for key, start in list(self._animations.items()):
+            if now - start >= self.DURACAO_ANIMACAO:
+                del self._animations[key]
+        self.viewport().update()
+        if not self._animations:
+            self._animation_timer.stop()
+
+    # ------------------------------------------------------------------
+    # Atalhos
+    # ------------------------------------------------------------------
+
+    def update_message(self, message_id: str, changes: Dict):
+        """Atualiza o registro (e o desenho) da mensagem; retorna o balão materializado, se houver"""
+        row = self.message_model.update_message(message_id, changes)
+        return self.bubble_for_row(row) if row >= 0 else None
+
+    def clear_messages(self):
+        self._animations.clear()
+        self.history_enabled = False
+        self._history_loading = False
+        self.message_model.clear()
+
+    def scroll_to_bottom(self):
+        self._stick_to_bottom = True
+        self.scrollToBottom()
+
+    def _on_scroll_range_changed(self, minimum: int, maximum: int):
+        if self._stick_to_bottom:
+            self.verticalScrollBar().setValue(maximum)
+
+    def _on_user_scroll(self, action: int):
+        # Rolagem do usuário (roda, arrasto, setas) solta do final; voltar ao fim prende de novo
+        QTimer.singleShot(0, self._update_stick_to_bottom)
+
+    def _update_stick_to_bottom(self):
+        scrollbar = self.verticalScrollBar()
+        self._stick_to_bottom = scrollbar.value() >= scrollbar.maximum()
+        self._maybe_request_history()
+
+    def wheelEvent(self, event):
+        super().wheelEvent(event)
+        # Conversa curta (sem barra de rolagem) também pode pedir histórico
+        if event.angleDelta().y() > 0:
+            self._maybe_request_history()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profiler da interface (modo de diagnóstico)
+
+Mede, só enquanto está ligado:
+- travamentos do event loop: um timer de pulsação na thread da UI e o atraso
+  de cada batida em relação ao intervalo pedido;
+- duração dos slots marcados com @profiled (carga de mensagens, busca...);
+- tempo de pintura das listas (ProfileSection no paintEvent);
+- quantidade de widgets vivos, por classe.
+
+O ProfilerOverlay mostra o resumo sobre a janela e dump_trace() grava os
+eventos no formato Trace Event (JSON), que abre em chrome://tracing ou no
+Perfetto. Desligado, cada ponto medido custa só a checagem de `enabled`.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from PyQt6.QtWidgets import QApplication, QLabel
+from PyQt6.QtCore import QEvent, QObject, Qt, QTimer
+from PyQt6.QtGui import QFont
+
+HEARTBEAT_MS = 50  # Intervalo da pulsação do event loop
+STALL_MS = 50  # Atraso da pulsação a partir do qual conta como travamento
+MAX_TRACE_EVENTS = 100000  # Eventos guardados para o dump (os mais antigos saem)
+RECENT_SECONDS = 10  # Janela dos travamentos exibidos no overlay
+
+
+class _Stat:
+    """Contagem, total, máximo e último valor de uma medida (em segundos)"""
+
+    __slots__ = ('count', 'total', 'max', 'last')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, duration: float):
+        self.count += 1
+        self.total += duration
+        self.last = duration
+        if duration > self.max:
+            self.max = duration
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class UIProfiler(QObject):
+    """Coleta de medidas da interface; ligado/desligado por start()/stop()"""
+
+    def __init__(self):
+        super().__init__()
+        self.enabled = False
+        self.trace_path: Optional[str] = None  # Se definido, o trace é gravado ao fechar o app
+
+        self.slot_stats: Dict[str, _Stat] = {}
+        self.paint_stats: Dict[str, _Stat] = {}
+        self.stall_stat = _Stat()
+        self.recent_stalls = deque()  # (momento, atraso) dos últimos RECENT_SECONDS
+        self.trace_events = deque(maxlen=MAX_TRACE_EVENTS)
+
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._last_beat = None
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setInterval(HEARTBEAT_MS)
+        self._heartbeat.timeout.connect(self._on_heartbeat)
+
+    # ---------- liga/desliga ----------
+
+    def start(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._last_beat = time.perf_counter()
+        self._heartbeat.start()
+        print("📈 Profiler da interface ligado")
+
+    def stop(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._heartbeat.stop()
+        print("📈 Profiler da interface desligado")
+        self.print_summary()
+
+    def reset(self):
+        self.slot_stats.clear()
+        self.paint_stats.clear()
+        self.stall_stat = _Stat()
+        self.recent_stalls.clear()
+        self.trace_events.clear()
+
+    # ---------- medidas ----------
+
+    def _trace(self, name: str, category: str, started: float, duration: float):
+        self.trace_events.append({
+            'name': name, 'cat': category, 'ph': 'X',
+            'ts': round((started - self._origin) * 1e6), 'dur': round(duration * 1e6),
+            'pid': self._pid, 'tid': threading.get_ident()
+        })
+
+    def record(self, name: str, started: float, finished: float, category: str = 'slot'):
+        """Registra um trecho medido (slot ou pintura)"""
+        duration = finished - started
+        stats = self.paint_stats if category == 'paint' else self.slot_stats
+        stat = stats.get(name)
+        if stat is None:
+            stat = stats[name] = _Stat()
+        stat.add(duration)
+        self._trace(name, category, started, duration)
+
+    def _on_heartbeat(self):
+        now = time.perf_counter()
+        lag = now - self._last_beat - HEARTBEAT_MS / 1000
+        self._last_beat = now
+        if lag * 1000 < STALL_MS:
+            return
+
+        self.stall_stat.add(lag)
+        self.recent_stalls.append((now, lag))
+        self._trace('event loop travado', 'stall', now - lag, lag)
+
+    def widget_counts(self) -> Counter:
+        """Widgets vivos por classe (amostra também vai para o trace)"""
+        counts = Counter(type(widget).__name__ for widget in QApplication.allWidgets())
+        if self.enabled:
+            self.trace_events.append({
+                'name': 'widgets', 'ph': 'C', 'ts': round((time.perf_counter() - self._origin) * 1e6),
+                'pid': self._pid, 'tid': threading.get_ident(), 'args': {'widgets': sum(counts.values())}
+            })
+        return counts
+
+    def stalls_in_window(self) -> List[float]:
+        """Atrasos (s) dos travamentos dos últimos RECENT_SECONDS"""
+        limit = time.perf_counter() - RECENT_SECONDS
+        while self.recent_stalls and self.recent_stalls[0][0] < limit:
+            self.recent_stalls.popleft()
+        return [lag for _, lag in self.recent_stalls]
+
+    # ---------- saída ----------
+
+    def dump_trace(self, path: str = None) -> Optional[str]:
+        """Grava os eventos em JSON (Trace Event); retorna o caminho"""
+        path = path or self.trace_path or f"ui_trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'traceEvents': list(self.trace_events), 'displayTimeUnit': 'ms'}, f)
+            print(f"💾 Trace da interface salvo: {path} ({len(self.trace_events)} eventos)")
+            return path
+        except Exception as e:
+            print(f"❌ Erro ao salvar trace: {e}")
+            return None
+
+    def summary_lines(self, top: int = 6) -> List[str]:
+        """Resumo em texto (usado pelo overlay e pelo console)"""
+        recent = self.stalls_in_window()
+        lines = [
+            f"Travamentos: {self.stall_stat.count} (máx {self.stall_stat.max * 1000:.0f} ms) | "
+            f"{len(recent)} nos últimos {RECENT_SECONDS}s"
+            + (f" (máx {max(recent) * 1000:.0f} ms)" if recent else "")
+        ]
+
+        if self.slot_stats:
+            lines.append("Slots (n · média · máx · último):")
+            ranked = sorted(self.slot_stats.items(), key=lambda item: item[1].max, reverse=True)
+            for name, stat in ranked[:top]:
+                lines.append(f"  {name[:34]:<34} {stat.count:>5} · {stat.average * 1000:6.1f} · "
+                             f"{stat.max * 1000:6.1f} · {stat.last * 1000:6.1f} ms")
+
+        if self.paint_stats:
+            lines.append("Pinturas (n · média · máx):")
+            for name, stat in sorted(self.paint_stats.items()):
+                lines.append(f"  {name[:34]:<34} {stat.count:>5} · {stat.average * 1000:6.1f} · "
+                             f"{stat.max * 1000:6.1f} ms")
+        return lines
+
+    def print_summary(self):
+        print("📈 RESUMO DA INTERFACE:")
+        for line in self.summary_lines(top=20):
+            print(f"   {line}")
+
+
+_ui_profiler: Optional[UIProfiler] = None
+
+
+def get_ui_profiler() -> UIProfiler:
+    """Profiler compartilhado da interface"""
+    global _ui_profiler
+    if _ui_profiler is None:
+        _ui_profiler = UIProfiler()
+    return _ui_profiler
+
+
+def profiled(name: str = None):
+    """Decorator para slots: mede a duração de cada chamada quando o profiler está ligado"""
+
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _ui_profiler
+            if profiler is None or not profiler.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(label, started, time.perf_counter())
+
+        return wrapper
+
+    return decorator
+
+
+class ProfileSection:
+    """Trecho medido com `with` (ex.: paintEvent); não faz nada com o profiler desligado"""
+
+    __slots__ = ('name', 'category', '_started')
+
+    def __init__(self, name: str, category: str = 'paint'):
+        self.name = name
+        self.category = category
+        self._started = None
+
+    def __enter__(self):
+        profiler = _ui_profiler
+        self._started = time.perf_counter() if profiler is not None and profiler.enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self._started is not None:
+            _ui_profiler.record(self.name, self._started, time.perf_counter(), self.category)
+        return False
+
+
+class ProfilerOverlay(QLabel):
+    """Painel semitransparente no canto da janela com o resumo do profiler (atualizado a cada 1 s)"""
+
+    def __init__(self, parent, extra_stats: Callable[[], Dict[str, object]] = None):
+        super().__init__(parent)
+        self.profiler = get_ui_profiler()
+        self.extra_stats = extra_stats
+
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.TextFormat.PlainText)
+        self.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
+        font = QFont('Consolas', 8)
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        self.setFont(font)
+        self.setStyleSheet("""
+            QLabel {
+                background-color: rgba(15, 23, 42, 210);
+                color: #e2e8f0;
+                border-radius: 8px;
+                padding: 8px;
+            }
+        """)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(1000)
+        self._timer.timeout.connect(self.refresh)
+        parent.installEventFilter(self)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._timer.stop()
+
+    def eventFilter(self, watched, event):
+        if watched is self.parent() and event.type() == QEvent.Type.Resize and self.isVisible():
+            self._place()
+        return False
+
+    def _place(self):
+        self.adjustSize()
+        parent = self.parentWidget()
+        self.move(parent.width() - self.width() - 12, 12)
+        self.raise_()
+
+    def refresh(self):
+        counts = self.profiler.widget_counts()
+        lines = ["📈 PROFILER DA INTERFACE  (Ctrl+Shift+P fecha · Ctrl+Shift+S salva trace)"]
+        lines += self.profiler.summary_lines()
+        lines.append(f"Widgets: {sum(counts.values())}  " +
+                     "  ".join(f"{name} {count}" for name, count in counts.most_common(4)))
+        if self.extra_stats:
+            lines.append("  ".join(f"{key}: {value}" for key, value in self.extra_stats().items()))
+
+        self.setText("\n".join(lines))
+        self._place()
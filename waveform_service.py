@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Serviço de FORMAS DE ONDA para mensagens de áudio
+Extrai envelopes reais (pico + RMS) do áudio baixado com redução vetorizada
+em NumPy e guarda os níveis de forma compacta (1 byte por barra) por mensagem
+"""
+
+import base64
+import importlib.util
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# pydub só é importado ao decodificar o primeiro arquivo
+PYDUB_AVAILABLE = importlib.util.find_spec("pydub") is not None
+
+STORED_BARS = 100  # Resolução guardada no banco; o widget reamostra para a largura
+MIN_LEVEL = 0.04  # Altura mínima (barras de silêncio continuam visíveis)
+
+
+def decode_whatsapp_waveform(waveform_b64: str) -> Optional[bytes]:
+    """
+    Decodifica o campo 'waveform' do WhatsApp (64 bytes com valores 0-100)
+    e devolve níveis uint8 (0-255) com TODOS os pontos
+    """
+    if not waveform_b64:
+        return None
+
+    try:
+        raw = base64.b64decode(waveform_b64)
+    except Exception:
+        return None
+
+    if not raw:
+        return None
+
+    if NUMPY_AVAILABLE:
+        values = np.frombuffer(raw, dtype=np.uint8).astype(np.float32)
+        peak = values.max()
+        if peak <= 0:
+            return None
+        return (values / peak * 255).astype(np.uint8).tobytes()
+
+    peak = max(raw)
+    if peak <= 0:
+        return None
+    return bytes(int(value / peak * 255) for value in raw)
+
+
+def compute_levels_from_samples(samples, bars: int = STORED_BARS) -> Optional[bytes]:
+    """
+    Reduz amostras PCM (1D, já em mono) a `bars` níveis uint8.
+    Cada barra combina pico e RMS do seu bloco, calculados em uma única
+    operação vetorizada sobre a matriz (barras x amostras_por_barra).
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+
+    samples = np.asarray(samples)
+    if samples.size == 0 or bars <= 0:
+        return None
+
+    bars = min(bars, samples.size)
+    per_bar = samples.size // bars
+    blocks = np.abs(samples[:per_bar * bars].astype(np.float32)).reshape(bars, per_bar)
+
+    peaks = blocks.max(axis=1)
+    rms = np.sqrt(np.mean(np.square(blocks), axis=1))
+
+    peak_max = peaks.max()
+    rms_max = rms.max()
+    if peak_max <= 0 or rms_max <= 0:
+        return np.zeros(bars, dtype=np.uint8).tobytes()
+
+    envelope = 0.5 * (peaks / peak_max) + 0.5 * (rms / rms_max)
+    return np.clip(envelope * 255, 0, 255).astype(np.uint8).tobytes()
+
+
+def compute_levels_from_file(file_path: str, bars: int = STORED_BARS) -> Optional[bytes]:
+    """Decodifica o arquivo de áudio (via pydub/ffmpeg) e calcula os níveis"""
+    if not (NUMPY_AVAILABLE and PYDUB_AVAILABLE):
+        return None
+
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(file_path)
+    dtype = {1: np.int8, 2: np.int16, 4: np.int32}.get(audio.sample_width)
+    if dtype is None:
+        return None
+
+    samples = np.frombuffer(audio.raw_data, dtype=dtype)
+    if audio.channels > 1:
+        # Mixdown por pico absoluto entre canais
+        samples = np.abs(samples.reshape(-1, audio.channels).astype(np.int64)).max(axis=1)
+
+    return compute_levels_from_samples(samples, bars)
+
+
+def resample_levels(levels: Sequence[int], bars: int) -> List[float]:
+    """Reamostra níveis (0-255) para `bars` barras normalizadas entre MIN_LEVEL e 1.0"""
+    if bars <= 0:
+        return []
+
+    if not levels:
+        return [MIN_LEVEL] * bars
+
+    if NUMPY_AVAILABLE:
+        values = np.frombuffer(bytes(levels), dtype=np.uint8).astype(np.float32) \
+            if isinstance(levels, (bytes, bytearray)) else np.asarray(levels, dtype=np.float32)
+
+        if values.size >= bars:
+            # Menos barras que níveis: pico de cada grupo
+            edges = np.linspace(0, values.size, bars + 1).astype(np.int64)[:-1]
+            reduced = np.maximum.reduceat(values, edges)
+        else:
+            # Mais barras que níveis: interpolação linear
+            reduced = np.interp(np.linspace(0, values.size - 1, bars), np.arange(values.size), values)
+
+        peak = reduced.max()
+        if peak <= 0:
+            return [MIN_LEVEL] * bars
+        return np.maximum(reduced / peak, MIN_LEVEL).tolist()
+
+    values = list(levels)
+    step = len(values) / bars
+    reduced = [
+        max(values[int(i * step):max(int(i * step) + 1, int((i + 1) * step))])
+        for i in range(bars)
+    ]
+    peak = max(reduced)
+    if peak <= 0:
+        return [MIN_LEVEL] * bars
+    return [max(value / peak, MIN_LEVEL) for value in reduced]
+
+
+class WaveformService:
+    """
+    Cache de formas de onda por mensagem (memória + banco).
+    Ordem de busca: memória -> banco -> campo 'waveform' do webhook.
+    Formas calculadas do áudio real substituem as do webhook.
+    """
+
+    def __init__(self, db_manager=None):
+        self.db_manager = db_manager
+        self._cache: Dict[str, Dict] = {}
+
+    def set_database(self, db_manager):
+        self.db_manager = db_manager
+
+    def get_waveform(self, message_id: str, audio_data: Dict = None) -> Optional[Dict]:
+        """Retorna {'levels': bytes, 'source': str} ou None"""
+        if message_id and message_id in self._cache:
+            return self._cache[message_id]
+
+        if message_id and self.db_manager:
+            stored = self.db_manager.get_waveforms([message_id]).get(message_id)
+            if stored:
+                self._cache[message_id] = stored
+                return stored
+
+        levels = decode_whatsapp_waveform((audio_data or {}).get('waveform', ''))
+        if levels:
+            waveform = {'levels': levels, 'source': 'whatsapp'}
+            if message_id:
+                self._cache[message_id] = waveform
+            return waveform
+
+        return None
+
+    def preload(self, message_ids: List[str]) -> int:
+        """Carrega do banco, em uma única consulta, as formas de onda de um chat"""
+        if not self.db_manager:
+            return 0
+
+        missing = [mid for mid in message_ids if mid and mid not in self._cache]
+        if not missing:
+            return 0
+
+        stored = self.db_manager.get_waveforms(missing)
+        self._cache.update(stored)
+        return len(stored)
+
+    def needs_extraction(self, message_id: str) -> bool:
+        """Indica se vale calcular a forma de onda a partir do arquivo"""
+        if not (NUMPY_AVAILABLE and PYDUB_AVAILABLE):
+            return False
+        cached = self._cache.get(message_id) if message_id else None
+        return not cached or cached.get('source') != 'audio'
+
+    def extract_from_file(self, message_id: str, file_path: str) -> Optional[bytes]:
+        """Calcula e salva a forma de onda real (chamar fora da thread da UI)"""
+        try:
+            levels = compute_levels_from_file(file_path)
+        except Exception as e:
+            print(f"⚠️ Erro ao extrair forma de onda: {e}")
+            return None
+
+        if not levels:
+            return None
+
+        if message_id:
+            self._cache[message_id] = {'levels': levels, 'source': 'audio'}
+            if self.db_manager:
+                self.db_manager.save_waveform(message_id, levels, source='audio')
+
+        return levels
+
+
+_service_instance: Optional[WaveformService] = None
+
+
+def get_waveform_service(db_manager=None) -> WaveformService:
+    """Retorna a instância única do serviço de formas de onda"""
+    global _service_instance
+
+    if _service_instance is None:
+        _service_instance = WaveformService(db_manager)
+    elif db_manager is not None and _service_instance.db_manager is None:
+        _service_instance.set_database(db_manager)
+
+    return _service_instance